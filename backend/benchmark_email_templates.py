@@ -0,0 +1,73 @@
+"""
+Email Template Render Benchmark for TalentSphere Backend
+
+Compares per-recipient render throughput of the old str.format rendering with
+the compiled template engine, unbound and bound to the variables a batch shares.
+
+Usage: python benchmark_email_templates.py [recipients]
+"""
+
+import os
+import sys
+import time
+
+os.environ.setdefault('EMAIL_PROVIDER', 'mock')
+
+from src.services.email_service import email_service
+from src.services.email_templates import compile_template
+
+
+def _variables(i):
+    return {
+        'user_name': f'Recipient {i}',
+        'job_title': 'Senior Backend Engineer',
+        'company_name': 'TalentSphere',
+        'location': 'Kigali, Rwanda',
+        'job_type': 'Full-time',
+        'experience_level': 'Senior',
+        'salary_range': '$60,000 - $80,000',
+        'job_url': 'https://talentsphere.com/jobs/42',
+        'reset_url': f'https://talentsphere.com/reset-password?token={i}',
+        'unsubscribe_url': 'https://talentsphere.com/settings/notifications',
+        'preferences_url': 'https://talentsphere.com/settings/notifications',
+    }
+
+
+def _timed(label, recipients, render):
+    start = time.perf_counter()
+    for i in range(recipients):
+        render(i)
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<34} {recipients / elapsed:>12,.0f} renders/s  ({elapsed * 1000:.1f} ms)")
+
+
+def run(recipients: int = 20000):
+    variables = [_variables(i) for i in range(recipients)]
+    shared = {key: value for key, value in variables[0].items() if key not in ('user_name', 'reset_url')}
+
+    for name, html in (('job_alert', True), ('password_reset', True), ('job_alert', False)):
+        template = email_service.templates[name]
+        source = template.html_body if html else template.text_body
+        print(f"{name} ({'html' if html else 'text'}, {len(source):,} chars), {recipients:,} recipients")
+
+        def legacy(i, source=source):
+            try:
+                return source.format(**variables[i])
+            except (KeyError, ValueError, IndexError):
+                return source  # the old renderer's fallback: the raw template
+
+        try:
+            source.format(**variables[0])
+            legacy_label = 'str.format (legacy)'
+        except (KeyError, ValueError, IndexError):
+            legacy_label = 'str.format (legacy, fails: raw)'
+
+        compiled = compile_template(source, html)
+        bound = compiled.bind(shared)
+        _timed(legacy_label, recipients, legacy)
+        _timed('compiled', recipients, lambda i: compiled.render(variables[i]))
+        _timed(f'compiled + bound ({len(bound.segments)} segments)', recipients, lambda i: bound.render(variables[i]))
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
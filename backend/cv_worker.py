@@ -0,0 +1,40 @@
+"""
+CV Generation Worker for TalentSphere Backend
+
+Runs queued CV generation jobs outside the web workers, so generation requests
+return as soon as the job is queued. Any number of worker processes can run side
+by side: jobs are claimed with SKIP LOCKED and leased.
+
+Usage: python cv_worker.py [--threads N]
+"""
+
+import argparse
+import logging
+import signal
+import threading
+
+from src.main import app
+from src.services.cv.job_queue import CVJobWorker
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--threads', type=int, help='Worker threads (CV_WORKER_THREADS, default 2)')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(threadName)s %(message)s')
+    worker = CVJobWorker(threads=args.threads)
+
+    shutdown = threading.Event()
+    signal.signal(signal.SIGTERM, lambda signum, frame: shutdown.set())
+    signal.signal(signal.SIGINT, lambda signum, frame: shutdown.set())
+
+    print(f"🚀 CV worker started: {worker.threads} threads")
+    worker.start(app)
+    shutdown.wait()
+    print("🛑 CV worker stopping...")
+    worker.stop(timeout=120)
+
+
+if __name__ == '__main__':
+    main()
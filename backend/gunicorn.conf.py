@@ -65,36 +65,30 @@ def post_fork(server, worker):
     """Called just after a worker has been forked."""
     server.log.info(f"Worker {worker.pid} booted")
     
-    # Use environment flag to ensure scheduler starts only once, even across worker recycling
-    if not os.getenv('TALENTSPHERE_SCHEDULER_STARTED'):
-        os.environ['TALENTSPHERE_SCHEDULER_STARTED'] = 'true'
-        os.environ['TALENTSPHERE_SCHEDULER_WORKER_PID'] = str(worker.pid)
-        
+    # Background tasks run in the scheduler process (python scheduler_worker.py);
+    # web workers start none. SCHEDULER_MODE=embedded runs a coordinator in every
+    # worker instead, for single-service deploys: one of them is elected leader.
+    if os.getenv('SCHEDULER_MODE', 'standalone').lower() == 'embedded':
         try:
             from src.main import app
-            from src.services.job_digest_scheduler import job_digest_scheduler
-            job_digest_scheduler.start(app)
-            server.log.info(f"✅ Job digest scheduler started in worker {worker.pid} (scheduler process)")
+            from src.services.scheduler_coordinator import scheduler_coordinator
+            scheduler_coordinator.start(app)
+            server.log.info(f"✅ Scheduler coordinator started in worker {worker.pid} (embedded mode)")
         except Exception as e:
-            server.log.error(f"❌ Failed to start job digest scheduler in worker {worker.pid}: {e}")
-            # Clear flag on failure so another worker can try
-            del os.environ['TALENTSPHERE_SCHEDULER_STARTED']
+            server.log.error(f"❌ Failed to start scheduler coordinator in worker {worker.pid}: {e}")
 
+    # CV generation jobs run in the CV worker (python cv_worker.py). CV_WORKER_MODE=embedded
+    # runs worker threads in every web worker instead; they hold no request slot.
+    # Without either, a web worker starts its threads once a job sits unclaimed
+    # for CV_JOB_UNCLAIMED_GRACE seconds (see job_queue.ensure_consumer).
+    if os.getenv('CV_WORKER_MODE', 'standalone').lower() == 'embedded':
         try:
-            from src.services.cleanup_service import start_cleanup_service
-            service = start_cleanup_service(app)
-            if service and service.is_running:
-                server.log.info(f"✅ Cleanup service started in worker {worker.pid} (scheduler process)")
-            else:
-                server.log.warning(f"⚠️  Cleanup service initialization issue in worker {worker.pid}")
+            from src.main import app
+            from src.services.cv.job_queue import cv_job_worker
+            cv_job_worker.start(app)
+            server.log.info(f"✅ CV job worker started in worker {worker.pid} (embedded mode)")
         except Exception as e:
-            server.log.error(f"❌ Failed to start cleanup service in worker {worker.pid}: {e}")
-            import traceback
-            traceback.print_exc()
-    else:
-        # Scheduler already running in another worker process
-        scheduler_pid = os.getenv('TALENTSPHERE_SCHEDULER_WORKER_PID', 'unknown')
-        server.log.info(f"Worker {worker.pid} - background schedulers running in worker {scheduler_pid}")
+            server.log.error(f"❌ Failed to start CV job worker in worker {worker.pid}: {e}")
 
 def worker_abort(worker):
     """Called when a worker received the SIGABRT signal."""
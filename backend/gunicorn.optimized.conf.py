@@ -90,32 +90,28 @@ def post_fork(server, worker):
     import setproctitle
     setproctitle.setproctitle(f"talentsphere-worker-{worker.pid}")
 
-    # Use environment flag to ensure scheduler starts only once, survives worker recycling
-    if not os.getenv('TALENTSPHERE_SCHEDULER_STARTED'):
-        os.environ['TALENTSPHERE_SCHEDULER_STARTED'] = 'true'
-        os.environ['TALENTSPHERE_SCHEDULER_WORKER_PID'] = str(worker.pid)
-        
+    # Background tasks run in the scheduler process (python scheduler_worker.py);
+    # web workers start none. SCHEDULER_MODE=embedded runs a coordinator in every
+    # worker instead, for single-service deploys: one of them is elected leader.
+    if os.getenv('SCHEDULER_MODE', 'standalone').lower() == 'embedded':
         try:
             from src.main import app
-            from src.services.job_digest_scheduler import job_digest_scheduler
-            job_digest_scheduler.start(app)
-            server.log.info(f"✅ Job digest scheduler started in worker {worker.pid} (scheduler process)")
+            from src.services.scheduler_coordinator import scheduler_coordinator
+            scheduler_coordinator.start(app)
+            server.log.info(f"✅ Scheduler coordinator started in worker {worker.pid} (embedded mode)")
         except Exception as e:
-            server.log.error(f"❌ Failed to start job digest scheduler in worker {worker.pid}: {e}")
-            # Clear flag on failure so another worker can try
-            del os.environ['TALENTSPHERE_SCHEDULER_STARTED']
+            server.log.error(f"❌ Failed to start scheduler coordinator in worker {worker.pid}: {e}")
 
+    # CV generation jobs run in the CV worker (python cv_worker.py). CV_WORKER_MODE=embedded
+    # runs worker threads in every web worker instead; they hold no request slot.
+    if os.getenv('CV_WORKER_MODE', 'standalone').lower() == 'embedded':
         try:
-            from src.services.cleanup_service import start_cleanup_service
-            service = start_cleanup_service(app)
-            if service and service.is_running:
-                server.log.info(f"✅ Cleanup service started in worker {worker.pid} (scheduler process)")
-            else:
-                server.log.warning(f"⚠️  Cleanup service initialization issue in worker {worker.pid}")
+            from src.main import app
+            from src.services.cv.job_queue import cv_job_worker
+            cv_job_worker.start(app)
+            server.log.info(f"✅ CV job worker started in worker {worker.pid} (embedded mode)")
         except Exception as e:
-            server.log.error(f"❌ Failed to start cleanup service in worker {worker.pid}: {e}")
-    else:
-        server.log.info(f"Worker {worker.pid} - background schedulers run in primary worker")
+            server.log.error(f"❌ Failed to start CV job worker in worker {worker.pid}: {e}")
 
 def pre_exec(server):
     """Called just before a new master process is forked."""
@@ -0,0 +1,40 @@
+# Gunicorn Configuration for the TalentSphere stream service
+# Serves the long-lived Server-Sent Events endpoints (GET /api/notifications/stream)
+# on gevent workers, so an open stream costs a greenlet instead of a sync worker.
+# Events from the API service arrive over Redis pub/sub, so REDIS_URL is required.
+
+import multiprocessing
+import os
+
+# Server socket - Render uses PORT environment variable
+bind = f"0.0.0.0:{os.getenv('PORT', '10000')}"
+backlog = 1024
+
+# Cooperative workers: each one holds up to worker_connections open streams
+workers = min(multiprocessing.cpu_count(), 2)
+worker_class = "gevent"
+worker_connections = 1000
+max_requests = 0  # streams are long-lived; do not recycle workers on request count
+worker_tmp_dir = "/dev/shm"
+
+# Streams close themselves after STREAM_MAX_DURATION (90s) and the browser reconnects
+timeout = 120
+keepalive = 5
+graceful_timeout = 30
+
+# Process naming
+proc_name = "talentsphere-stream"
+
+# Logging - Render captures stdout/stderr
+accesslog = "-"
+errorlog = "-"
+loglevel = "info"
+capture_output = True
+
+# Load the app in each worker, after gevent has patched the standard library
+preload_app = False
+
+
+def post_fork(server, worker):
+    """Called just after a worker has been forked."""
+    server.log.info(f"Stream worker {worker.pid} booted")
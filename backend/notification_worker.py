@@ -0,0 +1,40 @@
+"""
+Notification Queue Worker for TalentSphere Backend
+
+Drains the notification queue outside the web workers. Any number of worker
+processes can run side by side: rows are claimed with SKIP LOCKED and leased.
+
+Usage: python notification_worker.py [--threads N] [--batch-size N]
+"""
+
+import argparse
+import logging
+import signal
+import threading
+
+from src.main import app
+from src.services.notification_queue import NotificationQueueConsumer
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--threads', type=int, help='Consumer threads (NOTIFICATION_WORKER_THREADS, default 4)')
+    parser.add_argument('--batch-size', type=int, help='Entries claimed per batch (NOTIFICATION_QUEUE_BATCH_SIZE, default 50)')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(threadName)s %(message)s')
+    consumer = NotificationQueueConsumer(threads=args.threads, batch_size=args.batch_size)
+
+    shutdown = threading.Event()
+    signal.signal(signal.SIGTERM, lambda signum, frame: shutdown.set())
+    signal.signal(signal.SIGINT, lambda signum, frame: shutdown.set())
+
+    print(f"🚀 Notification worker started: {consumer.threads} threads, batch size {consumer.batch_size}")
+    consumer.start(app)
+    shutdown.wait()
+    print("🛑 Notification worker stopping...")
+    consumer.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -93,6 +93,7 @@ def optimize_database():
                 ("idx_applications_status", "CREATE INDEX IF NOT EXISTS idx_applications_status ON applications(status)"),
                 ("idx_applications_created_at", "CREATE INDEX IF NOT EXISTS idx_applications_created_at ON applications(created_at DESC)"),
                 ("idx_applications_job_status", "CREATE INDEX IF NOT EXISTS idx_applications_job_status ON applications(job_id, status)"),
+                ("idx_applications_job_match_score", "CREATE INDEX IF NOT EXISTS idx_applications_job_match_score ON applications(job_id, match_score)"),
                 
                 # User table indexes
                 ("idx_users_email", "CREATE INDEX IF NOT EXISTS idx_users_email ON users(email)"),
@@ -103,6 +104,9 @@ def optimize_database():
                 ("idx_companies_verified", "CREATE INDEX IF NOT EXISTS idx_companies_verified ON companies(is_verified) WHERE is_verified = true"),
                 ("idx_companies_slug", "CREATE INDEX IF NOT EXISTS idx_companies_slug ON companies(slug)"),
                 ("idx_companies_industry", "CREATE INDEX IF NOT EXISTS idx_companies_industry ON companies(industry)"),
+                
+                # Notification queue claim query
+                ("idx_notification_queue_claim", "CREATE INDEX IF NOT EXISTS idx_notification_queue_claim ON notification_queue(status, scheduled_for)"),
             ]
             
             # Execute index creation
@@ -121,6 +125,64 @@ def optimize_database():
             connection.commit()
             connection.close()
             
+            # Backfill the candidate search index on first deploy
+            try:
+                from src.models.candidate_search import CandidateSearchIndex, CandidateSkillPosting
+                from src.services.candidate_search import rebuild_index
+                CandidateSearchIndex.__table__.create(db.engine, checkfirst=True)
+                CandidateSkillPosting.__table__.create(db.engine, checkfirst=True)
+                if CandidateSearchIndex.query.count() == 0:
+                    indexed = rebuild_index()
+                    print(f"✅ Candidate search index built for {indexed} profiles")
+            except Exception as e:
+                db.session.rollback()
+                print(f"⚠️  Candidate search index backfill skipped: {str(e)}")
+            
+            # Profile features are computed lazily on first read; only the table is needed
+            try:
+                from src.models.profile_features import ProfileFeatures
+                ProfileFeatures.__table__.create(db.engine, checkfirst=True)
+            except Exception as e:
+                print(f"⚠️  Profile features table check skipped: {str(e)}")
+            
+            # Scheduler run history is written by the scheduler worker; only the table is needed
+            try:
+                from src.models.scheduler import SchedulerRun
+                SchedulerRun.__table__.create(db.engine, checkfirst=True)
+            except Exception as e:
+                print(f"⚠️  Scheduler runs table check skipped: {str(e)}")
+            
+            # CV generation jobs are queued by the web service and run by the CV worker;
+            # section snapshots let a regeneration reuse sections whose inputs did not change
+            try:
+                from src.models.cv_job import CVGenerationJob, CVSectionSnapshot
+                CVGenerationJob.__table__.create(db.engine, checkfirst=True)
+                CVSectionSnapshot.__table__.create(db.engine, checkfirst=True)
+            except Exception as e:
+                print(f"⚠️  CV generation tables check skipped: {str(e)}")
+            
+            # Build the conversation list from existing messages on first deploy
+            try:
+                from src.models.notification import Conversation, Message
+                from src.services.conversations import rebuild_conversations
+                Conversation.__table__.create(db.engine, checkfirst=True)
+                if Conversation.query.count() == 0 and Message.query.count() > 0:
+                    print(f"✅ Conversations built: {rebuild_conversations()} rows")
+            except Exception as e:
+                db.session.rollback()
+                print(f"⚠️  Conversations backfill skipped: {str(e)}")
+            
+            # Build skill demand statistics on first deploy; the digest scheduler keeps them fresh
+            try:
+                from src.models.skill_demand import SkillDemandStat
+                from src.services.skill_demand import refresh_skill_demand
+                SkillDemandStat.__table__.create(db.engine, checkfirst=True)
+                if SkillDemandStat.query.count() == 0:
+                    print(f"✅ Skill demand statistics built: {refresh_skill_demand()} rows")
+            except Exception as e:
+                db.session.rollback()
+                print(f"⚠️  Skill demand statistics build skipped: {str(e)}")
+            
             print(f"\n🎉 Database optimization completed!")
             print(f"📊 Created/verified {len(indexes)} indexes")
             print(f"⚡ Database queries should now be significantly faster")
@@ -0,0 +1,44 @@
+"""
+Scheduler Worker for TalentSphere Backend
+
+Runs the scheduler coordinator (digests, notification processing, job expiry,
+cleanup) outside the web workers. Several instances can run for failover: they
+elect one leader and only the leader runs tasks.
+
+Usage: python scheduler_worker.py [--list]
+"""
+
+import argparse
+import logging
+import signal
+import threading
+
+from src.main import app
+from src.services.scheduler_coordinator import scheduler_coordinator
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--list', action='store_true', help='Print the registered tasks and exit')
+    args = parser.parse_args()
+
+    if args.list:
+        for task in scheduler_coordinator.tasks.values():
+            print(f"{task.name:<36} {task.schedule!r:<28} jitter {task.jitter:g}s{'' if task.enabled else ' (disabled)'}")
+        return
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(threadName)s %(message)s')
+
+    shutdown = threading.Event()
+    signal.signal(signal.SIGTERM, lambda signum, frame: shutdown.set())
+    signal.signal(signal.SIGINT, lambda signum, frame: shutdown.set())
+
+    print(f"🚀 Scheduler worker started: {len(scheduler_coordinator.tasks)} tasks")
+    scheduler_coordinator.start(app)
+    shutdown.wait()
+    print("🛑 Scheduler worker stopping...")
+    scheduler_coordinator.stop()
+
+
+if __name__ == '__main__':
+    main()
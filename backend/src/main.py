@@ -18,8 +18,13 @@ from src.models.job import Job, JobCategory, JobBookmark, JobAlert, JobShare
 from src.models.job_template import JobTemplate
 #from src.models.application import Application, ApplicationActivity, ApplicationQuestion, ApplicationTemplate
 #from src.models.featured_ad import FeaturedAd, FeaturedAdPackage, Payment, Subscription
-from src.models.notification import Notification, NotificationTemplate, Review, ReviewVote, Message
+from src.models.notification import Notification, NotificationTemplate, Review, ReviewVote, Message, Conversation
 from src.models.notification_preferences import NotificationPreference, NotificationDeliveryLog, NotificationQueue
+from src.models.candidate_search import CandidateSearchIndex, CandidateSkillPosting
+from src.models.profile_features import ProfileFeatures
+from src.models.skill_demand import SkillDemandStat
+from src.models.scheduler import SchedulerRun
+from src.models.cv_job import CVGenerationJob, CVSectionSnapshot
 from src.models.ads import (
     AdCampaign, AdCreative, AdPlacement, AdCampaignPlacement,
     AdImpression, AdClick, AdAnalyticsDaily, AdCredit, AdReview, AdReviewAudit
@@ -50,10 +55,10 @@ from src.routes.cv_upload import cv_upload_bp
 from src.routes.optimized_api import optimized_api_bp
 from src.utils.performance import performance_metrics
 from src.utils.cache_middleware import ResponseCacheMiddleware, advanced_cache, CACHE_WARMING_FUNCTIONS
-from src.services.notification_scheduler import notification_scheduler
-from src.services.job_scheduler import job_scheduler
-from src.services.job_digest_scheduler import job_digest_scheduler
-from src.services.cleanup_service import start_cleanup_service, stop_cleanup_service
+from src.services.scheduler_coordinator import scheduler_coordinator, register_default_tasks
+
+# Background tasks run in whichever process starts the coordinator (scheduler_worker.py)
+register_default_tasks(scheduler_coordinator)
 
 app = Flask(__name__, static_folder=os.path.join(os.path.dirname(__file__), 'static'))
 
@@ -297,55 +302,21 @@ if __name__ == '__main__':
     if not args.no_init_db:
         init_database()
     
-    # Start notification scheduler
+    # Run background tasks in this process (development); the coordinator's
+    # leader election keeps a second local instance from running them twice
     try:
-        notification_scheduler.start()
-        print("✅ Notification scheduler started")
+        scheduler_coordinator.start(app)
+        print(f"✅ Scheduler coordinator started ({len(scheduler_coordinator.tasks)} tasks)")
     except Exception as e:
-        print(f"⚠️  Notification scheduler failed to start: {e}")
+        print(f"⚠️  Scheduler coordinator failed to start: {e}")
     
-    # Start job scheduler
-    try:
-        # Configure job scheduler from environment
-        check_interval = int(os.getenv('JOB_CLEANUP_INTERVAL_HOURS', '6'))
-        auto_delete = os.getenv('JOB_AUTO_DELETE_ENABLED', 'true').lower() == 'true'
-        grace_period = int(os.getenv('JOB_GRACE_PERIOD_DAYS', '7'))
-        notify_before = int(os.getenv('JOB_NOTIFY_BEFORE_EXPIRY_DAYS', '3'))
-        
-        job_scheduler.configure(
-            check_interval_hours=check_interval,
-            auto_delete_enabled=auto_delete,
-            grace_period_days=grace_period,
-            notify_before_expiry_days=notify_before
-        )
-        job_scheduler.start()
-        print("✅ Job scheduler started")
-    except Exception as e:
-        print(f"⚠️  Job scheduler failed to start: {e}")    
-    # Start job digest scheduler
+    # Execute queued CV generation jobs in this process too (cv_worker.py in production)
     try:
-        job_digest_scheduler.start(app)
-        print("✅ Job digest scheduler started (daily & weekly digests)")
+        from src.services.cv.job_queue import cv_job_worker
+        cv_job_worker.start(app)
+        print(f"✅ CV job worker started ({cv_job_worker.threads} threads)")
     except Exception as e:
-        print(f"⚠️  Job digest scheduler failed to start: {e}")
-    
-    # Start cleanup service - DISABLED to prevent database connection exhaustion
-    # The cleanup service was causing "too many clients" errors on the Aiven database
-    # It will be re-enabled once connection pooling is optimized
-    cleanup_enabled = os.getenv('ENABLE_CLEANUP_SERVICE', 'false').lower() == 'true'
-    if cleanup_enabled:
-        try:
-            cleanup_service = start_cleanup_service()
-            if cleanup_service and cleanup_service.is_running:
-                print("✅ Cleanup service started (external jobs & scholarships auto-delete)")
-            else:
-                print("⚠️  Cleanup service initialized but may not be running in all workers")
-        except Exception as e:
-            print(f"⚠️  Cleanup service failed to start: {e}")
-    else:
-        print("⚠️  Cleanup service disabled (set ENABLE_CLEANUP_SERVICE=true to enable)")
-        import traceback
-        traceback.print_exc()
+        print(f"⚠️  CV job worker failed to start: {e}")
     
     # Warm cache if requested
     if args.warm_cache:
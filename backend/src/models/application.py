@@ -56,6 +56,11 @@ class Application(db.Model):
     referrer = db.relationship('User', foreign_keys=[referrer_id], backref='referrals')
     application_activities = db.relationship('ApplicationActivity', backref='application', lazy='dynamic', cascade='all, delete-orphan')
     
+    # Indexes
+    __table_args__ = (
+        db.Index('idx_applications_job_match_score', 'job_id', 'match_score'),
+    )
+    
     def get_status_display(self):
         """Get human-readable status"""
         status_map = {
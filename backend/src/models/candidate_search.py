@@ -0,0 +1,77 @@
+"""
+Candidate search index models
+Denormalized, indexable view of job seeker profiles used by employer candidate search
+"""
+
+from datetime import datetime
+from sqlalchemy import DDL, Index, event, func
+
+from src.models.user import db
+
+
+class CandidateSearchIndex(db.Model):
+    """One searchable document per job seeker, refreshed on profile writes"""
+    __tablename__ = 'candidate_search_index'
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, unique=True)
+
+    # Full-text document (name, titles, summary, skills)
+    document = db.Column(db.Text, nullable=False, default='')
+
+    # Facet columns (normalized for indexed equality filters)
+    experience_band = db.Column(db.String(20))  # entry, mid, senior
+    years_of_experience = db.Column(db.Integer, default=0)
+    location = db.Column(db.String(100))  # lowercase preferred location
+    availability = db.Column(db.String(50))
+    is_searchable = db.Column(db.Boolean, default=False)  # active, visible job seeker
+    profile_completeness = db.Column(db.Integer, default=0)
+
+    # Timestamps
+    profile_updated_at = db.Column(db.DateTime)
+    indexed_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    # Relationships
+    user = db.relationship('User', backref=db.backref('candidate_search_entry', uselist=False, cascade='all, delete-orphan'))
+
+    __table_args__ = (
+        Index('idx_candidate_search_band', 'is_searchable', 'experience_band'),
+        Index('idx_candidate_search_location', 'is_searchable', 'location'),
+        Index('idx_candidate_search_availability', 'is_searchable', 'availability'),
+        # GIN index backing to_tsvector() searches on PostgreSQL; SQLite uses an FTS5 table instead
+        Index(
+            'idx_candidate_search_document_fts',
+            func.to_tsvector('english', document),
+            postgresql_using='gin'
+        ).ddl_if(dialect='postgresql'),
+    )
+
+    def __repr__(self):
+        return f'<CandidateSearchIndex user={self.user_id}>'
+
+
+# SQLite has no tsvector; keep an FTS5 shadow table (rowid = user_id) next to the index
+SQLITE_FTS_TABLE = 'candidate_search_fts'
+event.listen(
+    CandidateSearchIndex.__table__,
+    'after_create',
+    DDL(f"CREATE VIRTUAL TABLE IF NOT EXISTS {SQLITE_FTS_TABLE} USING fts5(document)").execute_if(dialect='sqlite')
+)
+
+
+class CandidateSkillPosting(db.Model):
+    """Posting list entry: normalized skill -> job seeker"""
+    __tablename__ = 'candidate_skill_postings'
+
+    skill = db.Column(db.String(100), primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+
+    # Relationships
+    user = db.relationship('User', backref=db.backref('skill_postings', lazy='dynamic', cascade='all, delete-orphan'))
+
+    __table_args__ = (
+        Index('idx_candidate_skill_postings_user', 'user_id'),
+    )
+
+    def __repr__(self):
+        return f'<CandidateSkillPosting {self.skill} -> {self.user_id}>'
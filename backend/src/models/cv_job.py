@@ -0,0 +1,104 @@
+"""
+CV generation job model
+Queued CV generation requests, their progress events and persisted results,
+and the generated CV sections kept for incremental regeneration
+"""
+
+import json
+import uuid
+from datetime import datetime
+
+from src.models.user import db
+
+
+def _loads(value, default=None):
+    try:
+        return json.loads(value) if value else default
+    except ValueError:
+        return default
+
+
+class CVGenerationJob(db.Model):
+    """One CV generation request, executed by a CV worker outside the web workers"""
+    __tablename__ = 'cv_generation_jobs'
+
+    id = db.Column(db.String(32), primary_key=True, default=lambda: uuid.uuid4().hex)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
+    kind = db.Column(db.String(20), nullable=False, default='full')  # full, targeted
+
+    # Generation input, resolved at enqueue time (profile and job data, style, sections)
+    params = db.Column(db.Text, nullable=False)
+
+    # Job Status
+    status = db.Column(db.String(20), nullable=False, default='queued')  # queued, running, succeeded, failed
+    phase = db.Column(db.String(30))  # latest progress phase
+    events = db.Column(db.Text)  # JSON list of progress events, in order
+    result = db.Column(db.Text)  # JSON CV content
+    error = db.Column(db.Text)
+    attempts = db.Column(db.Integer, default=0)
+    worker = db.Column(db.String(100))  # host:pid/thread of the worker that holds the lease
+
+    # Timestamps
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    heartbeat_at = db.Column(db.DateTime)  # lease renewal; refreshed on every progress event
+    finished_at = db.Column(db.DateTime)
+
+    __table_args__ = (
+        db.Index('idx_cv_jobs_status_created', 'status', 'created_at'),
+        db.Index('idx_cv_jobs_user_created', 'user_id', 'created_at'),
+    )
+
+    @property
+    def is_finished(self):
+        return self.status in ('succeeded', 'failed')
+
+    def get_params(self):
+        return _loads(self.params, {})
+
+    def get_events(self):
+        return _loads(self.events, [])
+
+    def get_result(self):
+        return _loads(self.result)
+
+    def to_dict(self, include_result=True, since_event=0):
+        events = self.get_events()
+        data = {
+            'job_id': self.id,
+            'kind': self.kind,
+            'status': self.status,
+            'phase': self.phase,
+            'events': events[since_event:],
+            'event_count': len(events),
+            'error': self.error,
+            'attempts': self.attempts,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+        }
+        if include_result:
+            data['result'] = self.get_result()
+        return data
+
+
+class CVSectionSnapshot(db.Model):
+    """Generated content of one CV section for one set of inputs (its fingerprint)"""
+    __tablename__ = 'cv_section_snapshots'
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
+    section = db.Column(db.String(30), nullable=False)  # summary, work, education, skills, ...
+    fingerprint = db.Column(db.String(64), nullable=False)  # sha256 of profile slice, job context and style
+    content = db.Column(db.Text, nullable=False)  # JSON: CV keys the section fills in
+    humanized = db.Column(db.Boolean, default=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    last_used_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'section', 'fingerprint', name='uq_cv_section_fingerprint'),
+        db.Index('idx_cv_sections_user_section_used', 'user_id', 'section', 'last_used_at'),
+    )
+
+    def get_content(self):
+        return _loads(self.content, {})
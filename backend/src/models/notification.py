@@ -351,3 +351,48 @@ class Message(db.Model):
         
         return data
 
+
+
+class Conversation(db.Model):
+    """Denormalized state of the message thread between two users.
+
+    Participants are stored ordered (user_low_id < user_high_id) so each pair
+    has exactly one row; it tracks the latest message and each participant's
+    unread count and is maintained by src.services.conversations.
+    """
+    __tablename__ = 'conversations'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    user_low_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    user_high_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    
+    # Latest Message
+    last_message_id = db.Column(db.Integer, db.ForeignKey('messages.id', ondelete='SET NULL'))
+    last_activity = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    
+    # Unread messages addressed to each participant
+    user_low_unread = db.Column(db.Integer, default=0, nullable=False)
+    user_high_unread = db.Column(db.Integer, default=0, nullable=False)
+    
+    # Timestamps
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        db.UniqueConstraint('user_low_id', 'user_high_id', name='unique_conversation_participants'),
+        db.Index('idx_conversations_low_activity', 'user_low_id', 'last_activity'),
+        db.Index('idx_conversations_high_activity', 'user_high_id', 'last_activity'),
+    )
+    
+    # Relationships
+    last_message = db.relationship('Message', foreign_keys=[last_message_id])
+    
+    @staticmethod
+    def participants(user_a_id, user_b_id):
+        """Ordered (low, high) participant ids of a pair"""
+        return (user_a_id, user_b_id) if user_a_id < user_b_id else (user_b_id, user_a_id)
+    
+    def other_user_id(self, user_id):
+        return self.user_high_id if user_id == self.user_low_id else self.user_low_id
+    
+    def unread_for(self, user_id):
+        return self.user_low_unread if user_id == self.user_low_id else self.user_high_unread
@@ -0,0 +1,55 @@
+"""
+Profile feature model
+Versioned, precomputed features of a job seeker profile shared by the CV builder,
+profile optimization and recommendation scorers
+"""
+
+import json
+from datetime import datetime
+
+from src.models.user import db
+
+
+class ProfileFeatures(db.Model):
+    """Derived features of one job seeker profile, recomputed on profile writes"""
+    __tablename__ = 'profile_features'
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, unique=True)
+
+    # Bumped on every recompute; consumers key their own caches on it
+    version = db.Column(db.Integer, nullable=False, default=1)
+
+    # Features
+    skills = db.Column(db.Text)  # JSON array of normalized (lowercase) skills
+    years_of_experience = db.Column(db.Integer, default=0)
+    seniority = db.Column(db.String(20))  # entry, mid, senior
+    keyword_bag = db.Column(db.Text)  # JSON object keyword -> count (top keywords)
+    distinct_keywords = db.Column(db.Integer, default=0)
+    total_words = db.Column(db.Integer, default=0)
+    completeness = db.Column(db.Integer, default=0)
+    completeness_sections = db.Column(db.Text)  # JSON object section -> fraction (0-1)
+
+    # Timestamps
+    computed_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    # Relationships
+    user = db.relationship('User', backref=db.backref('profile_features', uselist=False, cascade='all, delete-orphan'))
+
+    def to_dict(self):
+        return {
+            'user_id': self.user_id,
+            'version': self.version,
+            'skills': json.loads(self.skills) if self.skills else [],
+            'years_of_experience': self.years_of_experience or 0,
+            'seniority': self.seniority,
+            'keyword_bag': json.loads(self.keyword_bag) if self.keyword_bag else {},
+            'distinct_keywords': self.distinct_keywords or 0,
+            'total_words': self.total_words or 0,
+            'completeness': self.completeness or 0,
+            'completeness_sections': json.loads(self.completeness_sections) if self.completeness_sections else {},
+            'computed_at': self.computed_at.isoformat() if self.computed_at else None
+        }
+
+    def __repr__(self):
+        return f'<ProfileFeatures user={self.user_id} v{self.version}>'
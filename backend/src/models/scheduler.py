@@ -0,0 +1,57 @@
+"""
+Scheduler run model
+History of background task runs executed by the scheduler coordinator
+"""
+
+import json
+from datetime import datetime
+
+from src.models.user import db
+
+
+class SchedulerRun(db.Model):
+    """One run of a scheduled task; (task_name, scheduled_for) is claimed once"""
+    __tablename__ = 'scheduler_runs'
+
+    id = db.Column(db.Integer, primary_key=True)
+    task_name = db.Column(db.String(100), nullable=False)
+    scheduled_for = db.Column(db.DateTime, nullable=False)  # schedule slot (UTC), before jitter
+
+    # Run Status
+    status = db.Column(db.String(20), nullable=False, default='running')  # running, success, partial, failed, abandoned
+    result = db.Column(db.Text)  # JSON summary returned by the task
+    error = db.Column(db.Text)
+    worker = db.Column(db.String(100))  # host:pid of the coordinator that ran it
+
+    # Timestamps
+    started_at = db.Column(db.DateTime, default=datetime.utcnow)
+    finished_at = db.Column(db.DateTime)
+
+    __table_args__ = (
+        db.UniqueConstraint('task_name', 'scheduled_for', name='unique_scheduler_run_slot'),
+        db.Index('idx_scheduler_runs_task_started', 'task_name', 'started_at'),
+    )
+
+    @property
+    def duration_seconds(self):
+        if self.started_at and self.finished_at:
+            return (self.finished_at - self.started_at).total_seconds()
+        return None
+
+    def to_dict(self):
+        try:
+            result = json.loads(self.result) if self.result else None
+        except ValueError:
+            result = self.result
+        return {
+            'id': self.id,
+            'task_name': self.task_name,
+            'scheduled_for': self.scheduled_for.isoformat() if self.scheduled_for else None,
+            'status': self.status,
+            'result': result,
+            'error': self.error,
+            'worker': self.worker,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+            'duration_seconds': self.duration_seconds
+        }
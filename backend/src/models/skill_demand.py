@@ -0,0 +1,74 @@
+"""
+Skill demand statistics model
+Precomputed per-skill market aggregates (job counts, salary percentiles, trend)
+over rolling windows, by category and region
+"""
+
+from datetime import datetime
+from sqlalchemy import Index
+
+from src.models.user import db
+
+
+class SkillDemandStat(db.Model):
+    """Demand for one skill in one (window, category, region) slice.
+
+    ``category_id`` NULL and ``region`` '' denote the all-categories / all-regions
+    slices. The row with skill TOTAL_SKILL holds the number of jobs in the slice.
+    """
+    __tablename__ = 'skill_demand_stats'
+
+    TOTAL_SKILL = '*'
+
+    id = db.Column(db.Integer, primary_key=True)
+    skill = db.Column(db.String(100), nullable=False)
+    window_days = db.Column(db.Integer, nullable=False)  # 7, 30, 90
+    category_id = db.Column(db.Integer, db.ForeignKey('job_categories.id'))
+    region = db.Column(db.String(100), nullable=False, default='')  # lowercase country
+
+    # Demand
+    job_count = db.Column(db.Integer, default=0)
+    required_count = db.Column(db.Integer, default=0)
+    preferred_count = db.Column(db.Integer, default=0)
+    demand_rank = db.Column(db.Integer)  # 1 = most demanded skill in the slice, 0 = total row
+
+    # Salary percentiles (yearly, in salary_currency - the slice's most common currency)
+    salary_currency = db.Column(db.String(3))
+    salary_p25 = db.Column(db.Integer)
+    salary_p50 = db.Column(db.Integer)
+    salary_p75 = db.Column(db.Integer)
+    salary_samples = db.Column(db.Integer, default=0)
+
+    # Trend: least-squares slope of postings per bucket (1 day for 7-day windows, else 1 week)
+    trend_slope = db.Column(db.Float, default=0.0)
+
+    computed_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index('idx_skill_demand_slice_skill', 'window_days', 'category_id', 'region', 'skill'),
+        Index('idx_skill_demand_slice_rank', 'window_days', 'category_id', 'region', 'demand_rank'),
+    )
+
+    def to_dict(self):
+        return {
+            'skill': self.skill,
+            'window_days': self.window_days,
+            'category_id': self.category_id,
+            'region': self.region or None,
+            'job_count': self.job_count,
+            'required_count': self.required_count,
+            'preferred_count': self.preferred_count,
+            'demand_rank': self.demand_rank,
+            'salary': {
+                'currency': self.salary_currency,
+                'p25': self.salary_p25,
+                'p50': self.salary_p50,
+                'p75': self.salary_p75,
+                'samples': self.salary_samples
+            } if self.salary_samples else None,
+            'trend_slope': round(self.trend_slope or 0.0, 3),
+            'computed_at': self.computed_at.isoformat() if self.computed_at else None
+        }
+
+    def __repr__(self):
+        return f'<SkillDemandStat {self.skill} {self.window_days}d cat={self.category_id} region={self.region}>'
@@ -10,9 +10,13 @@ from src.models.job import Job, JobCategory
 from src.models.application import Application
 #from src.models.featured_ad import FeaturedAd, Payment
 from src.models.notification import Review
+from src.models.scheduler import SchedulerRun
 from src.routes.auth import token_required, role_required
 from src.services.job_scheduler import job_scheduler
+from src.services.scheduler_coordinator import scheduler_coordinator
 from src.services.job_notification_service import job_notification_service
+from src.services import candidate_search, profile_graph
+from src.services import candidate_search
 
 admin_bp = Blueprint('admin', __name__)
 
@@ -265,6 +269,8 @@ def toggle_user_status(current_user, user_id):
         
         user.is_active = not user.is_active
         user.updated_at = datetime.utcnow()
+        if user.role == 'job_seeker':
+            candidate_search.index_profile(user)
         
         db.session.commit()
         
@@ -323,11 +329,16 @@ def change_user_role(current_user, user_id):
         if new_role == 'job_seeker' and old_role != 'job_seeker':
             # Create job seeker profile if it doesn't exist
             if not user.job_seeker_profile:
-                from src.models.user import JobSeekerProfile
                 job_seeker_profile = JobSeekerProfile(user_id=user.id)
                 db.session.add(job_seeker_profile)
         
+        # Only job seekers are searchable: index the new profile, or hide the old one
+        if 'job_seeker' in (new_role, old_role):
+            db.session.flush()
+            candidate_search.index_profile(user, JobSeekerProfile.query.filter_by(user_id=user.id).first())
+        
         db.session.commit()
+        profile_graph.invalidate(user.id)
         
         # Log the role change (you might want to create an audit log table)
         print(f"Admin {current_user.email} changed user {user.email} role from {old_role} to {new_role}")
@@ -1911,3 +1922,26 @@ def extend_job_expiry(current_user, job_id):
         return jsonify({'error': 'Failed to extend job expiry', 'details': str(e)}), 500
 
 
+
+
+@admin_bp.route('/admin/scheduler', methods=['GET'])
+@token_required
+@role_required('admin')
+def get_scheduler_status(current_user):
+    """Registered background tasks with their latest run, plus recent run history"""
+    try:
+        limit = min(request.args.get('limit', 50, type=int), 200)
+        task_name = request.args.get('task')
+        
+        query = SchedulerRun.query
+        if task_name:
+            query = query.filter_by(task_name=task_name)
+        runs = query.order_by(desc(SchedulerRun.started_at)).limit(limit).all()
+        
+        return jsonify({
+            **scheduler_coordinator.status(),
+            'recent_runs': [run.to_dict() for run in runs]
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': 'Failed to get scheduler status', 'details': str(e)}), 500
@@ -9,6 +9,7 @@ from src.models.notification import Notification
 from src.routes.auth import token_required, role_required
 from src.services.notification_templates import EnhancedNotificationService
 from src.services.email_service import email_service
+from src.services import candidate_scoring
 
 application_bp = Blueprint('application', __name__)
 
@@ -88,6 +89,7 @@ def apply_for_job(current_user, job_id):
         )
         
         db.session.add(application)
+        candidate_scoring.score_application(application, job=job, profile=current_user.job_seeker_profile)
         db.session.flush()  # Get application ID
         
         # Create activity record
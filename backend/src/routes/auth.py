@@ -12,6 +12,7 @@ from datetime import datetime, timedelta
 
 from src.models.user import db, User, JobSeekerProfile, EmployerProfile
 from src.utils.db_utils import db_transaction, safe_db_operation
+from src.services import candidate_scoring, candidate_search, profile_features, profile_graph
 from src.services.notification_templates import EnhancedNotificationService
 from src.services.email_service import email_service
 
@@ -377,6 +378,9 @@ def register():
                 skills=data.get('skills')
             )
             db.session.add(profile)
+            db.session.flush()
+            # Searchable by employers from the start, not only after a first edit
+            candidate_search.index_profile(user, profile)
         elif data['role'] == 'employer':
             # Create employer profile
             profile = EmployerProfile(
@@ -947,6 +951,12 @@ def update_profile(current_user):
             for field in profile_fields:
                 if field in data:
                     setattr(profile, field, data[field])
+            
+            # Keep match scores, the search index and profile features in sync
+            if candidate_scoring.PROFILE_SCORING_FIELDS & set(data):
+                candidate_scoring.rescore_profile(current_user.id, profile)
+            candidate_search.index_profile(current_user, profile)
+            profile_features.refresh_features(current_user, profile)
         
         elif current_user.role == 'employer':
             profile = current_user.employer_profile
@@ -965,6 +975,7 @@ def update_profile(current_user):
         
         current_user.updated_at = datetime.utcnow()
         db.session.commit()
+        profile_graph.invalidate(current_user.id)
         
         return jsonify({
             'message': 'Profile updated successfully',
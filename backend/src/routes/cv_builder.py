@@ -9,12 +9,14 @@ from datetime import datetime
 import jwt
 import os
 import json
-import pickle
 import re
+import time
 
 from src.models.user import db, User
-from src.models.profile_extensions import WorkExperience, Education, Certification, Project, Award, Reference
+from src.models.cv_job import CVGenerationJob
 from src.services.cv.cv_builder_service import CVBuilderService  # Refactored modular service
+from src.services.cv.job_queue import enqueue_job, active_job_count, complete_payload, ensure_consumer, JobWatcher
+from src.services import profile_features, profile_graph
 from src.utils.db_utils import safe_db_operation
 
 from flask_limiter import Limiter
@@ -25,6 +27,11 @@ cv_builder_bp = Blueprint('cv_builder', __name__, url_prefix='/api/cv-builder')
 # Initialize CV Builder Service (Refactored - now ~300 lines instead of 2667!)
 cv_service = CVBuilderService()
 
+# Generation requests are queued as CV jobs and run by the CV worker (cv_worker.py)
+STREAM_HEARTBEAT_INTERVAL = 15  # seconds
+STREAM_POLL_INTERVAL = 1  # seconds; job row re-read interval when Redis is unavailable
+STREAM_MAX_DURATION = 90  # seconds; under the 120s worker timeout, EventSource reconnects with Last-Event-ID and resumes
+
 # ── Rate Limiter ──────────────────────────────────────────────────────────────
 # Uses JWT user_id as the key so limits are per-user, not per-IP.
 # Call limiter.init_app(app) in main.py after importing this blueprint.
@@ -60,31 +67,6 @@ def _rate_limit_handler(e):
         'limit_detail': str(e.description),
     }), 429
 
-# ── Redis Profile Cache ───────────────────────────────────────────────────────
-_redis_client = None
-
-
-def _get_redis():
-    """Return a Redis client, or None if Redis is not configured/reachable."""
-    global _redis_client
-    if _redis_client is not None:
-        return _redis_client
-    try:
-        import redis as _redis_lib
-        redis_url = os.environ.get('REDIS_URL', 'redis://localhost:6379/0')
-        client = _redis_lib.from_url(redis_url, socket_timeout=1, socket_connect_timeout=1)
-        client.ping()
-        _redis_client = client
-        print('[CV Cache] Redis connected')
-        return _redis_client
-    except Exception as exc:
-        print(f'[CV Cache] Redis unavailable, caching disabled: {exc}')
-        return None
-
-
-def _profile_cache_key(user_id: int) -> str:
-    return f'user_profile_{user_id}'
-
 
 def _parse_bool(value, default=True):
     """Parse boolean-like values from body/query payloads."""
@@ -102,14 +84,13 @@ def invalidate_user_profile_cache(user_id: int):
     Call this whenever a user updates their profile, work experience,
     education, certifications, projects, or awards so the CV builder
     picks up the latest data on the next request.
+    
+    Cache keys carry the profile feature version, so recomputing the
+    features retires the cached entry (old versions expire via TTL).
+    Profile-extension and profile routes already do this on write.
     """
-    redis = _get_redis()
-    if redis:
-        try:
-            redis.delete(_profile_cache_key(user_id))
-            print(f'[CV Cache] Invalidated cache for user {user_id}')
-        except Exception as exc:
-            print(f'[CV Cache] Failed to invalidate cache: {exc}')
+    if profile_features.refresh_features_for(user_id):
+        print(f'[CV Cache] Invalidated cache for user {user_id}')
 
 # Token verification decorator
 def token_required(f):
@@ -163,6 +144,60 @@ def role_required(*allowed_roles):
     return decorator
 
 
+def _generation_params(current_user, data: dict, default_sections: list) -> dict:
+    """Resolve a generation request into the input stored on a CV generation job"""
+    job_data = None
+    custom_job = data.get('job_data') or data.get('custom_job')
+    if data.get('job_id'):
+        from src.models.job import Job
+        job = Job.query.get(data['job_id'])
+        if job:
+            job_data = _build_comprehensive_job_data(job)
+    elif custom_job:
+        job_data = _normalize_custom_job_data(custom_job)
+
+    return {
+        'user_data': _get_user_profile_data(current_user),
+        'job_data': job_data,
+        'style': data.get('style', 'professional'),
+        'sections': data.get('sections') or default_sections,
+        'humanize': _parse_bool(data.get('humanize'), default=True),
+    }
+
+
+def _queue_generation(current_user, kind: str, params: dict):
+    """Queue a CV generation job; returns (job, None), or (None, error response)
+    while the user already has too many generations in flight"""
+    max_active = int(os.getenv('CV_JOB_MAX_ACTIVE_PER_USER', '3'))
+    if active_job_count(current_user.id) >= max_active:
+        return None, (jsonify({
+            'success': False,
+            'message': 'You already have CV generations in progress. Please wait for them to finish.',
+            'error_code': 'TOO_MANY_ACTIVE_JOBS'
+        }), 429)
+    return enqueue_job(current_user.id, kind, params), None
+
+
+def _queued_response(job: CVGenerationJob):
+    return jsonify({
+        'success': True,
+        'message': 'CV generation queued',
+        'data': {
+            'job_id': job.id,
+            'status': job.status,
+            'status_url': f'/api/cv-builder/jobs/{job.id}',
+            'stream_url': f'/api/cv-builder/generate-stream?cv_job_id={job.id}'
+        }
+    }), 202
+
+
+def _get_owned_job(current_user, job_id: str):
+    job = db.session.get(CVGenerationJob, job_id)
+    if job is None or (job.user_id != current_user.id and current_user.role != 'admin'):
+        return None
+    return job
+
+
 @cv_builder_bp.route('/generate', methods=['POST'])
 @limiter.limit('10 per hour; 50 per day')
 @token_required
@@ -182,10 +217,22 @@ def generate_cv(current_user):
             ...
         },
         "style": "professional",  // Style preference for AI content tone
-        "sections": ["work", "education", "skills", "summary", "projects", "certifications"]
+        "sections": ["work", "education", "skills", "summary", "projects", "certifications"],
+        "async": false  // Default: wait for the result in this request; true queues a CV job
     }
     
-    Response:
+    Response (async=true): 202
+    {
+        "success": true,
+        "data": {
+            "job_id": "…",
+            "status": "queued",
+            "status_url": "/api/cv-builder/jobs/<job_id>",
+            "stream_url": "/api/cv-builder/generate-stream?cv_job_id=<job_id>"
+        }
+    }
+    
+    Response (default):
     {
         "success": true,
         "data": {
@@ -195,30 +242,26 @@ def generate_cv(current_user):
     }
     """
     try:
-        data = request.get_json()
+        data = request.get_json() or {}
         
         # Debug logging
         print(f"[CV Builder] Received request data: {data}")
         
-        # Get user profile data
-        user_data = _get_user_profile_data(current_user)
+        params = _generation_params(
+            current_user, data, ['work', 'education', 'skills', 'summary', 'projects', 'certifications']
+        )
+        if _parse_bool(data.get('async'), default=False):
+            job, error_response = _queue_generation(current_user, 'full', params)
+            return error_response or _queued_response(job)
         
-        # Get job data if job_id provided
-        job_data = None
-        if data.get('job_id'):
-            from src.models.job import Job
-            job = Job.query.get(data['job_id'])
-            if job:
-                job_data = _build_comprehensive_job_data(job)
-        elif data.get('job_data'):
-            job_data = _normalize_custom_job_data(data['job_data'])
-            print(f"[CV Builder] Using normalized custom job data: {job_data.get('title')}")
+        user_data = params['user_data']
+        job_data = params['job_data']
         
         # Get CV preferences
-        cv_style = data.get('style', 'professional')
-        sections = data.get('sections', ['work', 'education', 'skills', 'summary', 'projects', 'certifications'])
+        cv_style = params['style']
+        sections = params['sections']
         use_incremental = data.get('incremental', True)  # Default to incremental generation
-        humanize = _parse_bool(data.get('humanize'), default=True)
+        humanize = params['humanize']
         
         # Choose service based on preference
         if use_incremental:
@@ -347,6 +390,8 @@ def health_check():
                     'gemini': 'available' if not api_stats.get('gemini_exhausted') else 'rate_limited',
                     'active': api_stats.get('current_provider')
                 },
+                'response_cache': api_stats.get('response_cache'),
+                'profile_cache': profile_graph.graph_cache.stats(),
                 'statistics': api_stats
             }
         }), 200 if is_healthy else 503
@@ -363,68 +408,62 @@ def health_check():
 @role_required('job_seeker', 'admin')
 def generate_cv_incremental(current_user):
     """
-    Generate CV content incrementally section by section
-    Better for avoiding API rate limits and provides progress updates
+    Regenerate a CV, calling the AI only for sections whose inputs changed
+    
+    Every section is fingerprinted from the profile data it is written from,
+    the target job and the style; sections generated before with the same
+    fingerprint are reused as they are. Editing one work experience therefore
+    regenerates (and humanizes) only the sections built from work history.
     
     Request body:
     {
         "job_id": 123,  // Optional
         "job_data": {},  // Optional custom job data
         "style": "professional",
-        "sections": ["summary", "experience", "education", "skills", "projects"]
+        "sections": ["summary", "work", "education", "skills", "projects"],  // Optional, sections the CV contains
+        "humanize": true,
+        "force": false  // Regenerate every section
     }
     
     Response:
     {
         "success": true,
-        "message": "CV generated successfully with 5 sections",
+        "message": "CV updated: 1 section regenerated, 4 reused",
         "data": {
             "cv_content": { /* Complete CV data */ },
-            "sections_generated": ["summary", "experience", "education", "skills", "projects"],
-            "generation_time": 15.5
+            "sections_generated": ["work"],
+            "sections_reused": ["summary", "education", "skills", "projects"],
+            "generation_time": 4.2
         }
     }
     """
-    import time as time_module
-    start_time = time_module.time()
+    start_time = time.time()
     
     try:
-        data = request.get_json()
-        
-        # Get user profile data
-        user_data = _get_user_profile_data(current_user)
-        
-        # Get job data if provided
-        job_data = None
-        if data.get('job_id'):
-            from src.models.job import Job
-            job = Job.query.get(data['job_id'])
-            if job:
-                job_data = _build_comprehensive_job_data(job)
-        elif data.get('job_data'):
-            job_data = _normalize_custom_job_data(data['job_data'])
-        
-        # Get preferences
-        cv_style = data.get('style', 'professional')
-        sections = data.get('sections', ['summary', 'experience', 'education', 'skills', 'projects', 'certifications'])
-        humanize = _parse_bool(data.get('humanize'), default=True)
-        
-        print(f"[CV Builder] Incremental generation: {len(sections)} sections")
+        data = request.get_json() or {}
+        params = _generation_params(
+            current_user, data, ['summary', 'work', 'education', 'skills', 'projects', 'certifications']
+        )
+        user_data = params['user_data']
         
-        # Generate CV using V2 service (incremental)
-        cv_content = cv_service.generate_cv_content(
+        cv_content = cv_service.generate_cv_incremental(
+            user_id=current_user.id,
             user_data=user_data,
-            job_data=job_data,
-            cv_style=cv_style,
-            include_sections=sections,
-            humanize=humanize,
+            job_data=params['job_data'],
+            cv_style=params['style'],
+            include_sections=params['sections'],
+            humanize=params['humanize'],
+            force=_parse_bool(data.get('force'), default=False),
         )
         
-        generation_time = time_module.time() - start_time
+        metadata = cv_content.get('metadata', {})
+        regenerated = metadata.get('sections_regenerated', [])
+        reused = metadata.get('sections_reused', [])
+        generation_time = time.time() - start_time
         
         return jsonify({
             'success': True,
-            'message': f'CV generated successfully with {len(sections)} sections',
+            'message': f'CV updated: {len(regenerated)} section(s) regenerated, {len(reused)} reused',
             'data': {
                 'cv_content': cv_content,
                 'user_data': {
@@ -433,7 +472,10 @@ def generate_cv_incremental(current_user):
                     'phone': user_data.get('phone'),
                     'location': user_data.get('location')
                 },
-                'sections_generated': sections,
+                'sections_generated': regenerated,
+                'sections_reused': reused,
+                'generation_progress': cv_content.get('generation_progress', []),
+                'todos': metadata.get('todos', []),
                 'generation_time': round(generation_time, 2)
             }
         }), 200
@@ -583,10 +625,11 @@ def generate_cv_targeted(current_user):
         "job_id": 123,
         "job_data": {...},
         "style": "professional",
-        "sections": ["summary", "experience", "education", "skills"]
+        "sections": ["summary", "experience", "education", "skills"],
+        "async": false  // Default: wait for the result; true queues a CV job (202, see /generate)
     }
     
-    Response includes:
+    Response (default) includes:
     - cv_content: Complete CV data
     - generation_progress: Array of progress updates per section
     - todos: Array of follow-up items for incomplete sections
@@ -596,24 +639,21 @@ def generate_cv_targeted(current_user):
         import time as time_module
         start_time = time_module.time()
         
-        data = request.get_json()
+        data = request.get_json() or {}
         
-        # Gather user profile data
-        user_data = _get_user_profile_data(current_user)
+        params = _generation_params(
+            current_user, data, ['summary', 'experience', 'education', 'skills', 'projects', 'certifications']
+        )
+        if _parse_bool(data.get('async'), default=False):
+            job, error_response = _queue_generation(current_user, 'targeted', params)
+            return error_response or _queued_response(job)
         
-        # Handle job targeting
-        job_data = None
-        if data.get('job_id'):
-            from src.models.job import Job
-            job = Job.query.get(data['job_id'])
-            if job:
-                job_data = _build_comprehensive_job_data(job)
-        elif data.get('job_data'):
-            job_data = _normalize_custom_job_data(data['job_data'])
+        user_data = params['user_data']
+        job_data = params['job_data']
         
         # Get preferences
-        cv_style = data.get('style', 'professional')
-        sections = data.get('sections', ['summary', 'experience', 'education', 'skills', 'projects', 'certifications'])
+        cv_style = params['style']
+        sections = params['sections']
         
         print(f"[CV Builder V3] Targeted generation: {len(sections)} sections")
         print(f"[CV Builder V3] Job targeting: {job_data.get('title') if job_data else 'General CV'}")
@@ -688,92 +728,187 @@ def _sse_token_required(f):
     return decorated
 
 
+@cv_builder_bp.route('/jobs', methods=['POST'])
+@limiter.limit('10 per hour; 50 per day')
+@token_required
+@role_required('job_seeker', 'admin')
+def create_cv_job(current_user):
+    """
+    Queue a CV generation job and return immediately
+    
+    Request body: as /generate, plus
+    {
+        "method": "full"    // full (single AI pass) or targeted (section by section)
+    }
+    
+    Response: 202 with job_id, status_url (poll) and stream_url (SSE progress)
+    """
+    try:
+        data = request.get_json() or {}
+        kind = data.get('method', 'full')
+        if kind not in ('full', 'targeted'):
+            return jsonify({'success': False, 'message': 'method must be "full" or "targeted"'}), 400
+        
+        params = _generation_params(
+            current_user, data, ['summary', 'work', 'education', 'skills', 'projects', 'certifications']
+        )
+        job, error_response = _queue_generation(current_user, kind, params)
+        return error_response or _queued_response(job)
+        
+    except Exception as e:
+        print(f"CV job enqueue error: {e}")
+        return jsonify({
+            'success': False,
+            'message': f'Failed to queue CV generation: {str(e)}'
+        }), 500
+
+
+@cv_builder_bp.route('/jobs/<job_id>', methods=['GET'])
+@token_required
+def get_cv_job(current_user, job_id):
+    """
+    Poll a CV generation job
+    
+    Query params:
+      since – return progress events from this index on (default 0)
+    
+    Response data: status (queued, running, succeeded, failed), phase, events,
+    event_count, error and, once succeeded, result (the CV content)
+    """
+    try:
+        job = _get_owned_job(current_user, job_id)
+        if job is None:
+            return jsonify({'success': False, 'message': 'CV job not found'}), 404
+        ensure_consumer(current_app._get_current_object(), job)
+        
+        since = max(request.args.get('since', 0, type=int), 0)
+        return jsonify({
+            'success': True,
+            'data': job.to_dict(include_result=job.status == 'succeeded', since_event=since)
+        }), 200
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Failed to get CV job: {str(e)}'
+        }), 500
+
+
+def _job_event_stream(job_id: str, start: int):
+    """SSE frames for a job's progress events from index ``start`` until the job finishes.
+
+    The job row is the source of truth: it is re-read whenever the worker
+    announces progress (or every STREAM_POLL_INTERVAL without Redis), and the
+    session is released between reads so no connection is held while waiting.
+    Full generations also record each drafted section as it streams in from
+    the AI provider (event 'section' with the section's content), so the CV
+    starts filling in long before the 'complete' event. A job left unclaimed
+    (no CV worker running) is picked up by worker threads in this process.
+    """
+    app = current_app._get_current_object()
+    watcher = JobWatcher(job_id)
+    try:
+        yield "retry: 3000\n\n"
+        # Sets the stream's last event id before the job records any event, so a
+        # reconnect resumes this job instead of queuing another one
+        yield f"id: {job_id}:{start - 1}\nevent: job\ndata: {json.dumps({'cv_job_id': job_id})}\n\n"
+        sent = start
+        deadline = time.monotonic() + STREAM_MAX_DURATION
+        last_frame = time.monotonic()
+        while True:
+            job = db.session.get(CVGenerationJob, job_id)
+            if job is None:
+                yield f"data: {json.dumps({'phase': 'error', 'message': 'CV job not found'})}\n\n"
+                return
+            
+            events = job.get_events()
+            for index in range(sent, len(events)):
+                event = events[index]
+                payload = complete_payload(job) if event.get('phase') == 'complete' else event
+                yield f"id: {job_id}:{index}\ndata: {json.dumps(payload, default=str)}\n\n"
+                last_frame = time.monotonic()
+            sent = max(sent, len(events))
+            
+            if job.is_finished:
+                if job.status == 'failed' and (not events or events[-1].get('phase') != 'error'):
+                    # Failed without an event of its own (its worker died on every attempt)
+                    yield f"data: {json.dumps({'phase': 'error', 'message': job.error or 'CV generation failed'})}\n\n"
+                return
+            
+            ensure_consumer(app, job)
+            db.session.remove()
+            if time.monotonic() >= deadline:
+                return
+            watcher.wait(STREAM_HEARTBEAT_INTERVAL if watcher.subscribed else STREAM_POLL_INTERVAL)
+            if time.monotonic() - last_frame >= STREAM_HEARTBEAT_INTERVAL:
+                yield ": keep-alive\n\n"
+                last_frame = time.monotonic()
+    finally:
+        watcher.close()
+
+
 @cv_builder_bp.route('/generate-stream', methods=['GET'])
 @_sse_token_required
 @role_required('job_seeker', 'admin')
 def generate_cv_stream(current_user):
     """
     Stream CV generation progress via Server-Sent Events (SSE).
-    The frontend connects with EventSource and receives incremental phase updates.
+    The frontend connects with EventSource and receives a phase update each time
+    the CV worker running the job moves on, then the complete (or error) event.
 
     Query params:
+      cv_job_id – follow an already queued job (see POST /jobs) instead of queuing one
       job_id   – optional job ID
       style    – CV style (default: professional)
       sections – comma-separated section names
       custom_job – URL-encoded JSON string of custom job data
+    
+    Events carry ids (<cv_job_id>:<index>), so a reconnecting EventSource resumes
+    the same job from its Last-Event-ID instead of starting a new generation.
     """
-    job_id = request.args.get('job_id')
-    style = request.args.get('style', 'professional')
-    raw_sections = request.args.get('sections', 'summary,work,education,skills')
-    sections = [s.strip() for s in raw_sections.split(',') if s.strip()]
-    raw_custom_job = request.args.get('custom_job')
-    humanize = _parse_bool(request.args.get('humanize'), default=True)
-
-    # Parse custom_job from query string if present
-    custom_job = None
-    if raw_custom_job:
-        try:
-            import urllib.parse
-            custom_job = json.loads(urllib.parse.unquote(raw_custom_job))
-        except Exception:
-            pass
-
-    def _stream():
+    job = None
+    start = 0
+    last_event_id = request.headers.get('Last-Event-ID', '')
+    if ':' in last_event_id:
+        resumed_id, _, index = last_event_id.partition(':')
+        job = _get_owned_job(current_user, resumed_id)
+        start = int(index) + 1 if index.isdigit() else 0
+    elif request.args.get('cv_job_id'):
+        job = _get_owned_job(current_user, request.args['cv_job_id'])
+        if job is None:
+            return jsonify({'success': False, 'message': 'CV job not found'}), 404
+    
+    if job is None:
+        raw_sections = request.args.get('sections', 'summary,work,education,skills')
+        data = {
+            'job_id': request.args.get('job_id', type=int),
+            'style': request.args.get('style', 'professional'),
+            'sections': [s.strip() for s in raw_sections.split(',') if s.strip()],
+            'humanize': request.args.get('humanize'),
+        }
+        
+        # Parse custom_job from query string if present
+        raw_custom_job = request.args.get('custom_job')
+        if raw_custom_job:
+            try:
+                import urllib.parse
+                data['custom_job'] = json.loads(urllib.parse.unquote(raw_custom_job))
+            except Exception:
+                pass
+        
         try:
-            # Phase 1 — Analyzing
-            yield f"data: {json.dumps({'phase': 'analyzing', 'message': 'Analyzing your profile…'})}\n\n"
-
-            user_data = _get_user_profile_data(current_user)
-
-            # Phase 2 — Decoding job
-            yield f"data: {json.dumps({'phase': 'decoding_job', 'message': 'Decoding job requirements…'})}\n\n"
-
-            job_data = None
-            if job_id:
-                try:
-                    from src.models.job import Job
-                    job = Job.query.get(int(job_id))
-                    if job:
-                        job_data = _build_comprehensive_job_data(job)
-                except Exception:
-                    pass
-            elif custom_job:
-                job_data = _normalize_custom_job_data(custom_job)
-
-            # Phase 3 — Strategizing
-            yield f"data: {json.dumps({'phase': 'strategizing', 'message': 'Planning CV strategy…'})}\n\n"
-
-            # Phase 4 — Generating (AI call happens here — blocks until done)
-            yield f"data: {json.dumps({'phase': 'generating', 'message': 'Writing your CV with AI…'})}\n\n"
-
-            cv_content = cv_service.generate_cv_content(
-                user_data=user_data,
-                job_data=job_data,
-                cv_style=style,
-                include_sections=sections,
-                humanize=humanize,
-            )
-
-            # Phase 5 — Humanizing language
-            yield f"data: {json.dumps({'phase': 'humanizing', 'message': 'Refining natural language…'})}\n\n"
-
-            # Phase 6 — Evaluating
-            yield f"data: {json.dumps({'phase': 'evaluating', 'message': 'Running ATS quality check…'})}\n\n"
-
-            # Extract quality gate metadata
-            agent_reasoning = cv_content.get('agent_reasoning')
-            ats_self_eval = (agent_reasoning or {}).get('ats_self_evaluation', {})
-
-            # Phase 7 — Complete
-            yield f"data: {json.dumps({'phase': 'complete', 'cv_data': cv_content, 'agent_reasoning': agent_reasoning, 'metadata': {'quality_gate_passed': ats_self_eval.get('passed_quality_gate', True), 'internal_revisions': ats_self_eval.get('internal_revisions', 0), 'ats_total_score': ats_self_eval.get('total_score', 0)}})}\n\n"
-
+            params = _generation_params(current_user, data, data['sections'])
         except Exception as exc:
             import traceback
             traceback.print_exc()
-            yield f"data: {json.dumps({'phase': 'error', 'message': str(exc)})}\n\n"
+            return jsonify({'success': False, 'message': f'CV generation failed: {str(exc)}'}), 500
+        
+        job, error_response = _queue_generation(current_user, 'full', params)
+        if error_response:
+            return error_response
 
     return Response(
-        stream_with_context(_stream()),
+        stream_with_context(_job_event_stream(job.id, start)),
         mimetype='text/event-stream',
         headers={
             'Cache-Control': 'no-cache',
@@ -1006,6 +1141,91 @@ def _normalize_custom_job_data(raw: dict) -> dict:
     return normalized
 
 
+MAX_MATCH_JOBS = 50
+
+
+@cv_builder_bp.route('/match-jobs', methods=['POST'])
+@token_required
+@role_required('job_seeker', 'admin')
+def match_jobs(current_user):
+    """
+    Rank many jobs as CV tailoring targets in one call
+    
+    Profile features are extracted once and scored against every job, so
+    this is cheap compared to running /generate analysis per job.
+    
+    Request body:
+    {
+        "job_ids": [1, 2, 3],      // Optional, defaults to the user's saved jobs
+        "source": "bookmarks",     // bookmarks | applications | all (when job_ids omitted)
+        "limit": 20
+    }
+    
+    Response:
+    {
+        "success": true,
+        "data": {
+            "matches": [{"job_id": 1, "relevance_score": 82, "matching_skills": [...], ...}],
+            "total": 3
+        }
+    }
+    """
+    try:
+        from sqlalchemy.orm import joinedload
+        from src.models.job import Job, JobBookmark
+        from src.models.application import Application
+        from src.services.cv.job_matcher import CVJobMatcher
+        
+        data = request.get_json(silent=True) or {}
+        limit = min(max(int(data.get('limit', 20)), 1), MAX_MATCH_JOBS)
+        
+        job_ids = data.get('job_ids')
+        if job_ids:
+            if not isinstance(job_ids, list):
+                return jsonify({'success': False, 'message': 'job_ids must be a list'}), 400
+            job_ids = [int(job_id) for job_id in job_ids][:MAX_MATCH_JOBS]
+        else:
+            source = data.get('source', 'bookmarks')
+            job_ids = []
+            if source in ('bookmarks', 'all'):
+                job_ids += [row.job_id for row in db.session.query(JobBookmark.job_id).filter(
+                    JobBookmark.user_id == current_user.id
+                ).order_by(JobBookmark.created_at.desc()).limit(MAX_MATCH_JOBS)]
+            if source in ('applications', 'all'):
+                job_ids += [row.job_id for row in db.session.query(Application.job_id).filter(
+                    Application.applicant_id == current_user.id
+                ).order_by(Application.created_at.desc()).limit(MAX_MATCH_JOBS)]
+            job_ids = list(dict.fromkeys(job_ids))[:MAX_MATCH_JOBS]
+        
+        if not job_ids:
+            return jsonify({'success': True, 'data': {'matches': [], 'total': 0}}), 200
+        
+        # One query for all jobs with the relationships the job dicts read
+        jobs = Job.query.options(
+            joinedload(Job.company), joinedload(Job.category)
+        ).filter(Job.id.in_(job_ids)).all()
+        jobs_data = [_build_comprehensive_job_data(job) for job in jobs]
+        
+        user_data = _get_user_profile_data(current_user)
+        matches = CVJobMatcher().analyze_match_batch(user_data, jobs_data)
+        
+        return jsonify({
+            'success': True,
+            'data': {
+                'matches': matches[:limit],
+                'total': len(matches)
+            }
+        }), 200
+    except (TypeError, ValueError):
+        return jsonify({'success': False, 'message': 'Invalid job_ids or limit'}), 400
+    except Exception as e:
+        print(f"[CV Builder] Match jobs error: {e}")
+        return jsonify({
+            'success': False,
+            'message': f'Failed to match jobs: {str(e)}'
+        }), 500
+
+
 @cv_builder_bp.route('/parse-job-posting', methods=['POST'])
 @token_required
 @role_required('job_seeker', 'admin')
@@ -1062,7 +1282,7 @@ Return a JSON object with these fields (use empty string "" if not found, use []
 Return ONLY the JSON object, no explanation."""
 
         # Use the CV service API client (same rate-limit-aware client)
-        response_text = cv_service.api_client.make_request_with_retry(prompt)
+        response_text = cv_service.api_client.make_request_with_retry(prompt, section='job_posting')
 
         # Parse JSON from response
         import re as re_module
@@ -1195,124 +1415,61 @@ def _get_user_profile_data(user: User) -> dict:
     """
     Gather comprehensive user profile data for CV generation.
 
-    Performance strategy:
-    - Layer 1: Redis cache with 1-hour TTL (cache key: user_profile_{user_id})
-    - Layer 2: If Redis is unavailable or cache is cold, run the DB queries and
-               populate the cache for subsequent requests.
-    - Invalidation: call invalidate_user_profile_cache(user_id) in profile-update
-      endpoints so stale data is never served.
+    Profile sections come from the shared profile graph (one database round
+    trip, cached at the profile feature version and dropped by every profile
+    write). Sections are re-sorted for the CV: current
+    and most recent entries first.
     """
-    cache_key = _profile_cache_key(user.id)
-    redis = _get_redis()
-
-    # ── Check cache ───────────────────────────────────────────────────────────
-    if redis:
-        try:
-            cached = redis.get(cache_key)
-            if cached:
-                print(f'[CV Cache] Cache HIT for user {user.id}')
-                return pickle.loads(cached)
-        except Exception as exc:
-            print(f'[CV Cache] Cache read error: {exc}')
-
-    # ── Cache miss — load from DB ─────────────────────────────────────────────
-    print(f'[CV Cache] Cache MISS for user {user.id}, querying DB')
-
-    # Use a single session scope and load all five related tables in one go
-    # by issuing the queries together before any lazy-loading can occur.
-    # (User model doesn't declare these relationships, so we use explicit
-    # filter queries. All five run within the same SQLAlchemy session which
-    # avoids repeated connection overhead.)
-    with db.session.no_autoflush:
-        # Reload the user inside this session in case it came from a different one
-        db_user = db.session.get(User, user.id)
-        if db_user is None:
-            db_user = user  # fallback
-
-        work_experiences = (
-            db.session.query(WorkExperience)
-            .filter_by(user_id=user.id)
-            .order_by(WorkExperience.is_current.desc(), WorkExperience.start_date.desc())
-            .all()
-        )
-        educations = (
-            db.session.query(Education)
-            .filter_by(user_id=user.id)
-            .order_by(Education.graduation_date.desc())
-            .all()
-        )
-        certifications = (
-            db.session.query(Certification)
-            .filter_by(user_id=user.id)
-            .order_by(Certification.issue_date.desc())
-            .all()
-        )
-        projects = (
-            db.session.query(Project)
-            .filter_by(user_id=user.id)
-            .order_by(Project.end_date.desc())
-            .all()
-        )
-        awards = (
-            db.session.query(Award)
-            .filter_by(user_id=user.id)
-            .order_by(Award.date_received.desc())
-            .all()
-        )
-        profile_references = (
-            db.session.query(Reference)
-            .filter_by(user_id=user.id)
-            .order_by(Reference.display_order)
-            .all()
-        )
+    features = profile_features.get_features(user)
+    graph = profile_graph.load_profile_graph(user, features['version'])
 
     # Base user info
     user_data = {
-        'id': db_user.id,
-        'first_name': db_user.first_name,
-        'last_name': db_user.last_name,
-        'email': db_user.email,
-        'phone': db_user.phone,
-        'location': db_user.location,
-        'bio': db_user.bio,
-        'profile_picture': db_user.profile_picture
+        'id': user.id,
+        'first_name': user.first_name,
+        'last_name': user.last_name,
+        'email': user.email,
+        'phone': user.phone,
+        'location': user.location,
+        'bio': user.bio,
+        'profile_picture': user.profile_picture
     }
 
     # Job seeker profile
-    if db_user.job_seeker_profile:
-        profile = db_user.job_seeker_profile
+    profile = graph['job_seeker_profile']
+    if profile:
         user_data['job_seeker_profile'] = {
-            'professional_title': getattr(profile, 'professional_title', None),
-            'professional_summary': getattr(profile, 'professional_summary', None),
-            'desired_position': getattr(profile, 'desired_position', None),
-            'skills': getattr(profile, 'skills', None),
-            'soft_skills': getattr(profile, 'soft_skills', None),
-            'years_of_experience': getattr(profile, 'years_of_experience', 0),
-            'education_level': getattr(profile, 'education_level', None),
-            'career_level': getattr(profile, 'career_level', None),
-            'desired_salary_min': getattr(profile, 'desired_salary_min', None),
-            'desired_salary_max': getattr(profile, 'desired_salary_max', None),
-            'salary_currency': getattr(profile, 'salary_currency', 'USD'),
-            'preferred_location': getattr(profile, 'preferred_location', None),
-            'preferred_locations': getattr(profile, 'preferred_locations', None),
-            'job_type_preference': getattr(profile, 'job_type_preference', None),
-            'job_types': getattr(profile, 'job_types', None),
-            'availability': getattr(profile, 'availability', None),
-            'willing_to_relocate': getattr(profile, 'willing_to_relocate', False),
-            'willing_to_travel': getattr(profile, 'willing_to_travel', None),
-            'work_authorization': getattr(profile, 'work_authorization', None),
-            'visa_sponsorship_required': getattr(profile, 'visa_sponsorship_required', False),
-            'notice_period': getattr(profile, 'notice_period', None),
-            'preferred_industries': getattr(profile, 'preferred_industries', None),
-            'preferred_company_size': getattr(profile, 'preferred_company_size', None),
-            'preferred_work_environment': getattr(profile, 'preferred_work_environment', None),
-            'linkedin_url': getattr(profile, 'linkedin_url', None),
-            'github_url': getattr(profile, 'github_url', None),
-            'portfolio_url': getattr(profile, 'portfolio_url', None),
-            'website_url': getattr(profile, 'website_url', None),
-            'resume_url': getattr(profile, 'resume_url', None),
-            'languages': getattr(profile, 'languages', None),
-            'certifications': getattr(profile, 'certifications', None)
+            'professional_title': profile.get('professional_title'),
+            'professional_summary': profile.get('professional_summary'),
+            'desired_position': profile.get('desired_position'),
+            'skills': profile.get('skills'),
+            'soft_skills': profile.get('soft_skills'),
+            'years_of_experience': profile.get('years_of_experience') or 0,
+            'education_level': profile.get('education_level'),
+            'career_level': profile.get('career_level'),
+            'desired_salary_min': profile.get('desired_salary_min'),
+            'desired_salary_max': profile.get('desired_salary_max'),
+            'salary_currency': profile.get('salary_currency'),
+            'preferred_location': profile.get('preferred_location'),
+            'preferred_locations': profile.get('preferred_locations'),
+            'job_type_preference': profile.get('job_type_preference'),
+            'job_types': profile.get('job_types'),
+            'availability': profile.get('availability'),
+            'willing_to_relocate': profile.get('willing_to_relocate'),
+            'willing_to_travel': profile.get('willing_to_travel'),
+            'work_authorization': profile.get('work_authorization'),
+            'visa_sponsorship_required': profile.get('visa_sponsorship_required'),
+            'notice_period': profile.get('notice_period'),
+            'preferred_industries': profile.get('preferred_industries'),
+            'preferred_company_size': profile.get('preferred_company_size'),
+            'preferred_work_environment': profile.get('preferred_work_environment'),
+            'linkedin_url': profile.get('linkedin_url'),
+            'github_url': profile.get('github_url'),
+            'portfolio_url': profile.get('portfolio_url'),
+            'website_url': profile.get('website_url'),
+            'resume_url': profile.get('resume_url'),
+            'languages': profile.get('languages'),
+            'certifications': profile.get('certifications')
         }
     else:
         user_data['job_seeker_profile'] = {
@@ -1326,19 +1483,13 @@ def _get_user_profile_data(user: User) -> dict:
             'languages': None
         }
 
-    user_data['work_experiences'] = [exp.to_dict() for exp in work_experiences]
-    user_data['educations'] = [edu.to_dict() for edu in educations]
-    user_data['certifications'] = [cert.to_dict() for cert in certifications]
-    user_data['projects'] = [proj.to_dict() for proj in projects]
-    user_data['awards'] = [award.to_dict() for award in awards]
-    user_data['references'] = [ref.to_dict() for ref in profile_references]
-
-    # ── Populate cache ────────────────────────────────────────────────────────
-    if redis:
-        try:
-            redis.setex(cache_key, 3600, pickle.dumps(user_data))
-            print(f'[CV Cache] Cached profile for user {user.id} (TTL 1h)')
-        except Exception as exc:
-            print(f'[CV Cache] Cache write error: {exc}')
+    work_experiences = profile_graph.newest_first(graph['work_experiences'], 'start_date')
+    user_data['work_experiences'] = sorted(work_experiences, key=lambda exp: not exp.get('is_current'))
+    user_data['educations'] = profile_graph.newest_first(graph['educations'], 'graduation_date')
+    user_data['certifications'] = profile_graph.newest_first(graph['certifications'], 'issue_date')
+    user_data['projects'] = profile_graph.newest_first(graph['projects'], 'end_date')
+    user_data['awards'] = profile_graph.newest_first(graph['awards'], 'date_received')
+    user_data['references'] = graph['references']
+    user_data['profile_features'] = features
 
     return user_data
@@ -6,11 +6,9 @@ import json
 import logging
 import os
 import re
+import threading
 from typing import Any, Dict, List, Optional
 
-import pdfplumber
-import pytesseract
-from PIL import Image, UnidentifiedImageError
 from flask import Blueprint, jsonify, request
 
 from src.models.user import JobSeekerProfile, db
@@ -25,7 +23,13 @@ from src.models.profile_extensions import (
     WorkExperience,
 )
 from src.routes.auth import role_required, token_required
-from src.routes.profile_extensions import _invalidate_complete_profile_cache
+from src.services import candidate_scoring, candidate_search, profile_features, profile_graph
+from src.services.cv_extraction import (
+    content_hash,
+    cv_extraction_service,
+    normalize_text as _normalize_text,
+    parsed_profile_cache,
+)
 
 try:
     from google import genai
@@ -42,6 +46,7 @@ cv_upload_bp = Blueprint('cv_upload', __name__)
 logger = logging.getLogger(__name__)
 
 MAX_UPLOAD_SIZE_BYTES = 10 * 1024 * 1024
+PARSE_CACHE_VERSION = 1  # bump when GEMINI_SYSTEM_PROMPT or the models change
 ALLOWED_EXTENSIONS = {'.pdf', '.png', '.jpg', '.jpeg', '.tiff'}
 
 GEMINI_SYSTEM_PROMPT = """
@@ -166,16 +171,6 @@ Rules:
 """.strip()
 
 
-def _normalize_text(raw_text: str) -> str:
-    text = (raw_text or "").replace("\x00", " ")
-    text = text.encode('utf-8', errors='ignore').decode('utf-8', errors='ignore')
-    text = re.sub(r'\r\n?', '\n', text)
-    text = re.sub(r'[\t\f\v]+', ' ', text)
-    text = re.sub(r'\n{3,}', '\n\n', text)
-    text = re.sub(r' {2,}', ' ', text)
-    return text.strip()
-
-
 def _extract_json_object(text: str) -> Optional[str]:
     if not text:
         return None
@@ -370,40 +365,14 @@ def _get_or_create_job_seeker_profile(current_user):
     return profile
 
 
-def _extract_text_from_pdf(file_storage) -> Dict[str, Any]:
-    pages_text: List[str] = []
-    page_count = 0
-
-    file_storage.stream.seek(0)
-    with pdfplumber.open(file_storage.stream) as pdf:
-        page_count = len(pdf.pages)
-        for page in pdf.pages:
-            page_text = page.extract_text() or ''
-            if page_text.strip():
-                pages_text.append(page_text)
-
-    merged_text = _normalize_text('\n\n'.join(pages_text))
-    return {
-        'extracted_text': merged_text,
-        'char_count': len(merged_text),
-        'pages': page_count,
-    }
-
-
-def _extract_text_from_image(file_storage) -> Dict[str, Any]:
-    file_storage.stream.seek(0)
-    with Image.open(file_storage.stream) as image:
-        extracted_text = pytesseract.image_to_string(image)
-
-    normalized = _normalize_text(extracted_text)
-    return {
-        'extracted_text': normalized,
-        'char_count': len(normalized),
-        'pages': 1,
-    }
+_gemini_client = None
+_gemini_client_key = None
+_gemini_client_lock = threading.Lock()
 
 
-def _parse_with_gemini(extracted_text: str, max_attempts: int = 2) -> Optional[Dict[str, Any]]:
+def _get_gemini_client():
+    """Process-wide Gemini client, rebuilt only when the API key changes"""
+    global _gemini_client, _gemini_client_key
     if genai is None:
         raise RuntimeError('Gemini SDK is not available on the server.')
 
@@ -411,7 +380,22 @@ def _parse_with_gemini(extracted_text: str, max_attempts: int = 2) -> Optional[D
     if not api_key:
         raise RuntimeError('GEMINI_API_KEY is not configured.')
 
-    client = genai.Client(api_key=api_key)
+    with _gemini_client_lock:
+        if _gemini_client is None or _gemini_client_key != api_key:
+            _gemini_client = genai.Client(api_key=api_key)
+            _gemini_client_key = api_key
+        return _gemini_client
+
+
+def _parse_with_gemini(extracted_text: str, max_attempts: int = 2) -> Optional[Dict[str, Any]]:
+    """Parse CV text into profile JSON; identical text (after normalization) is
+    answered from the parsed profile cache"""
+    cache_key = content_hash(f'{PARSE_CACHE_VERSION}\n{extracted_text}')
+    cached = parsed_profile_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    client = _get_gemini_client()
 
     safe_text = _truncate_for_parse(extracted_text)
     model_candidates = [
@@ -434,6 +418,7 @@ CV TEXT:
                 response_text = _response_to_text(response)
                 parsed_json = _parse_model_json(response_text)
                 if parsed_json and isinstance(parsed_json, dict):
+                    parsed_profile_cache.put(cache_key, parsed_json)
                     return parsed_json
                 last_error = f"Model {model_name} returned unparsable response"
             except Exception as model_error:
@@ -458,6 +443,8 @@ CV TEXT:
 @token_required
 @role_required('job_seeker')
 def cv_extract(current_user):
+    """Queue text extraction of an uploaded CV; poll the returned status_url for the text.
+    Without shared (Redis) status the text is extracted and returned by this request."""
     try:
         uploaded = request.files.get('cv_file')
         if not uploaded:
@@ -474,21 +461,52 @@ def cv_extract(current_user):
         if extension not in ALLOWED_EXTENSIONS:
             return jsonify({'error': 'Unsupported file format. Use PDF, PNG, JPG, JPEG, or TIFF.'}), 400
 
-        if extension == '.pdf':
-            payload = _extract_text_from_pdf(uploaded)
-        else:
-            payload = _extract_text_from_image(uploaded)
+        uploaded.stream.seek(0)
+        data = uploaded.stream.read()
+        if len(data) > MAX_UPLOAD_SIZE_BYTES:
+            return jsonify({'error': 'File size exceeds 10MB limit.'}), 413
 
-        if not payload['extracted_text']:
-            return jsonify({'error': 'No readable text found in the uploaded CV.'}), 422
+        if not cv_extraction_service.shares_status():
+            return _extraction_response(None, cv_extraction_service.extract_now(current_user.id, data, extension))
 
-        return jsonify(payload), 200
-    except UnidentifiedImageError:
-        return jsonify({'error': 'Could not read image file. Please upload a valid image.'}), 400
+        extraction_id = cv_extraction_service.submit(current_user.id, data, extension)
+        return jsonify({
+            'extraction_id': extraction_id,
+            'status': 'processing',
+            'status_url': f'/api/profile/cv-extract/{extraction_id}',
+        }), 202
     except Exception as e:
         return jsonify({'error': 'Failed to extract text from CV.', 'details': str(e)}), 500
 
 
+@cv_upload_bp.route('/cv-extract/<extraction_id>', methods=['GET'])
+@token_required
+@role_required('job_seeker')
+def cv_extract_status(current_user, extraction_id):
+    """Extraction result: 202 while processing, then the extracted text or the extraction error"""
+    entry = cv_extraction_service.status(extraction_id, current_user.id)
+    if entry is None:
+        return jsonify({'error': 'Extraction not found or expired. Please upload the CV again.'}), 404
+
+    if entry['status'] == 'processing':
+        return jsonify({'extraction_id': extraction_id, 'status': 'processing'}), 202
+    return _extraction_response(extraction_id, entry)
+
+
+def _extraction_response(extraction_id, entry):
+    """The extracted text of a finished extraction, or its error"""
+    if entry['status'] == 'succeeded':
+        body = dict(entry['result'], status='succeeded')
+        if extraction_id:
+            body['extraction_id'] = extraction_id
+        return jsonify(body), 200
+
+    body = {'error': entry.get('error') or 'Failed to extract text from CV.', 'status': 'failed'}
+    if entry.get('details'):
+        body['details'] = entry['details']
+    return jsonify(body), entry.get('status_code', 500)
+
+
 @cv_upload_bp.route('/cv-parse', methods=['POST'])
 @token_required
 @role_required('job_seeker')
@@ -872,8 +890,12 @@ def cv_autofill(current_user):
 
         current_user.updated_at = datetime.utcnow()
         profile.updated_at = datetime.utcnow()
+        if profile_changed:
+            candidate_scoring.rescore_profile(current_user.id, profile)
+        candidate_search.index_profile(current_user, profile)
+        profile_features.refresh_features(current_user, profile)
         db.session.commit()
-        _invalidate_complete_profile_cache(current_user.id)
+        profile_graph.invalidate(current_user.id)
 
         unique_filled = sorted(set(filled_sections))
         unique_skipped = sorted(set(skipped_sections) - set(unique_filled))
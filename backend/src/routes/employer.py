@@ -2,11 +2,13 @@ from flask import Blueprint, request, jsonify
 from datetime import datetime, timedelta
 from sqlalchemy import or_, and_, desc, func
 
-from src.models.user import db, User
+from src.models.user import db, User, JobSeekerProfile
 from src.models.job import Job, JobCategory
 from src.models.company import Company
 from src.models.application import Application
+from src.models.candidate_search import CandidateSkillPosting
 from src.routes.auth import token_required, role_required
+from src.services import candidate_scoring, candidate_search
 
 employer_bp = Blueprint('employer', __name__)
 
@@ -346,7 +348,7 @@ def bulk_application_action(current_user):
 @token_required
 @role_required('employer', 'admin')
 def get_top_candidates(current_user):
-    """Get top candidates based on application scores and profiles"""
+    """Get top candidates ranked by stored application match scores"""
     try:
         page = request.args.get('page', 1, type=int)
         per_page = min(request.args.get('per_page', 20, type=int), 100)
@@ -356,31 +358,39 @@ def get_top_candidates(current_user):
         location = request.args.get('location')
         
         # Base query for applications to employer's jobs
+        query = db.session.query(Application).join(Job).filter(
+            Application.status.in_(candidate_scoring.ACTIVE_APPLICATION_STATUSES)
+        )
         if current_user.role == 'employer':
-            query = db.session.query(Application).join(Job).filter(
-                Job.posted_by == current_user.id,
-                Application.status.in_(['submitted', 'under_review', 'shortlisted'])
-            )
-        else:
-            query = db.session.query(Application).join(Job).filter(
-                Application.status.in_(['submitted', 'under_review', 'shortlisted'])
-            )
+            query = query.filter(Job.posted_by == current_user.id)
         
         # Apply filters
         if job_id:
             query = query.filter(Application.job_id == job_id)
         
+        if skills or experience_level or location:
+            query = query.join(JobSeekerProfile, JobSeekerProfile.user_id == Application.applicant_id)
+        
         if skills:
-            skill_list = [skill.strip() for skill in skills.split(',')]
-            # This would require a more sophisticated search in a real implementation
-            # For now, we'll filter by applicants who have job seeker profiles
-            query = query.join(User).filter(User.id == Application.applicant_id)
-        
-        # Order by rating and creation date (temporary fix for missing match_score column)
-        query = query.order_by(
-            desc(Application.rating),
-            desc(Application.created_at)
-        )
+            # Normalized skill postings (candidate search index), not a LIKE scan of the JSON text
+            skill_list = candidate_scoring.normalize_skills(skills)
+            if skill_list:
+                query = query.filter(Application.applicant_id.in_(
+                    db.session.query(CandidateSkillPosting.user_id).filter(CandidateSkillPosting.skill.in_(skill_list))
+                ))
+        
+        if experience_level == 'entry':
+            query = query.filter(JobSeekerProfile.years_of_experience <= 2)
+        elif experience_level == 'mid':
+            query = query.filter(JobSeekerProfile.years_of_experience.between(3, 7))
+        elif experience_level == 'senior':
+            query = query.filter(JobSeekerProfile.years_of_experience >= 8)
+        
+        if location:
+            query = query.filter(JobSeekerProfile.preferred_location.ilike(f'%{location}%'))
+        
+        # Order by stored match score; applicant, profile and job are eager-loaded
+        query = candidate_scoring.top_candidates_query(query)
         
         # Paginate
         applications = query.paginate(page=page, per_page=per_page, error_out=False)
@@ -397,7 +407,7 @@ def get_top_candidates(current_user):
                 'job_id': application.job_id,
                 'status': application.status,
                 'rating': application.rating or 0,
-                'match_score': getattr(application, 'match_score', 0) or 0,  # Temporary fallback
+                'match_score': application.match_score or 0,
                 'applied_at': application.created_at.isoformat(),
                 'resume_url': application.resume_url,
                 'cover_letter': application.cover_letter,
@@ -407,13 +417,14 @@ def get_top_candidates(current_user):
             # Add job seeker profile information
             if application.applicant.job_seeker_profile:
                 profile = application.applicant.job_seeker_profile
+                years = profile.years_of_experience or 0
                 candidate_data['profile'] = {
                     'title': profile.desired_position,
-                    'experience_level': 'mid' if profile.years_of_experience >= 3 else 'entry' if profile.years_of_experience >= 1 else 'entry',
-                    'skills': profile.skills.split(',') if profile.skills else [],
+                    'experience_level': 'senior' if years >= 8 else 'mid' if years >= 3 else 'entry',
+                    'skills': sorted(candidate_scoring.normalize_skills(profile.skills)),
                     'location': profile.preferred_location,
-                    'summary': None,  # Not available in current model
-                    'years_experience': profile.years_of_experience
+                    'summary': profile.professional_summary,
+                    'years_experience': years
                 }
             
             candidates.append(candidate_data)
@@ -437,7 +448,7 @@ def get_top_candidates(current_user):
 @token_required
 @role_required('employer', 'admin')
 def search_candidates(current_user):
-    """Search for candidates based on various criteria"""
+    """Search for candidates with relevance ranking over the candidate search index"""
     try:
         page = request.args.get('page', 1, type=int)
         per_page = min(request.args.get('per_page', 20, type=int), 100)
@@ -447,57 +458,25 @@ def search_candidates(current_user):
         location = request.args.get('location')
         availability = request.args.get('availability')
         
-        # Start with users who have job seeker profiles
-        from src.models.user import JobSeekerProfile
-        query = db.session.query(User).join(JobSeekerProfile).filter(
-            User.role == 'job_seeker',
-            User.is_active == True,
-            JobSeekerProfile.profile_visibility.in_(['public', 'employers_only'])  # Only show public profiles
-        )
-        
-        # Apply search filters
-        if search:
-            query = query.filter(
-                or_(
-                    User.first_name.ilike(f'%{search}%'),
-                    User.last_name.ilike(f'%{search}%'),
-                    JobSeekerProfile.desired_position.ilike(f'%{search}%'),
-                    JobSeekerProfile.skills.ilike(f'%{search}%')
-                )
-            )
-        
-        if skills:
-            skill_terms = [skill.strip() for skill in skills.split(',')]
-            skill_filters = [JobSeekerProfile.skills.ilike(f'%{skill}%') for skill in skill_terms]
-            query = query.filter(or_(*skill_filters))
-        
-        if experience_level:
-            # Map experience level to years of experience
-            if experience_level == 'entry':
-                query = query.filter(JobSeekerProfile.years_of_experience <= 2)
-            elif experience_level == 'mid':
-                query = query.filter(JobSeekerProfile.years_of_experience.between(3, 7))
-            elif experience_level == 'senior':
-                query = query.filter(JobSeekerProfile.years_of_experience >= 8)
-        
-        if location:
-            query = query.filter(JobSeekerProfile.preferred_location.ilike(f'%{location}%'))
-        
-        if availability:
-            query = query.filter(JobSeekerProfile.availability == availability)
-        
-        # Order by profile completeness and last activity
-        query = query.order_by(
-            desc(JobSeekerProfile.updated_at),
-            desc(User.last_login)
+        skill_terms = [skill.strip() for skill in skills.split(',') if skill.strip()] if skills else []
+        min_years = request.args.get('min_years', type=int)
+        
+        # Ranked search over the candidate search index (facets are indexed columns)
+        candidates = candidate_search.search_candidates(
+            search=search,
+            skills=skill_terms,
+            experience_level=experience_level,
+            location=location,
+            availability=availability,
+            min_years=min_years,
+            page=page,
+            per_page=per_page
         )
         
-        # Paginate
-        candidates = query.paginate(page=page, per_page=per_page, error_out=False)
-        
         # Format response
         candidate_list = []
-        for user in candidates.items:
+        for entry, rank in candidates.items:
+            user = entry.user
             profile = user.job_seeker_profile
             candidate_data = {
                 'id': user.id,
@@ -505,16 +484,17 @@ def search_candidates(current_user):
                 'email': user.email,
                 'profile_picture': user.profile_picture,
                 'title': profile.desired_position,
-                'experience_level': 'senior' if profile.years_of_experience >= 8 else 'mid' if profile.years_of_experience >= 3 else 'entry',
+                'experience_level': entry.experience_band,
                 'years_experience': profile.years_of_experience,
                 'location': profile.preferred_location,
-                'skills': profile.skills.split(',') if profile.skills else [],
-                'summary': None,  # Not available in current model
+                'skills': sorted(candidate_scoring.normalize_skills(profile.skills)),
+                'summary': profile.professional_summary,
                 'availability_status': profile.availability,
                 'expected_salary_min': profile.desired_salary_min,
                 'expected_salary_max': profile.desired_salary_max,
                 'last_active': user.last_login.isoformat() if user.last_login else None,
-                'profile_updated': profile.updated_at.isoformat()
+                'profile_updated': profile.updated_at.isoformat(),
+                'relevance': round(float(rank or 0), 3)
             }
             candidate_list.append(candidate_data)
         
@@ -12,6 +12,7 @@ from src.routes.auth import token_required, role_required
 from src.utils.cache import cached, get_cached_featured_jobs, get_cached_job_categories, invalidate_job_caches
 from src.utils.db_utils import db_transaction, safe_db_operation
 from src.services.job_notification_service import job_notification_service
+from src.services import candidate_scoring
 
 job_bp = Blueprint('job', __name__)
 
@@ -733,6 +734,10 @@ def update_job(current_user, job_id):
             else:
                 return jsonify({'error': 'Invalid category'}), 400
         
+        # Keep stored application match scores in sync with scoring fields
+        if candidate_scoring.JOB_SCORING_FIELDS & set(data):
+            candidate_scoring.rescore_job(job)
+        
         job.updated_at = datetime.utcnow()
         db.session.commit()
         
@@ -12,6 +12,7 @@ from src.models.job import Job, JobAlert
 from src.routes.auth import token_required, role_required
 from src.services.notification_templates import EnhancedNotificationService
 from src.services.email_service import email_service
+from src.services.conversations import record_message
 
 job_alerts_bp = Blueprint('job_alerts', __name__)
 
@@ -227,12 +228,13 @@ def send_message_notification(current_user):
             sender_id=current_user.id,
             recipient_id=data['recipient_id'],
             subject=data['subject'],
-            content=data['content'],
+            message=data['content'],
             created_at=datetime.utcnow()
         )
         
         db.session.add(message)
         db.session.flush()
+        record_message(message)
         
         # Send notification with beautiful template
         success = enhanced_notification_service.send_new_message_notification(
@@ -1,12 +1,27 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, current_app, request, jsonify, stream_with_context
 from datetime import datetime, timedelta
+from functools import wraps
 from sqlalchemy import desc, and_, or_
+import json
+import jwt
+import queue
+import time
 
-from src.models.user import db
+from src.models.user import db, User
 from src.models.notification import Notification, Message
 from src.models.job import Job
 from src.models.application import Application
 from src.routes.auth import token_required
+from src.services.conversations import conversation_page, mark_read, record_message
+from src.services.notification_stream import notification_hub, unread_counter
+from src.utils.cache import cache
+
+# Seconds between keep-alive comments, and before a stream is closed so the
+# browser reconnects (EventSource does so on its own). Streams are served by the
+# gevent workers of the stream service (gunicorn.stream.conf.py); the duration
+# stays under the 120s gunicorn timeout in case one lands on a sync worker.
+STREAM_HEARTBEAT_INTERVAL = 20
+STREAM_MAX_DURATION = 90
 
 notification_bp = Blueprint('notification', __name__)
 
@@ -67,9 +82,7 @@ def get_notifications(current_user):
                 'has_next': notifications.has_next,
                 'has_prev': notifications.has_prev
             },
-            'unread_count': Notification.query.filter_by(
-                user_id=current_user.id, is_read=False
-            ).count()
+            'unread_count': unread_counter.get(current_user.id)
         }), 200
         
     except Exception as e:
@@ -270,17 +283,90 @@ def bulk_delete_notifications(current_user):
 def get_unread_count(current_user):
     """Get unread notification count"""
     try:
-        count = Notification.query.filter_by(
-            user_id=current_user.id, is_read=False
-        ).count()
-        
         return jsonify({
-            'unread_count': count
+            'unread_count': unread_counter.get(current_user.id)
         }), 200
         
     except Exception as e:
         return jsonify({'error': 'Failed to get unread count', 'details': str(e)}), 500
 
+def _stream_token_required(f):
+    """Like @token_required but also accepts the token as ?token= (EventSource cannot send headers)"""
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        token = None
+        auth_header = request.headers.get('Authorization', '')
+        if auth_header.startswith('Bearer '):
+            token = auth_header.split(' ', 1)[1]
+        if not token:
+            token = request.args.get('token')
+        if not token:
+            return jsonify({'error': 'Token is missing', 'message': 'Authorization header is required'}), 401
+        try:
+            data = jwt.decode(token, current_app.config['SECRET_KEY'], algorithms=['HS256'])
+            current_user = User.query.get(data['user_id'])
+            if not current_user or not current_user.is_active:
+                return jsonify({'error': 'Invalid token', 'message': 'User not found'}), 401
+        except jwt.ExpiredSignatureError:
+            return jsonify({'error': 'Token has expired', 'message': 'Please login again'}), 401
+        except jwt.InvalidTokenError:
+            return jsonify({'error': 'Invalid token', 'message': 'Token validation failed'}), 401
+        return f(current_user, *args, **kwargs)
+    return decorated
+
+@notification_bp.route('/notifications/stream', methods=['GET'])
+@_stream_token_required
+def stream_notifications(current_user):
+    """
+    Push new notifications and unread-count changes via Server-Sent Events (SSE).
+    Sends the current unread count first, then `notification` and `unread_count`
+    events as they are committed, with keep-alive comments in between.
+    """
+    user_id = current_user.id
+
+    def _event(payload):
+        if payload.get('unread_count') is None:
+            payload = {**payload, 'unread_count': unread_counter.get(user_id)}
+        return f"event: {payload['event']}\ndata: {json.dumps(payload, default=str)}\n\n"
+
+    def _stream():
+        subscription = notification_hub.subscribe(user_id)
+        try:
+            yield "retry: 3000\n\n"
+            last_count = unread_counter.get(user_id)
+            yield _event({'event': 'unread_count', 'unread_count': last_count, 'delta': 0})
+            deadline = time.monotonic() + STREAM_MAX_DURATION
+            while time.monotonic() < deadline:
+                # Do not hold a database connection while waiting for events
+                db.session.remove()
+                try:
+                    payload = subscription.get(timeout=STREAM_HEARTBEAT_INTERVAL)
+                except queue.Empty:
+                    if not cache.enabled:
+                        # Without Redis, changes made in other processes only show up in a recount
+                        count = unread_counter.get(user_id)
+                        if count != last_count:
+                            last_count = count
+                            yield _event({'event': 'unread_count', 'unread_count': count, 'delta': 0})
+                            continue
+                    yield ": keep-alive\n\n"
+                    continue
+                if payload.get('unread_count') is not None:
+                    last_count = payload['unread_count']
+                yield _event(payload)
+        finally:
+            notification_hub.unsubscribe(user_id, subscription)
+            db.session.remove()
+
+    return Response(
+        stream_with_context(_stream()),
+        mimetype='text/event-stream',
+        headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no',
+        }
+    )
+
 @notification_bp.route('/messages', methods=['GET'])
 @token_required
 def get_messages(current_user):
@@ -375,6 +461,7 @@ def send_message(current_user):
         
         db.session.add(message)
         db.session.flush()  # Get message ID
+        record_message(message)
         
         # Create notification for recipient
         notification = Notification(
@@ -410,7 +497,8 @@ def mark_message_read(current_user, message_id):
         if not message:
             return jsonify({'error': 'Message not found'}), 404
         
-        message.mark_as_read()
+        mark_read(message)
+        db.session.commit()
         
         return jsonify({
             'message': 'Message marked as read',
@@ -418,6 +506,7 @@ def mark_message_read(current_user, message_id):
         }), 200
         
     except Exception as e:
+        db.session.rollback()
         return jsonify({'error': 'Failed to mark message as read', 'details': str(e)}), 500
 
 @notification_bp.route('/conversations', methods=['GET'])
@@ -425,65 +514,30 @@ def mark_message_read(current_user, message_id):
 def get_conversations(current_user):
     """Get conversation list for current user"""
     try:
-        # Get unique conversations (latest message from each conversation)
-        subquery = db.session.query(
-            Message.id,
-            Message.sender_id,
-            Message.recipient_id,
-            Message.subject,
-            Message.message,
-            Message.is_read,
-            Message.created_at,
-            db.case(
-                (Message.sender_id == current_user.id, Message.recipient_id),
-                else_=Message.sender_id
-            ).label('other_user_id')
-        ).filter(
-            or_(Message.sender_id == current_user.id, Message.recipient_id == current_user.id)
-        ).subquery()
-        
-        # Get latest message for each conversation
-        latest_messages = db.session.query(
-            subquery.c.other_user_id,
-            db.func.max(subquery.c.created_at).label('latest_time')
-        ).group_by(subquery.c.other_user_id).subquery()
+        page = request.args.get('page', 1, type=int)
+        per_page = min(request.args.get('per_page', 50, type=int), 100)
         
-        # Join to get full message details
-        conversations = db.session.query(Message).join(
-            latest_messages,
-            and_(
-                or_(
-                    and_(Message.sender_id == current_user.id, Message.recipient_id == latest_messages.c.other_user_id),
-                    and_(Message.sender_id == latest_messages.c.other_user_id, Message.recipient_id == current_user.id)
-                ),
-                Message.created_at == latest_messages.c.latest_time
-            )
-        ).order_by(desc(Message.created_at)).all()
+        conversations = conversation_page(current_user.id, page, per_page)
         
         conversation_list = []
-        for message in conversations:
-            # Determine the other user in the conversation
-            other_user = message.sender if message.recipient_id == current_user.id else message.recipient
-            
-            # Count unread messages in this conversation
-            unread_count = Message.query.filter(
-                and_(
-                    Message.sender_id == other_user.id,
-                    Message.recipient_id == current_user.id,
-                    Message.is_read == False
-                )
-            ).count()
-            
-            conversation_data = {
+        for conversation, other_user, latest_message in conversations.items:
+            conversation_list.append({
                 'other_user': other_user.to_dict(),
-                'latest_message': message.to_dict(for_user_id=current_user.id),
-                'unread_count': unread_count
-            }
-            
-            conversation_list.append(conversation_data)
+                'latest_message': latest_message.to_dict(for_user_id=current_user.id) if latest_message else None,
+                'unread_count': conversation.unread_for(current_user.id),
+                'last_activity': conversation.last_activity.isoformat()
+            })
         
         return jsonify({
-            'conversations': conversation_list
+            'conversations': conversation_list,
+            'pagination': {
+                'page': page,
+                'per_page': per_page,
+                'total': conversations.total,
+                'pages': conversations.pages,
+                'has_next': conversations.has_next,
+                'has_prev': conversations.has_prev
+            }
         }), 200
         
     except Exception as e:
@@ -4,111 +4,25 @@ Provides PDF export, text generation, keyword suggestions, and profile tips
 """
 from flask import Blueprint, jsonify, request, send_file
 from src.models.user import User, db
-from src.models.profile_extensions import (
-    WorkExperience, Education, Certification, Project,
-    Award, Language, VolunteerExperience, ProfessionalMembership
-)
 from src.routes.auth import token_required, role_required
-from sqlalchemy import text
+from src.services import profile_features, profile_graph
 from datetime import datetime
 import json
 import io
 from collections import Counter
-import re
 
 profile_export_bp = Blueprint('profile_export', __name__)
 
 
 # ==================== KEYWORD OPTIMIZATION ====================
 
-def extract_keywords_from_text(text):
-    """Extract potential keywords from text"""
-    if not text:
-        return []
-    
-    # Remove common words
-    stop_words = {'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 
-                  'of', 'with', 'by', 'from', 'as', 'is', 'was', 'were', 'been', 'be',
-                  'have', 'has', 'had', 'do', 'does', 'did', 'will', 'would', 'could',
-                  'should', 'may', 'might', 'must', 'can', 'this', 'that', 'these', 'those'}
-    
-    # Extract words (alphanumeric + common tech chars)
-    words = re.findall(r'\b[a-zA-Z][a-zA-Z0-9+#\-\.]*\b', text.lower())
-    keywords = [word for word in words if word not in stop_words and len(word) > 2]
-    
-    return keywords
-
-
-def parse_list_field(value):
-    """Parse a list-like field that may be an array, JSON string, or CSV string."""
-    if not value:
-        return []
-
-    if isinstance(value, list):
-        return [str(item).strip() for item in value if str(item).strip()]
-
-    if isinstance(value, str):
-        raw = value.strip()
-        if not raw:
-            return []
-
-        # Try JSON first
-        try:
-            parsed = json.loads(raw)
-            if isinstance(parsed, list):
-                return [str(item).strip() for item in parsed if str(item).strip()]
-            if isinstance(parsed, str) and parsed.strip():
-                return [s.strip() for s in parsed.split(',') if s.strip()]
-        except Exception:
-            pass
-
-        # Fallback: comma-separated text
-        return [s.strip() for s in raw.split(',') if s.strip()]
-
-    return []
-
-
 def analyze_profile_keywords(user):
     """Analyze profile and suggest keywords for optimization"""
     try:
-        all_text = []
-        
-        # Collect text from all profile sections
-        if user.bio:
-            all_text.append(user.bio)
-        
-        if user.job_seeker_profile:
-            profile = user.job_seeker_profile
-            if profile.professional_summary:
-                all_text.append(profile.professional_summary)
-            all_text.extend(parse_list_field(profile.skills))
-            all_text.extend(parse_list_field(profile.technical_skills))
-            all_text.extend(parse_list_field(profile.soft_skills))
-        
-        # Work experience
-        for exp in user.work_experiences.all():
-            if exp.description:
-                all_text.append(exp.description)
-            if exp.key_responsibilities:
-                try:
-                    resp = json.loads(exp.key_responsibilities)
-                    all_text.extend(resp)
-                except:
-                    pass
-            if exp.achievements:
-                try:
-                    ach = json.loads(exp.achievements)
-                    all_text.extend(ach)
-                except:
-                    pass
-        
-        # Extract and count keywords
-        combined_text = ' '.join(all_text)
-        keywords = extract_keywords_from_text(combined_text)
-        keyword_counts = Counter(keywords)
+        features = profile_features.get_features(user)
         
         # Get top keywords
-        top_keywords = keyword_counts.most_common(20)
+        top_keywords = Counter(features['keyword_bag']).most_common(20)
         
         # Industry-specific keyword suggestions based on profile
         industry_keywords = {
@@ -132,8 +46,8 @@ def analyze_profile_keywords(user):
         return {
             'current_keywords': [{'keyword': k, 'count': c} for k, c in top_keywords],
             'suggested_keywords': suggested_keywords[:10],
-            'keyword_density': len(set(keywords)),
-            'total_words': len(combined_text.split())
+            'keyword_density': features['distinct_keywords'],
+            'total_words': features['total_words']
         }
         
     except Exception as e:
@@ -156,108 +70,8 @@ def get_keywords_analysis(current_user):
 
 def calculate_comprehensive_completeness(user):
     """Calculate detailed profile completeness"""
-    sections = {
-        'basic_info': 0,
-        'professional_summary': 0,
-        'work_experience': 0,
-        'education': 0,
-        'skills': 0,
-        'certifications': 0,
-        'projects': 0,
-        'professional_links': 0,
-        'preferences': 0,
-        'additional': 0
-    }
-    
-    weights = {
-        'basic_info': 15,
-        'professional_summary': 10,
-        'work_experience': 20,
-        'education': 15,
-        'skills': 15,
-        'certifications': 5,
-        'projects': 5,
-        'professional_links': 5,
-        'preferences': 5,
-        'additional': 5
-    }
-    
-    # ── One round-trip to fetch ALL counts ───────────────────────────────────
-    row = db.session.execute(text("""
-        SELECT
-            (SELECT COUNT(*) FROM work_experiences        WHERE user_id=:uid) AS work,
-            (SELECT COUNT(*) FROM educations              WHERE user_id=:uid) AS edu,
-            (SELECT COUNT(*) FROM certifications          WHERE user_id=:uid) AS cert,
-            (SELECT COUNT(*) FROM projects                WHERE user_id=:uid) AS proj,
-            (SELECT COUNT(*) FROM awards                  WHERE user_id=:uid) AS award,
-            (SELECT COUNT(*) FROM languages               WHERE user_id=:uid) AS lang,
-            (SELECT COUNT(*) FROM volunteer_experiences   WHERE user_id=:uid) AS volunteer,
-            (SELECT COUNT(*) FROM professional_memberships WHERE user_id=:uid) AS membership
-    """), {'uid': user.id}).fetchone()
-    exp_count, edu_count, cert_count, proj_count = row[0], row[1], row[2], row[3]
-    additional_count = row[4] + row[5] + row[6] + row[7]
-
-    # Basic info (15%)
-    basic_fields = [user.first_name, user.last_name, user.email, user.phone, user.location]
-    sections['basic_info'] = sum(1 for f in basic_fields if f) / len(basic_fields)
-    
-    if user.job_seeker_profile:
-        profile = user.job_seeker_profile
-        
-        # Professional summary (10%)
-        if profile.professional_title and profile.professional_summary:
-            sections['professional_summary'] = 1.0
-        elif profile.professional_title or profile.professional_summary:
-            sections['professional_summary'] = 0.5
-        
-        # Skills (15%)
-        combined_skills = []
-        combined_skills.extend(parse_list_field(profile.skills))
-        combined_skills.extend(parse_list_field(profile.technical_skills))
-        combined_skills.extend(parse_list_field(profile.soft_skills))
-        unique_skills = list({skill.lower(): skill for skill in combined_skills}.values())
-
-        if len(unique_skills) >= 5:
-            sections['skills'] = 1.0
-        elif len(unique_skills) > 0:
-            sections['skills'] = 0.5
-        
-        # Professional links (5%)
-        links = [profile.resume_url, profile.linkedin_url, profile.portfolio_url, profile.github_url]
-        sections['professional_links'] = sum(1 for l in links if l) / len(links)
-        
-        # Preferences (5%)
-        prefs = [profile.desired_position, profile.preferred_location, profile.job_type_preference, 
-                 profile.desired_salary_min, profile.availability]
-        sections['preferences'] = sum(1 for p in prefs if p) / len(prefs)
-    
-    # Work experience (20%)
-    if exp_count >= 3:
-        sections['work_experience'] = 1.0
-    elif exp_count >= 1:
-        sections['work_experience'] = exp_count / 3
-    
-    # Education (15%)
-    if edu_count >= 1:
-        sections['education'] = 1.0
-    
-    # Certifications (5%)
-    if cert_count >= 2:
-        sections['certifications'] = 1.0
-    elif cert_count == 1:
-        sections['certifications'] = 0.5
-    
-    # Projects (5%)
-    if proj_count >= 2:
-        sections['projects'] = 1.0
-    elif proj_count == 1:
-        sections['projects'] = 0.5
-    
-    # Additional (5%) - languages, awards, volunteer, memberships
-    if additional_count >= 3:
-        sections['additional'] = 1.0
-    elif additional_count > 0:
-        sections['additional'] = additional_count / 3
+    weights = profile_features.COMPLETENESS_WEIGHTS
+    sections = profile_features.get_features(user)['completeness_sections']
     
     # Calculate weighted total
     total_score = sum(sections[section] * weights[section] for section in sections)
@@ -300,16 +114,24 @@ def get_completeness_analysis(current_user):
 
 # ==================== TEXT EXPORT ====================
 
+def _month_year(value):
+    """'Jan 2024' for a serialized ISO date"""
+    parsed = profile_graph.parse_date(value)
+    return parsed.strftime('%b %Y') if parsed else ''
+
+
 def generate_text_profile(user):
     """Generate text version of profile"""
+    graph = profile_graph.get_profile_graph(user)
+    profile = graph['job_seeker_profile']
     lines = []
     
     # Header
     lines.append("=" * 80)
     lines.append(f"{user.first_name} {user.last_name}".center(80))
     
-    if user.job_seeker_profile and user.job_seeker_profile.professional_title:
-        lines.append(user.job_seeker_profile.professional_title.center(80))
+    if profile and profile.get('professional_title'):
+        lines.append(profile['professional_title'].center(80))
     
     lines.append("=" * 80)
     lines.append("")
@@ -324,135 +146,125 @@ def generate_text_profile(user):
         lines.append(f"Location: {user.location}")
     
     # Professional links
-    if user.job_seeker_profile:
-        profile = user.job_seeker_profile
-        if profile.linkedin_url:
-            lines.append(f"LinkedIn: {profile.linkedin_url}")
-        if profile.github_url:
-            lines.append(f"GitHub: {profile.github_url}")
-        if profile.portfolio_url:
-            lines.append(f"Portfolio: {profile.portfolio_url}")
-        if profile.website_url:
-            lines.append(f"Website: {profile.website_url}")
+    if profile:
+        if profile.get('linkedin_url'):
+            lines.append(f"LinkedIn: {profile['linkedin_url']}")
+        if profile.get('github_url'):
+            lines.append(f"GitHub: {profile['github_url']}")
+        if profile.get('portfolio_url'):
+            lines.append(f"Portfolio: {profile['portfolio_url']}")
+        if profile.get('website_url'):
+            lines.append(f"Website: {profile['website_url']}")
     
     lines.append("")
     
     # Professional Summary
-    if user.job_seeker_profile and user.job_seeker_profile.professional_summary:
+    if profile and profile.get('professional_summary'):
         lines.append("PROFESSIONAL SUMMARY")
         lines.append("-" * 80)
-        lines.append(user.job_seeker_profile.professional_summary)
+        lines.append(profile['professional_summary'])
         lines.append("")
     
     # Work Experience
-    work_experiences = user.work_experiences.order_by(WorkExperience.start_date.desc()).all()
+    work_experiences = profile_graph.newest_first(graph['work_experiences'], 'start_date')
     if work_experiences:
         lines.append("WORK EXPERIENCE")
         lines.append("-" * 80)
         for exp in work_experiences:
-            lines.append(f"\n{exp.job_title} at {exp.company_name}")
-            date_str = exp.start_date.strftime('%b %Y') if exp.start_date else ''
-            if exp.is_current:
+            lines.append(f"\n{exp['job_title']} at {exp['company_name']}")
+            date_str = _month_year(exp.get('start_date'))
+            if exp.get('is_current'):
                 date_str += " - Present"
-            elif exp.end_date:
-                date_str += f" - {exp.end_date.strftime('%b %Y')}"
-            lines.append(f"{date_str} | {exp.company_location or ''}")
+            elif exp.get('end_date'):
+                date_str += f" - {_month_year(exp['end_date'])}"
+            lines.append(f"{date_str} | {exp.get('company_location') or ''}")
             
-            if exp.description:
-                lines.append(f"\n{exp.description}")
+            if exp.get('description'):
+                lines.append(f"\n{exp['description']}")
             
-            if exp.key_responsibilities:
-                try:
-                    responsibilities = json.loads(exp.key_responsibilities)
-                    lines.append("\nKey Responsibilities:")
-                    for resp in responsibilities:
-                        lines.append(f"  • {resp}")
-                except:
-                    pass
+            if exp.get('key_responsibilities'):
+                lines.append("\nKey Responsibilities:")
+                for resp in exp['key_responsibilities']:
+                    lines.append(f"  • {resp}")
             
-            if exp.achievements:
-                try:
-                    achievements = json.loads(exp.achievements)
-                    lines.append("\nAchievements:")
-                    for ach in achievements:
-                        lines.append(f"  • {ach}")
-                except:
-                    pass
+            if exp.get('achievements'):
+                lines.append("\nAchievements:")
+                for ach in exp['achievements']:
+                    lines.append(f"  • {ach}")
         lines.append("")
     
     # Education
-    educations = user.educations.order_by(Education.graduation_date.desc()).all()
+    educations = profile_graph.newest_first(graph['educations'], 'graduation_date')
     if educations:
         lines.append("EDUCATION")
         lines.append("-" * 80)
         for edu in educations:
-            lines.append(f"\n{edu.degree_title or edu.degree_type}")
-            lines.append(f"{edu.institution_name}")
-            if edu.graduation_date:
-                lines.append(f"Graduated: {edu.graduation_date.strftime('%b %Y')}")
-            if edu.gpa:
-                lines.append(f"GPA: {edu.gpa}/{edu.gpa_scale}")
-            if edu.honors:
-                lines.append(f"Honors: {edu.honors}")
+            lines.append(f"\n{edu.get('degree_title') or edu.get('degree_type')}")
+            lines.append(f"{edu['institution_name']}")
+            if edu.get('graduation_date'):
+                lines.append(f"Graduated: {_month_year(edu['graduation_date'])}")
+            if edu.get('gpa'):
+                lines.append(f"GPA: {edu['gpa']}/{edu.get('gpa_scale')}")
+            if edu.get('honors'):
+                lines.append(f"Honors: {edu['honors']}")
         lines.append("")
     
     # Skills
-    if user.job_seeker_profile and user.job_seeker_profile.skills:
+    if profile and profile.get('skills'):
         lines.append("SKILLS")
         lines.append("-" * 80)
         try:
-            skills = json.loads(user.job_seeker_profile.skills)
+            skills = json.loads(profile['skills'])
             lines.append(", ".join(skills))
         except:
-            lines.append(user.job_seeker_profile.skills)
+            lines.append(profile['skills'])
         lines.append("")
     
     # Certifications
-    certs = user.certifications.order_by(Certification.issue_date.desc()).all()
+    certs = profile_graph.newest_first(graph['certifications'], 'issue_date')
     if certs:
         lines.append("CERTIFICATIONS")
         lines.append("-" * 80)
         for cert in certs:
-            lines.append(f"\n{cert.name}")
-            lines.append(f"Issuing Organization: {cert.issuing_organization}")
-            if cert.issue_date:
-                lines.append(f"Issue Date: {cert.issue_date.strftime('%b %Y')}")
-            if cert.credential_id:
-                lines.append(f"Credential ID: {cert.credential_id}")
+            lines.append(f"\n{cert['name']}")
+            lines.append(f"Issuing Organization: {cert.get('issuing_organization')}")
+            if cert.get('issue_date'):
+                lines.append(f"Issue Date: {_month_year(cert['issue_date'])}")
+            if cert.get('credential_id'):
+                lines.append(f"Credential ID: {cert['credential_id']}")
         lines.append("")
     
-    # Projects
-    projects = user.projects.filter_by(is_featured=True).order_by(Project.display_order).all()
+    # Projects (the graph lists featured projects first, each group by display order)
+    projects = [proj for proj in graph['projects'] if proj.get('is_featured')]
     if not projects:
-        projects = user.projects.order_by(Project.display_order).limit(3).all()
+        projects = graph['projects'][:3]
     
     if projects:
         lines.append("FEATURED PROJECTS")
         lines.append("-" * 80)
         for proj in projects:
-            lines.append(f"\n{proj.name}")
-            if proj.role:
-                lines.append(f"Role: {proj.role}")
-            lines.append(f"\n{proj.description}")
-            if proj.project_url:
-                lines.append(f"URL: {proj.project_url}")
+            lines.append(f"\n{proj['name']}")
+            if proj.get('role'):
+                lines.append(f"Role: {proj['role']}")
+            lines.append(f"\n{proj.get('description')}")
+            if proj.get('project_url'):
+                lines.append(f"URL: {proj['project_url']}")
         lines.append("")
     
     # Job Preferences
-    if user.job_seeker_profile:
-        profile = user.job_seeker_profile
+    if profile:
         lines.append("JOB PREFERENCES")
         lines.append("-" * 80)
-        if profile.desired_position:
-            lines.append(f"Desired Role: {profile.desired_position}")
-        if profile.job_type_preference:
-            lines.append(f"Job Type: {profile.job_type_preference}")
-        if profile.preferred_location:
-            lines.append(f"Preferred Location: {profile.preferred_location}")
-        if profile.desired_salary_min and profile.desired_salary_max:
-            lines.append(f"Salary Range: ${profile.desired_salary_min:,} - ${profile.desired_salary_max:,}")
-        if profile.availability:
-            lines.append(f"Availability: {profile.availability}")
+        if profile.get('desired_position'):
+            lines.append(f"Desired Role: {profile['desired_position']}")
+        if profile.get('job_type_preference'):
+            lines.append(f"Job Type: {profile['job_type_preference']}")
+        if profile.get('preferred_location'):
+            lines.append(f"Preferred Location: {profile['preferred_location']}")
+        if profile.get('desired_salary_min') and profile.get('desired_salary_max'):
+            lines.append(f"Salary Range: ${profile['desired_salary_min']:,} - ${profile['desired_salary_max']:,}")
+        if profile.get('availability'):
+            lines.append(f"Availability: {profile['availability']}")
         lines.append("")
     
     lines.append("=" * 80)
@@ -493,6 +305,7 @@ def export_profile_text(current_user):
 def export_profile_json(current_user):
     """Export complete profile as JSON"""
     try:
+        graph = profile_graph.get_profile_graph(current_user)
         profile_data = {
             'personal_info': {
                 'first_name': current_user.first_name,
@@ -502,15 +315,15 @@ def export_profile_json(current_user):
                 'location': current_user.location,
                 'bio': current_user.bio
             },
-            'job_seeker_profile': current_user.job_seeker_profile.to_dict() if current_user.job_seeker_profile else {},
-            'work_experiences': [exp.to_dict() for exp in current_user.work_experiences.all()],
-            'educations': [edu.to_dict() for edu in current_user.educations.all()],
-            'certifications': [cert.to_dict() for cert in current_user.certifications.all()],
-            'projects': [proj.to_dict() for proj in current_user.projects.all()],
-            'awards': [award.to_dict() for award in current_user.awards.all()],
-            'languages': [lang.to_dict() for lang in current_user.languages.all()],
-            'volunteer_experiences': [exp.to_dict() for exp in current_user.volunteer_experiences.all()],
-            'professional_memberships': [memb.to_dict() for memb in current_user.professional_memberships.all()],
+            'job_seeker_profile': graph['job_seeker_profile'] or {},
+            'work_experiences': graph['work_experiences'],
+            'educations': graph['educations'],
+            'certifications': graph['certifications'],
+            'projects': graph['projects'],
+            'awards': graph['awards'],
+            'languages': graph['languages'],
+            'volunteer_experiences': graph['volunteer_experiences'],
+            'professional_memberships': graph['professional_memberships'],
             'exported_at': datetime.utcnow().isoformat(),
             'export_version': '2.0'
         }
@@ -9,60 +9,12 @@ from src.models.profile_extensions import (
     Award, Language, VolunteerExperience, ProfessionalMembership, Reference
 )
 from src.routes.auth import token_required, role_required
+from src.services import candidate_scoring, candidate_search, profile_features, profile_graph
 from datetime import datetime
 import json
-import pickle
-import os
 
 profile_extensions_bp = Blueprint('profile_extensions', __name__)
 
-# ── Redis cache for complete-profile ──────────────────────────────────
-_profile_redis = None
-
-def _get_profile_redis():
-    global _profile_redis
-    if _profile_redis is not None:
-        return _profile_redis
-    try:
-        import redis as _r
-        client = _r.from_url(os.environ.get('REDIS_URL', 'redis://localhost:6379/0'),
-                             socket_timeout=1, socket_connect_timeout=1)
-        client.ping()
-        _profile_redis = client
-        return _profile_redis
-    except Exception:
-        return None
-
-def _complete_profile_cache_key(user_id):
-    return f'complete_profile_{user_id}'
-
-def _invalidate_complete_profile_cache(user_id):
-    r = _get_profile_redis()
-    if r:
-        try:
-            # Bust both the complete-profile cache and the CV builder profile cache
-            r.delete(_complete_profile_cache_key(user_id))
-            r.delete(f'user_profile_{user_id}')
-        except Exception:
-            pass
-
-
-@profile_extensions_bp.after_request
-def _bust_cache_on_write(response):
-    """Invalidate the complete-profile cache after any successful mutating request."""
-    if request.method in ('POST', 'PUT', 'DELETE') and response.status_code < 400:
-        try:
-            import jwt as _jwt
-            from flask import current_app
-            auth_header = request.headers.get('Authorization', '')
-            token = auth_header.split(' ')[-1] if auth_header else None
-            if token:
-                payload = _jwt.decode(token, current_app.config['SECRET_KEY'], algorithms=['HS256'])
-                _invalidate_complete_profile_cache(payload['user_id'])
-        except Exception:
-            pass
-    return response
-
 
 @profile_extensions_bp.route('/work-experience', methods=['GET'])
 @token_required
@@ -105,7 +57,9 @@ def add_work_experience(current_user):
         )
         
         db.session.add(experience)
+        profile_features.refresh_features(current_user)
         db.session.commit()
+        profile_graph.invalidate(current_user.id)
         
         return jsonify({
             'message': 'Work experience added successfully',
@@ -155,7 +109,9 @@ def update_work_experience(current_user, experience_id):
             experience.display_order = data['display_order']
         
         experience.updated_at = datetime.utcnow()
+        profile_features.refresh_features(current_user)
         db.session.commit()
+        profile_graph.invalidate(current_user.id)
         
         return jsonify({
             'message': 'Work experience updated successfully',
@@ -177,7 +133,9 @@ def delete_work_experience(current_user, experience_id):
         ).first_or_404()
         
         db.session.delete(experience)
+        profile_features.refresh_features(current_user)
         db.session.commit()
+        profile_graph.invalidate(current_user.id)
         
         return jsonify({'message': 'Work experience deleted successfully'}), 200
         
@@ -234,7 +192,9 @@ def add_education(current_user):
         )
         
         db.session.add(education)
+        profile_features.refresh_features(current_user)
         db.session.commit()
+        profile_graph.invalidate(current_user.id)
         
         return jsonify({
             'message': 'Education added successfully',
@@ -274,7 +234,9 @@ def update_education(current_user, education_id):
             education.relevant_coursework = json.dumps(data['relevant_coursework'])
         
         education.updated_at = datetime.utcnow()
+        profile_features.refresh_features(current_user)
         db.session.commit()
+        profile_graph.invalidate(current_user.id)
         
         return jsonify({
             'message': 'Education updated successfully',
@@ -296,7 +258,9 @@ def delete_education(current_user, education_id):
         ).first_or_404()
         
         db.session.delete(education)
+        profile_features.refresh_features(current_user)
         db.session.commit()
+        profile_graph.invalidate(current_user.id)
         
         return jsonify({'message': 'Education deleted successfully'}), 200
         
@@ -345,7 +309,9 @@ def add_certification(current_user):
         )
         
         db.session.add(certification)
+        profile_features.refresh_features(current_user)
         db.session.commit()
+        profile_graph.invalidate(current_user.id)
         
         return jsonify({
             'message': 'Certification added successfully',
@@ -378,7 +344,9 @@ def update_certification(current_user, cert_id):
             cert.skills_acquired = json.dumps(data['skills_acquired'])
         
         cert.updated_at = datetime.utcnow()
+        profile_features.refresh_features(current_user)
         db.session.commit()
+        profile_graph.invalidate(current_user.id)
         
         return jsonify({'message': 'Certification updated successfully', 'certification': cert.to_dict()}), 200
     except Exception as e:
@@ -393,7 +361,9 @@ def delete_certification(current_user, cert_id):
     try:
         cert = Certification.query.filter_by(id=cert_id, user_id=current_user.id).first_or_404()
         db.session.delete(cert)
+        profile_features.refresh_features(current_user)
         db.session.commit()
+        profile_graph.invalidate(current_user.id)
         return jsonify({'message': 'Certification deleted successfully'}), 200
     except Exception as e:
         db.session.rollback()
@@ -446,7 +416,9 @@ def add_project(current_user):
         )
         
         db.session.add(project)
+        profile_features.refresh_features(current_user)
         db.session.commit()
+        profile_graph.invalidate(current_user.id)
         
         return jsonify({'message': 'Project added successfully', 'project': project.to_dict()}), 201
     except Exception as e:
@@ -479,7 +451,9 @@ def update_project(current_user, project_id):
             project.images = json.dumps(data['images'])
         
         project.updated_at = datetime.utcnow()
+        profile_features.refresh_features(current_user)
         db.session.commit()
+        profile_graph.invalidate(current_user.id)
         
         return jsonify({'message': 'Project updated successfully', 'project': project.to_dict()}), 200
     except Exception as e:
@@ -494,7 +468,9 @@ def delete_project(current_user, project_id):
     try:
         project = Project.query.filter_by(id=project_id, user_id=current_user.id).first_or_404()
         db.session.delete(project)
+        profile_features.refresh_features(current_user)
         db.session.commit()
+        profile_graph.invalidate(current_user.id)
         return jsonify({'message': 'Project deleted successfully'}), 200
     except Exception as e:
         db.session.rollback()
@@ -535,7 +511,9 @@ def add_award(current_user):
         )
         
         db.session.add(award)
+        profile_features.refresh_features(current_user)
         db.session.commit()
+        profile_graph.invalidate(current_user.id)
         
         return jsonify({'message': 'Award added successfully', 'award': award.to_dict()}), 201
     except Exception as e:
@@ -559,7 +537,9 @@ def update_award(current_user, award_id):
             award.date_received = datetime.strptime(data['date_received'], '%Y-%m-%d').date() if data['date_received'] else None
         
         award.updated_at = datetime.utcnow()
+        profile_features.refresh_features(current_user)
         db.session.commit()
+        profile_graph.invalidate(current_user.id)
         
         return jsonify({'message': 'Award updated successfully', 'award': award.to_dict()}), 200
     except Exception as e:
@@ -574,7 +554,9 @@ def delete_award(current_user, award_id):
     try:
         award = Award.query.filter_by(id=award_id, user_id=current_user.id).first_or_404()
         db.session.delete(award)
+        profile_features.refresh_features(current_user)
         db.session.commit()
+        profile_graph.invalidate(current_user.id)
         return jsonify({'message': 'Award deleted successfully'}), 200
     except Exception as e:
         db.session.rollback()
@@ -609,7 +591,9 @@ def add_language(current_user):
         )
         
         db.session.add(language)
+        profile_features.refresh_features(current_user)
         db.session.commit()
+        profile_graph.invalidate(current_user.id)
         
         return jsonify({'message': 'Language added successfully', 'language': language.to_dict()}), 201
     except Exception as e:
@@ -630,7 +614,9 @@ def update_language(current_user, language_id):
                 setattr(language, field, data[field])
         
         language.updated_at = datetime.utcnow()
+        profile_features.refresh_features(current_user)
         db.session.commit()
+        profile_graph.invalidate(current_user.id)
         
         return jsonify({'message': 'Language updated successfully', 'language': language.to_dict()}), 200
     except Exception as e:
@@ -645,7 +631,9 @@ def delete_language(current_user, language_id):
     try:
         language = Language.query.filter_by(id=language_id, user_id=current_user.id).first_or_404()
         db.session.delete(language)
+        profile_features.refresh_features(current_user)
         db.session.commit()
+        profile_graph.invalidate(current_user.id)
         return jsonify({'message': 'Language deleted successfully'}), 200
     except Exception as e:
         db.session.rollback()
@@ -688,7 +676,9 @@ def add_volunteer_experience(current_user):
         )
         
         db.session.add(experience)
+        profile_features.refresh_features(current_user)
         db.session.commit()
+        profile_graph.invalidate(current_user.id)
         
         return jsonify({'message': 'Volunteer experience added successfully', 'experience': experience.to_dict()}), 201
     except Exception as e:
@@ -716,7 +706,9 @@ def update_volunteer_experience(current_user, experience_id):
             experience.responsibilities = json.dumps(data['responsibilities'])
         
         experience.updated_at = datetime.utcnow()
+        profile_features.refresh_features(current_user)
         db.session.commit()
+        profile_graph.invalidate(current_user.id)
         
         return jsonify({'message': 'Volunteer experience updated successfully', 'experience': experience.to_dict()}), 200
     except Exception as e:
@@ -731,7 +723,9 @@ def delete_volunteer_experience(current_user, experience_id):
     try:
         experience = VolunteerExperience.query.filter_by(id=experience_id, user_id=current_user.id).first_or_404()
         db.session.delete(experience)
+        profile_features.refresh_features(current_user)
         db.session.commit()
+        profile_graph.invalidate(current_user.id)
         return jsonify({'message': 'Volunteer experience deleted successfully'}), 200
     except Exception as e:
         db.session.rollback()
@@ -773,7 +767,9 @@ def add_professional_membership(current_user):
         )
         
         db.session.add(membership)
+        profile_features.refresh_features(current_user)
         db.session.commit()
+        profile_graph.invalidate(current_user.id)
         
         return jsonify({'message': 'Membership added successfully', 'membership': membership.to_dict()}), 201
     except Exception as e:
@@ -799,7 +795,9 @@ def update_professional_membership(current_user, membership_id):
             membership.end_date = datetime.strptime(data['end_date'], '%Y-%m-%d').date() if data['end_date'] else None
         
         membership.updated_at = datetime.utcnow()
+        profile_features.refresh_features(current_user)
         db.session.commit()
+        profile_graph.invalidate(current_user.id)
         
         return jsonify({'message': 'Membership updated successfully', 'membership': membership.to_dict()}), 200
     except Exception as e:
@@ -814,7 +812,9 @@ def delete_professional_membership(current_user, membership_id):
     try:
         membership = ProfessionalMembership.query.filter_by(id=membership_id, user_id=current_user.id).first_or_404()
         db.session.delete(membership)
+        profile_features.refresh_features(current_user)
         db.session.commit()
+        profile_graph.invalidate(current_user.id)
         return jsonify({'message': 'Membership deleted successfully'}), 200
     except Exception as e:
         db.session.rollback()
@@ -828,40 +828,11 @@ def delete_professional_membership(current_user, membership_id):
 def get_complete_profile(current_user):
     """Get complete profile with all sections"""
     try:
-        # ── Check Redis cache (2-minute TTL) ───────────────────────────────
-        r = _get_profile_redis()
-        cache_key = _complete_profile_cache_key(current_user.id)
-        if r:
-            try:
-                cached = r.get(cache_key)
-                if cached:
-                    return jsonify(pickle.loads(cached)), 200
-            except Exception:
-                pass
-
-        # ── Cache miss – query DB ───────────────────────────────────────
-        profile_data = {
-            'user': current_user.to_dict(include_sensitive=True),
-            'work_experiences': [exp.to_dict() for exp in current_user.work_experiences.order_by(WorkExperience.display_order, WorkExperience.start_date.desc()).all()],
-            'educations': [edu.to_dict() for edu in current_user.educations.order_by(Education.display_order, Education.graduation_date.desc()).all()],
-            'certifications': [cert.to_dict() for cert in current_user.certifications.order_by(Certification.display_order, Certification.issue_date.desc()).all()],
-            'projects': [proj.to_dict() for proj in current_user.projects.order_by(Project.is_featured.desc(), Project.display_order).all()],
-            'awards': [award.to_dict() for award in current_user.awards.order_by(Award.display_order, Award.date_received.desc()).all()],
-            'languages': [lang.to_dict() for lang in current_user.languages.order_by(Language.display_order).all()],
-            'volunteer_experiences': [exp.to_dict() for exp in current_user.volunteer_experiences.order_by(VolunteerExperience.display_order).all()],
-            'professional_memberships': [memb.to_dict() for memb in current_user.professional_memberships.order_by(ProfessionalMembership.is_current.desc()).all()],
-            'references': [ref.to_dict() for ref in current_user.references.order_by(Reference.display_order).all()]
-        }
-        
-        if current_user.job_seeker_profile:
-            profile_data['job_seeker_profile'] = current_user.job_seeker_profile.to_dict()
-
-        # ── Store in cache ─────────────────────────────────────────────
-        if r:
-            try:
-                r.setex(cache_key, 120, pickle.dumps(profile_data))
-            except Exception:
-                pass
+        graph = profile_graph.get_profile_graph(current_user)
+        profile_data = {'user': current_user.to_dict(include_sensitive=True)}
+        profile_data.update({key: graph[key] for key in profile_graph.SECTIONS})
+        if graph['job_seeker_profile']:
+            profile_data['job_seeker_profile'] = graph['job_seeker_profile']
 
         return jsonify(profile_data), 200
         
@@ -964,7 +935,15 @@ def update_complete_profile(current_user):
             profile.linkedin_url = data['linkedin_url']
         
         profile.updated_at = datetime.utcnow()
+        
+        # Keep stored application match scores in sync with scoring fields
+        if candidate_scoring.PROFILE_SCORING_FIELDS & set(data):
+            candidate_scoring.rescore_profile(current_user.id, profile)
+        candidate_search.index_profile(current_user, profile)
+        profile_features.refresh_features(current_user, profile)
+        
         db.session.commit()
+        profile_graph.invalidate(current_user.id)
         
         return jsonify({
             'message': 'Profile updated successfully',
@@ -1008,8 +987,9 @@ def add_reference(current_user):
             display_order=data.get('display_order', 0)
         )
         db.session.add(ref)
+        profile_features.refresh_features(current_user)
         db.session.commit()
-        _invalidate_complete_profile_cache(current_user.id)
+        profile_graph.invalidate(current_user.id)
         return jsonify({'message': 'Reference added successfully', 'reference': ref.to_dict()}), 201
     except Exception as e:
         db.session.rollback()
@@ -1027,8 +1007,9 @@ def update_reference(current_user, ref_id):
             if field in data:
                 setattr(ref, field, data[field])
         ref.updated_at = datetime.utcnow()
+        profile_features.refresh_features(current_user)
         db.session.commit()
-        _invalidate_complete_profile_cache(current_user.id)
+        profile_graph.invalidate(current_user.id)
         return jsonify({'message': 'Reference updated successfully', 'reference': ref.to_dict()}), 200
     except Exception as e:
         db.session.rollback()
@@ -1042,8 +1023,9 @@ def delete_reference(current_user, ref_id):
     try:
         ref = Reference.query.filter_by(id=ref_id, user_id=current_user.id).first_or_404()
         db.session.delete(ref)
+        profile_features.refresh_features(current_user)
         db.session.commit()
-        _invalidate_complete_profile_cache(current_user.id)
+        profile_graph.invalidate(current_user.id)
         return jsonify({'message': 'Reference deleted successfully'}), 200
     except Exception as e:
         db.session.rollback()
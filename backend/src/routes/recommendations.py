@@ -8,12 +8,19 @@ from src.models.user import db
 from src.models.job import Job, JobCategory, JobBookmark
 from src.models.application import Application
 from src.models.company import Company
+from src.models.profile_features import ProfileFeatures
 from src.routes.auth import token_required, role_required
+from src.services import profile_features
+from src.services.candidate_scoring import normalize_skills
 
 recommendations_bp = Blueprint('recommendations', __name__)
 
-def calculate_job_match_score(job, user_profile):
-    """Calculate job match score based on user profile"""
+def calculate_job_match_score(job, user_profile, user_skills=None):
+    """Calculate job match score based on user profile
+    
+    ``user_skills`` is the normalized skill set from the stored profile
+    features; pass it when scoring many jobs to skip re-parsing the profile.
+    """
     score = 0
     max_score = 100
     
@@ -24,17 +31,12 @@ def calculate_job_match_score(job, user_profile):
     score += 10
     
     # Skills matching (40% weight)
-    if user_profile.skills and job.required_skills:
-        try:
-            user_skills = json.loads(user_profile.skills) if isinstance(user_profile.skills, str) else user_profile.skills
-            job_skills = json.loads(job.required_skills) if isinstance(job.required_skills, str) else job.required_skills
-            
-            if user_skills and job_skills:
-                matching_skills = set(skill.lower() for skill in user_skills) & set(skill.lower() for skill in job_skills)
-                skill_score = (len(matching_skills) / len(job_skills)) * 40
-                score += min(skill_score, 40)
-        except:
-            pass
+    if user_skills is None:
+        user_skills = normalize_skills(user_profile.skills)
+    job_skills = normalize_skills(job.required_skills)
+    if user_skills and job_skills:
+        skill_score = (len(user_skills & job_skills) / len(job_skills)) * 40
+        score += min(skill_score, 40)
     
     # Experience level matching (20% weight) - more lenient
     if user_profile.years_of_experience is not None and job.years_experience_min:
@@ -125,10 +127,11 @@ def get_job_recommendations(current_user):
                 'profile_completeness': calculate_profile_completeness(profile)
             }), 200
         
-        # Calculate match scores for all jobs
+        # Calculate match scores for all jobs against the precomputed profile features
+        user_skills = set(profile_features.get_features(current_user)['skills'])
         job_scores = []
         for job in jobs:
-            score = calculate_job_match_score(job, profile)
+            score = calculate_job_match_score(job, profile, user_skills)
             # Lower threshold to include more recommendations
             if score > 10:  # Reduced from 20 to 10 to be less restrictive
                 job_scores.append((job, score))
@@ -147,16 +150,9 @@ def get_job_recommendations(current_user):
             
             # Add match reasons
             match_reasons = []
-            if profile.skills and job.required_skills:
-                try:
-                    user_skills = json.loads(profile.skills) if isinstance(profile.skills, str) else profile.skills
-                    job_skills = json.loads(job.required_skills) if isinstance(job.required_skills, str) else job.required_skills
-                    if user_skills and job_skills:
-                        matching_skills = set(skill.lower() for skill in user_skills) & set(skill.lower() for skill in job_skills)
-                        if matching_skills:
-                            match_reasons.append(f"Skills match: {', '.join(list(matching_skills)[:3])}")
-                except:
-                    pass
+            matching_skills = user_skills & normalize_skills(job.required_skills)
+            if matching_skills:
+                match_reasons.append(f"Skills match: {', '.join(sorted(matching_skills)[:3])}")
             
             if profile.preferred_location and job.city:
                 if profile.preferred_location.lower() in job.city.lower():
@@ -236,10 +232,21 @@ def get_candidate_recommendations(current_user):
         
         candidates = candidates_query.limit(limit * 2).all()
         
+        # Precomputed candidate skill sets, one query for the whole pool
+        job_skills = normalize_skills(job.required_skills)
+        candidate_skills = {
+            row.user_id: set(json.loads(row.skills or '[]'))
+            for row in ProfileFeatures.query.filter(
+                ProfileFeatures.user_id.in_([user.id for user, _ in candidates])
+            ).all()
+        } if candidates else {}
+        
         # Calculate match scores
         candidate_scores = []
         for user, profile in candidates:
-            score = calculate_candidate_match_score(user, profile, job)
+            score = calculate_candidate_match_score(
+                user, profile, job, candidate_skills.get(user.id), job_skills
+            )
             if score > 30:  # Only include candidates with reasonable match
                 candidate_scores.append((user, profile, score))
         
@@ -255,16 +262,12 @@ def get_candidate_recommendations(current_user):
             
             # Add match reasons
             match_reasons = []
-            if profile.skills and job.required_skills:
-                try:
-                    user_skills = json.loads(profile.skills) if isinstance(profile.skills, str) else profile.skills
-                    job_skills = json.loads(job.required_skills) if isinstance(job.required_skills, str) else job.required_skills
-                    if user_skills and job_skills:
-                        matching_skills = set(skill.lower() for skill in user_skills) & set(skill.lower() for skill in job_skills)
-                        if matching_skills:
-                            match_reasons.append(f"Skills match: {', '.join(list(matching_skills)[:3])}")
-                except:
-                    pass
+            user_skills = candidate_skills.get(user.id)
+            if user_skills is None:
+                user_skills = normalize_skills(profile.skills)
+            matching_skills = user_skills & job_skills
+            if matching_skills:
+                match_reasons.append(f"Skills match: {', '.join(sorted(matching_skills)[:3])}")
             
             if profile.years_of_experience and job.years_experience_min:
                 if profile.years_of_experience >= job.years_experience_min:
@@ -286,22 +289,22 @@ def get_candidate_recommendations(current_user):
     except Exception as e:
         return jsonify({'error': 'Failed to get candidate recommendations', 'details': str(e)}), 500
 
-def calculate_candidate_match_score(user, profile, job):
-    """Calculate candidate match score for a job"""
+def calculate_candidate_match_score(user, profile, job, user_skills=None, job_skills=None):
+    """Calculate candidate match score for a job
+    
+    ``user_skills``/``job_skills`` are precomputed normalized skill sets; they
+    are parsed from the profile and job when not supplied.
+    """
     score = 0
     
     # Skills matching (40% weight)
-    if profile.skills and job.required_skills:
-        try:
-            user_skills = json.loads(profile.skills) if isinstance(profile.skills, str) else profile.skills
-            job_skills = json.loads(job.required_skills) if isinstance(job.required_skills, str) else job.required_skills
-            
-            if user_skills and job_skills:
-                matching_skills = set(skill.lower() for skill in user_skills) & set(skill.lower() for skill in job_skills)
-                skill_score = (len(matching_skills) / len(job_skills)) * 40
-                score += min(skill_score, 40)
-        except:
-            pass
+    if user_skills is None:
+        user_skills = normalize_skills(profile.skills)
+    if job_skills is None:
+        job_skills = normalize_skills(job.required_skills)
+    if user_skills and job_skills:
+        skill_score = (len(user_skills & job_skills) / len(job_skills)) * 40
+        score += min(skill_score, 40)
     
     # Experience matching (30% weight)
     if profile.years_of_experience and job.years_experience_min:
@@ -1,6 +1,9 @@
 from flask import Blueprint, jsonify, request
 from src.models.user import User, JobSeekerProfile, db
 from src.routes.auth import token_required, role_required
+from src.models.skill_demand import SkillDemandStat
+from src.services import candidate_scoring, candidate_search, profile_features, profile_graph, skill_demand
+from sqlalchemy import or_
 from datetime import datetime
 import json
 import logging
@@ -76,7 +79,7 @@ def delete_user(current_user, user_id):
         
         # Import all models that might have foreign key constraints
         from src.models.application import Application, ApplicationActivity
-        from src.models.notification import Review, ReviewVote, Message
+        from src.models.notification import Review, ReviewVote, Message, Conversation
         
         # Clean up or cascade related data
         with db.session.no_autoflush:
@@ -105,7 +108,11 @@ def delete_user(current_user, user_id):
             # Handle messages where this user is sender or recipient
             # We can't set sender_id or recipient_id to NULL (since they're non-nullable)
             # so we need to delete these records
+            Conversation.query.filter((Conversation.user_low_id == user_id) | (Conversation.user_high_id == user_id)).delete(synchronize_session=False)
             Message.query.filter((Message.sender_id == user_id) | (Message.recipient_id == user_id)).delete(synchronize_session=False)
+
+            # Drop the candidate search document (the FTS row is not a mapped relationship)
+            candidate_search.remove_profiles([user_id])
             
             # We'll let the cascading delete handle other direct relationships like:
             # - JobSeekerProfile (cascade='all, delete-orphan')
@@ -145,7 +152,7 @@ def bulk_delete_users(current_user):
             
         # Import all models that might have foreign key constraints
         from src.models.application import Application, ApplicationActivity
-        from src.models.notification import Review, ReviewVote, Message
+        from src.models.notification import Review, ReviewVote, Message, Conversation
         
         # Clean up references that might cause constraint violations
         with db.session.no_autoflush:
@@ -172,7 +179,11 @@ def bulk_delete_users(current_user):
                 Review.query.filter(Review.id.in_(review_ids)).delete(synchronize_session=False)
             
             # Delete messages where these users are senders or recipients (non-nullable foreign keys)
+            Conversation.query.filter((Conversation.user_low_id.in_(user_ids)) | (Conversation.user_high_id.in_(user_ids))).delete(synchronize_session=False)
             Message.query.filter((Message.sender_id.in_(user_ids)) | (Message.recipient_id.in_(user_ids))).delete(synchronize_session=False)
+
+            # Drop the candidate search documents (the FTS rows are not mapped relationships)
+            candidate_search.remove_profiles(user_ids)
         
         deleted = []
         errors = []
@@ -293,9 +304,11 @@ def update_profile_visibility(current_user, user_id):
                 
             profile.profile_visibility = visibility
             profile.updated_at = datetime.utcnow()
+            candidate_search.index_profile(current_user, profile)
             
         current_user.updated_at = datetime.utcnow()
         db.session.commit()
+        profile_graph.invalidate(current_user.id)
         
         return jsonify({'message': 'Profile visibility updated successfully'}), 200
         
@@ -423,8 +436,12 @@ def update_user_skills(current_user, user_id):
         profile.skills = json.dumps(skills)
         profile.updated_at = datetime.utcnow()
         current_user.updated_at = datetime.utcnow()
+        candidate_scoring.rescore_profile(current_user.id, profile)
+        candidate_search.index_profile(current_user, profile)
+        profile_features.refresh_features(current_user, profile)
         
         db.session.commit()
+        profile_graph.invalidate(current_user.id)
         
         return jsonify({
             'message': 'Skills updated successfully',
@@ -544,6 +561,12 @@ def update_user_profile(current_user):
                     profile.certifications = certs
             
             profile.updated_at = datetime.utcnow()
+            
+            # Keep stored application match scores in sync with scoring fields
+            if candidate_scoring.PROFILE_SCORING_FIELDS & set(data):
+                candidate_scoring.rescore_profile(current_user.id, profile)
+            candidate_search.index_profile(current_user, profile)
+            profile_features.refresh_features(current_user, profile)
         
         elif current_user.role == 'employer':
             profile = current_user.employer_profile
@@ -565,6 +588,7 @@ def update_user_profile(current_user):
         
         current_user.updated_at = datetime.utcnow()
         db.session.commit()
+        profile_graph.invalidate(current_user.id)
         
         # Return updated profile
         profile_data = current_user.to_dict(include_sensitive=True)
@@ -618,7 +642,7 @@ def get_profile_views(current_user):
 @user_bp.route('/skill-analysis/gaps', methods=['GET'])
 @token_required
 def get_skill_gaps(current_user):
-    """Get user's skill gaps based on job applications and market trends"""
+    """Get user's skill gaps against precomputed market skill demand"""
     try:
         if current_user.role != 'job_seeker':
             return jsonify({'error': 'Only job seekers can view skill gaps'}), 403
@@ -627,51 +651,38 @@ def get_skill_gaps(current_user):
         if not profile:
             return jsonify({'skill_gaps': []}), 200
         
-        # Parse user's current skills
-        import json
-        user_skills = []
-        if profile.technical_skills:
-            try:
-                user_skills.extend(json.loads(profile.technical_skills) if isinstance(profile.technical_skills, str) else profile.technical_skills)
-            except:
-                pass
+        # Current skills from the precomputed profile features
+        user_skills = set(profile_features.get_features(current_user)['skills'])
         
-        if profile.skills:
-            try:
-                user_skills.extend(json.loads(profile.skills) if isinstance(profile.skills, str) else profile.skills)
-            except:
-                pass
+        window = request.args.get('window', skill_demand.DEFAULT_WINDOW, type=int)
+        if window not in skill_demand.WINDOWS:
+            window = skill_demand.DEFAULT_WINDOW
+        
+        # Slice total plus the most demanded skills the user lacks, one query
+        rows = skill_demand.fetch_slice(
+            [or_(SkillDemandStat.demand_rank == 0, ~SkillDemandStat.skill.in_(user_skills))],
+            window=window,
+            category_id=request.args.get('category_id', type=int),
+            region=request.args.get('region'),
+            limit=11
+        )
+        total_jobs = next((r.job_count for r in rows if r.skill == SkillDemandStat.TOTAL_SKILL), 0)
         
-        # Analyze skills needed in recent job applications
-        from src.models.application import Application
-        from src.models.job import Job
-        
-        user_applications = Application.query.filter_by(applicant_id=current_user.id).limit(10).all()
-        
-        required_skills_count = {}
-        for app in user_applications:
-            job = Job.query.get(app.job_id)
-            if job and job.required_skills:
-                try:
-                    job_skills = json.loads(job.required_skills) if isinstance(job.required_skills, str) else job.required_skills
-                    for skill in job_skills:
-                        skill_name = skill.lower() if isinstance(skill, str) else str(skill).lower()
-                        if skill_name not in [s.lower() for s in user_skills]:
-                            required_skills_count[skill_name] = required_skills_count.get(skill_name, 0) + 1
-                except:
-                    pass
-        
-        # Return top skill gaps
         skill_gaps = []
-        for skill, count in sorted(required_skills_count.items(), key=lambda x: x[1], reverse=True)[:10]:
+        for stat in rows:
+            if stat.skill == SkillDemandStat.TOTAL_SKILL:
+                continue
             skill_gaps.append({
-                'skill_name': skill.title(),
-                'market_demand': 'High' if count >= 3 else 'Medium' if count >= 1 else 'Low',
+                'skill_name': stat.skill.title(),
+                'market_demand': skill_demand.demand_level(stat.job_count, total_jobs),
                 'your_level': 0,
-                'frequency': count
+                'frequency': stat.job_count,
+                'trend': skill_demand.trend_label(stat.trend_slope or 0.0),
+                'salary_median': stat.salary_p50,
+                'salary_currency': stat.salary_currency
             })
         
-        return jsonify({'skill_gaps': skill_gaps}), 200
+        return jsonify({'skill_gaps': skill_gaps, 'window_days': window, 'jobs_analyzed': total_jobs}), 200
         
     except Exception as e:
         return jsonify({'error': 'Failed to get skill gaps', 'details': str(e), 'skill_gaps': []}), 500
@@ -698,41 +709,34 @@ def get_career_insights(current_user):
                 'message': 'Complete your profile for personalized insights'
             }), 200
         
-        # Calculate insights based on profile and applications
         from src.models.application import Application
-        from src.models.job import Job
         
-        # Get user's applications to analyze trends
-        applications = Application.query.filter_by(applicant_id=current_user.id).all()
+        applications_count = Application.query.filter_by(applicant_id=current_user.id).count()
         
         # Calculate average desired salary
         avg_salary = 0
         if profile.desired_salary_min and profile.desired_salary_max:
             avg_salary = (profile.desired_salary_min + profile.desired_salary_max) // 2
         
-        # Extract skills in demand
-        import json
-        skills_in_demand = {}
-        for app in applications:
-            job = Job.query.get(app.job_id)
-            if job and job.required_skills:
-                try:
-                    job_skills = json.loads(job.required_skills) if isinstance(job.required_skills, str) else job.required_skills
-                    for skill in job_skills:
-                        skill_name = str(skill).title()
-                        skills_in_demand[skill_name] = skills_in_demand.get(skill_name, 0) + 1
-                except:
-                    pass
-        
-        # Sort by frequency
-        top_skills = [skill for skill, _ in sorted(skills_in_demand.items(), key=lambda x: x[1], reverse=True)[:5]]
-        
-        # Calculate market demand based on number of applications
-        market_demand = 'High'
-        if len(applications) < 5:
-            market_demand = 'Low'
-        elif len(applications) < 15:
-            market_demand = 'Medium'
+        # Market aggregates: slice total, top skills and the user's own skills in one query
+        user_skills = set(profile_features.get_features(current_user)['skills'])
+        rows = skill_demand.fetch_slice(
+            [or_(SkillDemandStat.demand_rank <= 5, SkillDemandStat.skill.in_(user_skills))]
+        )
+        total_jobs = next((r.job_count for r in rows if r.skill == SkillDemandStat.TOTAL_SKILL), 0)
+        top_skills = [r.skill.title() for r in rows if 0 < r.demand_rank <= 5]
+        own_stats = [r for r in rows if r.skill in user_skills]
+        
+        # Market demand for the user's skills: share of jobs asking for their most wanted skill
+        market_demand = skill_demand.demand_level(
+            max((r.job_count for r in own_stats), default=0), total_jobs
+        )
+        trending_skills = [
+            r.skill.title() for r in sorted(own_stats, key=lambda r: r.trend_slope or 0.0, reverse=True)
+            if skill_demand.trend_label(r.trend_slope or 0.0) == 'rising'
+        ][:5]
+        salary_medians = sorted(r.salary_p50 for r in own_stats if r.salary_p50)
+        market_salary_median = salary_medians[len(salary_medians) // 2] if salary_medians else None
         
         # Career growth potential (based on experience and skills)
         growth_potential = 50  # Base score
@@ -747,7 +751,10 @@ def get_career_insights(current_user):
             'market_demand': market_demand,
             'top_skills_in_demand': top_skills,
             'career_growth_potential': growth_potential,
-            'applications_count': len(applications),
+            'trending_skills': trending_skills,
+            'market_salary_median': market_salary_median,
+            'jobs_analyzed': total_jobs,
+            'applications_count': applications_count,
             'years_experience': profile.years_of_experience or 0
         }), 200
         
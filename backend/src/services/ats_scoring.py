@@ -0,0 +1,520 @@
+"""
+ATS Scoring Engine
+Scores CV content against ATS criteria and job keywords. A CV is tokenized
+once into a CVDocument and a job posting once into a JobKeywordProfile, so
+one CV can be scored against many jobs (or many CV variants against one job)
+without re-reading either side
+"""
+
+import re
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+
+STRONG_VERBS = frozenset({
+    'led', 'developed', 'achieved', 'implemented', 'optimized', 'spearheaded',
+    'launched', 'streamlined', 'mentored', 'delivered', 'architected', 'designed',
+    'managed', 'increased', 'reduced', 'improved', 'built', 'created', 'transformed',
+    'established', 'drove', 'generated', 'negotiated', 'orchestrated', 'pioneered',
+})
+
+# Besides digits, these mark an achievement as quantified
+QUANTIFIER_MARKERS = ('%', '$', 'increased', 'reduced', 'improved', 'grew', 'saved')
+
+WEAK_VERBS = ('responsible for', 'worked on', 'helped with', 'duties included', 'tasked with', 'assisted with')
+
+TECH_KEYWORDS = (
+    'python', 'javascript', 'java', 'react', 'node', 'sql', 'aws', 'docker',
+    'kubernetes', 'git', 'agile', 'scrum', 'ci/cd', 'rest', 'api', 'mongodb',
+    'typescript', 'angular', 'vue', 'django', 'flask', 'postgresql', 'redis',
+    'machine learning', 'ai', 'data analysis', 'tensorflow', 'excel', 'tableau',
+    'spring', 'linux', 'ubuntu', 'windows', 'macos', 'figma',
+    'jira', 'confluence', 'slack', 'trello', 'notion', 'github', 'gitlab',
+    'nextjs', 'fastapi', 'graphql', 'firebase', 'supabase', 'terraform',
+    'gcp', 'azure', 'heroku', 'vercel', 'nginx', 'apache', 'celery',
+    'rabbitmq', 'kafka', 'spark', 'hadoop', 'airflow', 'dbt', 'snowflake',
+    'pandas', 'numpy', 'scikit-learn', 'pytorch', 'keras', 'matplotlib',
+    'sass', 'tailwind', 'bootstrap', 'webpack', 'vite', 'rollup',
+    'communication', 'leadership', 'teamwork', 'problem-solving',
+    'project management', 'stakeholder management', 'strategic planning',
+)
+
+STOP_WORDS = frozenset({
+    'the', 'and', 'for', 'with', 'that', 'this', 'will', 'are', 'from',
+    'have', 'been', 'our', 'your', 'they', 'you', 'not', 'but', 'can',
+    'all', 'each', 'which', 'when', 'what', 'how', 'who', 'may', 'also',
+    'work', 'working', 'role', 'position', 'job', 'company', 'team',
+    'able', 'ability', 'strong', 'good', 'excellent', 'ideal', 'preferred',
+    'required', 'requirements', 'looking', 'seeking', 'join', 'including',
+})
+
+JOB_WORD_RE = re.compile(r'[a-z0-9\+\#\.\-/]{3,}')
+DIGIT_RE = re.compile(r'\d')
+
+MAX_MISSING_KEYWORDS = 15
+
+
+@lru_cache(maxsize=4096)
+def _is_action_verb(word: str) -> bool:
+    """Whether a bullet's first word reads as a strong action verb ('Led', 'Optimizing', ...)"""
+    stem = word.rstrip('ed').rstrip('d')
+    return any(verb.startswith(stem) for verb in STRONG_VERBS) or word in STRONG_VERBS
+
+
+def _count_skills(skills: Any) -> int:
+    if isinstance(skills, dict):
+        return sum(len(v) for v in skills.values() if isinstance(v, list))
+    if isinstance(skills, list):
+        return len(skills)
+    return 0
+
+
+def _items(value: Any) -> list:
+    return value if isinstance(value, list) else []
+
+
+class CVDocument:
+    """Everything the scorer needs from one CV, extracted in a single pass"""
+
+    def __init__(self, cv_content: Dict[str, Any]):
+        self.contact = cv_content.get('contact_information') or {}
+
+        summary = cv_content.get('professional_summary') or ''
+        self.summary = summary if isinstance(summary, str) else str(summary)
+        self.summary_lower = self.summary.lower()
+        self.summary_words = len(self.summary.split())
+        self.summary_has_digit = bool(DIGIT_RE.search(self.summary))
+
+        self.experience_count = 0
+        self.total_achievements = 0
+        self.quantifiable = 0  # digits or quantifier markers (ATS score)
+        self.with_digits = 0  # digits only (optimization tips)
+        self.action_verbs = 0
+        self.weak_verbs = False
+        for experience in _items(cv_content.get('professional_experience')):
+            self.experience_count += 1
+            achievements = experience.get('achievements') if isinstance(experience, dict) else None
+            for achievement in _items(achievements):
+                self._read_achievement(str(achievement))
+
+        education = _items(cv_content.get('education'))
+        self.education_count = len(education)
+        self.has_coursework = any(isinstance(e, dict) and e.get('relevant_coursework') for e in education)
+
+        self.skills = cv_content.get('technical_skills', {})
+        self.skills_count = _count_skills(self.skills)
+        self.skill_categories = len(self.skills) if isinstance(self.skills, dict) else 0
+        self.competencies = cv_content.get('core_competencies', [])
+        self.competencies_count = len(self.competencies) if isinstance(self.competencies, list) else 0
+
+        # Text job keywords are looked for in
+        self.keyword_text = f"{str(self.skills).lower()} {str(self.competencies).lower()} {self.summary_lower}"
+
+        self.certifications = len(_items(cv_content.get('certifications')))
+        projects = _items(cv_content.get('projects'))
+        self.projects = len(projects)
+        self.projects_with_tech = sum(1 for p in projects if isinstance(p, dict) and p.get('technologies'))
+        self.awards = len(_items(cv_content.get('awards')))
+
+    def _read_achievement(self, text: str) -> None:
+        self.total_achievements += 1
+        lowered = text.lower()
+        has_digit = bool(DIGIT_RE.search(text))
+        if has_digit:
+            self.with_digits += 1
+        if has_digit or any(marker in lowered for marker in QUANTIFIER_MARKERS):
+            self.quantifiable += 1
+        words = lowered.split()
+        if words and _is_action_verb(words[0]):
+            self.action_verbs += 1
+        if not self.weak_verbs and any(verb in lowered for verb in WEAK_VERBS):
+            self.weak_verbs = True
+
+    def matches(self, keyword: str) -> bool:
+        return keyword in self.keyword_text
+
+
+class JobKeywordProfile:
+    """Keywords and title terms of one job posting, extracted once"""
+
+    def __init__(self, job_data: Dict[str, Any]):
+        self.title = str(job_data.get('title', ''))
+        self.title_lower = self.title.lower()
+        self.title_terms = tuple(word for word in self.title_lower.split() if len(word) > 3)
+
+        job_text = (
+            f"{job_data.get('requirements', '')} {job_data.get('description', '')} "
+            f"{job_data.get('required_skills', '')}"
+        ).lower()
+        keywords = {keyword for keyword in TECH_KEYWORDS if keyword in job_text}
+        keywords.update(
+            word for word in JOB_WORD_RE.findall(job_text) if len(word) > 3 and word not in STOP_WORDS
+        )
+        # Longest first, so the most specific missing keywords are reported
+        self.keywords: Tuple[str, ...] = tuple(sorted(keywords, key=lambda k: (-len(k), k)))
+
+    def match(self, document: CVDocument) -> Tuple[int, List[str]]:
+        """(matched keyword count, missing keywords worth reporting, longest first)"""
+        missing = [keyword for keyword in self.keywords if not document.matches(keyword)]
+        # Short tech terms ('sql', 'aws') count against the match but are not listed
+        return len(self.keywords) - len(missing), [keyword for keyword in missing if len(keyword) > 3]
+
+
+def _job_profile(job: Any) -> Optional[JobKeywordProfile]:
+    if job is None or isinstance(job, JobKeywordProfile):
+        return job
+    return JobKeywordProfile(job) if job else None
+
+
+def _document(cv: Any) -> CVDocument:
+    return cv if isinstance(cv, CVDocument) else CVDocument(cv)
+
+
+def grade(score: int) -> str:
+    if score >= 90:
+        return 'A'
+    elif score >= 80:
+        return 'B'
+    elif score >= 70:
+        return 'C'
+    elif score >= 60:
+        return 'D'
+    return 'F'
+
+
+def score_cv(cv: Any, job: Any = None) -> Dict[str, Any]:
+    """ATS score (100-point scale with breakdown) of a CV, optionally against a job.
+
+    ``cv`` is CV content or a CVDocument, ``job`` job data or a JobKeywordProfile.
+    """
+    doc = _document(cv)
+    job = _job_profile(job)
+    score = 0
+    breakdown = {}
+    missing_keywords: List[str] = []
+    strengths = []
+    improvements = []
+
+    # Contact Information (15 points)
+    contact = doc.contact
+    contact_score = 0
+    if contact.get('email'):
+        contact_score += 4
+    else:
+        improvements.append("Add professional email address")
+    if contact.get('phone'):
+        contact_score += 4
+    else:
+        improvements.append("Add phone number")
+    if contact.get('full_name') or contact.get('location'):
+        contact_score += 3
+    if contact.get('linkedin') or contact.get('github') or contact.get('portfolio'):
+        contact_score += 4
+        strengths.append("Professional online presence included")
+    else:
+        improvements.append("Add LinkedIn or portfolio URL")
+
+    score += contact_score
+    breakdown['contact_information'] = {
+        'score': contact_score, 'max': 15,
+        'percentage': round((contact_score / 15) * 100),
+        'status': 'excellent' if contact_score >= 12 else 'good' if contact_score >= 9 else 'needs_improvement'
+    }
+
+    # Professional Summary (15 points)
+    word_count = doc.summary_words
+    summary_score = 0
+    if 40 <= word_count <= 80:
+        summary_score = 10
+        strengths.append("Professional summary is well-sized")
+    elif 30 <= word_count < 40:
+        summary_score = 8
+        improvements.append("Professional summary could be slightly longer (aim 50-80 words)")
+    elif word_count > 80:
+        summary_score = 7
+        improvements.append("Professional summary is too long — aim for 50-80 words")
+    elif word_count >= 20:
+        summary_score = 5
+        improvements.append("Professional summary is too short — expand to 50-80 words")
+    else:
+        improvements.append("Add a professional summary (50-80 words)")
+
+    if doc.summary_has_digit:
+        summary_score += 3
+        strengths.append("Summary includes quantified achievements")
+    elif doc.summary:
+        improvements.append("Add quantified achievements to your summary (numbers, percentages)")
+
+    if job and doc.summary:
+        if job.title_lower and any(term in doc.summary_lower for term in job.title_terms):
+            summary_score += 2
+            strengths.append("Summary mentions target job title keywords")
+        else:
+            improvements.append("Include target job title keywords in your summary")
+
+    score += summary_score
+    breakdown['professional_summary'] = {
+        'score': summary_score, 'max': 15,
+        'percentage': round((summary_score / 15) * 100),
+        'word_count': word_count,
+        'status': 'excellent' if summary_score >= 13 else 'good' if summary_score >= 10 else 'needs_improvement'
+    }
+
+    # Work Experience (25 points)
+    exp_score = 0
+    if doc.experience_count >= 3:
+        exp_score += 8
+        strengths.append(f"{doc.experience_count} work experiences listed")
+    elif doc.experience_count >= 1:
+        exp_score += 5
+    else:
+        improvements.append("Add work experience section")
+
+    quantifiable = doc.quantifiable
+    if quantifiable >= 8:
+        exp_score += 12
+        strengths.append(f"{quantifiable} quantifiable achievements with metrics")
+    elif quantifiable >= 5:
+        exp_score += 9
+        strengths.append(f"{quantifiable} quantifiable achievements")
+    elif quantifiable >= 3:
+        exp_score += 6
+        improvements.append("Add more quantifiable achievements with specific metrics")
+    elif quantifiable >= 1:
+        exp_score += 3
+        improvements.append("Include more quantifiable achievements with numbers and percentages")
+    else:
+        improvements.append("Add quantifiable achievements to every work experience")
+
+    if doc.total_achievements > 0:
+        verb_ratio = doc.action_verbs / doc.total_achievements
+        if verb_ratio >= 0.7:
+            exp_score += 5
+            strengths.append("Strong action verbs used throughout")
+        elif verb_ratio >= 0.4:
+            exp_score += 3
+        else:
+            improvements.append("Start achievement bullets with strong action verbs (Led, Developed, Achieved)")
+
+    score += exp_score
+    breakdown['work_experience'] = {
+        'score': exp_score, 'max': 25,
+        'percentage': round((exp_score / 25) * 100),
+        'total_positions': doc.experience_count,
+        'total_achievements': doc.total_achievements,
+        'quantifiable_achievements': quantifiable,
+        'action_verb_usage': f"{doc.action_verbs}/{doc.total_achievements}",
+        'status': 'excellent' if exp_score >= 20 else 'good' if exp_score >= 15 else 'needs_improvement'
+    }
+
+    # Education (10 points)
+    edu_score = 0
+    if doc.education_count >= 1:
+        edu_score = 7
+        if doc.has_coursework:
+            edu_score += 3
+            strengths.append("Relevant coursework included")
+        elif job:
+            improvements.append("Add relevant coursework that matches job requirements")
+        strengths.append("Education section complete")
+    else:
+        improvements.append("Add education information")
+
+    score += edu_score
+    breakdown['education'] = {
+        'score': edu_score, 'max': 10,
+        'percentage': round((edu_score / 10) * 100),
+        'entries': doc.education_count,
+        'status': 'complete' if edu_score >= 7 else 'missing'
+    }
+
+    # Skills (20 points)
+    skills_score = 0
+    total_skills = doc.skills_count
+    if total_skills >= 15:
+        skills_score = 10
+        strengths.append(f"{total_skills} technical skills listed")
+    elif total_skills >= 10:
+        skills_score = 8
+    elif total_skills >= 6:
+        skills_score = 6
+        improvements.append("Add more relevant technical skills (aim for 15+)")
+    elif total_skills >= 3:
+        skills_score = 4
+        improvements.append("Expand skills section significantly")
+    else:
+        improvements.append("Add comprehensive skills section (aim for 12-20 skills)")
+
+    if doc.skill_categories >= 3:
+        skills_score += 3
+        strengths.append("Skills well-categorized")
+    elif doc.skill_categories >= 2:
+        skills_score += 2
+    else:
+        improvements.append("Categorize skills (Programming, Frameworks, Databases, Cloud, etc.)")
+
+    if doc.competencies_count >= 6:
+        skills_score += 3
+        strengths.append(f"{doc.competencies_count} core competencies listed")
+    elif doc.competencies_count >= 3:
+        skills_score += 2
+    else:
+        improvements.append("Add core competencies (soft skills, leadership abilities)")
+
+    # Job keyword matching (skills bonus up to +4)
+    if job:
+        matched, missing_keywords = job.match(doc)
+        total = len(job.keywords)
+        if total:
+            ratio = matched / total
+            if ratio >= 0.7:
+                skills_score += 4
+                strengths.append(f"Excellent keyword match: {matched}/{total} job keywords found")
+            elif ratio >= 0.5:
+                skills_score += 3
+                strengths.append(f"Good keyword match: {matched}/{total} job keywords found")
+            elif ratio >= 0.3:
+                skills_score += 2
+                improvements.append(f"Improve keyword match: only {matched}/{total} job keywords found")
+            else:
+                skills_score += 1
+                improvements.append(f"Low keyword match: {matched}/{total} — add more job-relevant keywords")
+        missing_keywords = missing_keywords[:MAX_MISSING_KEYWORDS]
+
+    skills_score = min(20, skills_score)
+    score += skills_score
+    breakdown['skills'] = {
+        'score': skills_score, 'max': 20,
+        'percentage': round((skills_score / 20) * 100),
+        'total_skills': total_skills,
+        'competencies_count': doc.competencies_count,
+        'categories': doc.skill_categories,
+        'status': 'excellent' if skills_score >= 18 else 'good' if skills_score >= 14 else 'needs_improvement'
+    }
+
+    # Additional Sections (15 points)
+    additional_score = 0
+    if doc.certifications >= 1:
+        additional_score += 5
+        strengths.append(f"{doc.certifications} certification(s) listed")
+    else:
+        improvements.append("Consider adding relevant certifications")
+
+    if doc.projects >= 1:
+        additional_score += 5
+        if doc.projects_with_tech >= 1:
+            additional_score += 1
+        strengths.append(f"{doc.projects} project(s) showcased")
+    else:
+        improvements.append("Showcase relevant projects or portfolio work")
+
+    if doc.awards >= 1:
+        additional_score += 4
+        strengths.append("Awards and recognition included")
+
+    additional_score = min(15, additional_score)
+    score += additional_score
+    breakdown['additional_sections'] = {
+        'score': additional_score, 'max': 15,
+        'percentage': round((additional_score / 15) * 100),
+        'certifications': doc.certifications,
+        'projects': doc.projects,
+        'awards': doc.awards,
+        'status': 'excellent' if additional_score >= 12 else 'good' if additional_score >= 8 else 'basic'
+    }
+
+    final_score = min(100, score)
+    return {
+        'total_score': final_score,
+        'estimated_score': final_score,
+        'max_score': 100,
+        'percentage': final_score,
+        'grade': grade(final_score),
+        'breakdown': breakdown,
+        'strengths': strengths[:7],
+        'improvements': improvements[:8],
+        'missing_keywords': missing_keywords,
+        'keyword_match_rate': round((1 - len(missing_keywords) / MAX_MISSING_KEYWORDS) * 100) if job else None
+    }
+
+
+def optimization_tips(cv: Any, job: Any = None, ats_result: Optional[Dict[str, Any]] = None) -> List[str]:
+    """Actionable tips for improving a CV; pass ``ats_result`` when the CV was
+    just scored against the same job to skip scoring it again"""
+    doc = _document(cv)
+    if ats_result is None:
+        job = _job_profile(job)
+    tips = []
+
+    if not doc.summary:
+        tips.append("Add a professional summary to introduce yourself and highlight key achievements")
+    else:
+        if doc.summary_words < 40:
+            tips.append(f"Expand your professional summary (currently {doc.summary_words} words, aim for 50-80 words)")
+        elif doc.summary_words > 80:
+            tips.append(f"Condense your professional summary (currently {doc.summary_words} words, aim for 50-80 words)")
+        if not doc.summary_has_digit:
+            tips.append("Add quantified metrics to your summary (e.g., percentages, dollar amounts, team sizes)")
+
+    if not doc.experience_count:
+        tips.append("Add work experience to showcase your professional background")
+    else:
+        if doc.total_achievements == 0:
+            tips.append("Add 3-5 achievement bullets to each work experience")
+        elif doc.with_digits < doc.total_achievements * 0.5:
+            tips.append(f"Quantify more achievements — only {doc.with_digits}/{doc.total_achievements} have metrics. Aim for 70%+")
+        if doc.weak_verbs:
+            tips.append("Replace weak verbs ('responsible for', 'helped with') with strong action verbs ('Led', 'Developed', 'Achieved', 'Implemented')")
+
+    if doc.skills_count < 10:
+        tips.append(f"Add more technical skills (currently {doc.skills_count}, aim for 12-20)")
+    if isinstance(doc.skills, dict) and doc.skill_categories < 3:
+        tips.append("Categorize skills into groups (Programming Languages, Frameworks, Databases, Cloud/DevOps)")
+
+    if not doc.competencies:
+        tips.append("Add core competencies section to highlight soft skills and leadership abilities")
+    elif doc.competencies_count < 6:
+        tips.append(f"Expand competencies (currently {doc.competencies_count}, aim for 8-10)")
+
+    contact = doc.contact
+    if not contact.get('linkedin') and not contact.get('github') and not contact.get('portfolio'):
+        tips.append("Add professional profiles (LinkedIn, GitHub, or portfolio URL)")
+
+    if not doc.certifications and not doc.awards:
+        tips.append("Add certifications or awards to stand out from other candidates")
+    if not doc.projects:
+        tips.append("Showcase relevant projects to demonstrate practical skills")
+
+    if job:
+        title = job.title if isinstance(job, JobKeywordProfile) else str(job.get('title', ''))
+        if title and title.lower() not in doc.summary_lower:
+            tips.append(f"Include the target job title '{title}' in your professional summary")
+
+        ats_data = ats_result if ats_result is not None else score_cv(doc, job)
+        missing = ats_data.get('missing_keywords', [])
+        if missing and len(missing) <= 8:
+            tips.append(f"Add these job-relevant keywords if applicable: {', '.join(missing[:5])}")
+        elif missing:
+            tips.append(f"Your CV is missing {len(missing)} job keywords — review job requirements and add matching skills")
+
+        kw_rate = ats_data.get('keyword_match_rate')
+        if kw_rate is not None and kw_rate < 50:
+            tips.append("Low keyword match with job posting — review the job description and mirror its exact terminology")
+
+    if len(tips) < 3:
+        tips.append("Use consistent formatting and clear section headers for ATS compatibility")
+        tips.append("Keep CV to 1-2 pages for optimal readability")
+
+    return tips[:10]
+
+
+def score_against_jobs(cv_content: Dict[str, Any], jobs: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Score one CV against many jobs; the CV is tokenized once"""
+    doc = CVDocument(cv_content)
+    return [score_cv(doc, job) for job in jobs]
+
+
+def score_variants(cv_variants: Iterable[Dict[str, Any]], job_data: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+    """Score many CV variants against one job; the job's keywords are extracted once"""
+    job = _job_profile(job_data)
+    return [score_cv(cv, job) for cv in cv_variants]
@@ -0,0 +1,272 @@
+"""
+Candidate Scoring Service
+Computes and stores Application.match_score from job and profile feature vectors
+so employer candidate rankings can be served from an indexed column
+"""
+
+import json
+import logging
+import re
+from typing import Dict, List, Optional, Set
+
+from sqlalchemy import desc
+from sqlalchemy.orm import joinedload
+
+from src.models.user import db, User, JobSeekerProfile
+from src.models.job import Job
+from src.models.application import Application
+
+
+logger = logging.getLogger(__name__)
+
+# Job fields whose change invalidates stored match scores
+JOB_SCORING_FIELDS = frozenset({
+    'required_skills', 'preferred_skills', 'years_experience_min', 'years_experience_max',
+    'city', 'location_type', 'employment_type'
+})
+
+# Profile fields whose change invalidates stored match scores
+PROFILE_SCORING_FIELDS = frozenset({
+    'skills', 'technical_skills', 'years_of_experience', 'preferred_location',
+    'job_type_preference', 'availability'
+})
+
+# Applications still in the running for a role
+ACTIVE_APPLICATION_STATUSES = ('submitted', 'under_review', 'shortlisted')
+
+
+def normalize_skills(*raw_values) -> Set[str]:
+    """Parse JSON arrays or delimited strings of skills into a lowercase set"""
+    skills = set()
+    for raw in raw_values:
+        if not raw:
+            continue
+        values = raw
+        if isinstance(raw, str):
+            try:
+                values = json.loads(raw)
+            except (ValueError, TypeError):
+                values = re.split(r'[,;|\n]+', raw)
+        if isinstance(values, str):
+            values = [values]
+        if not isinstance(values, (list, tuple, set)):
+            continue
+        for value in values:
+            if isinstance(value, dict):
+                value = value.get('name') or value.get('skill')
+            skill = str(value or '').strip().lower()
+            if skill:
+                skills.add(skill)
+    return skills
+
+
+def build_job_vector(job: Job) -> Dict:
+    """Extract the scoring features of a job posting"""
+    return {
+        'required_skills': normalize_skills(job.required_skills),
+        'preferred_skills': normalize_skills(job.preferred_skills),
+        'years_min': job.years_experience_min or 0,
+        'years_max': job.years_experience_max,
+        'city': (job.city or '').lower(),
+        'is_remote': bool(job.is_remote or job.location_type == 'remote'),
+        'employment_type': (job.employment_type or '').lower(),
+    }
+
+
+def build_profile_vector(profile: Optional[JobSeekerProfile]) -> Dict:
+    """Extract the scoring features of a job seeker profile"""
+    if not profile:
+        return {
+            'skills': set(), 'years': 0, 'location': '', 'job_type': '',
+            'availability': ''
+        }
+    return {
+        'skills': normalize_skills(profile.skills, profile.technical_skills),
+        'years': profile.years_of_experience or 0,
+        'location': (profile.preferred_location or '').lower(),
+        'job_type': (profile.job_type_preference or '').lower(),
+        'availability': (profile.availability or '').lower(),
+    }
+
+
+def score_vectors(job_vec: Dict, profile_vec: Dict) -> int:
+    """Score a profile vector against a job vector (0-100)"""
+    score = 0.0
+    skills = profile_vec['skills']
+
+    # Required skills (45%) - a job without listed skills doesn't penalise anyone
+    required = job_vec['required_skills']
+    if required:
+        score += 45 * len(required & skills) / len(required)
+    else:
+        score += 25
+
+    # Preferred skills (10%)
+    preferred = job_vec['preferred_skills']
+    if preferred:
+        score += 10 * len(preferred & skills) / len(preferred)
+
+    # Experience fit (25%)
+    years, years_min, years_max = profile_vec['years'], job_vec['years_min'], job_vec['years_max']
+    if years >= years_min and (not years_max or years <= years_max + 3):
+        score += 25
+    elif years >= years_min - 1:
+        score += 17
+    elif years >= years_min - 2:
+        score += 8
+
+    # Location (10%)
+    location, city = profile_vec['location'], job_vec['city']
+    if job_vec['is_remote']:
+        score += 10
+    elif location and city and (location in city or city in location):
+        score += 10
+
+    # Employment type (5%)
+    job_type, employment_type = profile_vec['job_type'], job_vec['employment_type']
+    if job_type and employment_type and (job_type in employment_type or employment_type in job_type):
+        score += 5
+    elif 'remote' in job_type and job_vec['is_remote']:
+        score += 5
+
+    # Availability (5%)
+    availability = profile_vec['availability']
+    if 'immediate' in availability:
+        score += 5
+    elif 'week' in availability:
+        score += 3
+
+    return int(round(min(score, 100)))
+
+
+def score_application(application: Application, job: Job = None, profile: JobSeekerProfile = None) -> Optional[int]:
+    """Compute and assign the match score of a single application.
+
+    Runs in a savepoint: a failure leaves match_score NULL for the scheduled
+    backfill and keeps the caller's transaction usable.
+    """
+    try:
+        with db.session.begin_nested():
+            job = job or application.job
+            if profile is None:
+                profile = JobSeekerProfile.query.filter_by(user_id=application.applicant_id).first()
+            application.match_score = score_vectors(build_job_vector(job), build_profile_vector(profile))
+    except Exception as e:
+        logger.error(f"Failed to score application {application.id}: {str(e)}")
+        application.match_score = None
+    return application.match_score
+
+
+def _write_scores(scores: List[Dict]) -> int:
+    """Persist computed scores with a single bulk UPDATE"""
+    if scores:
+        db.session.bulk_update_mappings(Application, scores)
+    return len(scores)
+
+
+def rescore_job(job: Job) -> int:
+    """Recompute match scores for every application to a job.
+
+    Runs in a savepoint of the caller's transaction, so a failure discards only
+    the rescoring and the job update itself can still be committed.
+    """
+    try:
+        with db.session.begin_nested():
+            job_vec = build_job_vector(job)
+            rows = db.session.query(Application.id, JobSeekerProfile).outerjoin(
+                JobSeekerProfile, JobSeekerProfile.user_id == Application.applicant_id
+            ).filter(Application.job_id == job.id).all()
+            return _write_scores([
+                {'id': app_id, 'match_score': score_vectors(job_vec, build_profile_vector(profile))}
+                for app_id, profile in rows
+            ])
+    except Exception as e:
+        logger.error(f"Failed to rescore applications for job {job.id}: {str(e)}")
+        return 0
+
+
+def rescore_profile(user_id: int, profile: JobSeekerProfile = None) -> int:
+    """Recompute match scores for every application submitted by a job seeker
+    (in a savepoint of the caller's transaction, like rescore_job)"""
+    try:
+        with db.session.begin_nested():
+            if profile is None:
+                profile = JobSeekerProfile.query.filter_by(user_id=user_id).first()
+            profile_vec = build_profile_vector(profile)
+            rows = db.session.query(Application.id, Job).join(
+                Job, Job.id == Application.job_id
+            ).filter(Application.applicant_id == user_id).all()
+            return _write_scores([
+                {'id': app_id, 'match_score': score_vectors(build_job_vector(job), profile_vec)}
+                for app_id, job in rows
+            ])
+    except Exception as e:
+        logger.error(f"Failed to rescore applications for user {user_id}: {str(e)}")
+        return 0
+
+
+def backfill_scores(*criteria, limit: int = 1000) -> int:
+    """Score applications that predate the scoring engine or whose scoring
+    failed (match_score IS NULL) and commit.
+
+    Run by the scheduler (candidates.backfill_scores), never from a read
+    request. ``criteria`` are extra filters on Application/Job; at most
+    ``limit`` rows are scored per call.
+    """
+    try:
+        rows = db.session.query(Application.id, Job, JobSeekerProfile).join(
+            Job, Job.id == Application.job_id
+        ).outerjoin(
+            JobSeekerProfile, JobSeekerProfile.user_id == Application.applicant_id
+        ).filter(
+            Application.match_score.is_(None),
+            *criteria
+        ).limit(limit).all()
+        if not rows:
+            return 0
+        job_vectors = {}
+        scores = []
+        for app_id, job, profile in rows:
+            if job.id not in job_vectors:
+                job_vectors[job.id] = build_job_vector(job)
+            scores.append({
+                'id': app_id,
+                'match_score': score_vectors(job_vectors[job.id], build_profile_vector(profile))
+            })
+        _write_scores(scores)
+        db.session.commit()
+        return len(scores)
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Failed to backfill match scores: {str(e)}")
+        raise
+
+
+def scheduled_tasks():
+    """Tasks run by the scheduler coordinator"""
+    from src.services.scheduler_coordinator import ScheduledTask, every
+    return [
+        ScheduledTask('candidates.backfill_scores', backfill_scores, every(minutes=10), jitter=120)
+    ]
+
+
+def top_candidates_query(query):
+    """Order an application query by stored match score and eager-load what the
+    candidate list renders (applicant, profile, job) so a page costs two queries"""
+    return query.options(
+        joinedload(Application.applicant).joinedload(User.job_seeker_profile),
+        joinedload(Application.job)
+    ).order_by(
+        desc(Application.match_score),
+        desc(Application.rating),
+        desc(Application.created_at)
+    )
+
+
+def top_applications_for_job(job_id: int, limit: int = 10) -> List[Application]:
+    """Top-N active applications for a job, served by idx_applications_job_match_score"""
+    query = Application.query.filter(
+        Application.job_id == job_id,
+        Application.status.in_(ACTIVE_APPLICATION_STATUSES)
+    )
+    return top_candidates_query(query).limit(limit).all()
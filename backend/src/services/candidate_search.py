@@ -0,0 +1,233 @@
+"""
+Candidate Search Service
+Maintains the candidate search index (full-text document + skill postings) and
+answers ranked employer candidate searches from it
+"""
+
+import logging
+import re
+from datetime import datetime
+from typing import List, Optional
+
+from sqlalchemy import Float, Integer, case, desc, func, literal
+from sqlalchemy.orm import joinedload
+
+from src.models.user import db, User, JobSeekerProfile
+from src.models.candidate_search import CandidateSearchIndex, CandidateSkillPosting, SQLITE_FTS_TABLE
+from src.services.candidate_scoring import normalize_skills
+
+
+logger = logging.getLogger(__name__)
+
+SEARCHABLE_VISIBILITY = ('public', 'employers_only')
+
+# Relevance weights
+TEXT_WEIGHT = 10.0
+SKILL_WEIGHT = 5.0
+EXPERIENCE_WEIGHT = 3.0
+COMPLETENESS_WEIGHT = 1.0
+
+_sqlite_fts_ready = False
+
+
+def experience_band(years: Optional[int]) -> str:
+    """Map years of experience to the entry/mid/senior facet"""
+    years = years or 0
+    if years >= 8:
+        return 'senior'
+    if years >= 3:
+        return 'mid'
+    return 'entry'
+
+
+def _is_postgres() -> bool:
+    return db.engine.dialect.name == 'postgresql'
+
+
+def _sqlite_fts_available() -> bool:
+    """Whether the FTS5 shadow table exists (created alongside the index table)"""
+    global _sqlite_fts_ready
+    if _sqlite_fts_ready:
+        return True
+    try:
+        _sqlite_fts_ready = db.session.execute(
+            db.text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+            {'name': SQLITE_FTS_TABLE}
+        ).first() is not None
+    except Exception as e:
+        logger.warning(f"SQLite FTS5 check failed, candidate search falls back to LIKE: {str(e)}")
+        _sqlite_fts_ready = False
+    return _sqlite_fts_ready
+
+
+def _build_document(user: User, profile: JobSeekerProfile, skills) -> str:
+    """Concatenate the searchable text of a profile"""
+    parts = [
+        user.first_name, user.last_name,
+        profile.professional_title, profile.desired_position,
+        profile.professional_summary, profile.preferred_location,
+        ' '.join(sorted(skills)),
+    ]
+    return ' '.join(p.strip() for p in parts if p and p.strip())
+
+
+def index_profile(user: User, profile: JobSeekerProfile = None) -> bool:
+    """Upsert the search document and skill postings of a job seeker.
+
+    Runs in a savepoint of the caller's transaction (the caller commits); a
+    failure discards only the index update.
+    """
+    try:
+        profile = profile or user.job_seeker_profile
+        if not profile:
+            return False
+
+        with db.session.begin_nested():
+            skills = normalize_skills(profile.skills, profile.technical_skills)
+            entry = CandidateSearchIndex.query.filter_by(user_id=user.id).first()
+            if not entry:
+                entry = CandidateSearchIndex(user_id=user.id)
+                db.session.add(entry)
+
+            entry.document = _build_document(user, profile, skills)
+            entry.experience_band = experience_band(profile.years_of_experience)
+            entry.years_of_experience = profile.years_of_experience or 0
+            entry.location = (profile.preferred_location or '').strip().lower() or None
+            entry.availability = profile.availability
+            entry.profile_completeness = profile.profile_completeness or 0
+            entry.profile_updated_at = profile.updated_at or datetime.utcnow()
+            entry.is_searchable = bool(
+                user.role == 'job_seeker' and user.is_active
+                and profile.profile_visibility in SEARCHABLE_VISIBILITY
+            )
+
+            # Replace skill postings
+            CandidateSkillPosting.query.filter_by(user_id=user.id).delete(synchronize_session=False)
+            if skills:
+                db.session.bulk_insert_mappings(CandidateSkillPosting, [
+                    {'skill': skill[:100], 'user_id': user.id} for skill in skills
+                ])
+
+            if not _is_postgres() and _sqlite_fts_available():
+                db.session.execute(db.text(f"DELETE FROM {SQLITE_FTS_TABLE} WHERE rowid = :uid"), {'uid': user.id})
+                db.session.execute(
+                    db.text(f"INSERT INTO {SQLITE_FTS_TABLE} (rowid, document) VALUES (:uid, :doc)"),
+                    {'uid': user.id, 'doc': entry.document}
+                )
+        return True
+    except Exception as e:
+        logger.error(f"Failed to index candidate {user.id}: {str(e)}")
+        return False
+
+
+def remove_profiles(user_ids: List[int]) -> None:
+    """Delete the search document, skill postings and FTS row of deleted users
+    or profiles, inside the caller's transaction (the caller commits)"""
+    if not user_ids:
+        return
+    CandidateSkillPosting.query.filter(CandidateSkillPosting.user_id.in_(user_ids)).delete()
+    CandidateSearchIndex.query.filter(CandidateSearchIndex.user_id.in_(user_ids)).delete()
+    if not _is_postgres() and _sqlite_fts_available():
+        for user_id in user_ids:
+            db.session.execute(db.text(f"DELETE FROM {SQLITE_FTS_TABLE} WHERE rowid = :uid"), {'uid': user_id})
+
+
+def rebuild_index(batch_size: int = 500) -> int:
+    """Reindex every job seeker profile (initial backfill / repair)"""
+    indexed = 0
+    last_id = 0
+    while True:
+        users = User.query.options(joinedload(User.job_seeker_profile)).filter(
+            User.role == 'job_seeker', User.id > last_id
+        ).order_by(User.id).limit(batch_size).all()
+        if not users:
+            break
+        for user in users:
+            if index_profile(user):
+                indexed += 1
+        last_id = users[-1].id
+        db.session.commit()
+    return indexed
+
+
+def _fts_terms(text: str) -> List[str]:
+    return re.findall(r'[\w\+\#\.]+', (text or '').lower())
+
+
+def search_candidates(search: str = None, skills: List[str] = None, experience_level: str = None,
+                      location: str = None, availability: str = None, min_years: int = None,
+                      page: int = 1, per_page: int = 20):
+    """Ranked candidate search.
+
+    Facets (experience band, location, availability) are equality/prefix filters on
+    indexed columns; relevance combines text rank, skill overlap from the postings,
+    experience fit and profile completeness.
+
+    Returns a Flask-SQLAlchemy pagination of (CandidateSearchIndex, rank) rows.
+    """
+    query = db.session.query(CandidateSearchIndex).filter(CandidateSearchIndex.is_searchable == True)
+
+    # Facet filters
+    if experience_level in ('entry', 'mid', 'senior'):
+        query = query.filter(CandidateSearchIndex.experience_band == experience_level)
+    if location:
+        query = query.filter(CandidateSearchIndex.location.like(f'{location.strip().lower()}%'))
+    if availability:
+        query = query.filter(CandidateSearchIndex.availability == availability)
+
+    # Text relevance
+    text_rank = literal(0.0, type_=Float)
+    terms = _fts_terms(search)
+    if terms:
+        if _is_postgres():
+            tsquery = func.plainto_tsquery('english', ' '.join(terms))
+            vector = func.to_tsvector('english', CandidateSearchIndex.document)
+            query = query.filter(vector.op('@@')(tsquery))
+            text_rank = func.ts_rank(vector, tsquery)
+        elif _sqlite_fts_available():
+            fts = db.text(
+                f"SELECT rowid AS user_id, -bm25({SQLITE_FTS_TABLE}) AS rank "
+                f"FROM {SQLITE_FTS_TABLE} WHERE {SQLITE_FTS_TABLE} MATCH :q"
+            ).bindparams(q=' '.join(f'"{t}"' for t in terms)).columns(
+                user_id=Integer, rank=Float
+            ).subquery('fts')
+            query = query.join(fts, fts.c.user_id == CandidateSearchIndex.user_id)
+            text_rank = fts.c.rank
+        else:
+            for term in terms:
+                query = query.filter(CandidateSearchIndex.document.ilike(f'%{term}%'))
+
+    # Skill overlap from the postings
+    skill_rank = literal(0.0, type_=Float)
+    skill_terms = sorted(normalize_skills(skills or []))
+    if skill_terms:
+        hits = db.session.query(
+            CandidateSkillPosting.user_id.label('user_id'),
+            func.count().label('hits')
+        ).filter(CandidateSkillPosting.skill.in_(skill_terms)).group_by(
+            CandidateSkillPosting.user_id
+        ).subquery('skill_hits')
+        query = query.join(hits, hits.c.user_id == CandidateSearchIndex.user_id)
+        skill_rank = hits.c.hits * 1.0 / len(skill_terms)
+
+    # Experience fit
+    experience_rank = literal(0.0, type_=Float)
+    if min_years is not None:
+        experience_rank = case(
+            (CandidateSearchIndex.years_of_experience >= min_years, 1.0),
+            (CandidateSearchIndex.years_of_experience >= min_years - 2, 0.5),
+            else_=0.0
+        )
+
+    rank = (
+        text_rank * TEXT_WEIGHT
+        + skill_rank * SKILL_WEIGHT
+        + experience_rank * EXPERIENCE_WEIGHT
+        + func.coalesce(CandidateSearchIndex.profile_completeness, 0) / 100.0 * COMPLETENESS_WEIGHT
+    ).label('rank')
+
+    query = query.add_columns(rank).options(
+        joinedload(CandidateSearchIndex.user).joinedload(User.job_seeker_profile)
+    ).order_by(desc('rank'), desc(CandidateSearchIndex.profile_updated_at))
+
+    return query.paginate(page=page, per_page=per_page, error_out=False)
@@ -4,6 +4,7 @@ Automatically deletes external jobs and scholarships 1 day after their deadline
 """
 
 import logging
+import os
 import threading
 import time
 from datetime import datetime, timedelta
@@ -55,28 +56,40 @@ class CleanupService:
             self.scheduler_thread.join(timeout=5)
         self.logger.info("🛑 Cleanup service stopped")
     
+    def scheduled_tasks(self):
+        """Tasks run by the scheduler coordinator (opt-in: ENABLE_CLEANUP_SERVICE=true enables them)"""
+        from src.services.scheduler_coordinator import ScheduledTask, every
+        enabled = os.getenv('ENABLE_CLEANUP_SERVICE', 'false').lower() == 'true'
+        return [
+            ScheduledTask('cleanup.external_opportunities', self.run_cleanup,
+                          every(seconds=self.check_interval), jitter=600, enabled=enabled)
+        ]
+    
+    def run_cleanup(self) -> Dict:
+        """One cleanup cycle over external jobs and scholarships"""
+        self.logger.info("🔍 Running cleanup check...")
+        jobs_deleted = self.cleanup_external_jobs()
+        scholarships_deleted = self.cleanup_external_scholarships()
+        
+        total_deleted = jobs_deleted + scholarships_deleted
+        if total_deleted > 0:
+            self.logger.info(
+                f"✅ Cleanup complete: Deleted {jobs_deleted} jobs and "
+                f"{scholarships_deleted} scholarships (Total: {total_deleted})"
+            )
+        else:
+            self.logger.info("✅ Cleanup complete: No items to delete")
+        return {'jobs_deleted': jobs_deleted, 'scholarships_deleted': scholarships_deleted}
+    
     def _run_scheduler(self):
         """Main scheduler loop"""
         while self.is_running:
             try:
-                self.logger.info("🔍 Running cleanup check...")
-
                 if self.app is not None:
                     with self.app.app_context():
-                        jobs_deleted = self.cleanup_external_jobs()
-                        scholarships_deleted = self.cleanup_external_scholarships()
-                else:
-                    jobs_deleted = self.cleanup_external_jobs()
-                    scholarships_deleted = self.cleanup_external_scholarships()
-                
-                total_deleted = jobs_deleted + scholarships_deleted
-                if total_deleted > 0:
-                    self.logger.info(
-                        f"✅ Cleanup complete: Deleted {jobs_deleted} jobs and "
-                        f"{scholarships_deleted} scholarships (Total: {total_deleted})"
-                    )
+                        self.run_cleanup()
                 else:
-                    self.logger.info("✅ Cleanup complete: No items to delete")
+                    self.run_cleanup()
                 
                 # Wait for next check
                 time.sleep(self.check_interval)
@@ -169,7 +182,7 @@ class CleanupService:
             self.logger.error(f"❌ Error in cleanup_external_jobs: {str(e)}")
             import traceback
             self.logger.error(traceback.format_exc())
-            return 0
+            raise
     
     def cleanup_external_scholarships(self) -> int:
         """
@@ -235,7 +248,7 @@ class CleanupService:
             self.logger.error(f"❌ Error in cleanup_external_scholarships: {str(e)}")
             import traceback
             self.logger.error(traceback.format_exc())
-            return 0
+            raise
     
     def _log_deletion_summary(self, item_type: str, deleted_items: List[Dict]):
         """Log a summary of deleted items"""
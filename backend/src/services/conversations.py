@@ -0,0 +1,140 @@
+"""
+Conversation Service
+Maintains the denormalized conversations table (latest message, last activity and
+per-participant unread counts) as messages are sent and read, and serves the inbox
+from it with a single indexed, paginated query
+"""
+
+import logging
+from datetime import datetime
+
+from sqlalchemy import and_, case, desc, func, or_, update
+from sqlalchemy.exc import IntegrityError
+
+from src.models.user import db, User
+from src.models.notification import Conversation, Message
+
+
+logger = logging.getLogger(__name__)
+
+
+def _pair_condition(low: int, high: int):
+    return and_(Conversation.user_low_id == low, Conversation.user_high_id == high)
+
+
+def _unread_column(low: int, user_id: int):
+    return Conversation.user_low_unread if user_id == low else Conversation.user_high_unread
+
+
+def record_message(message: Message) -> None:
+    """Account a new (flushed) message in its conversation. Runs in the caller's transaction."""
+    low, high = Conversation.participants(message.sender_id, message.recipient_id)
+    unread = _unread_column(low, message.recipient_id)
+    last_activity = message.created_at or datetime.utcnow()
+    bump = (
+        update(Conversation).where(_pair_condition(low, high))
+        .values({
+            Conversation.last_message_id: message.id,
+            Conversation.last_activity: last_activity,
+            unread: unread + 1,
+        })
+        .execution_options(synchronize_session=False)
+    )
+
+    if db.session.execute(bump).rowcount:
+        return
+    try:
+        with db.session.begin_nested():
+            db.session.add(Conversation(
+                user_low_id=low,
+                user_high_id=high,
+                last_message_id=message.id,
+                last_activity=last_activity,
+                **{unread.key: 1}
+            ))
+    except IntegrityError:
+        # The other participant's first message created the row concurrently
+        db.session.execute(bump)
+
+
+def mark_read(message: Message) -> bool:
+    """Mark a received message read and take it off the recipient's unread count.
+
+    The read flag is flipped with a conditional UPDATE, so concurrent requests
+    for the same message decrement the count once. Returns False when the
+    message was already read. Runs in the caller's transaction.
+    """
+    read = db.session.execute(
+        update(Message).where(Message.id == message.id, Message.is_read.isnot(True))
+        .values(is_read=True, read_at=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    )
+    if not read.rowcount:
+        return False
+
+    low, high = Conversation.participants(message.sender_id, message.recipient_id)
+    unread = _unread_column(low, message.recipient_id)
+    db.session.execute(
+        update(Conversation).where(_pair_condition(low, high))
+        .values({unread: case((unread > 0, unread - 1), else_=0)})
+        .execution_options(synchronize_session=False)
+    )
+    return True
+
+
+def conversation_page(user_id: int, page: int, per_page: int):
+    """One page of the user's conversations, most recent first.
+
+    Items are (conversation, other_user, last_message) rows; last_message is
+    None when the latest message was deleted.
+    """
+    other_user_id = case(
+        (Conversation.user_low_id == user_id, Conversation.user_high_id),
+        else_=Conversation.user_low_id
+    )
+    return db.session.query(Conversation, User, Message).join(
+        User, User.id == other_user_id
+    ).outerjoin(
+        Message, Message.id == Conversation.last_message_id
+    ).filter(
+        or_(Conversation.user_low_id == user_id, Conversation.user_high_id == user_id)
+    ).order_by(
+        desc(Conversation.last_activity), desc(Conversation.id)
+    ).paginate(page=page, per_page=per_page, error_out=False)
+
+
+def rebuild_conversations() -> int:
+    """Recompute every conversation from the messages table; returns the number of rows"""
+    low = case((Message.sender_id < Message.recipient_id, Message.sender_id), else_=Message.recipient_id)
+    high = case((Message.sender_id < Message.recipient_id, Message.recipient_id), else_=Message.sender_id)
+    unread = Message.is_read.isnot(True)
+
+    rows = db.session.query(
+        low.label('user_low_id'),
+        high.label('user_high_id'),
+        func.max(Message.id).label('last_message_id'),
+        func.max(Message.created_at).label('last_activity'),
+        func.sum(case((and_(unread, Message.recipient_id == low), 1), else_=0)).label('user_low_unread'),
+        func.sum(case((and_(unread, Message.recipient_id == high), 1), else_=0)).label('user_high_unread'),
+    ).group_by(low, high).all()
+
+    try:
+        Conversation.query.delete(synchronize_session=False)
+        if rows:
+            db.session.bulk_insert_mappings(Conversation, [
+                {
+                    'user_low_id': row.user_low_id,
+                    'user_high_id': row.user_high_id,
+                    'last_message_id': row.last_message_id,
+                    'last_activity': row.last_activity or datetime.utcnow(),
+                    'user_low_unread': int(row.user_low_unread or 0),
+                    'user_high_unread': int(row.user_high_unread or 0),
+                }
+                for row in rows
+            ])
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Failed to rebuild conversations: {str(e)}")
+        raise
+    return len(rows)
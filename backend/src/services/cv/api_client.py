@@ -5,7 +5,31 @@ Handles all external API communications with intelligent retry logic
 import os
 import time
 import re
-from typing import Optional
+import json
+import threading
+from typing import Callable, Optional
+
+from .provider_state import provider_state
+from .rate_limiter import provider_rate_limiter
+from .response_cache import response_cache
+
+OPENROUTER_MODEL = "openrouter/free"
+GEMINI_MODEL = "gemini-flash-latest"
+
+RATE_LIMIT_PATTERNS = [
+    '429', 'quota', 'QUOTA', 'rate limit', 'Rate limit',
+    'too many requests', 'requests per minute', 'RESOURCE_EXHAUSTED',
+    'rate_limit_exceeded', 'RateLimitError'
+]
+
+
+class StreamConsumerError(Exception):
+    """Raised by the stream consumer (not the provider) while tokens were being delivered"""
+
+    def __init__(self, original: Exception):
+        super().__init__(str(original))
+        self.original = original
+
 
 class CVAPIClient:
     """Manages API requests to Gemini and OpenRouter with automatic fallback"""
@@ -16,17 +40,14 @@ class CVAPIClient:
         self._openrouter_api_key = os.getenv('OPENROUTER_API_KEY')
         self._site_url = os.getenv('SITE_URL', 'https://jbs.afritechbridge.online')
         self._site_name = os.getenv('SITE_NAME', 'TalentSphere')
-        self._last_request_time = 0
-        self._min_request_interval = 3  # 3 seconds between requests
         
-        # API provider tracking
+        # Provider of the last successful call; provider health is shared (provider_state)
         self._current_provider = 'openrouter'
-        self._openrouter_quota_exhausted = False
-        self._gemini_quota_exhausted = False
         
-        # Request statistics
+        # Request statistics (sections may be generated from several threads)
         self._request_count = 0
         self._error_count = 0
+        self._stats_lock = threading.Lock()
         
         # Lazy-loaded client
         self.client = None
@@ -50,16 +71,15 @@ class CVAPIClient:
             self.client = genai.Client(api_key=self._api_key)
         return self.client
     
-    def _rate_limit_wait(self):
-        """Ensure we don't exceed rate limits"""
-        current_time = time.time()
-        time_since_last_request = current_time - self._last_request_time
-        
-        if time_since_last_request < self._min_request_interval:
-            wait_time = self._min_request_interval - time_since_last_request
-            time.sleep(wait_time)
-        
-        self._last_request_time = time.time()
+    def _rate_limit_wait(self, provider: str, timeout: Optional[float] = None):
+        """Wait for the provider's request budget, shared by all workers"""
+        waited = provider_rate_limiter.acquire(provider, timeout=timeout)
+        if waited >= 1:
+            print(f"[CV API] ⏳ Waited {waited:.1f}s for {provider} request budget")
+    
+    def _count_error(self):
+        with self._stats_lock:
+            self._error_count += 1
     
     def _extract_retry_delay(self, error_message: str) -> Optional[int]:
         """Extract retry delay from error message if available"""
@@ -98,7 +118,7 @@ class CVAPIClient:
         }
         
         payload = {
-            "model": "openrouter/free",
+            "model": OPENROUTER_MODEL,
             "messages": [{"role": "user", "content": prompt}],
             "temperature": temperature,
             "max_tokens": max_tokens
@@ -119,7 +139,7 @@ class CVAPIClient:
         client = self._get_gemini_client()
         
         response = client.models.generate_content(
-            model="gemini-flash-latest",
+            model=GEMINI_MODEL,
             contents=prompt,
             config={
                 'temperature': temperature,
@@ -149,115 +169,226 @@ class CVAPIClient:
         
         raise Exception("Gemini API returned empty response")
     
-    def make_request_with_retry(self, prompt: str, max_retries: int = 3) -> str:
+    def stream_openrouter(self, prompt: str, on_text: Callable[[str], None],
+                          temperature: float = 0.7, max_tokens: int = 2048) -> str:
+        """Call OpenRouter with a streamed completion, passing each text delta to
+        on_text as it arrives; returns the full response text"""
+        if not self._openrouter_api_key:
+            raise ValueError("OPENROUTER_API_KEY not found. Add it to .env to use fallback.")
+        
+        import requests
+        
+        url = "https://openrouter.ai/api/v1/chat/completions"
+        headers = {
+            "Authorization": f"Bearer {self._openrouter_api_key}",
+            "HTTP-Referer": self._site_url,
+            "X-Title": self._site_name,
+            "Content-Type": "application/json"
+        }
+        
+        payload = {
+            "model": OPENROUTER_MODEL,
+            "messages": [{"role": "user", "content": prompt}],
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+            "stream": True
+        }
+        
+        parts = []
+        with requests.post(url, headers=headers, json=payload, timeout=60, stream=True) as response:
+            response.raise_for_status()
+            response.encoding = 'utf-8'
+            for line in response.iter_lines(decode_unicode=True):
+                # Server-sent events; lines starting with ':' are keep-alive comments
+                if not line or not line.startswith('data:'):
+                    continue
+                data = line[len('data:'):].strip()
+                if data == '[DONE]':
+                    break
+                chunk = json.loads(data)
+                if chunk.get('error'):
+                    raise Exception(f"OpenRouter stream error: {chunk['error']}")
+                for choice in chunk.get('choices') or []:
+                    text = (choice.get('delta') or {}).get('content')
+                    if text:
+                        parts.append(text)
+                        on_text(text)
+        
+        if not parts:
+            raise Exception("OpenRouter returned empty response")
+        self._current_provider = 'openrouter'
+        return ''.join(parts)
+    
+    def stream_gemini(self, prompt: str, on_text: Callable[[str], None],
+                      temperature: float = 0.7, max_tokens: int = 2048) -> str:
+        """Call Gemini with a streamed completion, passing each text chunk to
+        on_text as it arrives; returns the full response text"""
+        client = self._get_gemini_client()
+        
+        parts = []
+        for chunk in client.models.generate_content_stream(
+            model=GEMINI_MODEL,
+            contents=prompt,
+            config={
+                'temperature': temperature,
+                'max_output_tokens': max_tokens,
+            }
+        ):
+            feedback = getattr(chunk, 'prompt_feedback', None)
+            if feedback is not None and getattr(feedback, 'block_reason', None):
+                raise Exception(f"Content blocked by safety filters: {feedback.block_reason}")
+            text = getattr(chunk, 'text', None)
+            if text:
+                parts.append(text)
+                on_text(text)
+        
+        if not parts:
+            raise Exception("Gemini API returned empty response")
+        self._current_provider = 'gemini'
+        return ''.join(parts)
+    
+    def make_request_with_retry(
+        self,
+        prompt: str,
+        max_retries: int = 3,
+        section: Optional[str] = None,
+        temperature: float = 0.7,
+        use_cache: bool = True,
+        stream=None,
+    ) -> str:
         """
         Make API request with intelligent retry logic and automatic fallback
+        
+        Identical prompts (same section and temperature) are answered from the
+        shared response cache instead of calling a provider again.
+        
+        With ``stream`` (an object with reset() and feed(text), such as
+        CVSectionStreamParser) the completion is streamed and fed to it as it
+        arrives; it is reset before every provider attempt. A cached response
+        is fed to it in one piece.
         """
+        cache_key = None
+        if use_cache and response_cache.enabled:
+            cache_key = response_cache.key(prompt, f'{OPENROUTER_MODEL}|{GEMINI_MODEL}', temperature, section)
+            cached = response_cache.get(cache_key)
+            if cached is not None:
+                print(f"[CV API] ♻️ Cached response for {section or 'prompt'} ({len(cached)} chars)")
+                if stream is not None:
+                    stream.reset()
+                    stream.feed(cached)
+                return cached
         
-        self._request_count += 1
+        response = self._request_with_fallback(prompt, max_retries, temperature, stream)
+        if cache_key:
+            response_cache.put(cache_key, response)
+        return response
+    
+    def _configured_providers(self) -> list:
+        """Providers with credentials, in preference order"""
+        providers = []
+        if self._openrouter_api_key:
+            providers.append('openrouter')
+        if self._api_key:
+            providers.append('gemini')
+        return providers
+    
+    def _call_provider(self, provider: str, prompt: str, temperature: float, stream=None) -> str:
+        if stream is None:
+            if provider == 'openrouter':
+                return self.call_openrouter(prompt, temperature=temperature, max_tokens=2048)
+            return self.call_gemini(prompt, temperature=temperature, max_tokens=2048)
         
-        # If OpenRouter quota exhausted, try Gemini directly
-        if self._openrouter_quota_exhausted and self._api_key:
-            print(f"[CV API] 🔄 Using Gemini (OpenRouter quota exhausted)")
+        def on_text(text: str):
+            # Keep consumer failures apart from provider failures
             try:
-                response = self.call_gemini(prompt, temperature=0.7, max_tokens=2048)
-                print(f"[CV API] ✅ Gemini successful (Request #{self._request_count})")
-                return response
+                stream.feed(text)
             except Exception as e:
-                print(f"[CV API] ⚠️ Gemini failed: {str(e)[:100]}")
-                self._openrouter_quota_exhausted = False
+                raise StreamConsumerError(e) from e
         
-        # Try OpenRouter first
-        if self._openrouter_api_key:
-            for attempt in range(max_retries):
-                try:
-                    self._rate_limit_wait()
-                    response = self.call_openrouter(prompt, temperature=0.7, max_tokens=2048)
-                    print(f"[CV API] ✅ OpenRouter successful (Request #{self._request_count}, Attempt {attempt + 1})")
-                    return response
-                    
-                except Exception as e:
-                    self._error_count += 1
-                    error_str = str(e)
-                    
-                    # Detect rate limiting
-                    is_rate_limit = any(pattern in error_str for pattern in [
-                        '429', 'quota', 'QUOTA', 'rate limit', 'Rate limit',
-                        'too many requests', 'requests per minute', 'RESOURCE_EXHAUSTED',
-                        'rate_limit_exceeded', 'RateLimitError'
-                    ])
-                    
-                    if is_rate_limit:
-                        extracted_delay = self._extract_retry_delay(error_str)
-                        
-                        if attempt < max_retries - 1:
-                            wait_time = extracted_delay if extracted_delay else (2 ** attempt) * 3
-                            wait_time = min(wait_time, 60)  # Max 60 seconds
-                            print(f"[CV API] ⏳ OpenRouter rate limit. Waiting {wait_time}s (attempt {attempt + 1}/{max_retries})")
-                            time.sleep(wait_time)
-                            continue
-                        else:
-                            self._openrouter_quota_exhausted = True
-                            print(f"[CV API] ❌ OpenRouter rate limit exhausted after {max_retries} attempts")
-                            break
-                    else:
-                        print(f"[CV API] ⚠️ OpenRouter error: {error_str[:200]}")
-                        if attempt < max_retries - 1:
-                            time.sleep(2)
-                            continue
-                        else:
-                            break
-        
-        # Fallback to Gemini
-        print(f"[CV API] 🔄 Falling back to Gemini...")
-        
-        if not self._api_key:
+        stream.reset()
+        if provider == 'openrouter':
+            return self.stream_openrouter(prompt, on_text, temperature=temperature, max_tokens=2048)
+        return self.stream_gemini(prompt, on_text, temperature=temperature, max_tokens=2048)
+    
+    def _request_with_fallback(self, prompt: str, max_retries: int, temperature: float, stream=None) -> str:
+        """
+        Call the first available provider, falling through to the next one on failure
+        
+        Providers cooling down after a rate limit or with an open circuit are
+        skipped without waiting, using the state every worker shares. Only when
+        no provider is usable does the request wait, and only for up to
+        CV_PROVIDER_MAX_WAIT seconds; longer cooldowns fail the request at once.
+        """
+        with self._stats_lock:
+            self._request_count += 1
+            request_number = self._request_count
+        
+        providers = self._configured_providers()
+        if not providers:
             raise Exception(
-                "OpenRouter failed and no Gemini API key found. "
+                "No AI provider configured. "
                 "Configure at least one API: GEMINI_API_KEY or OPENROUTER_API_KEY in .env"
             )
+        max_wait = float(os.getenv('CV_PROVIDER_MAX_WAIT', '10'))
         
+        last_error = None
         for attempt in range(max_retries):
-            try:
-                self._rate_limit_wait()
-                response = self.call_gemini(prompt, temperature=0.7, max_tokens=2048)
-                print(f"[CV API] ✅ Gemini successful (Request #{self._request_count}, Attempt {attempt + 1})")
-                return response
-                
-            except Exception as e:
-                self._error_count += 1
-                error_str = str(e)
+            ready, retry_in = [], []
+            for provider in providers:
+                usable, wait = provider_state.available(provider)
+                if usable:
+                    ready.append(provider)
+                else:
+                    retry_in.append(wait)
+            
+            if not ready:
+                wait_time = min(retry_in)
+                if wait_time > max_wait or attempt == max_retries - 1:
+                    raise Exception(
+                        f"⏳ All API providers are rate limited or unavailable. "
+                        f"Please retry in about {int(wait_time) + 1} seconds. "
+                        f"Total requests: {self._request_count}, Errors: {self._error_count}"
+                    )
+                print(f"[CV API] ⏳ No provider available, waiting {wait_time:.1f}s (attempt {attempt + 1}/{max_retries})")
+                time.sleep(wait_time)
+                continue
+            
+            for index, provider in enumerate(ready):
+                # Fall through to the next provider instead of waiting out this one's budget
+                is_last = index == len(ready) - 1
+                try:
+                    self._rate_limit_wait(provider, timeout=None if is_last else 0)
+                except Exception as e:
+                    last_error = e
+                    continue
                 
-                is_rate_limit = any(pattern in error_str for pattern in [
-                    '429', 'RESOURCE_EXHAUSTED', 'quota', 'QUOTA',
-                    'rate limit', 'too many requests', 'RateLimitError'
-                ])
+                started = time.monotonic()
+                try:
+                    response = self._call_provider(provider, prompt, temperature, stream)
+                except StreamConsumerError as e:
+                    raise e.original
+                except Exception as e:
+                    self._count_error()
+                    last_error = e
+                    error_str = str(e)
+                    rate_limited = any(pattern in error_str for pattern in RATE_LIMIT_PATTERNS)
+                    provider_state.record_failure(
+                        provider, error_str, rate_limited=rate_limited,
+                        retry_after=self._extract_retry_delay(error_str) if rate_limited else None
+                    )
+                    kind = 'rate limit' if rate_limited else 'error'
+                    print(f"[CV API] ⚠️ {provider} {kind}: {error_str[:200]}")
+                    continue
                 
-                if is_rate_limit:
-                    extracted_delay = self._extract_retry_delay(error_str)
-                    
-                    if attempt < max_retries - 1:
-                        wait_time = extracted_delay if extracted_delay else (2 ** attempt) * 3
-                        wait_time = min(wait_time, 60)
-                        print(f"[CV API] ⏳ Gemini rate limit. Waiting {wait_time}s (attempt {attempt + 1}/{max_retries})")
-                        time.sleep(wait_time)
-                        continue
-                    else:
-                        self._gemini_quota_exhausted = True
-                        raise Exception(
-                            f"⏳ Both API providers rate limited. Please wait a few minutes. "
-                            f"Free tier limits: OpenRouter ~200 req/day, Gemini 15 req/min. "
-                            f"Total requests: {self._request_count}, Errors: {self._error_count}"
-                        )
-                else:
-                    print(f"[CV API] ⚠️ Gemini error: {error_str[:200]}")
-                    if attempt < max_retries - 1:
-                        time.sleep(2)
-                        continue
-                    else:
-                        raise Exception(f"CV generation failed: {error_str[:200]}")
-        
-        raise Exception(f"Max retries exceeded. Total requests: {self._request_count}")
+                provider_state.record_success(provider, time.monotonic() - started)
+                self._current_provider = provider
+                print(f"[CV API] ✅ {provider} successful (Request #{request_number}, Attempt {attempt + 1})")
+                return response
+            
+            if attempt < max_retries - 1:
+                time.sleep(min(2 ** attempt, 4))
+        
+        raise Exception(f"CV generation failed: {str(last_error)[:200]}")
     
     @property
     def current_provider(self) -> str:
@@ -266,11 +397,14 @@ class CVAPIClient:
     
     def get_statistics(self) -> dict:
         """Get API usage statistics"""
+        providers = provider_state.snapshot()
         return {
             'total_requests': self._request_count,
             'total_errors': self._error_count,
             'success_rate': round((1 - self._error_count / max(self._request_count, 1)) * 100, 2),
             'current_provider': self._current_provider,
-            'openrouter_exhausted': self._openrouter_quota_exhausted,
-            'gemini_exhausted': self._gemini_quota_exhausted
+            'openrouter_exhausted': not providers['openrouter']['available'],
+            'gemini_exhausted': not providers['gemini']['available'],
+            'providers': providers,
+            'response_cache': response_cache.stats()
         }
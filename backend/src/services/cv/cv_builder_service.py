@@ -3,21 +3,39 @@ CV Builder Service (Refactored)
 Main orchestration service for AI-powered CV generation
 Simplified from 2667 lines to ~300 lines by using modular components
 """
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Callable
 import copy
 import json
+import os
 import re
 
 from src.services.cv_builder_enhancements import CVBuilderEnhancements
 from .api_client import CVAPIClient
 from .data_formatter import CVDataFormatter
 from .job_matcher import CVJobMatcher
-from .parser import CVParser
+from .job_queue import LeaseLost
+from .parser import CVParser, CVSectionStreamParser
 from .prompt_builder import CVPromptBuilder, HUMANIZATION_BANNED_PHRASES
+from . import section_store
 from .validator import CVValidator
 
 
+# Top-level CV sections forwarded to progress listeners while the response streams in
+STREAMED_SECTIONS = {
+    'contact_information': 'contact details',
+    'professional_summary': 'professional summary',
+    'professional_experience': 'experience',
+    'education': 'education',
+    'technical_skills': 'skills',
+    'core_competencies': 'core competencies',
+    'certifications': 'certifications',
+    'projects': 'projects',
+    'awards': 'awards',
+}
+
+
 class CVBuilderService:
     """
     Main CV Builder service orchestrating all components
@@ -44,6 +62,7 @@ class CVBuilderService:
         cv_style: str = "professional",
         include_sections: Optional[List[str]] = None,
         humanize: bool = True,
+        progress: Optional[Callable[..., None]] = None,
     ) -> Dict[str, Any]:
         """
         Generate AI-optimized CV content with deep job matching
@@ -53,6 +72,10 @@ class CVBuilderService:
             job_data: Optional target job information
             cv_style: Style preference (professional, creative, modern, etc.)
             include_sections: Sections to include
+            progress: Optional callback, called as progress(phase, message, **details)
+                at each phase transition; the AI response is then streamed and
+                each drafted section is reported (event='section') as soon as
+                it is complete
             
         Returns:
             Dictionary with structured CV content and metadata
@@ -65,9 +88,12 @@ class CVBuilderService:
             print(f"[CV Builder] 🎯 Job targeting: {job_data.get('title')} at {job_data.get('company_name', 'N/A')}")
         
         try:
+            self._report(progress, 'analyzing', 'Analyzing your profile…')
+
             # Pre-analyze job match if job data provided
             matching_analysis = None
             if job_data:
+                self._report(progress, 'decoding_job', 'Decoding job requirements…')
                 matching_analysis = self.job_matcher.analyze_match(user_data, job_data)
                 print(f"[CV Builder] Match analysis: score={matching_analysis['relevance_score']}/100, "
                       f"matched={len(matching_analysis['matching_skills'])}, "
@@ -82,6 +108,7 @@ class CVBuilderService:
                     print(f"[CV Builder] Reordered {len(relevant_exps)} experiences by relevance (all kept)")
             
             # Build comprehensive prompt
+            self._report(progress, 'strategizing', 'Planning CV strategy…')
             prompt = self.prompt_builder.build_full_cv_prompt(
                 user_data=user_data,
                 job_data=job_data,
@@ -92,7 +119,9 @@ class CVBuilderService:
             print(f"[CV Builder] Prompt length: {len(prompt)} characters")
             
             # Generate CV content using AI
-            response_text = self.api_client.make_request_with_retry(prompt)
+            self._report(progress, 'generating', 'Writing your CV with AI…')
+            stream = self._section_stream(progress) if progress is not None else None
+            response_text = self.api_client.make_request_with_retry(prompt, section='full', stream=stream)
             print(f"[CV Builder] ✅ AI response received ({len(response_text)} chars)")
             
             # Parse AI response
@@ -112,6 +141,7 @@ class CVBuilderService:
 
             # Optional second pass that rewrites AI-sounding phrasing while preserving structure.
             if humanize:
+                self._report(progress, 'humanizing', 'Refining natural language…')
                 cv_content = self._humanize_cv_content(cv_content)
 
             # Keep summary person-centric by stripping target company mentions.
@@ -132,13 +162,16 @@ class CVBuilderService:
                     cv_content = self.validator.add_missing_section(cv_content, section, user_data)
             
             # Calculate ATS score with job data
+            self._report(progress, 'evaluating', 'Running ATS quality check…')
             ats_result = CVBuilderEnhancements.calculate_ats_score(cv_content, job_data)
             cv_content['ats_score'] = ats_result
             score = ats_result.get('total_score', 0)
             print(f"[CV Builder] ATS Score: {score}/100 (Grade: {ats_result.get('grade', 'N/A')})")
             
             # Generate optimization tips
-            cv_content['optimization_tips'] = CVBuilderEnhancements.generate_optimization_tips(cv_content, job_data)
+            cv_content['optimization_tips'] = CVBuilderEnhancements.generate_optimization_tips(
+                cv_content, job_data, ats_result=ats_result
+            )
             print(f"[CV Builder] Generated {len(cv_content['optimization_tips'])} tips")
             
             # Add metadata with matching analysis
@@ -178,10 +211,26 @@ class CVBuilderService:
             
             return cv_content
             
+        except LeaseLost:
+            raise
         except Exception as e:
             print(f"[CV Builder] ❌ Generation failed: {str(e)}")
             raise Exception(f"CV generation failed: {str(e)}")
 
+    @staticmethod
+    def _report(progress: Optional[Callable[..., None]], phase: str, message: str, **details) -> None:
+        """Forward a phase transition to the caller's progress callback, if any"""
+        if progress is not None:
+            progress(phase, message, **details)
+
+    def _section_stream(self, progress: Callable[..., None]) -> CVSectionStreamParser:
+        """Stream parser reporting each drafted CV section to ``progress``"""
+        def on_section(key: str, value: Any):
+            if key in STREAMED_SECTIONS and value:
+                self._report(progress, 'generating', f'Drafted your {STREAMED_SECTIONS[key]}',
+                             event='section', section=key, content=value, draft=True)
+        return CVSectionStreamParser(on_section)
+
     def _sanitize_professional_summary(
         self,
         cv_content: Dict[str, Any],
@@ -238,7 +287,7 @@ Return the same JSON structure with only the text content improved. Return raw J
 CV JSON:
 {json.dumps(cv_data, ensure_ascii=True)}"""
 
-            response_text = self.api_client.make_request_with_retry(prompt, max_retries=2)
+            response_text = self.api_client.make_request_with_retry(prompt, max_retries=2, section='humanize')
             humanized_candidate = self.parser.parse_cv_response(response_text)
             humanized_candidate = self.parser.normalize_cv_structure(humanized_candidate)
 
@@ -326,16 +375,27 @@ CV JSON:
         user_data: Dict,
         job_data: Optional[Dict] = None,
         cv_style: str = 'professional',
-        include_sections: List[str] = None
+        include_sections: List[str] = None,
+        progress: Optional[Callable[..., None]] = None,
+        reused: Optional[Dict[str, Dict[str, Any]]] = None,
+        humanize: bool = False,
     ) -> Dict[str, Any]:
         """
         Generate CV sections individually (better for rate limits)
         
+        Independent sections are generated concurrently and merged in the
+        order requested, so wall time follows the slowest section.
+        
         Args:
             user_data: Complete user profile data
             job_data: Optional job posting data
             cv_style: CV style template
             include_sections: Sections to generate
+            progress: Optional callback, called as progress(phase, message, **details)
+                at each phase transition and before each generated section
+            reused: Already generated sections (section -> CV keys it fills in)
+                merged as they are instead of being generated
+            humanize: Run the humanization pass over the generated sections
             
         Returns:
             Complete CV content with progress tracking
@@ -345,12 +405,16 @@ CV JSON:
         # Reset progress
         self.generation_progress = []
         self.section_todos = []
+        reused = reused or {}
         
         if include_sections is None:
             include_sections = ['summary', 'work', 'education', 'skills', 'certifications']
         
+        self._report(progress, 'analyzing', 'Analyzing your profile…')
+
         # Pre-sort work experiences by job relevance (keeps ALL experiences)
         if job_data and user_data.get('work_experiences'):
+            self._report(progress, 'decoding_job', 'Decoding job requirements…')
             relevant_exps = self.job_matcher.filter_relevant_experiences(
                 user_data.get('work_experiences', []), job_data
             )
@@ -372,71 +436,94 @@ CV JSON:
             'references': []
         }
         
-        # Generate each section
+        # Sections needing no AI call are settled up front; the rest are generated concurrently
+        prompts, results = {}, {}
         for section in include_sections:
+            if section == 'references' or section in reused or section in prompts or section in results:
+                continue
+            
+            # Validate data availability
+            if not self._has_data_for_section(section, user_data):
+                print(f"[CV Builder] ⚠️  Insufficient data for: {section}")
+                self.section_todos.append({
+                    'section': section,
+                    'reason': 'insufficient_data',
+                    'suggestion': f'Add {section} information to your profile'
+                })
+                continue
+            
             try:
-                print(f"[CV Builder] 📝 Generating: {section}")
-                
-                # Special case: references always come from profile — no AI needed
-                if section == 'references':
-                    cv_content['references'] = user_data.get('references', [])
-                    self.generation_progress.append({
-                        'section': section,
-                        'status': 'completed',
-                        'timestamp': datetime.utcnow().isoformat()
-                    })
-                    print(f"[CV Builder] ✅ References loaded from profile ({len(cv_content['references'])})")
-                    continue
-
-                # Validate data availability
-                if not self._has_data_for_section(section, user_data):
-                    print(f"[CV Builder] ⚠️  Insufficient data for: {section}")
-                    self.section_todos.append({
-                        'section': section,
-                        'reason': 'insufficient_data',
-                        'suggestion': f'Add {section} information to your profile'
-                    })
-                    continue
-                
-                # Build section prompt
-                prompt = self.prompt_builder.build_section_prompt(
+                prompts[section] = self.prompt_builder.build_section_prompt(
                     section=section,
                     user_data=user_data,
                     job_data=job_data,
                     cv_style=cv_style
                 )
-                
-                # Generate section content
-                response = self.api_client.make_request_with_retry(prompt)
-                section_content = self.parser.parse_cv_response(response)
-                
-                # Merge into CV
-                cv_content = self._merge_section(cv_content, section, section_content)
-                
-                # Track progress
+            except Exception as e:
+                print(f"[CV Builder] ⚠️  Error in {section}: {str(e)}")
+                results[section] = (None, e, datetime.utcnow().isoformat())
+        
+        results.update(self._generate_sections(prompts, progress))
+        
+        # Merge in the requested order, so the result does not depend on which call finished first
+        for section in include_sections:
+            if section == 'references':
+                # Special case: references always come from profile — no AI needed
+                cv_content['references'] = user_data.get('references', [])
                 self.generation_progress.append({
                     'section': section,
                     'status': 'completed',
                     'timestamp': datetime.utcnow().isoformat()
                 })
-                
-                print(f"[CV Builder] ✅ Completed: {section}")
-                
-            except Exception as e:
-                print(f"[CV Builder] ⚠️  Error in {section}: {str(e)}")
+                print(f"[CV Builder] ✅ References loaded from profile ({len(cv_content['references'])})")
+                continue
+            if section in reused:
+                cv_content.update(reused[section])
+                self.generation_progress.append({
+                    'section': section,
+                    'status': 'reused',
+                    'timestamp': datetime.utcnow().isoformat()
+                })
+                continue
+            if section not in results:
+                continue
+            
+            section_content, error, finished_at = results.pop(section)
+            if error is not None:
                 self.generation_progress.append({
                     'section': section,
                     'status': 'failed',
-                    'error': str(e)[:100]
+                    'error': str(error)[:100]
                 })
+                continue
+            
+            cv_content = self._merge_section(cv_content, section, section_content)
+            self.generation_progress.append({
+                'section': section,
+                'status': 'completed',
+                'timestamp': finished_at
+            })
+        
+        # Humanize only what was just generated; reused sections already went through it
+        generated = [p['section'] for p in self.generation_progress
+                     if p['status'] == 'completed' and p['section'] in section_store.SECTION_KEYS]
+        if humanize and generated:
+            self._report(progress, 'humanizing', 'Refining natural language…')
+            keys = [key for section in generated for key in section_store.SECTION_KEYS[section]]
+            humanized = self._humanize_cv_content({key: cv_content[key] for key in keys})
+            for key in keys:
+                cv_content[key] = humanized.get(key, cv_content[key])
         
         # Always inject references from profile data (no AI, no stale value)
         cv_content['references'] = user_data.get('references', [])
 
         # Add ATS score and metadata
+        self._report(progress, 'evaluating', 'Running ATS quality check…')
         ats_result = CVBuilderEnhancements.calculate_ats_score(cv_content, job_data)
         cv_content['ats_score'] = ats_result
-        cv_content['optimization_tips'] = CVBuilderEnhancements.generate_optimization_tips(cv_content, job_data)
+        cv_content['optimization_tips'] = CVBuilderEnhancements.generate_optimization_tips(
+            cv_content, job_data, ats_result=ats_result
+        )
         
         # Add job matching analysis if job data provided
         if job_data:
@@ -455,14 +542,148 @@ CV JSON:
             'generation_method': 'section_by_section',
             'version': '5.0-enhanced',
             'sections_generated': len([p for p in self.generation_progress if p['status'] == 'completed']),
+            'sections_reused': list(reused),
             'todos': self.section_todos,
             'tailored_for_job': job_data.get('title') if job_data else None,
             'company': job_data.get('company_name') if job_data else None,
         }
         
+        cv_content['generation_progress'] = list(self.generation_progress)
+        
         print(f"[CV Builder] ✅ Section-by-section complete (ATS: {ats_result.get('total_score', 0)}/100)")
         return cv_content
     
+    def generate_cv_incremental(
+        self,
+        user_id: int,
+        user_data: Dict,
+        job_data: Optional[Dict] = None,
+        cv_style: str = 'professional',
+        include_sections: List[str] = None,
+        humanize: bool = True,
+        force: bool = False,
+        progress: Optional[Callable[..., None]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Regenerate only the CV sections whose inputs changed
+        
+        Each section is fingerprinted from the profile data it is written from,
+        the job context and the style. Sections with a stored result for their
+        current fingerprint are reused; the rest are generated section by
+        section (and humanized), then stored for the next regeneration.
+        
+        Args:
+            user_id: Owner of the stored sections
+            user_data: Complete user profile data
+            job_data: Optional job posting data
+            cv_style: CV style template
+            include_sections: Sections the CV should contain
+            humanize: Humanize regenerated sections
+            force: Regenerate every section, ignoring stored ones
+            progress: Optional progress callback (see generate_cv_section_by_section)
+            
+        Returns:
+            Complete CV content; metadata lists the regenerated and reused sections
+        """
+        if include_sections is None:
+            include_sections = ['summary', 'work', 'education', 'skills', 'projects', 'certifications']
+        sections = list(dict.fromkeys(section_store.normalize_section(s) for s in include_sections))
+        
+        job_context = None
+        if job_data:
+            # What the section prompts see of the job: the posting and its match against the profile
+            matching = self.job_matcher.analyze_match(copy.deepcopy(user_data), job_data)
+            job_context = {
+                'job': job_data,
+                'matching_skills': matching.get('matching_skills', [])[:15],
+                'skill_gaps': matching.get('skill_gaps', [])[:10],
+                'strategy': matching.get('tailoring_strategy', {}),
+            }
+        fingerprints = {
+            section: section_store.section_fingerprint(section, user_data, job_context, cv_style, humanize)
+            for section in sections if section in section_store.SECTION_KEYS
+        }
+        reused, stale = section_store.plan_sections(user_id, sections, fingerprints, force=force)
+        print(f"[CV Builder] ♻️ Incremental generation: reusing {list(reused)}, regenerating {stale}")
+        
+        cv_content = self.generate_cv_section_by_section(
+            user_data=user_data,
+            job_data=job_data,
+            cv_style=cv_style,
+            include_sections=sections,
+            progress=progress,
+            reused=reused,
+            humanize=humanize,
+        )
+        
+        regenerated = [p['section'] for p in cv_content.get('generation_progress', [])
+                       if p['status'] == 'completed' and p['section'] in fingerprints]
+        section_store.save_sections(
+            user_id,
+            {section: section_store.section_content(cv_content, section) for section in regenerated},
+            fingerprints,
+            humanized=humanize,
+        )
+        
+        cv_content['metadata'].update({
+            'generation_method': 'incremental',
+            'sections_regenerated': regenerated,
+            'sections_reused': list(reused),
+            'humanized': bool(humanize),
+        })
+        return cv_content
+    
+    def _generate_sections(
+        self,
+        prompts: Dict[str, str],
+        progress: Optional[Callable[..., None]] = None,
+    ) -> Dict[str, tuple]:
+        """
+        Run section prompts concurrently, CV_SECTION_CONCURRENCY (default 4) at a time
+        
+        How fast the calls actually go out is bounded by the provider rate limiter,
+        shared by every worker. Progress is reported from the calling thread as
+        sections finish.
+        
+        Returns:
+            section -> (parsed content, error, finished_at) for every prompt
+        """
+        results = {}
+        if not prompts:
+            return results
+        
+        max_workers = min(len(prompts), max(int(os.getenv('CV_SECTION_CONCURRENCY', '4')), 1))
+        print(f"[CV Builder] 📝 Generating {len(prompts)} sections, {max_workers} at a time: {list(prompts)}")
+        self._report(progress, 'generating', f'Writing {len(prompts)} sections…', sections=list(prompts))
+        
+        executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='cv-section')
+        try:
+            futures = {
+                executor.submit(self._generate_section, section, prompt): section
+                for section, prompt in prompts.items()
+            }
+            for future in as_completed(futures):
+                section = futures[future]
+                finished_at = datetime.utcnow().isoformat()
+                try:
+                    results[section] = (future.result(), None, finished_at)
+                except Exception as e:
+                    print(f"[CV Builder] ⚠️  Error in {section}: {str(e)}")
+                    results[section] = (None, e, finished_at)
+                    continue
+                print(f"[CV Builder] ✅ Completed: {section}")
+                self._report(progress, 'generating', f'Finished the {section} section', section=section)
+        finally:
+            # Only reached early when progress reporting aborts the run
+            executor.shutdown(wait=False, cancel_futures=True)
+        
+        return results
+    
+    def _generate_section(self, section: str, prompt: str) -> Any:
+        """Generate and parse one section (runs on a section worker thread)"""
+        response = self.api_client.make_request_with_retry(prompt, section=section)
+        return self.parser.parse_cv_response(response)
+    
     def _has_data_for_section(self, section: str, user_data: Dict) -> bool:
         """Check if user has data for a section"""
         data_map = {
@@ -113,6 +113,94 @@ class CVJobMatcher:
             )
         }
     
+    def analyze_match_batch(self, user_data: Dict, jobs_data: List[Dict]) -> List[Dict]:
+        """Score one candidate profile against many jobs.
+        
+        Profile keywords, the fuzzy-match index and per-experience durations are
+        computed once and reused for every job, so N jobs cost N job-keyword
+        extractions plus set/automaton lookups instead of N full analyses.
+        Results are ordered by relevance score, best fit first.
+        """
+        profile_keywords = self._extract_profile_keywords(user_data)
+        profile_index = self._build_profile_index(profile_keywords)
+        work_experiences = user_data.get('work_experiences', [])
+        exp_years = [
+            self._estimate_years(exp.get('start_date'), exp.get('end_date'), exp.get('is_current', False))
+            for exp in work_experiences
+        ]
+        
+        results = []
+        for job_data in jobs_data:
+            job_keywords = self._extract_job_keywords(job_data)
+            matching_skills = self._indexed_skill_match(job_keywords, profile_index)
+            skill_gaps = self._indexed_skill_gaps(job_keywords, profile_index)
+            experience_match = self._analyze_experience_match(work_experiences, job_data, exp_years)
+            relevance_score = self._calculate_relevance_score(
+                matching_skills, skill_gaps, experience_match, job_keywords, profile_keywords
+            )
+            strategy = self._generate_tailoring_strategy(
+                matching_skills, skill_gaps, experience_match, job_data, relevance_score
+            )
+            results.append({
+                'job_id': job_data.get('id'),
+                'title': job_data.get('title'),
+                'company_name': job_data.get('company_name'),
+                'relevance_score': relevance_score,
+                'matching_skills': sorted(matching_skills)[:15],
+                'skill_gaps': sorted(skill_gaps)[:10],
+                'experience_match': experience_match,
+                'tailoring_strategy': strategy,
+            })
+        
+        results.sort(key=lambda r: r['relevance_score'], reverse=True)
+        return results
+    
+    def _build_profile_index(self, profile_keywords: Set[str]) -> Dict:
+        """Precompute lookup structures for fuzzy matching against a fixed profile.
+        
+        Replaces the pairwise job x profile keyword loop with: a set for exact hits,
+        a separator-joined string for "job keyword inside a profile keyword", one
+        compiled alternation for "profile keyword inside a job keyword", and a set
+        of punctuation-stripped forms.
+        """
+        long_keywords = sorted((pk for pk in profile_keywords if len(pk) > 3), key=len, reverse=True)
+        return {
+            'keywords': profile_keywords,
+            'long_joined': '\x00'.join(long_keywords),
+            'long_pattern': re.compile('|'.join(re.escape(pk) for pk in long_keywords)) if long_keywords else None,
+            'normalized': {
+                norm for norm in (re.sub(r'[\.\-\s/]', '', pk) for pk in profile_keywords) if len(norm) > 2
+            },
+        }
+    
+    def _has_fuzzy_profile_match(self, keyword: str, profile_index: Dict) -> bool:
+        """Whether a job keyword contains or is contained in a long profile keyword"""
+        if keyword in profile_index['long_joined']:
+            return True
+        pattern = profile_index['long_pattern']
+        return bool(pattern and pattern.search(keyword))
+    
+    def _indexed_skill_match(self, job_keywords: Set[str], profile_index: Dict) -> Set[str]:
+        """Same result as _analyze_skill_match, using a prebuilt profile index"""
+        matches = job_keywords & profile_index['keywords']
+        for jk in job_keywords - matches:
+            if len(jk) > 3 and self._has_fuzzy_profile_match(jk, profile_index):
+                matches.add(jk)
+            elif re.sub(r'[\.\-\s/]', '', jk) in profile_index['normalized']:
+                matches.add(jk)
+        return matches
+    
+    def _indexed_skill_gaps(self, job_keywords: Set[str], profile_index: Dict) -> Set[str]:
+        """Same result as _identify_skill_gaps, using a prebuilt profile index"""
+        gaps = set()
+        for gap in job_keywords - profile_index['keywords']:
+            is_known_skill = any(gap in cluster for cluster in self.SKILL_CLUSTERS.values())
+            is_compound = gap in self.COMPOUND_TERMS
+            is_substantive = len(gap) > 3 and gap not in self.STOP_WORDS
+            if (is_known_skill or is_compound or is_substantive) and not self._has_fuzzy_profile_match(gap, profile_index):
+                gaps.add(gap)
+        return gaps
+    
     def _extract_job_keywords(self, job_data: Dict) -> Set[str]:
         """Extract meaningful keywords from job posting with NLP-style processing"""
         keywords = set()
@@ -403,8 +491,12 @@ class CVJobMatcher:
         
         return list(set(transferable))[:8]
     
-    def _analyze_experience_match(self, work_experiences: List[Dict], job_data: Dict) -> Dict:
-        """Deep analysis of experience alignment with job requirements"""
+    def _analyze_experience_match(self, work_experiences: List[Dict], job_data: Dict, exp_years: List[float] = None) -> Dict:
+        """Deep analysis of experience alignment with job requirements
+        
+        ``exp_years`` optionally supplies precomputed durations (one per experience)
+        so batch callers don't re-parse dates for every job.
+        """
         if not work_experiences:
             return {
                 'level': 'entry',
@@ -423,9 +515,12 @@ class CVJobMatcher:
         title_match = False
         industry_match = False
         
-        for exp in work_experiences:
+        for i, exp in enumerate(work_experiences):
             exp_title = str(exp.get('job_title', '')).lower()
-            years = self._estimate_years(exp.get('start_date'), exp.get('end_date'), exp.get('is_current', False))
+            if exp_years is not None:
+                years = exp_years[i]
+            else:
+                years = self._estimate_years(exp.get('start_date'), exp.get('end_date'), exp.get('is_current', False))
             total_years += years
             
             title_words = set(job_title.split()) - self.STOP_WORDS
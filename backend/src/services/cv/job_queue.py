@@ -0,0 +1,416 @@
+"""
+CV Generation Job Queue
+Runs CV generation outside the web workers: requests enqueue a job row with the
+resolved generation input and return its id, CV worker threads claim queued jobs
+(SELECT ... FOR UPDATE SKIP LOCKED on PostgreSQL, a conditional per-row claim
+elsewhere) under a lease renewed by every progress event, and record each phase
+transition and the final result on the row. Progress is also announced on a
+per-job Redis channel so streams wake up without polling
+"""
+
+import json
+import logging
+import os
+import socket
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import and_, func, or_, select, update
+
+from src.models.user import db
+from src.models.cv_job import CVGenerationJob
+from src.utils.cache import cache
+
+
+logger = logging.getLogger(__name__)
+
+EVENTS_CHANNEL_PREFIX = 'ts:cv_jobs'
+JOB_KINDS = ('full', 'targeted')
+ACTIVE_STATUSES = ('queued', 'running')
+
+
+class LeaseLost(Exception):
+    """The job's lease expired and another worker took it over"""
+
+
+def _visibility_timeout() -> int:
+    return int(os.getenv('CV_JOB_VISIBILITY_TIMEOUT', '900'))
+
+
+def _max_attempts() -> int:
+    return int(os.getenv('CV_JOB_MAX_ATTEMPTS', '2'))
+
+
+def _unclaimed_grace() -> int:
+    return int(os.getenv('CV_JOB_UNCLAIMED_GRACE', '30'))
+
+
+def _channel(job_id: str) -> str:
+    return f'{EVENTS_CHANNEL_PREFIX}:{job_id}'
+
+
+def _announce(job_id: str, phase: str) -> None:
+    if not cache.enabled:
+        return
+    try:
+        cache.redis_client.publish(_channel(job_id), phase)
+    except Exception as e:
+        logger.warning(f"Failed to announce CV job {job_id} progress: {str(e)}")
+
+
+def enqueue_job(user_id: int, kind: str, params: Dict[str, Any]) -> CVGenerationJob:
+    """Persist a queued job and commit it; ``params`` must be JSON serializable"""
+    if kind not in JOB_KINDS:
+        raise ValueError(f"Unknown CV job kind: {kind}")
+    job = CVGenerationJob(
+        user_id=user_id,
+        kind=kind,
+        params=json.dumps(params, default=str),
+        status='queued',
+        phase='queued',
+        events=json.dumps([{
+            'phase': 'queued',
+            'message': 'Waiting for a CV worker…',
+            'at': datetime.utcnow().isoformat()
+        }]),
+        attempts=0
+    )
+    db.session.add(job)
+    db.session.commit()
+    return job
+
+
+def active_job_count(user_id: int) -> int:
+    return CVGenerationJob.query.filter(
+        CVGenerationJob.user_id == user_id,
+        CVGenerationJob.status.in_(ACTIVE_STATUSES)
+    ).count()
+
+
+def _ready_condition(lease_cutoff: datetime):
+    """Jobs a worker may claim: queued ones and running ones whose worker stopped
+    renewing the lease while attempts remain"""
+    return or_(
+        CVGenerationJob.status == 'queued',
+        and_(
+            CVGenerationJob.status == 'running',
+            CVGenerationJob.heartbeat_at < lease_cutoff,
+            func.coalesce(CVGenerationJob.attempts, 0) < _max_attempts()
+        )
+    )
+
+
+def claim_job(worker: str) -> Optional[str]:
+    """Claim the oldest ready job for ``worker`` and commit the claim; returns its id"""
+    now = datetime.utcnow()
+    ready = _ready_condition(now - timedelta(seconds=_visibility_timeout()))
+    candidate = select(CVGenerationJob.id).where(ready).order_by(CVGenerationJob.created_at).limit(1)
+    claim_values = {
+        'status': 'running',
+        'worker': worker,
+        'started_at': now,
+        'heartbeat_at': now,
+        'attempts': func.coalesce(CVGenerationJob.attempts, 0) + 1,
+    }
+
+    try:
+        if db.engine.url.get_backend_name() == 'postgresql':
+            claimed = db.session.execute(
+                update(CVGenerationJob).where(
+                    CVGenerationJob.id.in_(candidate.with_for_update(skip_locked=True).scalar_subquery())
+                ).values(**claim_values).returning(CVGenerationJob.id)
+                .execution_options(synchronize_session=False)
+            ).scalar()
+        else:
+            claimed = None
+            job_id = db.session.execute(candidate).scalar()
+            if job_id:
+                result = db.session.execute(
+                    update(CVGenerationJob).where(CVGenerationJob.id == job_id, ready)
+                    .values(**claim_values).execution_options(synchronize_session=False)
+                )
+                claimed = job_id if result.rowcount else None
+        db.session.commit()
+        return claimed
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Failed to claim a CV generation job: {str(e)}")
+        return None
+
+
+def ensure_consumer(app, job: CVGenerationJob) -> bool:
+    """Start this process's worker threads when ``job`` has been queued for longer than
+    CV_JOB_UNCLAIMED_GRACE seconds (default 30, 0 disables) without a worker claiming
+    it, i.e. no CV worker is deployed or every worker is down; returns True if started"""
+    grace = _unclaimed_grace()
+    if grace <= 0 or job.status != 'queued' or cv_job_worker.is_running:
+        return False
+    if job.created_at and datetime.utcnow() - job.created_at < timedelta(seconds=grace):
+        return False
+    logger.warning(f"CV job {job.id} unclaimed for over {grace}s; running CV jobs in this process")
+    return cv_job_worker.start(app)
+
+
+def fail_exhausted_jobs() -> int:
+    """Fail running jobs whose worker died on every attempt. Runs in the caller's transaction."""
+    cutoff = datetime.utcnow() - timedelta(seconds=_visibility_timeout())
+    result = db.session.execute(
+        update(CVGenerationJob).where(
+            CVGenerationJob.status == 'running',
+            CVGenerationJob.heartbeat_at < cutoff,
+            func.coalesce(CVGenerationJob.attempts, 0) >= _max_attempts()
+        ).values(
+            status='failed',
+            phase='error',
+            error='CV worker stopped responding',
+            finished_at=datetime.utcnow()
+        ).execution_options(synchronize_session=False)
+    )
+    return result.rowcount or 0
+
+
+def prune_jobs() -> int:
+    """Delete finished jobs older than CV_JOB_RETENTION_DAYS (default 7)"""
+    cutoff = datetime.utcnow() - timedelta(days=int(os.getenv('CV_JOB_RETENTION_DAYS', '7')))
+    deleted = CVGenerationJob.query.filter(
+        CVGenerationJob.status.in_(('succeeded', 'failed')),
+        CVGenerationJob.finished_at < cutoff
+    ).delete(synchronize_session=False)
+    db.session.commit()
+    return deleted
+
+
+def complete_payload(job: CVGenerationJob) -> Dict[str, Any]:
+    """The ``complete`` stream event for a succeeded job, as the CV builder UI expects it"""
+    cv_content = job.get_result() or {}
+    agent_reasoning = cv_content.get('agent_reasoning')
+    ats_self_eval = (agent_reasoning or {}).get('ats_self_evaluation', {})
+    return {
+        'phase': 'complete',
+        'cv_data': cv_content,
+        'agent_reasoning': agent_reasoning,
+        'metadata': {
+            'quality_gate_passed': ats_self_eval.get('passed_quality_gate', True),
+            'internal_revisions': ats_self_eval.get('internal_revisions', 0),
+            'ats_total_score': ats_self_eval.get('total_score', 0),
+        },
+    }
+
+
+class JobProgress:
+    """Progress callback handed to the CV builder for one claimed job.
+
+    Every event is appended to the job row with a conditional UPDATE that also
+    renews the lease; when the row no longer belongs to this worker the update
+    matches nothing and LeaseLost aborts the generation.
+    """
+
+    def __init__(self, job: CVGenerationJob, worker: str):
+        self.job_id = job.id
+        self.worker = worker
+        self.events: List[Dict[str, Any]] = job.get_events()
+
+    def __call__(self, phase: str, message: str, **details):
+        self.record({'phase': phase, 'message': message, **details})
+
+    def record(self, event: Dict[str, Any], **values) -> None:
+        event = dict(event, at=datetime.utcnow().isoformat())
+        self.events.append(event)
+        result = db.session.execute(
+            update(CVGenerationJob).where(
+                CVGenerationJob.id == self.job_id,
+                CVGenerationJob.worker == self.worker,
+                CVGenerationJob.status == 'running'
+            ).values(
+                phase=event['phase'],
+                events=json.dumps(self.events, default=str),
+                heartbeat_at=datetime.utcnow(),
+                **values
+            ).execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+        if not result.rowcount:
+            raise LeaseLost(f"CV job {self.job_id} is no longer held by {self.worker}")
+        _announce(self.job_id, event['phase'])
+
+
+def run_job(job_id: str, worker: str, service) -> str:
+    """Execute a claimed job with ``service`` (a CVBuilderService); returns the final status"""
+    job = db.session.get(CVGenerationJob, job_id)
+    if job is None or job.worker != worker or job.status != 'running':
+        return 'skipped'
+    params = job.get_params()
+    kind = job.kind
+    progress = JobProgress(job, worker)
+    db.session.commit()
+
+    try:
+        if kind == 'targeted':
+            cv_content = service.generate_cv_section_by_section(
+                user_data=params.get('user_data') or {},
+                job_data=params.get('job_data'),
+                cv_style=params.get('style', 'professional'),
+                include_sections=params.get('sections'),
+                progress=progress,
+            )
+        else:
+            cv_content = service.generate_cv_content(
+                user_data=params.get('user_data') or {},
+                job_data=params.get('job_data'),
+                cv_style=params.get('style', 'professional'),
+                include_sections=params.get('sections'),
+                humanize=params.get('humanize', True),
+                progress=progress,
+            )
+    except LeaseLost as e:
+        db.session.rollback()
+        logger.warning(str(e))
+        return 'lost'
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"CV job {job_id} failed: {str(e)}")
+        try:
+            progress.record(
+                {'phase': 'error', 'message': str(e)},
+                status='failed', error=str(e)[:2000], finished_at=datetime.utcnow()
+            )
+        except LeaseLost:
+            return 'lost'
+        return 'failed'
+
+    try:
+        progress.record(
+            {'phase': 'complete', 'message': 'Your CV is ready'},
+            status='succeeded',
+            result=json.dumps(cv_content, default=str),
+            finished_at=datetime.utcnow()
+        )
+    except LeaseLost as e:
+        logger.warning(str(e))
+        return 'lost'
+    return 'succeeded'
+
+
+class JobWatcher:
+    """Wakes a job stream when the job records progress.
+
+    With Redis it waits on the job's channel; without it ``wait`` simply sleeps
+    for the timeout and the caller re-reads the row.
+    """
+
+    def __init__(self, job_id: str):
+        self._pubsub = None
+        if cache.enabled:
+            try:
+                self._pubsub = cache.redis_client.pubsub(ignore_subscribe_messages=True)
+                self._pubsub.subscribe(_channel(job_id))
+            except Exception as e:
+                logger.warning(f"CV job stream falling back to polling: {str(e)}")
+                self._pubsub = None
+
+    @property
+    def subscribed(self) -> bool:
+        return self._pubsub is not None
+
+    def wait(self, timeout: float) -> bool:
+        """Block until progress is announced or ``timeout`` passes; True when woken"""
+        if self._pubsub is None:
+            time.sleep(timeout)
+            return False
+        deadline = time.monotonic() + timeout
+        try:
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                message = self._pubsub.get_message(timeout=remaining)
+                if message and message.get('type') == 'message':
+                    return True
+        except Exception as e:
+            logger.warning(f"CV job stream lost Redis, polling instead: {str(e)}")
+            self.close()
+            return False
+
+    def close(self) -> None:
+        if self._pubsub is not None:
+            try:
+                self._pubsub.close()
+            except Exception:
+                pass
+            self._pubsub = None
+
+
+class CVJobWorker:
+    """Pool of worker threads executing queued CV generation jobs.
+
+    Each thread owns its CVBuilderService (the service keeps per-run state),
+    claims one job at a time and claims again straight away after finishing
+    one; it idles for the poll interval while the queue is empty.
+    """
+
+    def __init__(self, threads: int = None, poll_interval: float = None):
+        self.threads = threads or int(os.getenv('CV_WORKER_THREADS', '2'))
+        self.poll_interval = poll_interval or float(os.getenv('CV_JOB_POLL_INTERVAL', '2'))
+        self.worker_name = f"{socket.gethostname()}:{os.getpid()}"
+        self._stop = threading.Event()
+        self._workers: List[threading.Thread] = []
+        self._start_lock = threading.Lock()
+
+    @property
+    def is_running(self) -> bool:
+        return any(worker.is_alive() for worker in self._workers)
+
+    def start(self, app) -> bool:
+        with self._start_lock:
+            if self.is_running:
+                logger.warning("CV job worker is already running")
+                return False
+            self._stop.clear()
+            self._workers = [
+                threading.Thread(target=self._consume, args=(app, n), daemon=True,
+                                 name=f"cv-worker-{n}")
+                for n in range(self.threads)
+            ]
+            for worker in self._workers:
+                worker.start()
+        logger.info(f"CV job worker started: {self.threads} threads on {self.worker_name}")
+        return True
+
+    def stop(self, timeout: float = 30):
+        """Stop claiming and wait for in-flight jobs to finish"""
+        self._stop.set()
+        for worker in self._workers:
+            worker.join(timeout=timeout)
+        logger.info("CV job worker stopped")
+
+    def run_once(self, service, n: int = 0) -> Optional[str]:
+        """Claim and run one job (inside an app context); returns its final status"""
+        worker = f"{self.worker_name}/{n}"
+        job_id = claim_job(worker)
+        if not job_id:
+            return None
+        logger.info(f"CV worker {worker} running job {job_id}")
+        return run_job(job_id, worker, service)
+
+    def _consume(self, app, n: int):
+        from src.services.cv.cv_builder_service import CVBuilderService
+        service = CVBuilderService()
+        while not self._stop.is_set():
+            try:
+                with app.app_context():
+                    if n == 0:
+                        failed = fail_exhausted_jobs()
+                        db.session.commit()
+                        if failed:
+                            logger.warning(f"Failed {failed} CV jobs whose workers repeatedly died")
+                    status = self.run_once(service, n)
+            except Exception as e:
+                logger.error(f"CV worker {self.worker_name}/{n} error: {str(e)}")
+                status = None
+            if status is None:
+                self._stop.wait(self.poll_interval)
+
+
+cv_job_worker = CVJobWorker()
@@ -369,3 +369,94 @@ class CVParser:
             cv_data['core_competencies'] = [c for c in cv_data['core_competencies'] if c]
         
         return cv_data
+
+
+class CVSectionStreamParser:
+    """
+    Incremental parser for a streamed CV JSON response
+    
+    Fed the response text chunk by chunk, it scans the top-level object and
+    calls on_section(key, value) as soon as each top-level member is complete:
+    when a nested object or array value closes, or when the comma or brace
+    after a scalar value arrives. Text before the first brace (such as a
+    markdown fence) and after the closing brace is ignored; members that do
+    not parse are skipped, since the full response is parsed again at the end.
+    """
+
+    def __init__(self, on_section):
+        self.on_section = on_section
+        self._emitted: Dict[str, str] = {}
+        self.reset()
+
+    def reset(self):
+        """Start over on a new response (e.g. a retry); sections already emitted
+        with the same content are not emitted again"""
+        self._text = []
+        self._length = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._done = False
+        self._member_start = None
+        self._member_complete = False
+
+    def feed(self, chunk: str):
+        if self._done or not chunk:
+            return
+        offset = self._length
+        self._text.append(chunk)
+        self._length += len(chunk)
+        for i, char in enumerate(chunk, start=offset):
+            if self._done:
+                break
+            self._consume(i, char)
+
+    def _consume(self, i: int, char: str):
+        if self._in_string:
+            if self._escape:
+                self._escape = False
+            elif char == '\\':
+                self._escape = True
+            elif char == '"':
+                self._in_string = False
+            return
+
+        if char == '"':
+            self._in_string = True
+            if self._depth == 1 and self._member_start is None:
+                self._member_start = i
+        elif char in '{[':
+            self._depth += 1
+        elif char in '}]':
+            self._depth -= 1
+            if self._depth == 1 and self._member_start is not None:
+                # A nested value just closed: the member is complete
+                self._emit(self._slice(self._member_start, i + 1))
+                self._member_complete = True
+            elif self._depth == 0:
+                self._end_member(i)
+                self._done = True
+        elif char == ',' and self._depth == 1:
+            self._end_member(i)
+
+    def _end_member(self, i: int):
+        if self._member_start is not None and not self._member_complete:
+            self._emit(self._slice(self._member_start, i))
+        self._member_start = None
+        self._member_complete = False
+
+    def _slice(self, start: int, end: int) -> str:
+        return ''.join(self._text)[start:end]
+
+    def _emit(self, member_text: str):
+        try:
+            member = json.loads('{' + member_text + '}')
+        except json.JSONDecodeError:
+            return
+        for key, value in member.items():
+            key = FIELD_ALIASES.get(key, key)
+            fingerprint = json.dumps(value, sort_keys=True, default=str)
+            if self._emitted.get(key) == fingerprint:
+                continue
+            self._emitted[key] = fingerprint
+            self.on_section(key, value)
@@ -0,0 +1,194 @@
+"""
+CV AI Provider State
+Health of each AI provider shared by every worker: a circuit breaker opened by
+repeated failures, the cooldown a provider asked for when it rate limited us,
+and rolling call latency. Kept in Redis so one worker's 429 immediately routes
+every other worker to the next provider, with an in-process fallback
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import deque
+from typing import Dict, Optional, Tuple
+
+from src.utils.cache import cache
+
+
+logger = logging.getLogger(__name__)
+
+STATE_PREFIX = 'ts:cv_provider'
+LATENCY_SAMPLES = 100
+
+
+def _settings() -> Dict[str, float]:
+    return {
+        'failure_threshold': int(os.getenv('CV_PROVIDER_FAILURE_THRESHOLD', '5')),
+        'open_seconds': float(os.getenv('CV_PROVIDER_OPEN_SECONDS', '60')),
+        'default_cooldown': float(os.getenv('CV_PROVIDER_COOLDOWN_SECONDS', '60')),
+        'probe_seconds': float(os.getenv('CV_PROVIDER_PROBE_SECONDS', '30')),
+    }
+
+
+def _percentile(samples, fraction: float) -> Optional[float]:
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return round(ordered[min(int(len(ordered) * fraction), len(ordered) - 1)], 1)
+
+
+class ProviderStateStore:
+    """Circuit breaker, cooldown and latency state per provider.
+
+    A provider is unavailable while it cools down after a rate limit or while
+    its circuit is open. Once the open period passes, one caller across all
+    workers is let through as a probe: success closes the circuit, failure
+    opens it again.
+    """
+
+    def __init__(self):
+        self._local: Dict[str, Dict] = {}
+        self._latency: Dict[str, deque] = {}
+        self._lock = threading.Lock()
+
+    def available(self, provider: str) -> Tuple[bool, float]:
+        """(usable now, seconds until it may be usable) for ``provider``"""
+        state = self._read(provider)
+        wait = self._wait(state, time.time())
+        if wait > 0:
+            return False, wait
+        if state.get('circuit') == 'open':
+            probe_seconds = _settings()['probe_seconds']
+            if not self._claim_probe(provider, probe_seconds):
+                return False, probe_seconds
+        return True, 0.0
+
+    def record_success(self, provider: str, latency_seconds: float) -> None:
+        self._write(provider, {'circuit': 'closed', 'failures': 0, 'opened_until': 0, 'last_success_at': time.time()})
+        self._add_latency(provider, latency_seconds * 1000)
+
+    def record_failure(self, provider: str, error: str, rate_limited: bool = False,
+                       retry_after: Optional[float] = None) -> None:
+        """Count a failed call; a rate limit also starts the provider's cooldown
+        (``retry_after`` seconds when the provider said how long)"""
+        settings = _settings()
+        now = time.time()
+        failures = self._increment_failures(provider)
+        update = {'last_error': (error or '')[:300], 'last_failure_at': now}
+        if rate_limited:
+            update['cooldown_until'] = now + (retry_after or settings['default_cooldown'])
+        if failures >= settings['failure_threshold'] or self._read(provider).get('circuit') == 'open':
+            update['circuit'] = 'open'
+            update['opened_until'] = now + settings['open_seconds']
+            logger.warning(f"{provider} circuit opened after {failures} consecutive failures")
+        self._write(provider, update)
+
+    def snapshot(self) -> Dict[str, Dict]:
+        """State of every provider seen, for health reporting"""
+        providers = {'openrouter', 'gemini'}
+        with self._lock:
+            providers.update(self._local)
+        result = {}
+        now = time.time()
+        for provider in sorted(providers):
+            state = self._read(provider)
+            retry_in = self._wait(state, now)
+            samples = self._latency_samples(provider)
+            result[provider] = {
+                'available': retry_in <= 0,
+                'retry_in_seconds': round(retry_in, 1),
+                'circuit': state.get('circuit') or 'closed',
+                'consecutive_failures': int(state.get('failures') or 0),
+                'last_error': state.get('last_error'),
+                'latency_ms': {
+                    'samples': len(samples),
+                    'avg': round(sum(samples) / len(samples), 1) if samples else None,
+                    'p50': _percentile(samples, 0.5),
+                    'p95': _percentile(samples, 0.95),
+                },
+            }
+        return result
+
+    @staticmethod
+    def _wait(state: Dict, now: float) -> float:
+        """Seconds left of the provider's cooldown or open circuit"""
+        cooldown_until = float(state.get('cooldown_until') or 0)
+        opened_until = float(state.get('opened_until') or 0) if state.get('circuit') == 'open' else 0
+        return max(max(cooldown_until, opened_until) - now, 0.0)
+
+    def _key(self, provider: str) -> str:
+        return f'{STATE_PREFIX}:{provider}'
+
+    def _read(self, provider: str) -> Dict:
+        if cache.enabled:
+            try:
+                return cache.redis_client.hgetall(self._key(provider)) or {}
+            except Exception as e:
+                logger.warning(f"Shared {provider} state unavailable, using process state: {str(e)}")
+        with self._lock:
+            return dict(self._local.get(provider, {}))
+
+    def _write(self, provider: str, values: Dict) -> None:
+        if cache.enabled:
+            try:
+                pipe = cache.redis_client.pipeline()
+                pipe.hset(self._key(provider), mapping={k: str(v) for k, v in values.items()})
+                pipe.expire(self._key(provider), 24 * 3600)
+                pipe.execute()
+                return
+            except Exception as e:
+                logger.warning(f"Failed to share {provider} state, keeping it in process: {str(e)}")
+        with self._lock:
+            self._local.setdefault(provider, {}).update(values)
+
+    def _increment_failures(self, provider: str) -> int:
+        if cache.enabled:
+            try:
+                return int(cache.redis_client.hincrby(self._key(provider), 'failures', 1))
+            except Exception as e:
+                logger.warning(f"Failed to count {provider} failure in Redis: {str(e)}")
+        with self._lock:
+            state = self._local.setdefault(provider, {})
+            state['failures'] = int(state.get('failures') or 0) + 1
+            return state['failures']
+
+    def _claim_probe(self, provider: str, probe_seconds: float) -> bool:
+        if cache.enabled:
+            try:
+                return bool(cache.redis_client.set(
+                    f'{self._key(provider)}:probe', '1', nx=True, ex=max(int(probe_seconds), 1)
+                ))
+            except Exception:
+                pass
+        with self._lock:
+            state = self._local.setdefault(provider, {})
+            if float(state.get('probe_until') or 0) > time.time():
+                return False
+            state['probe_until'] = time.time() + probe_seconds
+            return True
+
+    def _add_latency(self, provider: str, latency_ms: float) -> None:
+        if cache.enabled:
+            try:
+                pipe = cache.redis_client.pipeline()
+                pipe.lpush(f'{self._key(provider)}:latency', round(latency_ms, 1))
+                pipe.ltrim(f'{self._key(provider)}:latency', 0, LATENCY_SAMPLES - 1)
+                pipe.execute()
+                return
+            except Exception:
+                pass
+        with self._lock:
+            self._latency.setdefault(provider, deque(maxlen=LATENCY_SAMPLES)).append(latency_ms)
+
+    def _latency_samples(self, provider: str) -> list:
+        if cache.enabled:
+            try:
+                return [float(v) for v in cache.redis_client.lrange(f'{self._key(provider)}:latency', 0, -1)]
+            except Exception:
+                pass
+        with self._lock:
+            return list(self._latency.get(provider, ()))
+
+
+provider_state = ProviderStateStore()
@@ -0,0 +1,116 @@
+"""
+CV AI Provider Rate Limiter
+Token bucket per AI provider, shared by every web and CV worker process through
+Redis so concurrent generations together stay within the provider's request
+budget. Falls back to an in-process bucket when Redis is unavailable
+"""
+
+import logging
+import os
+import random
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from src.utils.cache import cache
+
+
+logger = logging.getLogger(__name__)
+
+BUCKET_PREFIX = 'ts:cv_provider_bucket'
+
+# Requests per minute allowed by default (free tiers)
+DEFAULT_REQUESTS_PER_MINUTE = {
+    'openrouter': 20,
+    'gemini': 15,
+}
+
+# Refill by elapsed server time, then take a token if one is available.
+# Returns 0 when a token was taken, otherwise the milliseconds until one will be.
+_TAKE_TOKEN = """
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local now_parts = redis.call('TIME')
+local now = tonumber(now_parts[1]) * 1000 + math.floor(tonumber(now_parts[2]) / 1000)
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1]) or capacity
+local ts = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(now - ts, 0) * rate / 1000)
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = math.ceil((1 - tokens) * 1000 / rate)
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity * 1000 / rate) + 60000)
+return wait
+"""
+
+
+class ProviderRateLimiter:
+    """Blocks callers until the provider's shared request budget allows a call.
+
+    The budget is CV_<PROVIDER>_REQUESTS_PER_MINUTE (OpenRouter 20, Gemini 15
+    by default) with bursts of up to CV_PROVIDER_BURST requests.
+    """
+
+    def __init__(self):
+        self._local: Dict[str, Tuple[float, float]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def limits(provider: str) -> Tuple[float, float]:
+        """(tokens per second, bucket capacity) for ``provider``"""
+        per_minute = float(os.getenv(
+            f'CV_{provider.upper()}_REQUESTS_PER_MINUTE',
+            DEFAULT_REQUESTS_PER_MINUTE.get(provider, 15)
+        ))
+        burst = float(os.getenv('CV_PROVIDER_BURST', '4'))
+        return max(per_minute, 0.1) / 60.0, max(burst, 1.0)
+
+    def acquire(self, provider: str, timeout: float = None) -> float:
+        """Take one request token for ``provider``; returns the seconds spent waiting.
+
+        Raises an exception worded as a rate limit when no token frees up within
+        ``timeout`` (CV_PROVIDER_WAIT_TIMEOUT, default 60s), so callers treat it
+        like the provider's own 429.
+        """
+        if timeout is None:
+            timeout = float(os.getenv('CV_PROVIDER_WAIT_TIMEOUT', '60'))
+        rate, capacity = self.limits(provider)
+        started = time.monotonic()
+        while True:
+            wait = self._take_shared(provider, rate, capacity)
+            if wait is None:
+                wait = self._take_local(provider, rate, capacity)
+            if wait <= 0:
+                return time.monotonic() - started
+            if time.monotonic() - started + wait > timeout:
+                raise Exception(f"{provider} rate limit: request budget exhausted, retry after {int(wait) + 1} seconds")
+            # A little jitter keeps waiting workers from retrying in lockstep
+            time.sleep(wait + random.uniform(0, 0.05))
+
+    def _take_shared(self, provider: str, rate: float, capacity: float) -> Optional[float]:
+        if not cache.enabled:
+            return None
+        try:
+            wait_ms = cache.redis_client.eval(_TAKE_TOKEN, 1, f'{BUCKET_PREFIX}:{provider}', rate, capacity)
+            return int(wait_ms) / 1000.0
+        except Exception as e:
+            logger.warning(f"Shared {provider} rate limiter unavailable, limiting in-process: {str(e)}")
+            return None
+
+    def _take_local(self, provider: str, rate: float, capacity: float) -> float:
+        with self._lock:
+            now = time.monotonic()
+            tokens, updated = self._local.get(provider, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated) * rate)
+            if tokens >= 1:
+                self._local[provider] = (tokens - 1, now)
+                return 0.0
+            self._local[provider] = (tokens, now)
+            return (1 - tokens) / rate
+
+
+provider_rate_limiter = ProviderRateLimiter()
@@ -0,0 +1,204 @@
+"""
+CV LLM Response Cache
+Content-addressed cache of AI responses for CV prompts. Entries are keyed by a
+hash of the normalized prompt, model, temperature and section, expire after a
+TTL and are evicted least-recently-used beyond a size bound. Stored in Redis so
+every worker shares them, with an on-disk store when Redis is unavailable
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+from typing import Dict, Optional
+
+from src.utils.cache import cache, RedisLRU
+
+
+logger = logging.getLogger(__name__)
+
+CACHE_VERSION = 1  # bump when prompts change in a way normalization cannot see
+KEY_PREFIX = 'ts:cv_llm'
+STATS_KEY = f'{KEY_PREFIX}:stats'
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Whitespace-insensitive form of a prompt: trailing spaces and blank-line runs
+    do not change what the model is asked"""
+    lines = [line.rstrip() for line in prompt.strip().splitlines()]
+    return re.sub(r'\n{3,}', '\n\n', '\n'.join(lines))
+
+
+def is_cacheable(response_text: str) -> bool:
+    """Only responses holding a JSON object are cached; anything else would be
+    replayed to every later request for the same prompt"""
+    if not response_text:
+        return False
+    start, end = response_text.find('{'), response_text.rfind('}')
+    if start < 0 or end <= start:
+        return False
+    try:
+        json.loads(response_text[start:end + 1])
+        return True
+    except ValueError:
+        return False
+
+
+def _mtime(entry) -> float:
+    try:
+        return entry.stat().st_mtime
+    except OSError:
+        return 0.0
+
+
+class LLMResponseCache:
+    """Shared AI response cache with per-process and (with Redis) global hit metrics"""
+
+    def __init__(self):
+        self.enabled = os.getenv('CV_LLM_CACHE_ENABLED', 'true').lower() == 'true'
+        self.ttl = int(os.getenv('CV_LLM_CACHE_TTL', str(24 * 3600)))
+        self.max_entries = int(os.getenv('CV_LLM_CACHE_MAX_ENTRIES', '2000'))
+        self.directory = os.getenv(
+            'CV_LLM_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'talentsphere_cv_llm_cache')
+        )
+        self._stats = {'hits': 0, 'misses': 0, 'stores': 0, 'evictions': 0, 'errors': 0}
+        self._lock = threading.Lock()
+        self._redis = RedisLRU(KEY_PREFIX, self.ttl, self.max_entries)
+
+    @staticmethod
+    def key(prompt: str, model: str, temperature: float, section: Optional[str] = None) -> str:
+        material = json.dumps([CACHE_VERSION, normalize_prompt(prompt), model, round(float(temperature), 3), section or ''])
+        return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        value = self._redis_get(key) if cache.enabled else self._disk_get(key)
+        self._count('hits' if value is not None else 'misses')
+        return value
+
+    def put(self, key: str, response_text: str) -> bool:
+        if not is_cacheable(response_text):
+            return False
+        stored = self._redis_put(key, response_text) if cache.enabled else self._disk_put(key, response_text)
+        if stored:
+            self._count('stores')
+        return stored
+
+    def discard(self, key: str) -> None:
+        if cache.enabled:
+            try:
+                self._redis.discard(key)
+            except Exception as e:
+                logger.warning(f"Failed to discard cached AI response: {str(e)}")
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+    def stats(self) -> Dict:
+        with self._lock:
+            local = dict(self._stats)
+        lookups = local['hits'] + local['misses']
+        result = {
+            'enabled': self.enabled,
+            'backend': 'redis' if cache.enabled else 'disk',
+            'ttl_seconds': self.ttl,
+            'max_entries': self.max_entries,
+            'process': dict(local, hit_rate=round(local['hits'] / lookups, 3) if lookups else None),
+        }
+        if cache.enabled:
+            try:
+                shared = {k: int(v) for k, v in (cache.redis_client.hgetall(STATS_KEY) or {}).items()}
+                shared_lookups = shared.get('hits', 0) + shared.get('misses', 0)
+                shared['hit_rate'] = round(shared.get('hits', 0) / shared_lookups, 3) if shared_lookups else None
+                result['global'] = shared
+                result['entries'] = self._redis.size()
+            except Exception as e:
+                logger.warning(f"Failed to read AI response cache stats: {str(e)}")
+        else:
+            result['entries'] = len(self._disk_entries())
+        return result
+
+    def _count(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            self._stats[name] += amount
+        if cache.enabled and name != 'errors':
+            try:
+                cache.redis_client.hincrby(STATS_KEY, name, amount)
+            except Exception:
+                pass
+
+    def _error(self, action: str, error: Exception) -> None:
+        self._count('errors')
+        logger.warning(f"AI response cache {action} failed: {str(error)}")
+
+    def _redis_get(self, key: str) -> Optional[str]:
+        try:
+            return self._redis.get(key)
+        except Exception as e:
+            self._error('read', e)
+            return self._disk_get(key)
+
+    def _redis_put(self, key: str, response_text: str) -> bool:
+        try:
+            evicted = self._redis.put(key, response_text)
+            if evicted:
+                self._count('evictions', evicted)
+            return True
+        except Exception as e:
+            self._error('write', e)
+            return self._disk_put(key, response_text)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f'{key}.json')
+
+    def _disk_entries(self):
+        try:
+            return [entry for entry in os.scandir(self.directory) if entry.name.endswith('.json')]
+        except OSError:
+            return []
+
+    def _disk_get(self, key: str) -> Optional[str]:
+        path = self._path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+            if time.time() - entry['created_at'] > self.ttl:
+                os.remove(path)
+                return None
+            os.utime(path)  # mtime is the LRU clock
+            return entry['response']
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError) as e:
+            self._error('disk read', e)
+            return None
+
+    def _disk_put(self, key: str, response_text: str) -> bool:
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump({'created_at': time.time(), 'response': response_text}, f)
+            os.replace(tmp_path, self._path(key))
+        except OSError as e:
+            self._error('disk write', e)
+            return False
+
+        with self._lock:
+            entries = self._disk_entries()
+            excess = len(entries) - self.max_entries
+            if excess > 0:
+                for entry in sorted(entries, key=_mtime)[:excess]:
+                    try:
+                        os.remove(entry.path)
+                    except OSError:
+                        pass
+                self._stats['evictions'] += excess
+        return True
+
+
+response_cache = LLMResponseCache()
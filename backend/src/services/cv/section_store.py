@@ -0,0 +1,137 @@
+"""
+CV Section Store
+Fingerprints the inputs of each CV section (the profile slice it is written
+from, the job context and the style) and keeps the content generated for each
+fingerprint, so regenerating a CV only calls the AI for sections whose inputs
+changed
+"""
+
+import hashlib
+import json
+import logging
+import os
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.models.cv_job import CVSectionSnapshot
+from src.models.user import db
+
+
+logger = logging.getLogger(__name__)
+
+FINGERPRINT_VERSION = 1  # bump when section prompts change, so stored sections are regenerated
+
+SECTION_ALIASES = {
+    'experience': 'work',
+    'professional_experience': 'work',
+    'professional_summary': 'summary',
+}
+
+# CV keys each section fills in
+SECTION_KEYS = {
+    'summary': ('professional_summary',),
+    'work': ('professional_experience',),
+    'education': ('education',),
+    'skills': ('technical_skills', 'core_competencies'),
+    'certifications': ('certifications',),
+    'projects': ('projects',),
+    'awards': ('awards',),
+}
+
+# Profile data each section prompt is written from: (job seeker profile fields, user data fields)
+SECTION_INPUTS = {
+    'summary': (('professional_title', 'years_of_experience', 'professional_summary'), ('work_experiences',)),
+    'work': ((), ('work_experiences',)),
+    'education': ((), ('educations',)),
+    'skills': (('skills', 'technical_skills', 'soft_skills'), ()),
+    'certifications': ((), ('certifications',)),
+    'projects': ((), ('projects',)),
+    'awards': ((), ('awards',)),
+}
+
+
+def normalize_section(section: str) -> str:
+    return SECTION_ALIASES.get(section, section)
+
+
+def profile_slice(section: str, user_data: Dict[str, Any]) -> Dict[str, Any]:
+    """The part of the profile ``section`` is generated from"""
+    profile_fields, user_fields = SECTION_INPUTS.get(section, ((), ()))
+    profile = user_data.get('job_seeker_profile') or {}
+    return {
+        'profile': {field: profile.get(field) for field in profile_fields},
+        'user': {field: user_data.get(field) for field in user_fields},
+    }
+
+
+def section_fingerprint(section: str, user_data: Dict[str, Any], job_context: Optional[Dict[str, Any]],
+                        cv_style: str, humanize: bool) -> str:
+    material = json.dumps(
+        [FINGERPRINT_VERSION, section, profile_slice(section, user_data), job_context, cv_style, bool(humanize)],
+        sort_keys=True, default=str
+    )
+    return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+
+def section_content(cv_content: Dict[str, Any], section: str) -> Dict[str, Any]:
+    """The CV keys ``section`` fills in, taken from generated CV content"""
+    return {key: cv_content.get(key) for key in SECTION_KEYS.get(section, ())}
+
+
+def plan_sections(user_id: int, sections: List[str], fingerprints: Dict[str, str],
+                  force: bool = False) -> Tuple[Dict[str, Dict[str, Any]], List[str]]:
+    """Split ``sections`` into (stored content to reuse, sections to regenerate).
+
+    A section is reused when a snapshot exists for its current fingerprint;
+    sections without a fingerprint (references, unknown sections) are always
+    left to the generator.
+    """
+    wanted = {section: fingerprints[section] for section in sections if section in fingerprints}
+    reused = {}
+    if wanted and not force:
+        snapshots = CVSectionSnapshot.query.filter(
+            CVSectionSnapshot.user_id == user_id,
+            CVSectionSnapshot.section.in_(list(wanted)),
+            CVSectionSnapshot.fingerprint.in_(list(wanted.values()))
+        ).all()
+        now = datetime.utcnow()
+        for snapshot in snapshots:
+            if wanted.get(snapshot.section) == snapshot.fingerprint:
+                reused[snapshot.section] = snapshot.get_content()
+                snapshot.last_used_at = now
+        db.session.commit()
+    return reused, [section for section in sections if section not in reused]
+
+
+def save_sections(user_id: int, contents: Dict[str, Dict[str, Any]], fingerprints: Dict[str, str],
+                  humanized: bool) -> None:
+    """Store freshly generated sections, keeping the CV_SECTION_SNAPSHOTS_KEPT
+    (default 5) most recently used snapshots per section"""
+    keep = max(int(os.getenv('CV_SECTION_SNAPSHOTS_KEPT', '5')), 1)
+    now = datetime.utcnow()
+    try:
+        for section, content in contents.items():
+            fingerprint = fingerprints.get(section)
+            if not fingerprint:
+                continue
+            snapshot = CVSectionSnapshot.query.filter_by(
+                user_id=user_id, section=section, fingerprint=fingerprint
+            ).first()
+            if snapshot is None:
+                snapshot = CVSectionSnapshot(user_id=user_id, section=section, fingerprint=fingerprint)
+                db.session.add(snapshot)
+            snapshot.content = json.dumps(content, default=str)
+            snapshot.humanized = humanized
+            snapshot.last_used_at = now
+            db.session.flush()
+
+            stale_ids = [row.id for row in CVSectionSnapshot.query.with_entities(CVSectionSnapshot.id).filter_by(
+                user_id=user_id, section=section
+            ).order_by(CVSectionSnapshot.last_used_at.desc(), CVSectionSnapshot.id.desc()).offset(keep).all()]
+            if stale_ids:
+                CVSectionSnapshot.query.filter(CVSectionSnapshot.id.in_(stale_ids)).delete(synchronize_session=False)
+        db.session.commit()
+    except Exception as e:
+        # Losing a snapshot only costs a regeneration later
+        db.session.rollback()
+        logger.warning(f"Failed to store CV sections for user {user_id}: {str(e)}")
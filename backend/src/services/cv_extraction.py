@@ -0,0 +1,370 @@
+"""
+CV Extraction Service
+Extracts text from uploaded CVs in a small process pool so OCR never runs on a
+web worker. PDFs are split into page ranges extracted in parallel; a page is sent
+through OCR only when it has no text layer. Uploads are submitted and their
+result polled; status is kept in Redis so any web worker can answer the poll.
+Without Redis the upload request waits for its own extraction instead, since a
+poll may reach another worker. Extracted text and parsed profiles are cached by
+content hash, so re-uploading or re-parsing the same CV costs no OCR or AI call
+"""
+
+import copy
+import hashlib
+import io
+import json
+import logging
+import math
+import multiprocessing
+import os
+import re
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, List, Optional, Tuple
+
+import pdfplumber
+import pytesseract
+from PIL import Image, UnidentifiedImageError
+
+
+logger = logging.getLogger(__name__)
+
+STATUS_PREFIX = 'ts:cv_extract'
+CACHE_PREFIX = 'ts:cv_content'
+MAX_PROCESSES = 2  # per web worker: every gunicorn worker owns a pool
+
+
+class ExtractionError(Exception):
+    """Extraction failed in a way the uploader can act on; carries the HTTP status to report"""
+
+    def __init__(self, message: str, status_code: int = 422):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def normalize_text(raw_text: str) -> str:
+    text = (raw_text or "").replace("\x00", " ")
+    text = text.encode('utf-8', errors='ignore').decode('utf-8', errors='ignore')
+    text = re.sub(r'\r\n?', '\n', text)
+    text = re.sub(r'[\t\f\v]+', ' ', text)
+    text = re.sub(r'\n{3,}', '\n\n', text)
+    text = re.sub(r' {2,}', ' ', text)
+    return text.strip()
+
+
+def content_hash(value) -> str:
+    """SHA-256 of file bytes, or of text after normalization"""
+    if isinstance(value, str):
+        value = normalize_text(value).encode('utf-8')
+    return hashlib.sha256(value).hexdigest()
+
+
+def _ocr_dpi() -> int:
+    return int(os.getenv('CV_EXTRACT_OCR_DPI', '300'))
+
+
+def pdf_page_count(data: bytes) -> int:
+    with pdfplumber.open(io.BytesIO(data)) as pdf:
+        return len(pdf.pages)
+
+
+def extract_pdf_pages(data: bytes, start: int, end: int) -> List[Tuple[int, str, str]]:
+    """(page index, text, 'text' or 'ocr') for pages start..end-1; runs in a pool process"""
+    pages = []
+    with pdfplumber.open(io.BytesIO(data)) as pdf:
+        for index in range(start, min(end, len(pdf.pages))):
+            page = pdf.pages[index]
+            text = page.extract_text() or ''
+            method = 'text'
+            if not text.strip():
+                # Scanned page: no text layer, so render it and OCR the image
+                method = 'ocr'
+                try:
+                    image = page.to_image(resolution=_ocr_dpi()).original
+                    text = pytesseract.image_to_string(image)
+                except Exception as e:
+                    # Keep the pages that did have text rather than failing the whole CV
+                    logger.warning(f"OCR of PDF page {index + 1} failed: {str(e)}")
+                    method = 'ocr_failed'
+            pages.append((index, text, method))
+            page.close()  # release the page's parsed objects before the next one
+    return pages
+
+
+def extract_image_text(data: bytes) -> str:
+    """OCR of an uploaded image; runs in a pool process"""
+    with Image.open(io.BytesIO(data)) as image:
+        return pytesseract.image_to_string(image)
+
+
+class CVContentCache:
+    """Bounded content-addressed cache for one kind of CV derivative.
+
+    ``namespace`` separates the kinds: 'text' maps a file hash to its
+    extracted text, 'parsed' maps a text hash to the parsed profile. Entries
+    expire after CV_CONTENT_CACHE_TTL (default 7 days) and beyond
+    CV_CONTENT_CACHE_MAX_ENTRIES (default 500) per kind the least recently
+    used are evicted. Shared through Redis, with an in-process LRU fallback
+    that hands out copies, so callers may modify what they get.
+    """
+
+    def __init__(self, namespace: str):
+        self.namespace = namespace
+        self.ttl = int(os.getenv('CV_CONTENT_CACHE_TTL', str(7 * 24 * 3600)))
+        self.max_entries = int(os.getenv('CV_CONTENT_CACHE_MAX_ENTRIES', '500'))
+        self._local: 'OrderedDict[str, Tuple[float, Any]]' = OrderedDict()
+        self._stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+        self._lock = threading.Lock()
+        self._store = None
+
+    def _redis(self):
+        # Not at module level: pool processes import this module
+        from src.utils.cache import RedisLRU
+        if self._store is None:
+            self._store = RedisLRU(f'{CACHE_PREFIX}:{self.namespace}', self.ttl, self.max_entries)
+        return self._store
+
+    def get(self, digest: str) -> Optional[Any]:
+        from src.utils.cache import cache
+        value = None
+        if cache.enabled:
+            try:
+                raw = self._redis().get(digest)
+                if raw is not None:
+                    value = json.loads(raw)
+            except Exception as e:
+                logger.warning(f"CV {self.namespace} cache read failed: {str(e)}")
+        else:
+            with self._lock:
+                expires_at, cached = self._local.get(digest, (0, None))
+                if expires_at > time.time():
+                    self._local.move_to_end(digest)
+                    value = copy.deepcopy(cached)
+                else:
+                    self._local.pop(digest, None)
+        self._count('hits' if value is not None else 'misses')
+        return value
+
+    def put(self, digest: str, value: Any) -> None:
+        from src.utils.cache import cache
+        if cache.enabled:
+            try:
+                evicted = self._redis().put(digest, json.dumps(value))
+                if evicted:
+                    self._count('evictions', evicted)
+            except Exception as e:
+                logger.warning(f"CV {self.namespace} cache write failed: {str(e)}")
+            return
+        with self._lock:
+            self._local[digest] = (time.time() + self.ttl, copy.deepcopy(value))
+            self._local.move_to_end(digest)
+            while len(self._local) > self.max_entries:
+                self._local.popitem(last=False)
+                self._stats['evictions'] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats, entries=len(self._local))
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = round(stats['hits'] / lookups, 3) if lookups else None
+        return stats
+
+    def _count(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            self._stats[name] += amount
+
+
+extracted_text_cache = CVContentCache('text')
+parsed_profile_cache = CVContentCache('parsed')
+
+
+class CVExtractionService:
+    """Process pool for CV text extraction plus the submit/poll status store.
+
+    CV_EXTRACT_PROCESSES (default: CPU count, at most MAX_PROCESSES) bounds
+    the OCR processes per web worker; a few coordinator threads only wait on them.
+    """
+
+    def __init__(self):
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._coordinator: Optional[ThreadPoolExecutor] = None
+        self._local: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _processes() -> int:
+        requested = int(os.getenv('CV_EXTRACT_PROCESSES', str(os.cpu_count() or 1)))
+        return min(max(requested, 1), MAX_PROCESSES)
+
+    @staticmethod
+    def _ttl() -> int:
+        return int(os.getenv('CV_EXTRACT_RESULT_TTL', '900'))
+
+    @staticmethod
+    def _mp_context():
+        """Start pool processes from a fork server, since forking a threaded web
+        worker is unsafe; the server preloads this module so processes start fast"""
+        if 'forkserver' not in multiprocessing.get_all_start_methods():
+            return multiprocessing.get_context('spawn')
+        context = multiprocessing.get_context('forkserver')
+        context.set_forkserver_preload([__name__])
+        return context
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self._processes(), mp_context=self._mp_context())
+            return self._pool
+
+    def _reset_pool(self, pool: ProcessPoolExecutor) -> None:
+        with self._lock:
+            if self._pool is pool:
+                self._pool = None
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    def _get_coordinator(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._coordinator is None:
+                self._coordinator = ThreadPoolExecutor(
+                    max_workers=int(os.getenv('CV_EXTRACT_CONCURRENCY', '2')), thread_name_prefix='cv-extract'
+                )
+            return self._coordinator
+
+    @staticmethod
+    def shares_status() -> bool:
+        """Whether status is kept in Redis, where any web worker can answer a poll"""
+        from src.utils.cache import cache
+        return cache.enabled
+
+    def submit(self, user_id: int, data: bytes, extension: str) -> str:
+        """Queue extraction of an uploaded file; returns the extraction id to poll.
+
+        A file extracted before (same bytes) is answered from the cache at once.
+        Only use with shared status (see extract_now).
+        """
+        extraction_id = uuid.uuid4().hex
+        digest = content_hash(data)
+        cached = extracted_text_cache.get(digest)
+        if cached is not None:
+            self._save(extraction_id, {
+                'user_id': user_id, 'status': 'succeeded', 'result': dict(cached, cached=True), 'duration_seconds': 0
+            })
+            return extraction_id
+        self._save(extraction_id, {'user_id': user_id, 'status': 'processing', 'submitted_at': time.time()})
+        self._get_coordinator().submit(self._run, extraction_id, user_id, data, extension, digest)
+        return extraction_id
+
+    def extract_now(self, user_id: int, data: bytes, extension: str) -> Dict[str, Any]:
+        """Extract an uploaded file while the caller waits and return the finished
+        status entry; for when status is not shared and a poll could reach a worker
+        that never saw the upload. Bounded by CV_EXTRACT_SYNC_TIMEOUT (default 90s),
+        below the web worker timeout.
+        """
+        digest = content_hash(data)
+        cached = extracted_text_cache.get(digest)
+        if cached is not None:
+            return {'user_id': user_id, 'status': 'succeeded', 'result': dict(cached, cached=True), 'duration_seconds': 0}
+        return self._perform(user_id, data, extension, digest, float(os.getenv('CV_EXTRACT_SYNC_TIMEOUT', '90')))
+
+    def status(self, extraction_id: str, user_id: int) -> Optional[Dict[str, Any]]:
+        """Status of an extraction owned by ``user_id``, or None when unknown or expired"""
+        entry = self._load(extraction_id)
+        if not entry or entry.get('user_id') != user_id:
+            return None
+        return entry
+
+    def extract(self, data: bytes, extension: str, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Extract text from a PDF or image with the process pool (blocking)"""
+        timeout = timeout or float(os.getenv('CV_EXTRACT_TIMEOUT', '180'))
+        pool = self._get_pool()
+        try:
+            if extension == '.pdf':
+                return self._extract_pdf(pool, data, timeout)
+            text = normalize_text(pool.submit(extract_image_text, data).result(timeout=timeout))
+            return {'extracted_text': text, 'char_count': len(text), 'pages': 1, 'ocr_pages': 1}
+        except BrokenProcessPool:
+            # A pool process died (e.g. out of memory); start fresh for the next upload
+            self._reset_pool(pool)
+            raise
+
+    def _extract_pdf(self, pool: ProcessPoolExecutor, data: bytes, timeout: float) -> Dict[str, Any]:
+        page_count = pool.submit(pdf_page_count, data).result(timeout=timeout)
+        if page_count == 0:
+            return {'extracted_text': '', 'char_count': 0, 'pages': 0, 'ocr_pages': 0}
+
+        # Contiguous page ranges, one per process, so each opens the document once
+        per_task = math.ceil(page_count / min(self._processes(), page_count))
+        futures = [
+            pool.submit(extract_pdf_pages, data, start, start + per_task)
+            for start in range(0, page_count, per_task)
+        ]
+        deadline = time.monotonic() + timeout
+        pages = []
+        for future in futures:
+            pages.extend(future.result(timeout=max(deadline - time.monotonic(), 0)))
+
+        pages.sort(key=lambda page: page[0])
+        merged = normalize_text('\n\n'.join(text for _, text, _ in pages if text.strip()))
+        return {
+            'extracted_text': merged,
+            'char_count': len(merged),
+            'pages': page_count,
+            'ocr_pages': sum(1 for _, _, method in pages if method == 'ocr'),
+        }
+
+    def _run(self, extraction_id: str, user_id: int, data: bytes, extension: str, digest: str) -> None:
+        self._save(extraction_id, self._perform(user_id, data, extension, digest))
+
+    def _perform(self, user_id: int, data: bytes, extension: str, digest: str,
+                 timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Finished status entry of one extraction: succeeded with the result, or failed"""
+        started = time.monotonic()
+        entry = {'user_id': user_id, 'status': 'failed'}
+        try:
+            payload = self.extract(data, extension, timeout)
+            if not payload['extracted_text']:
+                raise ExtractionError('No readable text found in the uploaded CV.', 422)
+            extracted_text_cache.put(digest, payload)
+            entry.update(status='succeeded', result=dict(payload, cached=False))
+        except UnidentifiedImageError:
+            entry.update(error='Could not read image file. Please upload a valid image.', status_code=400)
+        except ExtractionError as e:
+            entry.update(error=str(e), status_code=e.status_code)
+        except Exception as e:
+            logger.warning(f"CV extraction failed: {str(e)}")
+            entry.update(error='Failed to extract text from CV.', details=str(e), status_code=500)
+        entry['duration_seconds'] = round(time.monotonic() - started, 2)
+        return entry
+
+    def _save(self, extraction_id: str, entry: Dict[str, Any]) -> None:
+        from src.utils.cache import cache  # not at module level: pool processes import this module
+        if cache.enabled:
+            try:
+                cache.redis_client.set(f'{STATUS_PREFIX}:{extraction_id}', json.dumps(entry), ex=self._ttl())
+                return
+            except Exception as e:
+                logger.warning(f"Failed to share CV extraction status, keeping it in process: {str(e)}")
+        now = time.time()
+        with self._lock:
+            self._local = {key: value for key, value in self._local.items() if value[0] > now}
+            self._local[extraction_id] = (now + self._ttl(), entry)
+
+    def _load(self, extraction_id: str) -> Optional[Dict[str, Any]]:
+        from src.utils.cache import cache
+        if cache.enabled:
+            try:
+                value = cache.redis_client.get(f'{STATUS_PREFIX}:{extraction_id}')
+                if value is not None:
+                    return json.loads(value)
+            except Exception as e:
+                logger.warning(f"Shared CV extraction status unavailable: {str(e)}")
+        with self._lock:
+            expires_at, entry = self._local.get(extraction_id, (0, None))
+        return entry if expires_at > time.time() else None
+
+
+cv_extraction_service = CVExtractionService()
@@ -0,0 +1,346 @@
+"""
+Email Delivery Engine
+Concurrent transactional email dispatch: a pooled keep-alive HTTP session to Brevo,
+a bounded sender pool, a token-bucket rate limiter sized to the provider quota,
+per-recipient retry of throttled or transient failures and batched
+(messageVersions) sends
+"""
+
+import json
+import logging
+import os
+import random
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+logger = logging.getLogger(__name__)
+
+BREVO_SMTP_URL = 'https://api.brevo.com/v3/smtp/email'
+
+# Provider responses worth retrying: throttling and transient server errors
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+
+# Upper bound for a single retry wait, whatever Retry-After asks for
+MAX_RETRY_WAIT = 30  # seconds
+
+# Batch (messageVersions) request limits: versions per request and request body size
+MAX_BATCH_VERSIONS = 1000
+MAX_BATCH_BYTES = 4 * 1024 * 1024
+
+# A 400 naming a recipient field (e.g. "email is not valid in to"); only these
+# are worth splitting a batch for, other 400s fail every part of it alike
+RECIPIENT_ERROR = re.compile(r'recipient|\b(?:in|of)\s+(?:to|cc|bcc)\b|messageVersions\[\d+\]\.(?:to|cc|bcc)', re.I)
+
+
+class DeliveryResult(NamedTuple):
+    """Outcome of sending one message"""
+    success: bool
+    status_code: Optional[int] = None
+    message_id: Optional[str] = None
+    error: Optional[str] = None
+    retryable: bool = False
+    retry_after: Optional[float] = None
+    attempts: int = 1
+    message_ids: Tuple[str, ...] = ()  # one per version of a batch request
+
+
+class TokenBucket:
+    """Thread-safe token bucket: ``rate`` tokens per second, bursts up to ``capacity``"""
+
+    def __init__(self, rate: float, capacity: float = None):
+        self.rate = float(rate)
+        self.capacity = float(capacity or max(self.rate, 1.0))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, tokens: float = 1.0) -> None:
+        """Block until ``tokens`` are available (no-op when the rate is unlimited)"""
+        if self.rate <= 0:
+            return
+        while True:
+            with self.lock:
+                self._refill(time.monotonic())
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return
+                wait = (tokens - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def pause(self, seconds: float) -> None:
+        """Drain the bucket so every sender waits about ``seconds`` (provider throttling)"""
+        if self.rate <= 0:
+            return
+        with self.lock:
+            self._refill(time.monotonic())
+            self.tokens = min(self.tokens, -seconds * self.rate)
+
+
+def rejects_recipient(result: 'DeliveryResult') -> bool:
+    """Whether a failed request was rejected for an invalid recipient"""
+    error = result.error or ''
+    return result.status_code == 400 and 'sender' not in error.lower() and bool(RECIPIENT_ERROR.search(error))
+
+
+def _retry_after(response) -> Optional[float]:
+    value = response.headers.get('Retry-After')
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+class BrevoTransport:
+    """Brevo transactional API over one persistent, connection-pooled session"""
+
+    def __init__(self, api_key: Optional[str], pool_size: int = 10, timeout: int = 15):
+        self.api_key = api_key
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.mount('https://', HTTPAdapter(pool_connections=1, pool_maxsize=pool_size))
+        self.session.headers.update({
+            'accept': 'application/json',
+            'api-key': api_key or '',
+            'content-type': 'application/json'
+        })
+
+    @property
+    def is_configured(self) -> bool:
+        return bool(self.api_key)
+
+    def send(self, payload: Dict) -> DeliveryResult:
+        try:
+            response = self.session.post(BREVO_SMTP_URL, json=payload, timeout=self.timeout)
+        except requests.exceptions.Timeout:
+            return DeliveryResult(False, error='Brevo API request timed out', retryable=True)
+        except requests.exceptions.ConnectionError as e:
+            return DeliveryResult(False, error=f'Brevo API connection failed: {str(e)}', retryable=True)
+        except requests.exceptions.RequestException as e:
+            return DeliveryResult(False, error=f'Brevo API request failed: {str(e)}')
+
+        if response.status_code in (200, 201, 202):
+            try:
+                body = response.json()
+            except ValueError:
+                body = {}
+            return DeliveryResult(True, response.status_code, message_id=body.get('messageId'),
+                                  message_ids=tuple(body.get('messageIds') or ()))
+
+        return DeliveryResult(
+            False,
+            response.status_code,
+            error=f'Brevo API error {response.status_code}: {response.text[:500]}',
+            retryable=response.status_code in RETRYABLE_STATUSES,
+            retry_after=_retry_after(response)
+        )
+
+
+class MockTransport:
+    """In-process stand-in for the provider (EMAIL_PROVIDER=mock), for local runs,
+    tests and benchmarks. Keeps the most recent payloads in ``sent``."""
+
+    is_configured = True
+
+    def __init__(self, latency: float = 0.0, failure_rate: float = 0.0, history: int = 1000):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.sent = deque(maxlen=history)
+        self.count = 0
+        self.lock = threading.Lock()
+
+    def send(self, payload: Dict) -> DeliveryResult:
+        if self.latency:
+            time.sleep(self.latency)
+        if self.failure_rate and random.random() < self.failure_rate:
+            return DeliveryResult(False, 503, error='Mock provider failure', retryable=True)
+
+        # Like the provider, reject the whole request if any recipient is invalid
+        versions = payload.get('messageVersions') or [payload]
+        for version in versions:
+            for recipient in version.get('to') or ():
+                if '@' not in (recipient.get('email') or ''):
+                    return DeliveryResult(False, 400, error=f"Mock provider: email {recipient.get('email')!r} is not valid in to")
+
+        with self.lock:
+            first = self.count + 1
+            self.count += len(versions)
+            self.sent.append(payload)
+        message_ids = tuple(f'<mock-{n}@talentsphere>' for n in range(first, first + len(versions)))
+        if 'messageVersions' in payload:
+            return DeliveryResult(True, 201, message_ids=message_ids)
+        return DeliveryResult(True, 201, message_id=message_ids[0])
+
+
+class DeliveryEngine:
+    """Rate-limited concurrent sender with per-recipient retry.
+
+    Workers only talk to the transport; rendering and database bookkeeping stay
+    in the calling thread.
+    """
+
+    def __init__(self, transport, max_workers: int = 16, rate_per_second: float = 50.0,
+                 max_retries: int = 3, backoff_base: float = 1.0):
+        self.transport = transport
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.limiter = TokenBucket(rate_per_second)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    @property
+    def is_configured(self) -> bool:
+        return self.transport.is_configured
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                    thread_name_prefix='email-delivery')
+            return self._executor
+
+    def send(self, payload: Dict) -> DeliveryResult:
+        """Send one message, retrying throttled/transient failures with backoff"""
+        attempt = 0
+        while True:
+            attempt += 1
+            self.limiter.acquire()
+            try:
+                result = self.transport.send(payload)
+            except Exception as e:
+                result = DeliveryResult(False, error=str(e))
+
+            if result.success or not result.retryable or attempt > self.max_retries:
+                return result._replace(attempts=attempt)
+
+            if result.retry_after is not None:
+                delay = min(result.retry_after, MAX_RETRY_WAIT)
+            else:
+                delay = min(self.backoff_base * 2 ** (attempt - 1), MAX_RETRY_WAIT) * random.uniform(1.0, 1.25)
+            if result.status_code == 429:
+                # The quota is shared: slow every sender down, not just this one
+                self.limiter.pause(delay)
+            logger.debug(f"Retrying email delivery in {delay:.2f}s (attempt {attempt}): {result.error}")
+            time.sleep(delay)
+
+    def submit(self, payload: Dict) -> Future:
+        return self.executor.submit(self.send, payload)
+
+    def send_many(self, payloads: Iterable[Optional[Dict]], window: int = None) -> Iterator[DeliveryResult]:
+        """Send messages concurrently, yielding results in input order.
+
+        ``payloads`` is consumed lazily in the calling thread with at most
+        ``window`` messages in flight, so large recipient lists are never held
+        in memory at once. A ``None`` payload yields a failed result.
+        """
+        window = window or self.max_workers * 4
+        pending = deque()
+        for payload in payloads:
+            pending.append(self.submit(payload) if payload is not None else None)
+            if len(pending) >= window:
+                yield self._collect(pending.popleft())
+        while pending:
+            yield self._collect(pending.popleft())
+
+    def send_versions(self, base: Dict, versions: List[Dict],
+                      max_versions: int = MAX_BATCH_VERSIONS,
+                      max_bytes: int = MAX_BATCH_BYTES) -> List[DeliveryResult]:
+        """Send one message in many versions (``messageVersions``), one result per version.
+
+        Versions are chunked to the provider's per-request limits and the chunks
+        sent concurrently. A chunk the provider rejects for an invalid recipient
+        is split in halves and resent until the failing versions are isolated, so
+        each version ends up with its own outcome. Any other failure fails the
+        whole chunk, as does a split whose halves both fail with the same error:
+        that error belongs to the shared content, not to one recipient.
+        """
+        results: List[Optional[DeliveryResult]] = [None] * len(versions)
+        # (version indexes, id of the split the chunk came from)
+        chunks = [(chunk, None) for chunk in
+                  chunk_versions(versions, len(json.dumps(base)), max_versions, max_bytes)]
+        splits = 0
+        while chunks:
+            payloads = ({**base, 'messageVersions': [versions[i] for i in chunk]} for chunk, _ in chunks)
+            outcomes = list(zip(chunks, self.send_many(payloads)))
+            halves: Dict[int, List[DeliveryResult]] = {}
+            for (_, split), result in outcomes:
+                if split is not None:
+                    halves.setdefault(split, []).append(result)
+            rejected = []
+            for (chunk, split), result in outcomes:
+                shared_failure = split is not None and all(
+                    not half.success and (half.status_code, half.error) == (result.status_code, result.error)
+                    for half in halves[split]
+                )
+                if not result.success and not shared_failure and rejects_recipient(result) and len(chunk) > 1:
+                    middle = len(chunk) // 2
+                    splits += 1
+                    rejected.extend([(chunk[:middle], splits), (chunk[middle:], splits)])
+                    continue
+                for position, index in enumerate(chunk):
+                    message_id = result.message_ids[position] if position < len(result.message_ids) else None
+                    results[index] = result._replace(message_id=message_id, message_ids=())
+            chunks = rejected
+        return results
+
+    @staticmethod
+    def _collect(future: Optional[Future]) -> DeliveryResult:
+        if future is None:
+            return DeliveryResult(False, error='Message could not be prepared')
+        try:
+            return future.result()
+        except Exception as e:
+            return DeliveryResult(False, error=str(e))
+
+
+def chunk_versions(versions: List[Dict], base_bytes: int, max_versions: int,
+                   max_bytes: int) -> List[List[int]]:
+    """Group version indexes into requests within the version-count and body-size limits"""
+    chunks, chunk, size = [], [], base_bytes
+    for index, version in enumerate(versions):
+        version_bytes = len(json.dumps(version)) + 1
+        if chunk and (len(chunk) >= max_versions or size + version_bytes > max_bytes):
+            chunks.append(chunk)
+            chunk, size = [], base_bytes
+        chunk.append(index)
+        size += version_bytes
+    if chunk:
+        chunks.append(chunk)
+    return chunks
+
+
+def create_delivery_engine(api_key: Optional[str]) -> DeliveryEngine:
+    """Engine configured from the environment.
+
+    EMAIL_PROVIDER (brevo|mock), EMAIL_MAX_WORKERS, EMAIL_SEND_RATE (messages per
+    second, 0 = unlimited), EMAIL_MAX_RETRIES, EMAIL_HTTP_TIMEOUT and, for the mock
+    provider, EMAIL_MOCK_LATENCY_MS and EMAIL_MOCK_FAILURE_RATE.
+    """
+    max_workers = int(os.getenv('EMAIL_MAX_WORKERS', '16'))
+    if os.getenv('EMAIL_PROVIDER', 'brevo').lower() == 'mock':
+        transport = MockTransport(
+            latency=float(os.getenv('EMAIL_MOCK_LATENCY_MS', '0')) / 1000,
+            failure_rate=float(os.getenv('EMAIL_MOCK_FAILURE_RATE', '0'))
+        )
+    else:
+        transport = BrevoTransport(api_key, pool_size=max_workers,
+                                   timeout=int(os.getenv('EMAIL_HTTP_TIMEOUT', '15')))
+    return DeliveryEngine(
+        transport,
+        max_workers=max_workers,
+        rate_per_second=float(os.getenv('EMAIL_SEND_RATE', '50')),
+        max_retries=int(os.getenv('EMAIL_MAX_RETRIES', '3'))
+    )
@@ -5,15 +5,16 @@ Provides comprehensive email delivery with templates, tracking, and batching
 
 import os
 import json
-import requests
 from datetime import datetime, timedelta
-from typing import List, Dict, Optional, Any
+from typing import List, Dict, Optional, Any, Tuple
 from dataclasses import dataclass
 from enum import Enum
 import logging
 
 from src.models.user import db
 from src.models.notification import Notification, NotificationTemplate
+from src.services.email_delivery import DeliveryResult, create_delivery_engine
+from src.services.email_templates import CompiledTemplate, compile_template
 
 
 class EmailPriority(Enum):
@@ -81,6 +82,9 @@ class EmailService:
         self.logger.info(f"   Sender Name: {self.sender_name}")
         self.logger.info(f"   Brevo API Key Set: {'Yes' if self.brevo_api_key else 'No'}")
         
+        # Concurrent, rate-limited delivery (pooled HTTP session)
+        self.delivery = create_delivery_engine(self.brevo_api_key)
+        
         # Email templates
         self.templates = self._load_templates()
         
@@ -159,28 +163,15 @@ class EmailService:
     def send_notification_email(self, notification: EmailNotification) -> bool:
         """Send a single notification email via Brevo"""
         try:
-            if not self.brevo_api_key:
+            if not self.delivery.is_configured:
                 self.logger.warning("Email service not configured - BREVO_API_KEY missing")
                 return False
             
-            template = self.templates.get(notification.template_name)
-            if not template:
-                self.logger.error(f"Template '{notification.template_name}' not found")
+            payload = self._render_notification(notification)
+            if payload is None:
                 return False
             
-            # Render email content
-            subject = self._render_template(notification.subject, notification.variables)
-            html_body = self._render_template(template.html_body, notification.variables)
-            text_body = self._render_template(template.text_body, notification.variables)
-            
-            # Send via Brevo API
-            success = self._send_brevo_email(
-                recipient_email=notification.recipient_email,
-                recipient_name=notification.recipient_name,
-                subject=subject,
-                html_body=html_body,
-                text_body=text_body
-            )
+            success = self._log_delivery(self.delivery.send(payload), notification.recipient_email)
             
             # Update notification status if provided
             if success and notification.notification_id:
@@ -192,31 +183,66 @@ class EmailService:
             self.logger.error(f"Error sending notification email: {str(e)}")
             return False
     
+    def send_notification_batch(self, notifications: List[EmailNotification]) -> List[DeliveryResult]:
+        """Send rendered notifications as Brevo batch requests, one result per notification.
+        
+        Each notification becomes one message version carrying its own content, so
+        a whole batch costs a single API call. Notification status is left to the
+        caller, which keeps all database work in the calling thread.
+        """
+        if not self.delivery.is_configured:
+            self.logger.warning("Email service not configured - BREVO_API_KEY missing")
+            return [DeliveryResult(False, error='Email service not configured')] * len(notifications)
+        
+        # Fragments that depend only on variables every notification of a template
+        # shares (e.g. the same job for all alert recipients) are rendered once
+        groups: Dict[str, List[EmailNotification]] = {}
+        for notification in notifications:
+            groups.setdefault(notification.template_name, []).append(notification)
+        bound = {
+            name: self._bind_bodies(name, _shared_variables(group) if len(group) > 1 else {})
+            for name, group in groups.items()
+        }
+        
+        versions, positions = [], []
+        results: List[DeliveryResult] = [DeliveryResult(False, error='Email could not be rendered')] * len(notifications)
+        for position, notification in enumerate(notifications):
+            compiled = bound[notification.template_name]
+            payload = self._render_notification(notification, compiled) if compiled else None
+            if payload is None:
+                continue
+            versions.append({
+                'to': payload['to'],
+                'subject': payload['subject'],
+                'htmlContent': payload['htmlContent'],
+                'textContent': payload['textContent']
+            })
+            positions.append(position)
+        
+        if versions:
+            # Top-level content is required by the API; every version overrides it
+            first = versions[0]
+            base = self._build_brevo_payload('', '', first['subject'], first['htmlContent'], first['textContent'])
+            del base['to']
+            for position, result in zip(positions, self.delivery.send_versions(base, versions)):
+                results[position] = result
+        
+        for notification, result in zip(notifications, results):
+            self._log_delivery(result, notification.recipient_email)
+        return results
+    
     def send_batch_emails(self, notifications: List[EmailNotification]) -> Dict[str, int]:
-        """Send multiple emails in batches"""
+        """Send multiple emails in batch requests"""
         results = {'sent': 0, 'failed': 0, 'skipped': 0}
         
         try:
-            # Group by priority
-            urgent_emails = [n for n in notifications if n.priority == EmailPriority.URGENT]
-            high_emails = [n for n in notifications if n.priority == EmailPriority.HIGH]
-            normal_emails = [n for n in notifications if n.priority in [EmailPriority.NORMAL, EmailPriority.LOW]]
-            
-            # Send in priority order
-            for email_group in [urgent_emails, high_emails, normal_emails]:
-                for i in range(0, len(email_group), self.batch_size):
-                    batch = email_group[i:i + self.batch_size]
-                    
-                    for notification in batch:
-                        if self.send_notification_email(notification):
-                            results['sent'] += 1
-                        else:
-                            results['failed'] += 1
-                    
-                    # Rate limiting between batches
-                    if i + self.batch_size < len(email_group):
-                        import time
-                        time.sleep(self.batch_delay)
+            for notification, result in zip(notifications, self.send_notification_batch(notifications)):
+                if result.success:
+                    results['sent'] += 1
+                    if notification.notification_id:
+                        self._update_notification_status(notification.notification_id)
+                else:
+                    results['failed'] += 1
             
             return results
             
@@ -330,51 +356,105 @@ class EmailService:
         ]
         return notification_type in important_types
     
+    def _render_notification(self, notification: EmailNotification,
+                             compiled: Optional[Tuple[CompiledTemplate, CompiledTemplate]] = None) -> Optional[Dict[str, Any]]:
+        """Render a notification into a Brevo payload (None if its template is unknown)
+        
+        ``compiled`` may carry the (HTML, text) bodies already bound to the
+        variables a batch shares, see ``_bind_bodies``.
+        """
+        if compiled is None:
+            compiled = self._bind_bodies(notification.template_name, {})
+            if compiled is None:
+                return None
+        html_template, text_template = compiled
+        
+        return self._build_brevo_payload(
+            recipient_email=notification.recipient_email,
+            recipient_name=notification.recipient_name,
+            subject=self._render_template(notification.subject, notification.variables),
+            html_body=html_template.render(notification.variables),
+            text_body=text_template.render(notification.variables)
+        )
+    
+    def _bind_bodies(self, template_name: str,
+                     shared_variables: Dict[str, Any]) -> Optional[Tuple[CompiledTemplate, CompiledTemplate]]:
+        """Compiled (HTML, text) bodies of a template with the shared variables pre-rendered"""
+        template = self.templates.get(template_name)
+        if not template:
+            self.logger.error(f"Template '{template_name}' not found")
+            return None
+        html_template = compile_template(template.html_body, html=True)
+        text_template = compile_template(template.text_body)
+        if shared_variables:
+            return html_template.bind(shared_variables), text_template.bind(shared_variables)
+        return html_template, text_template
+    
+    def _build_brevo_payload(self, recipient_email: str, recipient_name: str,
+                             subject: str, html_body: str, text_body: str) -> Dict[str, Any]:
+        """Brevo Transactional Email API payload for one recipient"""
+        return {
+            "sender": {
+                "name": self.sender_name,
+                "email": self.sender_email
+            },
+            "to": [
+                {
+                    "email": recipient_email,
+                    "name": recipient_name
+                }
+            ],
+            "subject": subject,
+            "htmlContent": html_body,
+            "textContent": text_body
+        }
+    
+    def _log_delivery(self, result: DeliveryResult, recipient_email: str) -> bool:
+        if result.success:
+            self.logger.info(f"Email sent successfully via Brevo to {recipient_email}")
+        else:
+            self.logger.error(f"Email to {recipient_email} failed after {result.attempts} attempt(s): {result.error}")
+        return result.success
+    
     def _send_brevo_email(self, recipient_email: str, recipient_name: str,
                            subject: str, html_body: str, text_body: str) -> bool:
         """Send email via Brevo Transactional Email API"""
         try:
-            url = "https://api.brevo.com/v3/smtp/email"
-            headers = {
-                "accept": "application/json",
-                "api-key": self.brevo_api_key,
-                "content-type": "application/json"
-            }
-            payload = {
-                "sender": {
-                    "name": self.sender_name,
-                    "email": self.sender_email
-                },
-                "to": [
-                    {
-                        "email": recipient_email,
-                        "name": recipient_name
-                    }
-                ],
-                "subject": subject,
-                "htmlContent": html_body,
-                "textContent": text_body
-            }
-            
-            response = requests.post(url, json=payload, headers=headers, timeout=15)
-            
-            if response.status_code in (200, 201):
-                self.logger.info(f"Email sent successfully via Brevo to {recipient_email}")
-                return True
-            else:
-                self.logger.error(f"Brevo API error {response.status_code}: {response.text}")
-                return False
-            
-        except requests.exceptions.Timeout:
-            self.logger.error("Brevo API request timed out")
-            return False
-        except requests.exceptions.RequestException as e:
-            self.logger.error(f"Brevo API request failed: {str(e)}")
-            return False
+            payload = self._build_brevo_payload(recipient_email, recipient_name, subject, html_body, text_body)
+            return self._log_delivery(self.delivery.send(payload), recipient_email)
         except Exception as e:
             self.logger.error(f"Error sending email via Brevo: {str(e)}")
             return False
     
+    def send_brevo_batch(self, recipients: List[Dict[str, Any]], subject: str,
+                         html_body: str, text_body: str) -> List[DeliveryResult]:
+        """Send one email to many recipients as Brevo batch requests.
+        
+        ``recipients`` are dicts with ``email``, ``name`` and optional ``params``;
+        the content may reference them as ``{{ params.<name> }}``. Returns one
+        result per recipient, in order.
+        """
+        if not self.delivery.is_configured:
+            self.logger.warning("Email service not configured - BREVO_API_KEY missing")
+            return [DeliveryResult(False, error='Email service not configured')] * len(recipients)
+        
+        base = self._build_brevo_payload('', '', subject, html_body, text_body)
+        del base['to']
+        versions = []
+        for recipient in recipients:
+            version = {'to': [{'email': recipient['email'], 'name': recipient.get('name') or recipient['email']}]}
+            if recipient.get('params'):
+                version['params'] = recipient['params']
+            versions.append(version)
+        
+        results = self.delivery.send_versions(base, versions)
+        failed = [r for r in results if not r.success]
+        self.logger.info(f"Brevo batch send: {len(results) - len(failed)}/{len(results)} accepted")
+        for recipient, result in zip(recipients, results):
+            if not result.success:
+                self._log_delivery(result, recipient['email'])
+        return results
+    
     def _update_notification_status(self, notification_id: int):
         """Update notification as sent"""
         try:
@@ -384,13 +464,10 @@ class EmailService:
         except Exception as e:
             self.logger.error(f"Error updating notification status: {str(e)}")
     
-    def _render_template(self, template: str, variables: Dict[str, Any]) -> str:
-        """Render template with variables"""
+    def _render_template(self, template: str, variables: Dict[str, Any], html: bool = False) -> str:
+        """Render template with variables (compiled once per template source)"""
         try:
-            return template.format(**variables)
-        except KeyError as e:
-            self.logger.warning(f"Missing template variable: {str(e)}")
-            return template
+            return compile_template(template, html).render(variables)
         except Exception as e:
             self.logger.error(f"Error rendering template: {str(e)}")
             return template
@@ -1001,5 +1078,14 @@ class EmailService:
             return False
 
 
+def _shared_variables(notifications: List[EmailNotification]) -> Dict[str, Any]:
+    """Variables with the same value in every notification"""
+    first, rest = notifications[0].variables, notifications[1:]
+    return {
+        key: value for key, value in first.items()
+        if all(key in n.variables and n.variables[key] == value for n in rest)
+    }
+
+
 # Global email service instance
 email_service = EmailService()
\ No newline at end of file
@@ -0,0 +1,200 @@
+"""
+Email Template Engine
+Compiles email templates once into segment lists and renders them by joining
+segments. Understands the ``{name}`` placeholders of subjects and text bodies and
+the Mustache subset used by the HTML files ({{name}}, {{#section}}, {{^section}},
+{{.}}). Templates can be bound to the variables shared by a batch, which renders
+the invariant fragments once and leaves only the per-recipient slots for each send
+"""
+
+import logging
+import re
+from functools import lru_cache
+from html import escape as html_escape
+from typing import Any, Dict, List, NamedTuple, Tuple, Union
+
+
+logger = logging.getLogger(__name__)
+
+# {{name}}, {{#name}}, {{^name}}, {{/name}}, {{.}} and single-brace {name}.
+# CSS rule bodies ("{ margin: 0; }") never match, so no escaping is needed in the files.
+TOKEN_RE = re.compile(r'\{\{\s*([#^/]?)\s*([A-Za-z_][\w.]*|\.)\s*\}\}|\{([A-Za-z_]\w*)\}')
+
+
+class Var(NamedTuple):
+    name: str
+
+
+class Section(NamedTuple):
+    name: str
+    inverted: bool
+    body: Tuple
+
+
+Segment = Union[str, Var, Section]
+
+
+class TemplateSyntaxError(ValueError):
+    pass
+
+
+class _Unbound(Exception):
+    """Raised while binding when a fragment still depends on per-recipient variables"""
+
+
+_MISSING = object()
+
+
+def _parse(source: str) -> Tuple[Segment, ...]:
+    root: List[Segment] = []
+    stack: List[Tuple[str, bool, List[Segment]]] = []
+    current = root
+    position = 0
+    for match in TOKEN_RE.finditer(source):
+        if match.start() > position:
+            current.append(source[position:match.start()])
+        position = match.end()
+        kind, name, single = match.group(1), match.group(2), match.group(3)
+        if single:
+            current.append(Var(single))
+        elif kind in ('#', '^'):
+            stack.append((name, kind == '^', current))
+            current = []
+        elif kind == '/':
+            if not stack or stack[-1][0] != name:
+                raise TemplateSyntaxError(f"Unexpected closing section '{name}'")
+            section_name, inverted, parent = stack.pop()
+            parent.append(Section(section_name, inverted, _merge(current)))
+            current = parent
+        else:
+            current.append(Var(name))
+    if stack:
+        raise TemplateSyntaxError(f"Unclosed section '{stack[-1][0]}'")
+    if position < len(source):
+        current.append(source[position:])
+    return _merge(root)
+
+
+def _merge(segments: List[Segment]) -> Tuple[Segment, ...]:
+    """Join adjacent literal segments"""
+    merged: List[Segment] = []
+    for segment in segments:
+        if isinstance(segment, str) and merged and isinstance(merged[-1], str):
+            merged[-1] += segment
+        elif segment != '':
+            merged.append(segment)
+    return tuple(merged)
+
+
+def _lookup(stack: List[Any], name: str):
+    if name == '.':
+        return stack[-1]
+    head, _, rest = name.partition('.')
+    for context in reversed(stack):
+        if isinstance(context, dict) and head in context:
+            value = context[head]
+            for part in rest.split('.') if rest else ():
+                value = value.get(part, _MISSING) if isinstance(value, dict) else getattr(value, part, _MISSING)
+            return value
+    return _MISSING
+
+
+class CompiledTemplate:
+    """A template parsed into literal, variable and section segments.
+
+    HTML templates escape values unless they provide ``__html__`` (markupsafe
+    Markup); missing and None values render as empty strings.
+    """
+
+    __slots__ = ('segments', 'html', 'flat')
+
+    def __init__(self, segments: Tuple[Segment, ...], html: bool = False):
+        self.segments = segments
+        self.html = html
+        # Templates without sections or dotted names render in one pass over the segments
+        self.flat = all(type(s) is str or (type(s) is Var and '.' not in s.name) for s in segments)
+
+    @property
+    def is_static(self) -> bool:
+        return all(isinstance(segment, str) for segment in self.segments)
+
+    def _format(self, value) -> str:
+        if value is None or value is _MISSING:
+            return ''
+        if self.html:
+            return value.__html__() if hasattr(value, '__html__') else html_escape(str(value))
+        return str(value)
+
+    def _render(self, segments, stack: List[Any], out: List[str], strict: bool) -> None:
+        for segment in segments:
+            if type(segment) is str:
+                out.append(segment)
+            elif type(segment) is Var:
+                value = _lookup(stack, segment.name)
+                if value is _MISSING and strict:
+                    raise _Unbound(segment.name)
+                out.append(self._format(value))
+            else:
+                value = _lookup(stack, segment.name)
+                if value is _MISSING and strict:
+                    raise _Unbound(segment.name)
+                if segment.inverted:
+                    if not value or value is _MISSING:
+                        self._render(segment.body, stack, out, strict)
+                elif not value or value is _MISSING:
+                    continue
+                elif isinstance(value, (list, tuple)):
+                    for item in value:
+                        stack.append(item)
+                        self._render(segment.body, stack, out, strict)
+                        stack.pop()
+                elif isinstance(value, dict):
+                    stack.append(value)
+                    self._render(segment.body, stack, out, strict)
+                    stack.pop()
+                else:
+                    self._render(segment.body, stack, out, strict)
+
+    def render(self, variables: Dict[str, Any]) -> str:
+        if self.is_static:
+            return self.segments[0] if self.segments else ''
+        if self.flat:
+            fmt, get = self._format, variables.get
+            return ''.join([s if type(s) is str else fmt(get(s.name)) for s in self.segments])
+        out: List[str] = []
+        self._render(self.segments, [variables], out, strict=False)
+        return ''.join(out)
+
+    def bind(self, variables: Dict[str, Any]) -> 'CompiledTemplate':
+        """Pre-render every fragment that depends only on ``variables``.
+
+        Sections are pre-rendered only when nothing inside them is left
+        unresolved; anything referring to other names stays a slot.
+        """
+        return CompiledTemplate(self._bind(self.segments, variables), self.html)
+
+    def _bind(self, segments, variables: Dict[str, Any]) -> Tuple[Segment, ...]:
+        bound: List[Segment] = []
+        for segment in segments:
+            if type(segment) is str:
+                bound.append(segment)
+                continue
+            out: List[str] = []
+            try:
+                self._render((segment,), [variables], out, strict=True)
+                bound.append(''.join(out))
+            except _Unbound:
+                # Section bodies are left whole: their names may resolve against
+                # per-recipient items, which shared variables must not shadow
+                bound.append(segment)
+        return _merge(bound)
+
+
+@lru_cache(maxsize=256)
+def compile_template(source: str, html: bool = False) -> CompiledTemplate:
+    """Compiled form of a template source, cached by source text"""
+    try:
+        return CompiledTemplate(_parse(source), html)
+    except TemplateSyntaxError as e:
+        logger.error(f"Email template syntax error, rendering it as plain text: {str(e)}")
+        return CompiledTemplate((source,), html)
@@ -0,0 +1,163 @@
+"""
+Job Alert Index
+Percolator-style reverse index over active job alerts: alerts are bucketed by
+their exact-match criteria (category, employment type, experience level, remote)
+and keyword alerts are reached through a keyword posting list, so matching a job
+probes only the alerts that can possibly match it
+"""
+
+import logging
+import threading
+from collections import defaultdict
+from itertools import product
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+from sqlalchemy import func
+
+from src.models.user import db
+from src.models.job import JobAlert
+
+
+logger = logging.getLogger(__name__)
+
+
+class AlertEntry(NamedTuple):
+    """Compact copy of the alert fields needed after bucket selection"""
+    id: int
+    user_id: int
+    location: Optional[str]  # lowercase
+    salary_min: Optional[int]
+    keywords: Tuple[str, ...]  # lowercase, empty when the alert has no keyword filter
+
+
+def job_text(job) -> str:
+    """Text that alert keywords are matched against"""
+    return f"{job.title} {job.description or ''} {job.required_skills or ''}".lower()
+
+
+def job_location(job) -> str:
+    return f"{job.city or ''} {job.state or ''} {job.country or ''}".strip().lower()
+
+
+class JobAlertIndex:
+    """Reverse index of job alerts.
+
+    Matching semantics are those of ``JobNotificationService._job_matches_alert``:
+    an unset criterion matches anything, keywords match as substrings of the job
+    text and at least one keyword must match.
+    """
+
+    def __init__(self, alerts: Iterable = ()):
+        self.entries: Dict[int, AlertEntry] = {}
+        self.buckets: Dict[tuple, List[int]] = defaultdict(list)
+        self.keyword_postings: Dict[str, Set[int]] = defaultdict(set)
+        for alert in alerts:
+            self.add(alert)
+
+    def __len__(self):
+        return len(self.entries)
+
+    @staticmethod
+    def bucket_key(alert) -> tuple:
+        return (
+            alert.category_id or None,
+            alert.employment_type or None,
+            alert.experience_level or None,
+            alert.is_remote,
+        )
+
+    def add(self, alert) -> None:
+        keywords = tuple(kw.strip().lower() for kw in alert.keywords.split(',')) if alert.keywords else ()
+        entry = AlertEntry(
+            id=alert.id,
+            user_id=alert.user_id,
+            location=alert.location.lower() if alert.location else None,
+            salary_min=alert.salary_min,
+            keywords=keywords,
+        )
+        self.entries[entry.id] = entry
+        self.buckets[self.bucket_key(alert)].append(entry.id)
+        for keyword in keywords:
+            self.keyword_postings[keyword].add(entry.id)
+
+    def _probe_keys(self, job) -> Iterable[tuple]:
+        """Bucket keys an alert can have and still match the job (None = wildcard)"""
+        return product(
+            {None, job.category_id or None},
+            {None, job.employment_type or None},
+            {None, job.experience_level or None},
+            {None, job.is_remote},
+        )
+
+    def match(self, job, text: str = None, require_salary: bool = False) -> List[AlertEntry]:
+        """Alerts matching a job, probing only its candidate buckets
+
+        ``require_salary`` makes alerts with a salary minimum skip jobs that
+        don't state a salary (the digest's SQL-era behaviour).
+        """
+        candidates = [
+            self.entries[alert_id]
+            for key in self._probe_keys(job)
+            for alert_id in self.buckets.get(key, ())
+        ]
+        if not candidates:
+            return []
+
+        location = job_location(job)
+        text = text if text is not None else job_text(job)
+
+        # Test each distinct keyword once, then resolve alerts through the postings
+        keywords = {kw for entry in candidates for kw in entry.keywords}
+        keyword_hits: Set[int] = set()
+        for keyword in keywords:
+            if keyword in text:
+                keyword_hits |= self.keyword_postings[keyword]
+
+        matches = []
+        for entry in candidates:
+            if entry.location and entry.location not in location:
+                continue
+            if entry.salary_min and job.salary_min and job.salary_min < entry.salary_min:
+                continue
+            if entry.salary_min and require_salary and not job.salary_min:
+                continue
+            if entry.keywords and entry.id not in keyword_hits:
+                continue
+            matches.append(entry)
+        return matches
+
+    def matching_user_ids(self, job) -> Set[int]:
+        return {entry.user_id for entry in self.match(job)}
+
+
+def load_index(*criteria) -> JobAlertIndex:
+    """Build an index from active alerts (optionally filtered), reading only the indexed columns"""
+    rows = db.session.query(
+        JobAlert.id, JobAlert.user_id, JobAlert.keywords, JobAlert.location,
+        JobAlert.category_id, JobAlert.employment_type, JobAlert.experience_level,
+        JobAlert.salary_min, JobAlert.is_remote
+    ).filter(JobAlert.is_active == True, *criteria).all()
+    return JobAlertIndex(rows)
+
+
+_cached_index: Optional[JobAlertIndex] = None
+_cached_signature = None
+_cache_lock = threading.Lock()
+
+
+def get_active_index() -> JobAlertIndex:
+    """Process-wide index of all active alerts.
+
+    Reused while the active alert set is unchanged (same count and latest
+    update), which costs one aggregate query instead of reloading every alert.
+    """
+    global _cached_index, _cached_signature
+    signature = tuple(db.session.query(
+        func.count(JobAlert.id), func.max(JobAlert.updated_at), func.max(JobAlert.id)
+    ).filter(JobAlert.is_active == True).one())
+    with _cache_lock:
+        if _cached_index is None or signature != _cached_signature:
+            _cached_index = load_index()
+            _cached_signature = signature
+            logger.info(f"Job alert index rebuilt: {len(_cached_index)} active alerts")
+        return _cached_index
@@ -0,0 +1,92 @@
+"""
+Job Digest Compiler
+Builds per-user job digests set-wise: the window's new jobs are loaded once,
+subscribers and their alerts are loaded in batches, and matching runs in memory
+against the job alert index
+"""
+
+import logging
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Iterator, List, Tuple
+
+from sqlalchemy.orm import contains_eager, joinedload
+
+from src.models.user import User, db
+from src.models.job import Job, JobAlert
+from src.models.notification_preferences import NotificationPreference
+from src.services.job_alert_index import job_text, load_index
+
+
+logger = logging.getLogger(__name__)
+
+
+class DigestCompiler:
+    """Streams (user, jobs) digest payloads for a set of subscribers"""
+
+    def __init__(self, since_date: datetime, batch_size: int = 1000,
+                 max_jobs: int = 20, fallback_jobs: int = 10):
+        self.since_date = since_date
+        self.batch_size = batch_size
+        self.max_jobs = max_jobs  # per user, most recent first
+        self.fallback_jobs = fallback_jobs  # recent jobs for users without alerts
+        self.subscriber_count = 0
+        self.job_count = 0
+
+    def _load_jobs(self) -> List[Job]:
+        """New jobs of the window, newest first, with what the digest email renders"""
+        return Job.query.options(
+            joinedload(Job.company)
+        ).filter(
+            Job.status == 'published',
+            Job.created_at >= self.since_date,
+            Job.is_active == True
+        ).order_by(Job.created_at.desc()).all()
+
+    def _subscriber_batches(self, criteria) -> Iterator[List[User]]:
+        """Active subscribers (with preferences eager-loaded) in keyset-paginated batches"""
+        last_id = 0
+        while True:
+            batch = User.query.join(
+                NotificationPreference, NotificationPreference.user_id == User.id
+            ).options(
+                contains_eager(User.notification_preferences)
+            ).filter(
+                User.is_active == True,
+                User.id > last_id,
+                *criteria
+            ).order_by(User.id).limit(self.batch_size).all()
+            if not batch:
+                return
+            yield batch
+            last_id = batch[-1].id
+
+    def compile(self, *criteria) -> Iterator[Tuple[User, List[Job]]]:
+        """Yield (user, matching jobs) for every subscriber with something to send.
+
+        ``criteria`` filter NotificationPreference/User (e.g. digest type and day).
+        """
+        jobs = self._load_jobs()
+        self.job_count = len(jobs)
+        if not jobs:
+            return
+        texts = {job.id: job_text(job) for job in jobs}
+        fallback = jobs[:self.fallback_jobs]
+
+        for batch in self._subscriber_batches(criteria):
+            self.subscriber_count += len(batch)
+            user_ids = [user.id for user in batch]
+            index = load_index(JobAlert.user_id.in_(user_ids))
+            users_with_alerts = {entry.user_id for entry in index.entries.values()}
+
+            # Jobs are scanned newest first, so each list stays date-ordered
+            matches: Dict[int, List[Job]] = defaultdict(list)
+            for job in jobs:
+                for user_id in {entry.user_id for entry in index.match(job, texts[job.id], require_salary=True)}:
+                    if len(matches[user_id]) < self.max_jobs:
+                        matches[user_id].append(job)
+
+            for user in batch:
+                user_jobs = matches.get(user.id) if user.id in users_with_alerts else fallback
+                if user_jobs:
+                    yield user, user_jobs
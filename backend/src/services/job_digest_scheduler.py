@@ -26,6 +26,7 @@ class JobDigestScheduler:
         self.local_timezone = os.getenv('APP_TIMEZONE', '')
         self.daily_digest_time = os.getenv('MORNING_JOB_UPDATE_TIME', '06:00')
         self.weekly_digest_time = os.getenv('WEEKLY_DIGEST_TIME', '18:00')
+        self.skill_demand_interval_hours = int(os.getenv('SKILL_DEMAND_REFRESH_HOURS', '6'))
     
     def start(self, app=None):
         """Start the scheduler in a background thread"""
@@ -51,6 +52,19 @@ class JobDigestScheduler:
             self.thread.join(timeout=5)
         print("🛑 Job digest scheduler stopped")
     
+    def scheduled_tasks(self):
+        """Tasks run by the scheduler coordinator; digest times are local to APP_TIMEZONE"""
+        from src.services.scheduler_coordinator import ScheduledTask, daily_at
+        if not self.enabled:
+            return []
+        tz = self.local_timezone or None
+        return [
+            ScheduledTask('digest.morning_top_jobs', self._run_daily_digest,
+                          daily_at(self.daily_digest_time, tz), jitter=120),
+            ScheduledTask('digest.weekly_jobs_scholarships', self._run_weekly_digest,
+                          daily_at(self.weekly_digest_time, tz, weekday='5'), jitter=120),
+        ]
+    
     def _run_scheduler(self):
         """Run the scheduler loop"""
         # If APP_TIMEZONE is provided, run schedule checks in that timezone.
@@ -67,14 +81,18 @@ class JobDigestScheduler:
         schedule.clear('job_digest_scheduler')
 
         # Schedule daily morning update
-        schedule.every().day.at(self.daily_digest_time).do(self._run_daily_digest).tag('job_digest_scheduler')
+        schedule.every().day.at(self.daily_digest_time).do(self._run_quietly, self._run_daily_digest).tag('job_digest_scheduler')
         
         # Schedule weekly digest every Friday evening
-        schedule.every().friday.at(self.weekly_digest_time).do(self._run_weekly_digest).tag('job_digest_scheduler')
+        schedule.every().friday.at(self.weekly_digest_time).do(self._run_quietly, self._run_weekly_digest).tag('job_digest_scheduler')
+        
+        # Rebuild market skill demand statistics
+        schedule.every(self.skill_demand_interval_hours).hours.do(self._run_skill_demand_refresh).tag('job_digest_scheduler')
         
         print("📅 Scheduled tasks:")
         print(f"   - Morning update: Every day at {self.daily_digest_time}")
         print(f"   - Weekly digest: Every Friday at {self.weekly_digest_time}")
+        print(f"   - Skill demand statistics: Every {self.skill_demand_interval_hours} hours")
         
         while self.running:
             try:
@@ -84,6 +102,14 @@ class JobDigestScheduler:
                 print(f"❌ Error in scheduler: {e}")
                 time.sleep(60)
     
+    @staticmethod
+    def _run_quietly(task):
+        """Legacy loop wrapper: a job that raises would not be rescheduled by ``schedule``"""
+        try:
+            return task()
+        except Exception:
+            return None  # already reported by the task
+
     def _run_daily_digest(self):
         """Run daily digest task"""
         try:
@@ -96,7 +122,7 @@ class JobDigestScheduler:
             return result
         except Exception as e:
             print(f"❌ Morning update failed: {e}")
-            return None
+            raise
     
     def _run_weekly_digest(self):
         """Run weekly digest task"""
@@ -110,6 +136,20 @@ class JobDigestScheduler:
             return result
         except Exception as e:
             print(f"❌ Weekly digest failed: {e}")
+            raise
+
+    def _run_skill_demand_refresh(self):
+        """Rebuild the skill demand statistics table"""
+        try:
+            from src.services.skill_demand import refresh_skill_demand
+            result = self._execute_with_distributed_lock(
+                lock_name='skill_demand_refresh',
+                task=refresh_skill_demand
+            )
+            print(f"✅ Skill demand statistics refreshed: {result}")
+            return result
+        except Exception as e:
+            print(f"❌ Skill demand refresh failed: {e}")
             return None
 
     def _execute_with_distributed_lock(self, lock_name: str, task):
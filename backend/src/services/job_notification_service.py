@@ -7,6 +7,7 @@ from datetime import datetime, timedelta
 from datetime import timezone as dt_timezone
 from typing import List, Dict, Any
 from sqlalchemy import and_, or_, func
+from sqlalchemy.orm import contains_eager
 import os
 from zoneinfo import ZoneInfo
 
@@ -16,6 +17,12 @@ from src.models.scholarship import Scholarship
 from src.models.notification_preferences import NotificationPreference
 from src.services.notification_templates import EnhancedNotificationService
 from src.services.email_service import email_service
+from src.services import job_alert_index
+from src.services.job_digest_compiler import DigestCompiler
+
+
+# Placeholder for the recipient's name in emails sent as Brevo batches
+BATCH_USER_NAME = '{{ params.user_name }}'
 
 
 class JobNotificationService:
@@ -95,22 +102,23 @@ class JobNotificationService:
         """
         Find users who should receive notifications for this job
         Based on job alerts and notification preferences
-        """
-        matching_users = []
         
-        # Get all active job alerts
-        job_alerts = JobAlert.query.filter_by(is_active=True).all()
-        
-        for alert in job_alerts:
-            if self._job_matches_alert(job, alert):
-                user = User.query.get(alert.user_id)
-                if user and user.is_active and user not in matching_users:
-                    # Check notification preferences
-                    prefs = NotificationPreference.query.filter_by(user_id=user.id).first()
-                    if prefs and prefs.job_alerts_email:
-                        matching_users.append(user)
+        Probes the reverse alert index for candidate alerts, then loads the
+        matching users together with their preferences in one query.
+        """
+        user_ids = job_alert_index.get_active_index().matching_user_ids(job)
+        if not user_ids:
+            return []
         
-        return matching_users
+        return User.query.join(
+            NotificationPreference, NotificationPreference.user_id == User.id
+        ).options(
+            contains_eager(User.notification_preferences)
+        ).filter(
+            User.id.in_(user_ids),
+            User.is_active == True,
+            NotificationPreference.job_alerts_email == True
+        ).all()
     
     def _job_matches_alert(self, job: Job, alert: JobAlert) -> bool:
         """Check if a job matches a user's job alert criteria"""
@@ -179,15 +187,9 @@ class JobNotificationService:
                 'total_users': len(users)
             }
 
-        for user in users:
-            try:
-                if self._send_morning_update_email(user, top_jobs, top_scholarships):
-                    sent_count += 1
-                else:
-                    failed_count += 1
-            except Exception as e:
-                print(f"❌ Failed to send morning update to user {user.id}: {e}")
-                failed_count += 1
+        sent_count, failed_count = self._send_to_users(
+            users, self._render_morning_update_email(BATCH_USER_NAME, top_jobs, top_scholarships)
+        )
 
         return {
             'success': True,
@@ -230,15 +232,12 @@ class JobNotificationService:
                 'total_users': len(users)
             }
 
-        for user in users:
-            try:
-                if self._send_weekly_digest_email(user, weekly_jobs, weekly_scholarships, week_start_local, week_end_local):
-                    sent_count += 1
-                else:
-                    failed_count += 1
-            except Exception as e:
-                print(f"❌ Failed to send weekly digest to user {user.id}: {e}")
-                failed_count += 1
+        sent_count, failed_count = self._send_to_users(
+            users,
+            self._render_weekly_digest_email(
+                BATCH_USER_NAME, weekly_jobs, weekly_scholarships, week_start_local, week_end_local
+            )
+        )
 
         return {
             'success': True,
@@ -253,6 +252,20 @@ class JobNotificationService:
             'timezone': self.local_tz_name
         }
 
+    def _send_to_users(self, users: List[User], content: Dict[str, str]):
+        """Send one rendered email to many users in Brevo batch requests; returns (sent, failed).
+
+        The content is rendered once with BATCH_USER_NAME in place of the
+        recipient's name, which Brevo fills in per recipient from its params.
+        """
+        recipients = [
+            {'email': user.email, 'name': user.get_full_name(), 'params': {'user_name': user.get_full_name()}}
+            for user in users
+        ]
+        results = email_service.send_brevo_batch(recipients, **content)
+        sent_count = sum(1 for result in results if result.success)
+        return sent_count, len(results) - sent_count
+
     def _get_current_calendar_week_window(self):
         """Get local calendar week window (Mon-Fri), plus UTC-naive boundaries for DB queries."""
         now_local = datetime.now(self.local_tz)
@@ -282,40 +295,34 @@ class JobNotificationService:
         return datetime.now().astimezone().tzinfo
     
     def _send_digest(self, digest_type: str) -> Dict[str, Any]:
-        """Send job digest (daily or weekly) to users"""
+        """Send job digest (daily or weekly) to users
+        
+        Digests are compiled set-wise (one job query, batched subscriber and
+        alert loads, in-memory matching) and sent as they stream out.
+        """
         
-        # Get users with digest enabled
+        # Subscribers with digest enabled
         if digest_type == 'daily':
-            preferences = NotificationPreference.query.filter_by(
-                daily_digest_enabled=True,
-                email_enabled=True
-            ).all()
+            criteria = (
+                NotificationPreference.daily_digest_enabled == True,
+                NotificationPreference.email_enabled == True
+            )
             time_range = timedelta(days=1)
         else:  # weekly
             current_day = datetime.now().strftime('%A').lower()
-            preferences = NotificationPreference.query.filter_by(
-                weekly_digest_enabled=True,
-                weekly_digest_day=current_day,
-                email_enabled=True
-            ).all()
+            criteria = (
+                NotificationPreference.weekly_digest_enabled == True,
+                NotificationPreference.weekly_digest_day == current_day,
+                NotificationPreference.email_enabled == True
+            )
             time_range = timedelta(days=7)
         
+        compiler = DigestCompiler(since_date=datetime.utcnow() - time_range)
         sent_count = 0
         failed_count = 0
         
-        for pref in preferences:
+        for user, matching_jobs in compiler.compile(*criteria):
             try:
-                user = User.query.get(pref.user_id)
-                if not user or not user.is_active:
-                    continue
-                
-                # Get jobs posted in the time range that match user's interests
-                cutoff_date = datetime.utcnow() - time_range
-                matching_jobs = self._get_matching_jobs_for_user(user, cutoff_date)
-                
-                if not matching_jobs:
-                    continue  # Skip if no matching jobs
-                
                 # Send digest email
                 success = self._send_digest_email(user, matching_jobs, digest_type)
                 if success:
@@ -324,7 +331,7 @@ class JobNotificationService:
                     failed_count += 1
                     
             except Exception as e:
-                print(f"❌ Failed to send {digest_type} digest to user {pref.user_id}: {e}")
+                print(f"❌ Failed to send {digest_type} digest to user {user.id}: {e}")
                 failed_count += 1
         
         return {
@@ -333,7 +340,7 @@ class JobNotificationService:
             'digest_type': digest_type,
             'sent_count': sent_count,
             'failed_count': failed_count,
-            'total_users': len(preferences)
+            'total_users': compiler.subscriber_count
         }
 
     def _get_active_users_with_email(self) -> List[User]:
@@ -364,6 +371,14 @@ class JobNotificationService:
 
     def _send_morning_update_email(self, user: User, jobs: List[Job], scholarships: List[Scholarship]) -> bool:
         """Send morning top jobs and scholarships email to a single user."""
+        return email_service._send_brevo_email(
+            recipient_email=user.email,
+            recipient_name=user.get_full_name(),
+            **self._render_morning_update_email(user.get_full_name(), jobs, scholarships)
+        )
+
+    def _render_morning_update_email(self, user_name: str, jobs: List[Job], scholarships: List[Scholarship]) -> Dict[str, str]:
+        """Render the morning top jobs and scholarships email (subject, HTML and text bodies)."""
         jobs_html = []
         jobs_text = []
 
@@ -502,7 +517,7 @@ class JobNotificationService:
                 <!-- Main content -->
                 <div style='padding: 40px 20px;'>
                     <p style='color: #1f2937; font-size: 16px; line-height: 1.6; margin: 0 0 24px 0;'>
-                        Hi <strong>{user.get_full_name()}</strong>,
+                        Hi <strong>{user_name}</strong>,
                     </p>
                     <p style='color: #4b5563; font-size: 15px; line-height: 1.6; margin: 0 0 32px 0;'>
                         We've curated the latest opportunities just for you. Check out today's top picks and take your next step towards your dream career!
@@ -575,7 +590,7 @@ class JobNotificationService:
             "\n".join(scholarships_text) if scholarships_text else "No new scholarships right now."
         )
         text_body = (
-            f"Good morning {user.get_full_name()},\n\n"
+            f"Good morning {user_name},\n\n"
             "Your top opportunities are ready!\n\n"
             f"Top Jobs ({len(jobs)}):\n"
             f"{jobs_text_block}\n"
@@ -586,13 +601,11 @@ class JobNotificationService:
             f"Manage preferences: {self.frontend_url}/settings/notifications"
         )
 
-        return email_service._send_brevo_email(
-            recipient_email=user.email,
-            recipient_name=user.get_full_name(),
-            subject=subject,
-            html_body=html_body,
-            text_body=text_body
-        )
+        return {
+            'subject': subject,
+            'html_body': html_body,
+            'text_body': text_body
+        }
 
     def _send_weekly_digest_email(
         self,
@@ -603,6 +616,21 @@ class JobNotificationService:
         week_end: datetime
     ) -> bool:
         """Send weekly digest with jobs and scholarships added this week."""
+        return email_service._send_brevo_email(
+            recipient_email=user.email,
+            recipient_name=user.get_full_name(),
+            **self._render_weekly_digest_email(user.get_full_name(), jobs, scholarships, week_start, week_end)
+        )
+
+    def _render_weekly_digest_email(
+        self,
+        user_name: str,
+        jobs: List[Job],
+        scholarships: List[Scholarship],
+        week_start: datetime,
+        week_end: datetime
+    ) -> Dict[str, str]:
+        """Render the weekly jobs and scholarships digest email (subject, HTML and text bodies)."""
         jobs_html = []
         jobs_text = []
         for idx, job in enumerate(jobs[:10], start=1):
@@ -691,7 +719,7 @@ class JobNotificationService:
                 <!-- Main content -->
                 <div style='padding: 40px 20px;'>
                     <p style='color: #1f2937; font-size: 16px; line-height: 1.6; margin: 0 0 8px 0;'>
-                        Hi <strong>{user.get_full_name()}</strong>,
+                        Hi <strong>{user_name}</strong>,
                     </p>
                     <p style='color: #4b5563; font-size: 15px; line-height: 1.6; margin: 0 0 32px 0;'>
                         This week was exciting! We found <strong>{len(jobs)} new job opportunities</strong> and <strong>{len(scholarships)} scholarship</strong> that might interest you. Take some time this weekend to explore them.
@@ -793,7 +821,7 @@ class JobNotificationService:
             "\n".join(scholarships_text) if scholarships_text else "No new scholarships this week."
         )
         text_body = (
-            f"Hello {user.get_full_name()},\n\n"
+            f"Hello {user_name},\n\n"
             f"Weekly Digest: {week_start_fmt} - {week_end_fmt}\n\n"
             f"This week we found {len(jobs)} new job opportunities and {len(scholarships)} scholarships for you!\n\n"
             f"New Jobs ({len(jobs)}):\n"
@@ -805,13 +833,11 @@ class JobNotificationService:
             f"Manage preferences: {self.frontend_url}/settings/notifications"
         )
 
-        return email_service._send_brevo_email(
-            recipient_email=user.email,
-            recipient_name=user.get_full_name(),
-            subject=subject,
-            html_body=html_body,
-            text_body=text_body
-        )
+        return {
+            'subject': subject,
+            'html_body': html_body,
+            'text_body': text_body
+        }
 
     def _get_job_company_name(self, job: Job) -> str:
         """Safely derive a company/organization display name for a job."""
@@ -825,57 +851,6 @@ class JobNotificationService:
             return scholarship.organization.name
         return scholarship.external_organization_name or 'Unknown organization'
     
-    def _get_matching_jobs_for_user(self, user: User, since_date: datetime) -> List[Job]:
-        """Get jobs that match user's job alert preferences since a given date"""
-        matching_jobs = set()
-        
-        # Get user's job alerts
-        job_alerts = JobAlert.query.filter_by(
-            user_id=user.id,
-            is_active=True
-        ).all()
-        
-        if not job_alerts:
-            # If no job alerts, return recent published jobs (limited)
-            recent_jobs = Job.query.filter(
-                Job.status == 'published',
-                Job.created_at >= since_date,
-                Job.is_active == True
-            ).order_by(Job.created_at.desc()).limit(10).all()
-            return recent_jobs
-        
-        # Find jobs matching each alert
-        for alert in job_alerts:
-            jobs = Job.query.filter(
-                Job.status == 'published',
-                Job.created_at >= since_date,
-                Job.is_active == True
-            )
-            
-            # Apply alert filters
-            if alert.category_id:
-                jobs = jobs.filter(Job.category_id == alert.category_id)
-            
-            if alert.employment_type:
-                jobs = jobs.filter(Job.employment_type == alert.employment_type)
-            
-            if alert.experience_level:
-                jobs = jobs.filter(Job.experience_level == alert.experience_level)
-            
-            if alert.is_remote is not None:
-                jobs = jobs.filter(Job.is_remote == alert.is_remote)
-            
-            if alert.salary_min:
-                jobs = jobs.filter(Job.salary_min >= alert.salary_min)
-            
-            # Execute query and add to set
-            for job in jobs.limit(20).all():
-                if self._job_matches_alert(job, alert):
-                    matching_jobs.add(job)
-        
-        # Return sorted by date (most recent first)
-        return sorted(list(matching_jobs), key=lambda j: j.created_at, reverse=True)[:20]
-    
     def _send_digest_email(self, user: User, jobs: List[Job], digest_type: str) -> bool:
         """Send digest email with multiple job listings"""
         try:
@@ -4,6 +4,7 @@ Handles automated cleanup and management of jobs
 """
 
 import logging
+import os
 import threading
 import time
 from datetime import datetime, timedelta
@@ -23,10 +24,10 @@ class JobScheduler:
         self.is_running = False
         self.scheduler_thread = None
         # Check every 6 hours by default (configurable via environment)
-        self.check_interval = 6 * 60 * 60  # 6 hours in seconds
-        self.auto_delete_enabled = True  # Can be configured
-        self.grace_period_days = 7  # Grace period before deletion after expiry
-        self.notify_before_expiry_days = 3  # Notify employers before expiry
+        self.check_interval = int(os.getenv('JOB_CLEANUP_INTERVAL_HOURS', '6')) * 60 * 60
+        self.auto_delete_enabled = os.getenv('JOB_AUTO_DELETE_ENABLED', 'true').lower() == 'true'
+        self.grace_period_days = int(os.getenv('JOB_GRACE_PERIOD_DAYS', '7'))  # Grace period before deletion after expiry
+        self.notify_before_expiry_days = int(os.getenv('JOB_NOTIFY_BEFORE_EXPIRY_DAYS', '3'))  # Notify employers before expiry
         
     def start(self):
         """Start the job scheduler"""
@@ -49,15 +50,35 @@ class JobScheduler:
             self.scheduler_thread.join(timeout=5)
         self.logger.info("Job scheduler stopped")
     
+    def scheduled_tasks(self):
+        """Tasks run by the scheduler coordinator"""
+        from src.services.scheduler_coordinator import ScheduledTask, every
+        return [
+            ScheduledTask('jobs.expiry_checks', self.run_checks, every(seconds=self.check_interval), jitter=300)
+        ]
+    
+    def run_checks(self):
+        """One check cycle: mark expired jobs, warn about expiring ones, delete old ones.
+
+        Every step runs even if an earlier one failed; the first failure is then re-raised.
+        """
+        steps = [self._mark_expired_jobs, self._notify_expiring_jobs]
+        if self.auto_delete_enabled:
+            steps.append(self._delete_old_expired_jobs)
+        errors = []
+        for step in steps:
+            try:
+                step()
+            except Exception as e:
+                errors.append(e)
+        if errors:
+            raise errors[0]
+    
     def _run_scheduler(self):
         """Main scheduler loop"""
         while self.is_running:
             try:
-                self._mark_expired_jobs()
-                self._notify_expiring_jobs()
-                
-                if self.auto_delete_enabled:
-                    self._delete_old_expired_jobs()
+                self.run_checks()
                 
                 time.sleep(self.check_interval)
                 
@@ -101,6 +122,7 @@ class JobScheduler:
         except Exception as e:
             db.session.rollback()
             self.logger.error(f"Error marking expired jobs: {str(e)}")
+            raise
     
     def _notify_expiring_jobs(self):
         """Notify employers about jobs expiring soon"""
@@ -139,6 +161,7 @@ class JobScheduler:
         except Exception as e:
             db.session.rollback()
             self.logger.error(f"Error notifying about expiring jobs: {str(e)}")
+            raise
     
     def _delete_old_expired_jobs(self):
         """
@@ -192,6 +215,7 @@ class JobScheduler:
         except Exception as e:
             db.session.rollback()
             self.logger.error(f"Error deleting old expired jobs: {str(e)}")
+            raise
     
     def _notify_job_expired(self, job: Job):
         """Send notification to employer that their job has expired"""
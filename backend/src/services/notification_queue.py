@@ -0,0 +1,177 @@
+"""
+Notification Queue Consumer
+Claims ready notification_queue rows with SELECT ... FOR UPDATE SKIP LOCKED (a
+conditional per-row claim on SQLite) so any number of consumers can share the
+queue, leases claimed rows for a visibility timeout and runs N consumer threads,
+in the web process or as the standalone notification_worker.py
+"""
+
+import logging
+import os
+import socket
+import threading
+from datetime import datetime, timedelta
+from typing import List
+
+from sqlalchemy import case, func, or_, and_, select, update
+
+from src.models.user import db
+from src.models.notification_preferences import NotificationQueue
+
+
+logger = logging.getLogger(__name__)
+
+# Claim order: most urgent first, then oldest
+PRIORITY_RANK = case(
+    (NotificationQueue.priority == 'urgent', 0),
+    (NotificationQueue.priority == 'high', 1),
+    (NotificationQueue.priority == 'normal', 2),
+    else_=3
+)
+
+
+def _ready_condition(now: datetime, lease_cutoff: datetime):
+    """Rows a consumer may claim: due queued rows (retry time honoured) and
+    processing rows whose lease ran out before being completed"""
+    return or_(
+        and_(
+            NotificationQueue.status == 'queued',
+            NotificationQueue.scheduled_for <= now,
+            or_(NotificationQueue.next_retry_at.is_(None), NotificationQueue.next_retry_at <= now)
+        ),
+        and_(
+            NotificationQueue.status == 'processing',
+            NotificationQueue.processed_at < lease_cutoff,
+            func.coalesce(NotificationQueue.retry_count, 0) < func.coalesce(NotificationQueue.max_retries, 3)
+        )
+    )
+
+
+def _claim_values(now: datetime) -> dict:
+    # processed_at doubles as the lease start; a lease that expired counts as a failed attempt
+    return {
+        'status': 'processing',
+        'processed_at': now,
+        'retry_count': func.coalesce(NotificationQueue.retry_count, 0) + case(
+            (NotificationQueue.status == 'processing', 1), else_=0
+        )
+    }
+
+
+def fail_exhausted_leases(visibility_timeout: int) -> int:
+    """Fail rows whose consumer died on every attempt. Runs in the caller's transaction."""
+    cutoff = datetime.utcnow() - timedelta(seconds=visibility_timeout)
+    result = db.session.execute(
+        update(NotificationQueue).where(
+            NotificationQueue.status == 'processing',
+            NotificationQueue.processed_at < cutoff,
+            func.coalesce(NotificationQueue.retry_count, 0) >= func.coalesce(NotificationQueue.max_retries, 3)
+        ).values(status='failed').execution_options(synchronize_session=False)
+    )
+    return result.rowcount or 0
+
+
+def claim_entries(limit: int, visibility_timeout: int) -> List[int]:
+    """Claim up to ``limit`` ready queue rows and commit the claim; returns their ids.
+
+    On PostgreSQL the rows are picked with FOR UPDATE SKIP LOCKED, so concurrent
+    consumers never wait on or receive each other's rows. Other databases claim
+    row by row with a conditional UPDATE, keeping only rows this call changed.
+    """
+    now = datetime.utcnow()
+    ready = _ready_condition(now, now - timedelta(seconds=visibility_timeout))
+    candidates = select(NotificationQueue.id).where(ready).order_by(
+        PRIORITY_RANK, NotificationQueue.scheduled_for
+    ).limit(limit)
+
+    try:
+        if db.engine.url.get_backend_name() == 'postgresql':
+            claimed = db.session.execute(
+                update(NotificationQueue).where(
+                    NotificationQueue.id.in_(candidates.with_for_update(skip_locked=True).scalar_subquery())
+                ).values(**_claim_values(now)).returning(NotificationQueue.id)
+                .execution_options(synchronize_session=False)
+            ).scalars().all()
+        else:
+            claimed = []
+            for entry_id in db.session.execute(candidates).scalars().all():
+                result = db.session.execute(
+                    update(NotificationQueue).where(NotificationQueue.id == entry_id, ready)
+                    .values(**_claim_values(now)).execution_options(synchronize_session=False)
+                )
+                if result.rowcount:
+                    claimed.append(entry_id)
+        db.session.commit()
+        return list(claimed)
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Failed to claim notification queue entries: {str(e)}")
+        return []
+
+
+class NotificationQueueConsumer:
+    """Pool of consumer threads draining the notification queue.
+
+    Each thread claims a batch, processes it through the notification scheduler
+    and claims again straight away while batches come back full; it idles for
+    the poll interval once the queue is drained.
+    """
+
+    def __init__(self, threads: int = None, batch_size: int = None,
+                 visibility_timeout: int = None, poll_interval: float = None):
+        self.threads = threads or int(os.getenv('NOTIFICATION_WORKER_THREADS', '4'))
+        self.batch_size = batch_size or int(os.getenv('NOTIFICATION_QUEUE_BATCH_SIZE', '50'))
+        self.visibility_timeout = visibility_timeout or int(os.getenv('NOTIFICATION_QUEUE_VISIBILITY_TIMEOUT', '300'))
+        self.poll_interval = poll_interval or float(os.getenv('NOTIFICATION_QUEUE_POLL_INTERVAL', '5'))
+        self.worker_name = f"{socket.gethostname()}:{os.getpid()}"
+        self._stop = threading.Event()
+        self._workers: List[threading.Thread] = []
+
+    @property
+    def is_running(self) -> bool:
+        return any(worker.is_alive() for worker in self._workers)
+
+    def start(self, app):
+        if self.is_running:
+            logger.warning("Notification queue consumer is already running")
+            return
+        self._stop.clear()
+        self._workers = [
+            threading.Thread(target=self._consume, args=(app, n), daemon=True,
+                             name=f"notification-consumer-{n}")
+            for n in range(self.threads)
+        ]
+        for worker in self._workers:
+            worker.start()
+        logger.info(f"Notification queue consumer started: {self.threads} threads on {self.worker_name}")
+
+    def stop(self, timeout: float = 30):
+        """Stop claiming and wait for in-flight batches to finish"""
+        self._stop.set()
+        for worker in self._workers:
+            worker.join(timeout=timeout)
+        logger.info("Notification queue consumer stopped")
+
+    def run_once(self) -> int:
+        """Claim and process one batch (inside an app context); returns the batch size"""
+        from src.services.notification_scheduler import notification_scheduler
+        return notification_scheduler.process_queue_batch(self.batch_size, self.visibility_timeout)
+
+    def _consume(self, app, n: int):
+        while not self._stop.is_set():
+            try:
+                with app.app_context():
+                    if n == 0:
+                        failed = fail_exhausted_leases(self.visibility_timeout)
+                        db.session.commit()
+                        if failed:
+                            logger.warning(f"Failed {failed} queue entries whose consumers repeatedly died")
+                    processed = self.run_once()
+            except Exception as e:
+                logger.error(f"Notification consumer {self.worker_name}/{n} error: {str(e)}")
+                processed = 0
+            if processed < self.batch_size:
+                self._stop.wait(self.poll_interval)
+
+
+queue_consumer = NotificationQueueConsumer()
@@ -5,18 +5,21 @@ Handles batched and scheduled notification delivery
 
 import asyncio
 import logging
+import os
 import json
 import hashlib
 from datetime import datetime, timedelta
 from typing import List, Dict, Any
 import threading
 import time
-from sqlalchemy import text
+from sqlalchemy import insert, text, update
 
 from src.models.user import db
 from src.models.notification import Notification
 from src.models.notification_preferences import NotificationQueue, NotificationDeliveryLog, NotificationPreference
 from src.services.email_service import email_service, EmailNotification, EmailPriority
+from src.services.email_delivery import DeliveryResult
+from src.services.notification_queue import claim_entries
 
 
 class NotificationScheduler:
@@ -28,6 +31,7 @@ class NotificationScheduler:
         self.scheduler_thread = None
         self.check_interval = 60  # Check every minute
         self.batch_size = 50
+        self.queue_visibility_timeout = int(os.getenv('NOTIFICATION_QUEUE_VISIBILITY_TIMEOUT', '300'))  # seconds
         self._last_daily_run_slot = None
         self._last_weekly_run_slot = None
 
@@ -106,14 +110,35 @@ class NotificationScheduler:
             self.scheduler_thread.join(timeout=5)
         self.logger.info("Notification scheduler stopped")
     
+    def scheduled_tasks(self):
+        """Tasks run by the scheduler coordinator; digest hours are UTC.
+
+        The queue is drained by the notification worker (notification_worker.py);
+        the coordinator's one batch per check interval only runs as a fallback
+        for deploys without it (NOTIFICATION_QUEUE_MODE=scheduler, the default).
+        """
+        from src.services.scheduler_coordinator import ScheduledTask, cron, every
+        queue_in_scheduler = os.getenv('NOTIFICATION_QUEUE_MODE', 'scheduler').lower() == 'scheduler'
+        return [
+            ScheduledTask('notifications.scheduled', self._process_scheduled_notifications,
+                          every(seconds=self.check_interval), jitter=10),
+            ScheduledTask('notifications.queue', self._process_queued_notifications,
+                          every(seconds=self.check_interval), jitter=10, enabled=queue_in_scheduler),
+            ScheduledTask('notifications.daily_digest', self._send_daily_digests, cron('0 9 * * *'), jitter=120),
+            ScheduledTask('notifications.weekly_digest', self._send_weekly_digests, cron('0 9 * * 1'), jitter=120),
+            ScheduledTask('notifications.cleanup_logs', self._cleanup_old_logs, every(hours=1), jitter=300),
+        ]
+    
     def _run_scheduler(self):
         """Main scheduler loop"""
         while self.is_running:
             try:
-                self._process_scheduled_notifications()
-                self._process_queued_notifications()
-                self._process_digest_notifications()
-                self._cleanup_old_logs()
+                for step in (self._process_scheduled_notifications, self._process_queued_notifications,
+                             self._process_digest_notifications, self._cleanup_old_logs):
+                    try:
+                        step()
+                    except Exception:
+                        pass  # logged by the step; the next steps still run
                 
                 time.sleep(self.check_interval)
                 
@@ -134,38 +159,49 @@ class NotificationScheduler:
             ).limit(self.batch_size).all()
             
             if not scheduled_notifications:
-                return
+                return {'success': True, 'sent_count': 0, 'failed_count': 0}
             
             self.logger.info(f"Processing {len(scheduled_notifications)} scheduled notifications")
             
+            sent_count = 0
+            failed_count = 0
             for notification in scheduled_notifications:
                 try:
-                    self._send_notification_email(notification)
+                    if self._send_notification_email(notification):
+                        sent_count += 1
+                    else:
+                        failed_count += 1
                 except Exception as e:
+                    failed_count += 1
                     self.logger.error(f"Error sending scheduled notification {notification.id}: {str(e)}")
             
             db.session.commit()
+            return {'success': True, 'sent_count': sent_count, 'failed_count': failed_count}
             
         except Exception as e:
             db.session.rollback()
             self.logger.error(f"Error processing scheduled notifications: {str(e)}")
+            raise
     
     def _process_queued_notifications(self):
         """Process queued notifications"""
+        return {'claimed': self.process_queue_batch(self.batch_size, self.queue_visibility_timeout)}
+    
+    def process_queue_batch(self, limit: int, visibility_timeout: int) -> int:
+        """Claim up to ``limit`` ready queue entries and deliver them; returns the number claimed
+        
+        Claims are exclusive across threads and processes (see notification_queue),
+        so any number of consumers may call this concurrently. A failed batch is
+        rolled back and re-raised.
+        """
+        entry_ids = claim_entries(limit, visibility_timeout)
+        if not entry_ids:
+            return 0
+        
         try:
-            current_time = datetime.utcnow()
-            
-            # Get queued notifications ready for delivery
             queued_notifications = NotificationQueue.query.filter(
-                NotificationQueue.status == 'queued',
-                NotificationQueue.scheduled_for <= current_time
-            ).order_by(
-                NotificationQueue.priority.desc(),
-                NotificationQueue.scheduled_for.asc()
-            ).limit(self.batch_size).all()
-            
-            if not queued_notifications:
-                return
+                NotificationQueue.id.in_(entry_ids)
+            ).all()
             
             self.logger.info(f"Processing {len(queued_notifications)} queued notifications")
             
@@ -185,39 +221,39 @@ class NotificationScheduler:
             db.session.commit()
             
         except Exception as e:
+            # Claimed rows stay leased and are retried once the visibility timeout passes
             db.session.rollback()
             self.logger.error(f"Error processing queued notifications: {str(e)}")
+            raise
+        
+        return len(entry_ids)
     
     def _process_queue_batch(self, queue_entries: List[NotificationQueue]):
-        """Process a batch of queue entries"""
+        """Process a batch of queue entries
+        
+        Notifications, users and preferences for the whole batch are loaded up
+        front (three IN queries) and preference checks run in memory; queue status
+        changes are collected and written with one bulk update at the end.
+        """
+        notifications, users, preferences = self._prefetch_queue_context(queue_entries)
+        queue_updates: Dict[int, Dict[str, Any]] = {}
         email_notifications = []
         
         for queue_entry in queue_entries:
             try:
-                queue_entry.status = 'processing'
-                queue_entry.processed_at = datetime.utcnow()
-                
-                # Get the notification
-                notification = Notification.query.get(queue_entry.notification_id)
-                if not notification:
-                    queue_entry.status = 'failed'
-                    continue
-                
-                # Get user for email data
-                from src.models.user import User
-                user = User.query.get(queue_entry.user_id)
-                if not user:
-                    queue_entry.status = 'failed'
+                notification = notifications.get(queue_entry.notification_id)
+                user = users.get(queue_entry.user_id)
+                if not notification or not user:
+                    queue_updates[queue_entry.id] = {'status': 'failed'}
                     continue
                 
                 # Check user preferences
-                preferences = NotificationPreference.get_or_create_for_user(user.id)
-                if not preferences.should_send_notification(
+                if not preferences[user.id].should_send_notification(
                     notification.notification_type, 
                     queue_entry.delivery_method,
                     notification.priority == 'urgent'
                 ):
-                    queue_entry.status = 'skipped'
+                    queue_updates[queue_entry.id] = {'status': 'skipped'}
                     continue
                 
                 if queue_entry.delivery_method == 'email':
@@ -242,61 +278,102 @@ class NotificationScheduler:
                     
                     email_notifications.append((email_notification, queue_entry, notification))
                 
+                else:
+                    self.logger.warning(f"No sender for delivery method '{queue_entry.delivery_method}' (queue entry {queue_entry.id})")
+                    queue_updates[queue_entry.id] = {'status': 'skipped'}
+                
             except Exception as e:
                 self.logger.error(f"Error preparing queue entry {queue_entry.id}: {str(e)}")
-                queue_entry.status = 'failed'
+                queue_updates[queue_entry.id] = {'status': 'failed'}
         
         # Send emails in batch
         if email_notifications:
-            self._send_email_batch(email_notifications)
+            queue_updates.update(self._send_email_batch(email_notifications))
+        
+        if queue_updates:
+            db.session.execute(
+                update(NotificationQueue),
+                [{'id': entry_id, **values} for entry_id, values in queue_updates.items()]
+            )
     
-    def _send_email_batch(self, email_notifications: List[tuple]):
-        """Send a batch of email notifications"""
-        for email_notification, queue_entry, notification in email_notifications:
-            try:
-                success = email_service.send_notification_email(email_notification)
-                
-                if success:
-                    queue_entry.status = 'sent'
-                    notification.mark_as_sent()
-                    
-                    # Log successful delivery
-                    delivery_log = NotificationDeliveryLog(
-                        notification_id=notification.id,
-                        user_id=queue_entry.user_id,
-                        delivery_method='email',
-                        delivery_status='sent',
-                        recipient_address=email_notification.recipient_email,
-                        delivery_provider='smtp'
-                    )
-                    db.session.add(delivery_log)
-                    
-                else:
-                    queue_entry.status = 'failed'
-                    queue_entry.retry_count += 1
-                    
-                    # Schedule retry if not exceeded max retries
-                    if queue_entry.retry_count < queue_entry.max_retries:
-                        retry_delay = min(2 ** queue_entry.retry_count * 60, 3600)  # Exponential backoff, max 1 hour
-                        queue_entry.next_retry_at = datetime.utcnow() + timedelta(seconds=retry_delay)
-                        queue_entry.status = 'queued'
-                    
-                    # Log failed delivery
-                    delivery_log = NotificationDeliveryLog(
-                        notification_id=notification.id,
-                        user_id=queue_entry.user_id,
-                        delivery_method='email',
-                        delivery_status='failed',
-                        recipient_address=email_notification.recipient_email,
-                        delivery_provider='smtp',
-                        delivery_response='Email delivery failed'
-                    )
-                    db.session.add(delivery_log)
+    def _prefetch_queue_context(self, queue_entries: List[NotificationQueue]):
+        """Notifications, users and preferences of a batch, keyed by id / user id
+        
+        Users without preferences get default ones, flushed together.
+        """
+        from src.models.user import User
+        notification_ids = {entry.notification_id for entry in queue_entries}
+        user_ids = {entry.user_id for entry in queue_entries}
+        
+        notifications = {n.id: n for n in Notification.query.filter(Notification.id.in_(notification_ids)).all()}
+        users = {u.id: u for u in User.query.filter(User.id.in_(user_ids)).all()}
+        preferences = {
+            p.user_id: p for p in NotificationPreference.query.filter(NotificationPreference.user_id.in_(user_ids)).all()
+        }
+        
+        missing = [NotificationPreference(user_id=user_id) for user_id in users if user_id not in preferences]
+        if missing:
+            db.session.add_all(missing)
+            db.session.flush()
+            preferences.update({p.user_id: p for p in missing})
+        
+        return notifications, users, preferences
+    
+    def _send_email_batch(self, email_notifications: List[tuple]) -> Dict[int, Dict[str, Any]]:
+        """Send a batch of email notifications
+        
+        The batch goes out as Brevo batch requests. Delivery logs are bulk
+        inserted and sent notifications bulk updated; the queue status changes
+        are returned (by queue entry id) for the caller to write.
+        """
+        try:
+            results = email_service.send_notification_batch(
+                [email_notification for email_notification, _, _ in email_notifications]
+            )
+        except Exception as e:
+            self.logger.error(f"Error dispatching email batch: {str(e)}")
+            results = [DeliveryResult(False, error=str(e))] * len(email_notifications)
+        
+        now = datetime.utcnow()
+        queue_updates: Dict[int, Dict[str, Any]] = {}
+        sent_notifications = []
+        delivery_logs = []
+        
+        for (email_notification, queue_entry, notification), result in zip(email_notifications, results):
+            if result.success:
+                queue_updates[queue_entry.id] = {'status': 'sent'}
+                sent_notifications.append({'id': notification.id, 'is_sent': True, 'sent_at': now})
+                delivery_response = f"messageId {result.message_id}" if result.message_id else None
+            else:
+                retry_count = (queue_entry.retry_count or 0) + 1
+                queue_updates[queue_entry.id] = {'status': 'failed', 'retry_count': retry_count}
                 
-            except Exception as e:
-                self.logger.error(f"Error sending email for notification {notification.id}: {str(e)}")
-                queue_entry.status = 'failed'
-                queue_entry.retry_count += 1
+                # Schedule retry if not exceeded max retries
+                if retry_count < queue_entry.max_retries:
+                    retry_delay = min(2 ** retry_count * 60, 3600)  # Exponential backoff, max 1 hour
+                    queue_updates[queue_entry.id].update({
+                        'status': 'queued',
+                        'next_retry_at': now + timedelta(seconds=retry_delay)
+                    })
+                delivery_response = result.error or 'Email delivery failed'
+            
+            delivery_logs.append({
+                'notification_id': notification.id,
+                'user_id': queue_entry.user_id,
+                'delivery_method': 'email',
+                'delivery_status': 'sent' if result.success else 'failed',
+                'recipient_address': email_notification.recipient_email,
+                'delivery_provider': 'smtp',
+                'delivery_response': delivery_response,
+                'attempted_at': now
+            })
+        
+        if sent_notifications:
+            db.session.execute(update(Notification), sent_notifications)
+        if delivery_logs:
+            db.session.execute(insert(NotificationDeliveryLog), delivery_logs)
+        
+        return queue_updates
     
     def _send_notification_email(self, notification: Notification):
         """Send email for a single notification"""
@@ -431,6 +508,8 @@ class NotificationScheduler:
                 weekly_digest_enabled=True
             ).all()
             
+            sent_count = 0
+            failed_count = 0
             for pref in preferences:
                 try:
                     from src.models.user import User
@@ -471,14 +550,21 @@ class NotificationScheduler:
                     if success:
                         self._create_digest_marker(user.id, digest_key)
                         db.session.commit()
+                        sent_count += 1
+                    else:
+                        failed_count += 1
                     
                 except Exception as e:
                     db.session.rollback()
+                    failed_count += 1
                     self.logger.error(f"Error sending weekly digest to user {pref.user_id}: {str(e)}")
             
+            return {'success': True, 'sent_count': sent_count, 'failed_count': failed_count}
+            
         except Exception as e:
             db.session.rollback()
             self.logger.error(f"Error in weekly digest processing: {str(e)}")
+            raise
         finally:
             if lock_acquired:
                 self._release_pg_lock(lock_name)
@@ -501,6 +587,8 @@ class NotificationScheduler:
                 daily_digest_enabled=True
             ).all()
             
+            sent_count = 0
+            failed_count = 0
             for pref in preferences:
                 try:
                     # Check if it's the right time for this user
@@ -536,14 +624,21 @@ class NotificationScheduler:
                         if success:
                             self._create_digest_marker(user.id, digest_key)
                             db.session.commit()
+                            sent_count += 1
+                        else:
+                            failed_count += 1
                     
                 except Exception as e:
                     db.session.rollback()
+                    failed_count += 1
                     self.logger.error(f"Error sending daily digest to user {pref.user_id}: {str(e)}")
             
+            return {'success': True, 'sent_count': sent_count, 'failed_count': failed_count}
+            
         except Exception as e:
             db.session.rollback()
             self.logger.error(f"Error in daily digest processing: {str(e)}")
+            raise
         finally:
             if lock_acquired:
                 self._release_pg_lock(lock_name)
@@ -582,10 +677,12 @@ class NotificationScheduler:
                 self.logger.info(f"Cleaned up {old_queue_count} old queue entries")
             
             db.session.commit()
+            return {'logs_deleted': old_logs_count, 'queue_entries_deleted': old_queue_count}
             
         except Exception as e:
             db.session.rollback()
             self.logger.error(f"Error in cleanup: {str(e)}")
+            raise
     
     def queue_notification(self, notification_id: int, user_id: int, delivery_method: str = 'email', 
                           priority: str = 'normal', scheduled_for: datetime = None, 
@@ -0,0 +1,316 @@
+"""
+Notification Stream
+Per-user unread counters kept up to date incrementally and a push channel for
+notification events. ORM changes to notifications are captured during flush,
+serialized after it and, once the transaction commits, applied to the counter and
+published to the user's stream: over Redis pub/sub when Redis is available (so every worker sees them),
+in-process otherwise
+"""
+
+import json
+import logging
+import queue
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, Optional, Set
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from src.models.notification import Notification
+from src.utils.cache import cache
+
+
+logger = logging.getLogger(__name__)
+
+COUNTER_PREFIX = 'ts:notif_unread'
+COUNTER_TTL = 24 * 3600  # seconds
+LOCAL_COUNTER_TTL = 5  # seconds; without Redis other processes' changes are only seen on a recount
+EVENTS_CHANNEL = 'ts:notifications:events'
+
+# Increment only a counter that is already cached; a missing one is recomputed on read
+_APPLY_DELTA = """
+if redis.call('EXISTS', KEYS[1]) == 1 then
+    local value = redis.call('INCRBY', KEYS[1], ARGV[1])
+    if value < 0 then
+        redis.call('SET', KEYS[1], 0, 'KEEPTTL')
+        value = 0
+    end
+    return value
+end
+return false
+"""
+
+_PENDING_KEY = 'notification_stream_pending'
+_RESYNC_KEY = 'notification_stream_resync'
+
+
+class UnreadCounter:
+    """Unread notification count per user.
+
+    Counts are computed from the database on a miss and then moved by deltas.
+    Keys carry a generation number: bulk statements the ORM cannot attribute
+    to users bump the generation, which drops every cached count at once.
+    """
+
+    def __init__(self):
+        self._local: Dict[int, tuple] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, user_id: int) -> str:
+        generation = cache.redis_client.get(f'{COUNTER_PREFIX}:generation') or '0'
+        return f'{COUNTER_PREFIX}:{generation}:{user_id}'
+
+    @staticmethod
+    def _count(user_id: int) -> int:
+        return Notification.query.filter_by(user_id=user_id, is_read=False).count()
+
+    def get(self, user_id: int) -> int:
+        if cache.enabled:
+            try:
+                key = self._key(user_id)
+                value = cache.redis_client.get(key)
+                if value is not None:
+                    return int(value)
+                count = self._count(user_id)
+                cache.redis_client.set(key, count, ex=COUNTER_TTL, nx=True)
+                return count
+            except Exception as e:
+                logger.warning(f"Unread counter unavailable, counting from the database: {str(e)}")
+                return self._count(user_id)
+
+        with self._lock:
+            entry = self._local.get(user_id)
+            if entry and entry[1] > time.monotonic():
+                return entry[0]
+        count = self._count(user_id)
+        with self._lock:
+            self._local[user_id] = (count, time.monotonic() + LOCAL_COUNTER_TTL)
+        return count
+
+    def apply(self, user_id: int, delta: int) -> Optional[int]:
+        """Move a cached count by ``delta``; returns the new count, or None when not cached"""
+        if cache.enabled:
+            try:
+                value = cache.redis_client.eval(_APPLY_DELTA, 1, self._key(user_id), delta)
+                return int(value) if value is not None else None
+            except Exception as e:
+                logger.warning(f"Failed to update unread counter for user {user_id}: {str(e)}")
+                return None
+
+        with self._lock:
+            entry = self._local.get(user_id)
+            if not entry or entry[1] <= time.monotonic():
+                return None
+            count = max(entry[0] + delta, 0)
+            self._local[user_id] = (count, entry[1])
+            return count
+
+    def invalidate_all(self) -> None:
+        if cache.enabled:
+            try:
+                cache.redis_client.incr(f'{COUNTER_PREFIX}:generation')
+            except Exception as e:
+                logger.warning(f"Failed to invalidate unread counters: {str(e)}")
+        with self._lock:
+            self._local.clear()
+
+
+class NotificationHub:
+    """Fan-out of notification events to the streams open in this process.
+
+    With Redis, events are published on one channel and a listener thread
+    (started with the first subscriber) hands them to local subscribers, so an
+    event raised in any worker reaches the user's streams in every worker.
+    """
+
+    def __init__(self, queue_size: int = 100):
+        self.queue_size = queue_size
+        self._subscribers: Dict[int, Set[queue.Queue]] = defaultdict(set)
+        self._lock = threading.Lock()
+        self._listener: Optional[threading.Thread] = None
+
+    def subscribe(self, user_id: int) -> queue.Queue:
+        subscription = queue.Queue(maxsize=self.queue_size)
+        with self._lock:
+            self._subscribers[user_id].add(subscription)
+        if cache.enabled:
+            self._ensure_listener()
+        return subscription
+
+    def unsubscribe(self, user_id: int, subscription: queue.Queue) -> None:
+        with self._lock:
+            subscriptions = self._subscribers.get(user_id)
+            if subscriptions:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscribers[user_id]
+
+    def publish(self, user_id: int, payload: Dict) -> None:
+        if cache.enabled:
+            try:
+                cache.redis_client.publish(EVENTS_CHANNEL, json.dumps({'user_id': user_id, 'event': payload}))
+                return
+            except Exception as e:
+                logger.warning(f"Failed to publish notification event, delivering locally: {str(e)}")
+        self.dispatch(user_id, payload)
+
+    def dispatch(self, user_id: int, payload: Dict) -> None:
+        with self._lock:
+            subscriptions = list(self._subscribers.get(user_id, ()))
+        for subscription in subscriptions:
+            try:
+                subscription.put_nowait(payload)
+            except queue.Full:
+                # A stalled client: drop the event, the next unread_count event resyncs it
+                logger.debug(f"Dropping notification event for a slow stream of user {user_id}")
+
+    def _ensure_listener(self) -> None:
+        with self._lock:
+            if self._listener and self._listener.is_alive():
+                return
+            self._listener = threading.Thread(target=self._listen, daemon=True,
+                                              name='notification-stream-listener')
+            self._listener.start()
+
+    def _listen(self) -> None:
+        while True:
+            try:
+                pubsub = cache.redis_client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(EVENTS_CHANNEL)
+                for message in pubsub.listen():
+                    if message.get('type') != 'message':
+                        continue
+                    data = json.loads(message['data'])
+                    self.dispatch(int(data['user_id']), data['event'])
+            except Exception as e:
+                logger.warning(f"Notification stream listener error, reconnecting: {str(e)}")
+                time.sleep(5)
+
+
+unread_counter = UnreadCounter()
+notification_hub = NotificationHub()
+
+
+def _pending(session) -> list:
+    return session.info.setdefault(_PENDING_KEY, [])
+
+
+def _record(session, user_id: int, delta: int, notification=None) -> None:
+    """Queue a change for after commit, tagged with the savepoint (or transaction)
+    it was flushed in, so rolling back that savepoint discards exactly its changes"""
+    transaction = session.get_nested_transaction() or session.get_transaction()
+    _pending(session).append((user_id, delta, notification, transaction))
+
+
+def _within(transaction, ancestor) -> bool:
+    while transaction is not None:
+        if transaction is ancestor:
+            return True
+        transaction = transaction.parent
+    return False
+
+
+@event.listens_for(Notification, 'after_insert')
+def _notification_inserted(mapper, connection, target):
+    # Serialized once the flush is over (_serialize_inserted), not in the middle of it
+    unread = not target.is_read
+    _record(Session.object_session(target), target.user_id, 1 if unread else 0, target)
+
+
+@event.listens_for(Session, 'after_flush_postexec')
+def _serialize_inserted(session, flush_context):
+    pending = session.info.get(_PENDING_KEY)
+    if not pending:
+        return
+    serialized = []
+    for user_id, delta, notification, transaction in pending:
+        if isinstance(notification, Notification):
+            try:
+                notification = notification.to_dict()
+            except Exception as e:
+                logger.warning(f"Failed to serialize notification for user {user_id}: {str(e)}")
+                notification = None
+        serialized.append((user_id, delta, notification, transaction))
+    session.info[_PENDING_KEY] = serialized
+
+
+@event.listens_for(Notification, 'after_update')
+def _notification_updated(mapper, connection, target):
+    history = inspect(target).attrs.is_read.history
+    if not history.has_changes():
+        return
+    session = Session.object_session(target)
+    if not history.deleted:
+        # The previous value was never loaded, so the direction of the change is unknown
+        session.info[_RESYNC_KEY] = True
+    elif bool(history.deleted[0]) != bool(target.is_read):
+        _record(session, target.user_id, -1 if target.is_read else 1)
+
+
+@event.listens_for(Notification, 'after_delete')
+def _notification_deleted(mapper, connection, target):
+    if not target.is_read:
+        _record(Session.object_session(target), target.user_id, -1)
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _bulk_statement(orm_execute_state):
+    """Bulk UPDATE/DELETE bypass the mapper events: drop every cached count when
+    one can change which notifications are unread"""
+    if not (orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    if Notification.__mapper__ not in orm_execute_state.all_mappers:
+        return
+    if orm_execute_state.is_update:
+        parameters = orm_execute_state.parameters
+        rows = parameters if isinstance(parameters, list) else [parameters or {}]
+        keys = {key for row in rows for key in row}
+        keys.update(getattr(key, 'key', key) for key in (getattr(orm_execute_state.statement, '_values', None) or {}))
+        if keys and 'is_read' not in keys and 'user_id' not in keys:
+            return
+    orm_execute_state.session.info[_RESYNC_KEY] = True
+
+
+@event.listens_for(Session, 'after_commit')
+def _publish_committed(session):
+    pending = session.info.pop(_PENDING_KEY, None)
+    if session.info.pop(_RESYNC_KEY, False):
+        unread_counter.invalidate_all()
+    if not pending:
+        return
+
+    deltas: Dict[int, int] = defaultdict(int)
+    for user_id, delta, _, _ in pending:
+        deltas[user_id] += delta
+    counts = {user_id: unread_counter.apply(user_id, delta) if delta else None
+              for user_id, delta in deltas.items()}
+
+    try:
+        for user_id, delta, notification, _ in pending:
+            if notification is not None:
+                notification_hub.publish(user_id, {
+                    'event': 'notification', 'notification': notification, 'unread_count': counts[user_id]
+                })
+        for user_id, delta in deltas.items():
+            if delta:
+                notification_hub.publish(user_id, {
+                    'event': 'unread_count', 'unread_count': counts[user_id], 'delta': delta
+                })
+    except Exception as e:
+        logger.error(f"Failed to publish notification events: {str(e)}")
+
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _discard_rolled_back(session, previous_transaction):
+    if previous_transaction.nested:
+        # Only the changes flushed inside the savepoint are gone
+        pending = session.info.get(_PENDING_KEY)
+        if pending:
+            session.info[_PENDING_KEY] = [
+                entry for entry in pending if not _within(entry[3], previous_transaction)
+            ]
+        return
+    session.info.pop(_PENDING_KEY, None)
+    session.info.pop(_RESYNC_KEY, None)
@@ -114,12 +114,12 @@ class NotificationTemplateHandler:
             'sender_role': sender.role.replace('_', ' ').title(),
             'sender_avatar': f"{kwargs.get('frontend_url', 'https://talentsphere.com')}/api/users/{sender.id}/avatar",
             'message_subject': message.subject,
-            'message_preview': message.content[:100] + '...' if len(message.content) > 100 else message.content,
+            'message_preview': message.message[:100] + '...' if len(message.message) > 100 else message.message,
             'message_date': message.created_at.strftime('%B %d, %Y at %I:%M %p'),
             'message_url': f"{kwargs.get('frontend_url', 'https://talentsphere.com')}/messages/{message.id}",
             'reply_url': f"{kwargs.get('frontend_url', 'https://talentsphere.com')}/messages/compose?reply_to={message.id}",
-            'has_attachments': len(message.attachments) > 0 if hasattr(message, 'attachments') else False,
-            'attachment_count': len(message.attachments) if hasattr(message, 'attachments') else 0,
+            'has_attachments': bool(getattr(message, 'attachments', None)),
+            'attachment_count': len(getattr(message, 'attachments', None) or []),
             'is_urgent': message.priority == 'urgent' if hasattr(message, 'priority') else False
         }
     
@@ -292,7 +292,7 @@ class EnhancedNotificationService:
             
             return self.email_service.create_and_send_notification(
                 user_id=user_id,
-                notification_type='message',
+                notification_type=NotificationType.MESSAGE,
                 title=f"New Message: {message.subject}",
                 message=f"You have a new message from {message.sender.get_full_name()}",
                 variables=template_data,
@@ -0,0 +1,293 @@
+"""
+Profile Feature Service
+Computes the derived features of a job seeker profile (normalized skills, years of
+experience, seniority, keyword bag, completeness) once per profile version and
+stores them in profile_features for every consumer to read
+"""
+
+import json
+import logging
+import re
+from collections import Counter
+from datetime import date
+from typing import Dict, List, Optional
+
+from src.models.user import db, User
+from src.models.profile_features import ProfileFeatures
+from src.services import profile_graph
+from src.services.candidate_scoring import normalize_skills
+from src.services.candidate_search import experience_band
+
+
+logger = logging.getLogger(__name__)
+
+# Number of keywords kept in the stored keyword bag
+KEYWORD_BAG_SIZE = 50
+
+COMPLETENESS_WEIGHTS = {
+    'basic_info': 15,
+    'professional_summary': 10,
+    'work_experience': 20,
+    'education': 15,
+    'skills': 15,
+    'certifications': 5,
+    'projects': 5,
+    'professional_links': 5,
+    'preferences': 5,
+    'additional': 5
+}
+
+STOP_WORDS = {'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for',
+              'of', 'with', 'by', 'from', 'as', 'is', 'was', 'were', 'been', 'be',
+              'have', 'has', 'had', 'do', 'does', 'did', 'will', 'would', 'could',
+              'should', 'may', 'might', 'must', 'can', 'this', 'that', 'these', 'those'}
+
+
+def extract_keywords_from_text(text):
+    """Extract potential keywords from text"""
+    if not text:
+        return []
+
+    # Extract words (alphanumeric + common tech chars)
+    words = re.findall(r'\b[a-zA-Z][a-zA-Z0-9+#\-\.]*\b', text.lower())
+    return [word for word in words if word not in STOP_WORDS and len(word) > 2]
+
+
+def parse_list_field(value):
+    """Parse a list-like field that may be an array, JSON string, or CSV string."""
+    if not value:
+        return []
+
+    if isinstance(value, list):
+        return [str(item).strip() for item in value if str(item).strip()]
+
+    if isinstance(value, str):
+        raw = value.strip()
+        if not raw:
+            return []
+
+        # Try JSON first
+        try:
+            parsed = json.loads(raw)
+            if isinstance(parsed, list):
+                return [str(item).strip() for item in parsed if str(item).strip()]
+            if isinstance(parsed, str) and parsed.strip():
+                return [s.strip() for s in parsed.split(',') if s.strip()]
+        except Exception:
+            pass
+
+        # Fallback: comma-separated text
+        return [s.strip() for s in raw.split(',') if s.strip()]
+
+    return []
+
+
+def _as_list(value) -> List:
+    return value if isinstance(value, list) else []
+
+
+def _estimate_years(work_experiences: List[Dict]) -> int:
+    """Total years across (serialized) work experience entries"""
+    days = 0
+    for exp in work_experiences:
+        start = profile_graph.parse_date(exp.get('start_date'))
+        if not start:
+            continue
+        end_date = profile_graph.parse_date(exp.get('end_date'))
+        end = date.today() if exp.get('is_current') or not end_date else end_date
+        days += max((end - start).days, 0)
+    return int(days // 365)
+
+
+def _keyword_features(user: User, profile, work_experiences: List[Dict]) -> Dict:
+    """Keyword bag over the free text of the profile"""
+    all_text = []
+    if user.bio:
+        all_text.append(user.bio)
+    if profile:
+        if profile.professional_summary:
+            all_text.append(profile.professional_summary)
+        all_text.extend(parse_list_field(profile.skills))
+        all_text.extend(parse_list_field(profile.technical_skills))
+        all_text.extend(parse_list_field(profile.soft_skills))
+    for exp in work_experiences:
+        if exp.get('description'):
+            all_text.append(exp['description'])
+        all_text.extend(str(item) for item in _as_list(exp.get('key_responsibilities')))
+        all_text.extend(str(item) for item in _as_list(exp.get('achievements')))
+
+    combined_text = ' '.join(all_text)
+    counts = Counter(extract_keywords_from_text(combined_text))
+    return {
+        'keyword_bag': dict(counts.most_common(KEYWORD_BAG_SIZE)),
+        'distinct_keywords': len(counts),
+        'total_words': len(combined_text.split())
+    }
+
+
+def _completeness_sections(user: User, profile, graph: Dict) -> Dict[str, float]:
+    """Per-section completeness fractions (0-1), see COMPLETENESS_WEIGHTS"""
+    sections = {section: 0 for section in COMPLETENESS_WEIGHTS}
+
+    exp_count = len(graph['work_experiences'])
+    edu_count, cert_count, proj_count = len(graph['educations']), len(graph['certifications']), len(graph['projects'])
+    additional_count = sum(
+        len(graph[key]) for key in ('awards', 'languages', 'volunteer_experiences', 'professional_memberships')
+    )
+
+    basic_fields = [user.first_name, user.last_name, user.email, user.phone, user.location]
+    sections['basic_info'] = sum(1 for f in basic_fields if f) / len(basic_fields)
+
+    if profile:
+        if profile.professional_title and profile.professional_summary:
+            sections['professional_summary'] = 1.0
+        elif profile.professional_title or profile.professional_summary:
+            sections['professional_summary'] = 0.5
+
+        combined_skills = []
+        combined_skills.extend(parse_list_field(profile.skills))
+        combined_skills.extend(parse_list_field(profile.technical_skills))
+        combined_skills.extend(parse_list_field(profile.soft_skills))
+        unique_skills = {skill.lower() for skill in combined_skills}
+        if len(unique_skills) >= 5:
+            sections['skills'] = 1.0
+        elif unique_skills:
+            sections['skills'] = 0.5
+
+        links = [profile.resume_url, profile.linkedin_url, profile.portfolio_url, profile.github_url]
+        sections['professional_links'] = sum(1 for l in links if l) / len(links)
+
+        prefs = [profile.desired_position, profile.preferred_location, profile.job_type_preference,
+                 profile.desired_salary_min, profile.availability]
+        sections['preferences'] = sum(1 for p in prefs if p) / len(prefs)
+
+    if exp_count >= 3:
+        sections['work_experience'] = 1.0
+    elif exp_count >= 1:
+        sections['work_experience'] = exp_count / 3
+
+    if edu_count >= 1:
+        sections['education'] = 1.0
+
+    if cert_count >= 2:
+        sections['certifications'] = 1.0
+    elif cert_count == 1:
+        sections['certifications'] = 0.5
+
+    if proj_count >= 2:
+        sections['projects'] = 1.0
+    elif proj_count == 1:
+        sections['projects'] = 0.5
+
+    if additional_count >= 3:
+        sections['additional'] = 1.0
+    elif additional_count > 0:
+        sections['additional'] = additional_count / 3
+
+    return sections
+
+
+def compute_features(user: User, profile=None) -> Dict:
+    """Compute the feature set of a profile from the profile tables"""
+    profile = profile or user.job_seeker_profile
+    # Straight from the database: features are computed mid-write, before the version bump
+    graph = profile_graph.load_sections(user)
+    work_experiences = graph['work_experiences']
+
+    years = profile.years_of_experience if profile and profile.years_of_experience else _estimate_years(work_experiences)
+    skills = normalize_skills(profile.skills, profile.technical_skills, profile.soft_skills) if profile else set()
+    sections = _completeness_sections(user, profile, graph)
+
+    features = {
+        'skills': sorted(skills),
+        'years_of_experience': years,
+        'seniority': experience_band(years),
+        'completeness': round(sum(sections[s] * COMPLETENESS_WEIGHTS[s] for s in sections)),
+        'completeness_sections': sections,
+    }
+    features.update(_keyword_features(user, profile, work_experiences))
+    return features
+
+
+def refresh_features(user: User, profile=None) -> Optional[ProfileFeatures]:
+    """Recompute and store the features of a profile, bumping its version.
+
+    Runs in a savepoint of the caller's transaction (the caller commits, so the
+    new version lands atomically with the profile write); a failure discards
+    only the feature update.
+    """
+    try:
+        with db.session.begin_nested():
+            features = compute_features(user, profile)
+            row = ProfileFeatures.query.filter_by(user_id=user.id).first()
+            if row is None:
+                row = ProfileFeatures(user_id=user.id, version=1)
+                db.session.add(row)
+            else:
+                row.version = (row.version or 0) + 1
+
+            row.skills = json.dumps(features['skills'])
+            row.years_of_experience = features['years_of_experience']
+            row.seniority = features['seniority']
+            row.keyword_bag = json.dumps(features['keyword_bag'])
+            row.distinct_keywords = features['distinct_keywords']
+            row.total_words = features['total_words']
+            row.completeness = features['completeness']
+            row.completeness_sections = json.dumps(features['completeness_sections'])
+        return row
+    except Exception as e:
+        logger.error(f"Failed to compute profile features for user {user.id}: {str(e)}")
+        return None
+
+
+def refresh_features_for(user_id: int) -> bool:
+    """Recompute and commit the features of any user (outside a request's own write)"""
+    try:
+        user = db.session.get(User, user_id)
+        if not user or refresh_features(user) is None:
+            return False
+        db.session.commit()
+        return True
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Failed to refresh profile features for user {user_id}: {str(e)}")
+        return False
+
+
+def _empty_features(user: User) -> Dict:
+    sections = {section: 0 for section in COMPLETENESS_WEIGHTS}
+    return {
+        'user_id': user.id, 'version': 0, 'skills': [], 'years_of_experience': 0,
+        'seniority': experience_band(0), 'keyword_bag': {}, 'distinct_keywords': 0,
+        'total_words': 0, 'completeness': 0, 'completeness_sections': sections,
+    }
+
+
+def get_features(user: User) -> Dict:
+    """Stored features of a profile, computed on first use"""
+    row = ProfileFeatures.query.filter_by(user_id=user.id).first()
+    if row is None:
+        row = refresh_features(user)
+        if row is None:
+            try:
+                features = compute_features(user)
+            except Exception as e:
+                logger.error(f"Failed to compute profile features for user {user.id}: {str(e)}")
+                return _empty_features(user)
+            features.update({'user_id': user.id, 'version': 0})
+            return features
+        features = row.to_dict()
+        try:
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logger.warning(f"Could not persist profile features for user {user.id}: {str(e)}")
+            features['version'] = 0
+        return features
+    return row.to_dict()
+
+
+def profile_version(user_id: int) -> int:
+    """Current feature version of a profile (0 if never computed)"""
+    version = db.session.query(ProfileFeatures.version).filter_by(user_id=user_id).scalar()
+    return version or 0
@@ -0,0 +1,234 @@
+"""
+Profile Graph Loader
+Loads a job seeker's profile and every profile section (work experience,
+education, certifications, ...) in one database round trip and keeps the
+serialized result in a compact JSON cache tagged with the profile feature
+version, so the CV builder, profile exports, completeness analysis and the
+complete-profile endpoint share one load per profile version. Profile writes
+also drop the cached graph directly (invalidate)
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import Text, cast, func, literal, literal_column, select, union_all
+
+from src.models.user import db, User, JobSeekerProfile
+from src.models.profile_extensions import (
+    WorkExperience, Education, Certification, Project,
+    Award, Language, VolunteerExperience, ProfessionalMembership, Reference
+)
+from src.utils.cache import cache
+
+
+logger = logging.getLogger(__name__)
+
+GRAPH_FORMAT_VERSION = 2  # bump when the serialized shape of a section changes
+CACHE_PREFIX = 'ts:profile_graph'
+
+# Graph key -> (model, display order). The order is the one the profile
+# editor shows; consumers needing another order re-sort the serialized rows.
+SECTIONS = {
+    'work_experiences': (WorkExperience, (WorkExperience.display_order, WorkExperience.start_date.desc())),
+    'educations': (Education, (Education.display_order, Education.graduation_date.desc())),
+    'certifications': (Certification, (Certification.display_order, Certification.issue_date.desc())),
+    'projects': (Project, (Project.is_featured.desc(), Project.display_order)),
+    'awards': (Award, (Award.display_order, Award.date_received.desc())),
+    'languages': (Language, (Language.display_order,)),
+    'volunteer_experiences': (VolunteerExperience, (VolunteerExperience.display_order,)),
+    'professional_memberships': (ProfessionalMembership, (ProfessionalMembership.is_current.desc(),)),
+    'references': (Reference, (Reference.display_order,)),
+}
+PROFILE_KEY = 'job_seeker_profile'
+
+
+def _hydrate(model, row: Dict[str, Any]):
+    """Transient ``model`` instance from a JSON row, so its own to_dict() serializes it"""
+    values = {}
+    for column in model.__table__.columns:
+        value = row.get(column.name)
+        if isinstance(value, str):
+            if isinstance(column.type, db.DateTime):
+                value = datetime.fromisoformat(value)
+            elif isinstance(column.type, db.Date):
+                value = date.fromisoformat(value[:10])
+        values[column.key] = value
+    return model(**values)
+
+
+def _aggregate_query(user_id: int):
+    """Profile row and all section rows as (key, position, row JSON), one UNION ALL"""
+    parts = [
+        select(literal(PROFILE_KEY).label('section'), literal(1).label('position'),
+               cast(func.row_to_json(literal_column(JobSeekerProfile.__tablename__)), Text).label('data'))
+        .where(JobSeekerProfile.user_id == user_id)
+    ]
+    for key, (model, order) in SECTIONS.items():
+        parts.append(
+            select(literal(key), func.row_number().over(order_by=order),
+                   cast(func.row_to_json(literal_column(model.__tablename__)), Text))
+            .where(model.user_id == user_id)
+        )
+    return union_all(*parts)
+
+
+def _load_aggregated(user_id: int) -> Tuple[Any, Dict[str, List[Any]]]:
+    # Core statements skip the session's autoflush; pending section rows must be visible
+    db.session.flush()
+    rows = db.session.execute(_aggregate_query(user_id)).all()
+    profile = None
+    sections: Dict[str, List[Tuple[int, Any]]] = {key: [] for key in SECTIONS}
+    for key, position, data in rows:
+        row = json.loads(data) if isinstance(data, str) else data
+        if key == PROFILE_KEY:
+            profile = _hydrate(JobSeekerProfile, row)
+        else:
+            sections[key].append((position, _hydrate(SECTIONS[key][0], row)))
+    return profile, {key: [item for _, item in sorted(items, key=lambda i: i[0])] for key, items in sections.items()}
+
+
+def _load_per_section(user: User) -> Tuple[Any, Dict[str, List[Any]]]:
+    # The section backrefs are lazy='dynamic' and cannot be eager loaded; without
+    # a network hop per query (SQLite) ordered per-section queries are as cheap
+    sections = {
+        key: model.query.filter_by(user_id=user.id).order_by(*order).all()
+        for key, (model, order) in SECTIONS.items()
+    }
+    return user.job_seeker_profile, sections
+
+
+def load_sections(user: User) -> Dict[str, Any]:
+    """Serialized profile graph straight from the database (no cache)"""
+    if db.engine.dialect.name == 'postgresql':
+        profile, sections = _load_aggregated(user.id)
+    else:
+        profile, sections = _load_per_section(user)
+    graph = {key: [item.to_dict() for item in items] for key, items in sections.items()}
+    graph[PROFILE_KEY] = profile.to_dict() if profile else None
+    return graph
+
+
+class ProfileGraphCache:
+    """Serialized profile graphs, one entry per user tagged with the profile
+    feature version it was loaded at.
+
+    An entry of another version is a miss, and profile writes invalidate the
+    user's entry after committing, so a write whose feature refresh failed is
+    not served stale either. Entries expire after PROFILE_GRAPH_CACHE_TTL
+    (default 1 hour). Stored as compact JSON in Redis, with an in-process LRU of
+    PROFILE_GRAPH_CACHE_MAX_ENTRIES (default 500) when Redis is unavailable.
+    """
+
+    def __init__(self):
+        self.ttl = int(os.getenv('PROFILE_GRAPH_CACHE_TTL', '3600'))
+        self.max_entries = int(os.getenv('PROFILE_GRAPH_CACHE_MAX_ENTRIES', '500'))
+        self._local: 'OrderedDict[str, Tuple[float, str]]' = OrderedDict()
+        self._stats = {'hits': 0, 'misses': 0}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(user_id: int) -> str:
+        return f'{CACHE_PREFIX}:f{GRAPH_FORMAT_VERSION}:{user_id}'
+
+    def get(self, user_id: int, version: int) -> Optional[Dict[str, Any]]:
+        raw = None
+        if cache.enabled:
+            try:
+                raw = cache.redis_client.get(self.key(user_id))
+            except Exception as e:
+                logger.warning(f"Profile graph cache read failed: {str(e)}")
+        else:
+            with self._lock:
+                expires_at, raw = self._local.get(self.key(user_id), (0, None))
+                if expires_at > time.time():
+                    self._local.move_to_end(self.key(user_id))
+                else:
+                    raw = None
+        entry = json.loads(raw) if raw is not None else None
+        if entry is not None and entry.get('version') != version:
+            entry = None
+        with self._lock:
+            self._stats['hits' if entry is not None else 'misses'] += 1
+        return entry['graph'] if entry is not None else None
+
+    def put(self, user_id: int, version: int, graph: Dict[str, Any]) -> None:
+        raw = json.dumps({'version': version, 'graph': graph}, separators=(',', ':'), default=str)
+        if cache.enabled:
+            try:
+                cache.redis_client.set(self.key(user_id), raw, ex=self.ttl)
+            except Exception as e:
+                logger.warning(f"Profile graph cache write failed: {str(e)}")
+            return
+        with self._lock:
+            self._local[self.key(user_id)] = (time.time() + self.ttl, raw)
+            self._local.move_to_end(self.key(user_id))
+            while len(self._local) > self.max_entries:
+                self._local.popitem(last=False)
+
+    def invalidate(self, user_id: int) -> None:
+        if cache.enabled:
+            try:
+                cache.redis_client.delete(self.key(user_id))
+            except Exception as e:
+                logger.warning(f"Profile graph cache invalidation failed: {str(e)}")
+        with self._lock:
+            self._local.pop(self.key(user_id), None)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats, entries=len(self._local))
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = round(stats['hits'] / lookups, 3) if lookups else None
+        return stats
+
+
+graph_cache = ProfileGraphCache()
+
+
+def invalidate(user_id: int) -> None:
+    """Drop the cached graph of ``user_id``; call after committing a profile write"""
+    graph_cache.invalidate(user_id)
+
+
+def load_profile_graph(user: User, version: Optional[int] = None) -> Dict[str, Any]:
+    """Serialized profile and sections of ``user``.
+
+    ``version`` is the profile feature version (profile_features.profile_version);
+    with it the graph is served from and stored in the cache. Without it (or
+    version 0, features never computed) the graph is always read from the database.
+    """
+    if version:
+        graph = graph_cache.get(user.id, version)
+        if graph is not None:
+            return graph
+    graph = load_sections(user)
+    if version:
+        graph_cache.put(user.id, version, graph)
+    return graph
+
+
+def get_profile_graph(user: User) -> Dict[str, Any]:
+    """Profile graph of ``user`` at its current profile version.
+
+    Only job seeker profiles are cached: their writes bump the version and
+    invalidate the entry, other roles' features are not refreshed on write.
+    """
+    from src.services import profile_features
+    version = profile_features.profile_version(user.id) if user.role == 'job_seeker' else None
+    return load_profile_graph(user, version)
+
+
+def newest_first(items: List[Dict[str, Any]], field: str) -> List[Dict[str, Any]]:
+    """Serialized rows by an ISO date ``field``, most recent first, undated last"""
+    return sorted(items, key=lambda item: item.get(field) or '', reverse=True)
+
+
+def parse_date(value: Optional[str]) -> Optional[date]:
+    """Date of a serialized ISO date/datetime field"""
+    return date.fromisoformat(value[:10]) if value else None
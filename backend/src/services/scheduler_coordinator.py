@@ -0,0 +1,581 @@
+"""
+Scheduler Coordinator
+Runs every background task of the backend from one place. Coordinators in any
+number of processes elect a single leader (PostgreSQL advisory lock, Redis lock,
+or a file lock for SQLite/local runs); only the leader runs tasks. Tasks are
+registered with cron or interval schedules and jitter, and every run is claimed
+and recorded in scheduler_runs, so a slot runs once even across a leader change
+"""
+
+import hashlib
+import json
+import logging
+import os
+import random
+import socket
+import tempfile
+import threading
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError
+
+from src.models.user import db
+from src.models.scheduler import SchedulerRun
+from src.utils.cache import cache
+
+try:
+    import fcntl
+except ImportError:  # Windows: no file locking, a single local process leads
+    fcntl = None
+
+try:
+    from zoneinfo import ZoneInfo
+except ImportError:
+    ZoneInfo = None
+
+
+logger = logging.getLogger(__name__)
+
+LEADER_LOCK_NAME = 'talentsphere:scheduler_leader'
+
+# Result summaries stored in run history are cut to this many characters
+MAX_RESULT_LENGTH = 2000
+
+
+def _parse_cron_field(field: str, low: int, high: int) -> frozenset:
+    values = set()
+    for part in field.split(','):
+        expression, _, step = part.partition('/')
+        step = int(step) if step else 1
+        if expression == '*':
+            start, end = low, high
+        elif '-' in expression:
+            start, end = (int(value) for value in expression.split('-', 1))
+        else:
+            start = int(expression)
+            end = high if step > 1 else start
+        if start < low or end > high or start > end or step < 1:
+            raise ValueError(f"Invalid cron field '{field}'")
+        values.update(range(start, end + 1, step))
+    return frozenset(values)
+
+
+class CronSchedule:
+    """Five-field cron expression (minute hour day-of-month month day-of-week)
+    evaluated in ``tz`` (an IANA name; UTC when empty)"""
+
+    def __init__(self, expression: str, tz: str = None):
+        fields = expression.split()
+        if len(fields) != 5:
+            raise ValueError(f"Cron expression needs 5 fields: '{expression}'")
+        self.expression = expression
+        self.minutes = _parse_cron_field(fields[0], 0, 59)
+        self.hours = _parse_cron_field(fields[1], 0, 23)
+        self.days = _parse_cron_field(fields[2], 1, 31)
+        self.months = _parse_cron_field(fields[3], 1, 12)
+        # 0 and 7 are both Sunday
+        self.weekdays = frozenset(day % 7 for day in _parse_cron_field(fields[4], 0, 7))
+        self.days_restricted = fields[2] != '*'
+        self.weekdays_restricted = fields[4] != '*'
+        self.tz = ZoneInfo(tz) if tz and ZoneInfo else None
+
+    def __repr__(self):
+        return f"cron('{self.expression}')"
+
+    def _day_matches(self, moment: datetime) -> bool:
+        day = moment.day in self.days
+        weekday = (moment.weekday() + 1) % 7 in self.weekdays
+        if self.days_restricted and self.weekdays_restricted:
+            return day or weekday  # cron semantics: either restriction matches
+        return day and weekday
+
+    def next_after(self, after: datetime) -> datetime:
+        """First matching minute strictly after ``after`` (naive UTC in and out)"""
+        moment = after.replace(tzinfo=timezone.utc)
+        if self.tz:
+            moment = moment.astimezone(self.tz)
+        moment = moment.replace(second=0, microsecond=0, tzinfo=None) + timedelta(minutes=1)
+
+        limit = moment + timedelta(days=366 * 5)
+        while moment < limit:
+            if moment.month not in self.months:
+                moment = (moment.replace(day=1, hour=0, minute=0) + timedelta(days=32)).replace(day=1)
+            elif not self._day_matches(moment):
+                moment = moment.replace(hour=0, minute=0) + timedelta(days=1)
+            elif moment.hour not in self.hours:
+                moment = moment.replace(minute=0) + timedelta(hours=1)
+            elif moment.minute not in self.minutes:
+                moment += timedelta(minutes=1)
+            else:
+                if self.tz:
+                    moment = moment.replace(tzinfo=self.tz).astimezone(timezone.utc)
+                return moment.replace(tzinfo=None)
+        raise ValueError(f"Cron expression never matches: '{self.expression}'")
+
+    def next_slot(self, previous: Optional[datetime], now: datetime, misfire_grace: float) -> datetime:
+        if previous is None:
+            return self.next_after(now)
+        slot = self.next_after(previous)
+        if slot < now - timedelta(seconds=misfire_grace):
+            return self.next_after(now)  # missed by too much: wait for the next one
+        return slot
+
+
+class IntervalSchedule:
+    """Fixed interval between slots; a slot missed while nobody led runs once on takeover"""
+
+    def __init__(self, seconds: float):
+        if seconds <= 0:
+            raise ValueError("Interval must be positive")
+        self.seconds = float(seconds)
+
+    def __repr__(self):
+        return f"every({self.seconds:g}s)"
+
+    def next_slot(self, previous: Optional[datetime], now: datetime, misfire_grace: float) -> datetime:
+        if previous is None:
+            return now
+        return max(previous + timedelta(seconds=self.seconds), now.replace(microsecond=0))
+
+
+def cron(expression: str, tz: str = None) -> CronSchedule:
+    return CronSchedule(expression, tz)
+
+
+def every(seconds: float = 0, minutes: float = 0, hours: float = 0) -> IntervalSchedule:
+    return IntervalSchedule(seconds + minutes * 60 + hours * 3600)
+
+
+def daily_at(time_of_day: str, tz: str = None, weekday: str = '*') -> CronSchedule:
+    """Cron schedule for an 'HH:MM' time, every day or on the given cron weekday(s)"""
+    hour, minute = (int(part) for part in time_of_day.split(':', 1))
+    return CronSchedule(f'{minute} {hour} * * {weekday}', tz)
+
+
+class ScheduledTask:
+    """A named background task and its schedule.
+
+    ``jitter`` delays each run by a random 0..jitter seconds so tasks sharing a
+    slot do not start together; ``misfire_grace`` is how late a missed cron slot
+    may still run after a leader change.
+
+    A task fails by raising. A task delivering to many recipients may instead
+    return a summary with ``success`` and ``sent_count``/``failed_count``
+    (see run_status), so partial delivery is recorded as such.
+    """
+
+    def __init__(self, name: str, func: Callable, schedule, jitter: float = 0,
+                 misfire_grace: float = 3600, enabled: bool = True):
+        self.name = name
+        self.func = func
+        self.schedule = schedule
+        self.jitter = jitter
+        self.misfire_grace = misfire_grace
+        self.enabled = enabled
+
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'schedule': repr(self.schedule),
+            'jitter_seconds': self.jitter,
+            'enabled': self.enabled
+        }
+
+
+class PostgresLeaderLock:
+    """Session-level advisory lock held on a dedicated autocommit connection"""
+
+    def __init__(self, engine, name: str = LEADER_LOCK_NAME):
+        self.engine = engine
+        self.lock_id = int(hashlib.md5(name.encode('utf-8')).hexdigest()[:8], 16)
+        self.connection = None
+
+    def acquire(self) -> bool:
+        connection = None
+        try:
+            connection = self.engine.connect().execution_options(isolation_level='AUTOCOMMIT')
+            acquired = connection.execute(
+                text("SELECT pg_try_advisory_lock(:lock_id)"), {'lock_id': self.lock_id}
+            ).scalar()
+        except Exception as e:
+            logger.warning(f"Scheduler leader election failed: {str(e)}")
+            acquired = False
+        if acquired:
+            self.connection = connection
+            return True
+        if connection is not None:
+            connection.close()
+        return False
+
+    def refresh(self) -> bool:
+        # The lock lives as long as the session: a live connection means it is still held
+        try:
+            self.connection.execute(text("SELECT 1"))
+            return True
+        except Exception as e:
+            logger.warning(f"Scheduler leader connection lost: {str(e)}")
+            self._close()
+            return False
+
+    def release(self) -> None:
+        if self.connection is None:
+            return
+        try:
+            self.connection.execute(text("SELECT pg_advisory_unlock(:lock_id)"), {'lock_id': self.lock_id})
+        except Exception:
+            pass
+        self._close()
+
+    def _close(self):
+        try:
+            self.connection.close()
+        except Exception:
+            pass
+        self.connection = None
+
+
+_REDIS_REFRESH = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('PEXPIRE', KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+_REDIS_RELEASE = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+class RedisLeaderLock:
+    """Expiring Redis key owned by a random token, extended while the leader is alive"""
+
+    def __init__(self, client, name: str = LEADER_LOCK_NAME, ttl: float = 90):
+        self.client = client
+        self.key = f'ts:{name}'
+        self.ttl_ms = int(ttl * 1000)
+        self.token = uuid.uuid4().hex
+
+    def acquire(self) -> bool:
+        try:
+            return bool(self.client.set(self.key, self.token, nx=True, px=self.ttl_ms))
+        except Exception as e:
+            logger.warning(f"Scheduler leader election failed: {str(e)}")
+            return False
+
+    def refresh(self) -> bool:
+        try:
+            return bool(self.client.eval(_REDIS_REFRESH, 1, self.key, self.token, self.ttl_ms))
+        except Exception as e:
+            logger.warning(f"Failed to extend scheduler leadership: {str(e)}")
+            return False
+
+    def release(self) -> None:
+        try:
+            self.client.eval(_REDIS_RELEASE, 1, self.key, self.token)
+        except Exception:
+            pass
+
+
+class FileLeaderLock:
+    """Exclusive flock on a local file: elects one process per host (SQLite/local runs)"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.handle = None
+
+    def acquire(self) -> bool:
+        if fcntl is None:
+            return True
+        handle = open(self.path, 'a')
+        try:
+            fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            handle.close()
+            return False
+        self.handle = handle
+        return True
+
+    def refresh(self) -> bool:
+        return True
+
+    def release(self) -> None:
+        if self.handle is not None:
+            fcntl.flock(self.handle, fcntl.LOCK_UN)
+            self.handle.close()
+            self.handle = None
+
+
+def create_leader_lock(tick_seconds: float):
+    """Leader lock for this deployment.
+
+    SCHEDULER_LOCK (postgres|redis|file) overrides the default: the database's
+    advisory lock on PostgreSQL, otherwise Redis when available, otherwise a
+    file lock (SCHEDULER_LOCK_FILE).
+    """
+    kind = os.getenv('SCHEDULER_LOCK', '').lower()
+    if not kind:
+        if db.engine.url.get_backend_name() == 'postgresql':
+            kind = 'postgres'
+        elif cache.enabled:
+            kind = 'redis'
+        else:
+            kind = 'file'
+
+    if kind == 'postgres':
+        return PostgresLeaderLock(db.engine)
+    if kind == 'redis':
+        return RedisLeaderLock(cache.redis_client, ttl=max(tick_seconds * 3, 30))
+    return FileLeaderLock(os.getenv('SCHEDULER_LOCK_FILE',
+                                    os.path.join(tempfile.gettempdir(), 'talentsphere-scheduler.lock')))
+
+
+class _TaskState:
+    __slots__ = ('slot', 'due', 'future')
+
+    def __init__(self):
+        self.slot: Optional[datetime] = None
+        self.due: Optional[datetime] = None
+        self.future: Optional[Future] = None
+
+
+class SchedulerCoordinator:
+    """Task registry plus the election/dispatch loop.
+
+    Followers retry the election every ``election_interval`` seconds. The
+    leader wakes at least every ``tick`` seconds to confirm its lock and start
+    due tasks on a small pool; a task never overlaps with its previous run.
+    """
+
+    def __init__(self, tick: float = None, election_interval: float = None, max_concurrent: int = None):
+        self.tick = tick or float(os.getenv('SCHEDULER_TICK_SECONDS', '15'))
+        self.election_interval = election_interval or float(os.getenv('SCHEDULER_ELECTION_INTERVAL', '30'))
+        self.max_concurrent = max_concurrent or int(os.getenv('SCHEDULER_MAX_CONCURRENT_TASKS', '2'))
+        self.worker_name = f"{socket.gethostname()}:{os.getpid()}"
+        self.tasks: Dict[str, ScheduledTask] = {}
+        self.app = None
+        self.lock = None
+        self.is_leader = False
+        self._states: Dict[str, _TaskState] = {}
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def register(self, task: ScheduledTask) -> ScheduledTask:
+        if task.name in self.tasks:
+            raise ValueError(f"Scheduled task '{task.name}' is already registered")
+        self.tasks[task.name] = task
+        return task
+
+    def register_all(self, tasks: List[ScheduledTask]) -> None:
+        for task in tasks:
+            self.register(task)
+
+    @property
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, app):
+        if self.is_running:
+            logger.warning("Scheduler coordinator is already running")
+            return
+        self.app = app
+        with app.app_context():
+            self.lock = create_leader_lock(self.tick)
+        self._stop.clear()
+        self._executor = ThreadPoolExecutor(max_workers=self.max_concurrent, thread_name_prefix='scheduled-task')
+        self._thread = threading.Thread(target=self._run, daemon=True, name='scheduler-coordinator')
+        self._thread.start()
+        logger.info(f"Scheduler coordinator started on {self.worker_name} "
+                    f"({len(self.tasks)} tasks, {type(self.lock).__name__})")
+
+    def stop(self, timeout: float = 30):
+        """Stop dispatching, wait for running tasks and give up leadership"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=timeout)
+        if self._executor:
+            self._executor.shutdown(wait=True)
+        logger.info("Scheduler coordinator stopped")
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                if not self.is_leader:
+                    if not self.lock.acquire():
+                        self._stop.wait(self.election_interval)
+                        continue
+                    self._on_elected()
+                elif not self.lock.refresh():
+                    logger.warning(f"Scheduler leadership lost on {self.worker_name}")
+                    self.is_leader = False
+                    continue
+                self._stop.wait(self._dispatch_due())
+            except Exception as e:
+                logger.error(f"Scheduler coordinator error: {str(e)}")
+                self._stop.wait(self.tick)
+        self._resign()
+
+    def _on_elected(self):
+        self.is_leader = True
+        logger.info(f"Scheduler leadership acquired by {self.worker_name}")
+        with self.app.app_context():
+            # Runs still marked running belonged to a leader that died mid-task
+            SchedulerRun.query.filter(
+                SchedulerRun.status == 'running', SchedulerRun.worker != self.worker_name
+            ).update(
+                {'status': 'abandoned', 'finished_at': datetime.utcnow()}, synchronize_session=False
+            )
+            db.session.commit()
+            now = datetime.utcnow()
+            for task in self.tasks.values():
+                last = SchedulerRun.query.filter_by(task_name=task.name).order_by(
+                    SchedulerRun.scheduled_for.desc()
+                ).first()
+                self._schedule(task, last.scheduled_for if last else None, now)
+
+    def _resign(self):
+        if self.is_leader:
+            self.is_leader = False
+            self.lock.release()
+            logger.info(f"Scheduler leadership released by {self.worker_name}")
+
+    def _schedule(self, task: ScheduledTask, previous: Optional[datetime], now: datetime):
+        state = self._states.setdefault(task.name, _TaskState())
+        state.slot = task.schedule.next_slot(previous, now, task.misfire_grace)
+        state.due = state.slot + timedelta(seconds=random.uniform(0, task.jitter)) if task.jitter else state.slot
+
+    def _dispatch_due(self) -> float:
+        """Start every due task; returns seconds until the next wake-up"""
+        now = datetime.utcnow()
+        wake = self.tick
+        for task in self.tasks.values():
+            if not task.enabled:
+                continue
+            state = self._states.get(task.name)
+            if state is None or (state.future is not None and not state.future.done()):
+                continue
+            if state.due <= now:
+                slot = state.slot
+                state.future = self._executor.submit(self._execute, task, slot)
+                self._schedule(task, slot, now)
+            wake = min(wake, max((state.due - now).total_seconds(), 1.0))
+        return wake
+
+    def _execute(self, task: ScheduledTask, slot: datetime):
+        with self.app.app_context():
+            try:
+                run = self._claim(task, slot)
+                if run is None:
+                    return
+                logger.info(f"Running scheduled task {task.name} (slot {slot.isoformat()})")
+                try:
+                    result = task.func()
+                    status, error = run_status(result)
+                    self._finish(run, status, result=result, error=error)
+                except Exception as e:
+                    db.session.rollback()
+                    logger.error(f"Scheduled task {task.name} failed: {str(e)}")
+                    self._finish(run, 'failed', error=str(e))
+            finally:
+                db.session.remove()
+
+    def _claim(self, task: ScheduledTask, slot: datetime) -> Optional[SchedulerRun]:
+        run = SchedulerRun(task_name=task.name, scheduled_for=slot, status='running',
+                           worker=self.worker_name, started_at=datetime.utcnow())
+        db.session.add(run)
+        try:
+            db.session.commit()
+            return run
+        except IntegrityError:
+            db.session.rollback()
+            logger.info(f"Skipping {task.name}: slot {slot.isoformat()} already ran")
+            return None
+
+    def _finish(self, run: SchedulerRun, status: str, result=None, error: str = None):
+        try:
+            run.status = status
+            run.finished_at = datetime.utcnow()
+            run.error = error[:MAX_RESULT_LENGTH] if error else None
+            if result is not None:
+                run.result = json.dumps(result, default=str)[:MAX_RESULT_LENGTH]
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Failed to record scheduler run {run.id}: {str(e)}")
+
+    def run_now(self, name: str):
+        """Run a task immediately in the calling thread (inside an app context); not recorded"""
+        return self.tasks[name].func()
+
+    def status(self) -> Dict:
+        """Registered tasks with their latest run (reads history, works in any process)"""
+        latest = {}
+        for task_name in self.tasks:
+            run = SchedulerRun.query.filter_by(task_name=task_name).order_by(SchedulerRun.started_at.desc()).first()
+            latest[task_name] = run.to_dict() if run else None
+        return {
+            'worker': self.worker_name,
+            'running_here': self.is_running,
+            'leader_here': self.is_leader,
+            'tasks': [
+                {
+                    **task.to_dict(),
+                    'next_due': self._states[name].due.isoformat() if name in self._states and self.is_leader else None,
+                    'last_run': latest[name]
+                }
+                for name, task in self.tasks.items()
+            ]
+        }
+
+
+def run_status(result) -> Tuple[str, Optional[str]]:
+    """Run status of a task that returned ``result``: a summary reporting
+    ``success: False`` failed, one with failed deliveries is partial (failed if
+    nothing was delivered)"""
+    if not isinstance(result, dict):
+        return 'success', None
+    if result.get('success') is False:
+        return 'failed', str(result.get('error') or result.get('message') or 'Task reported failure')
+    failed_count = result.get('failed_count') or 0
+    if failed_count:
+        error = f"{failed_count} of {failed_count + (result.get('sent_count') or 0)} deliveries failed"
+        return ('partial' if result.get('sent_count') else 'failed'), error
+    return 'success', None
+
+
+def prune_history() -> int:
+    """Delete scheduler run history older than SCHEDULER_HISTORY_DAYS (default 14)"""
+    cutoff = datetime.utcnow() - timedelta(days=int(os.getenv('SCHEDULER_HISTORY_DAYS', '14')))
+    deleted = SchedulerRun.query.filter(SchedulerRun.started_at < cutoff).delete(synchronize_session=False)
+    db.session.commit()
+    return deleted
+
+
+def register_default_tasks(coordinator: SchedulerCoordinator) -> SchedulerCoordinator:
+    """Register the tasks of every background service"""
+    from src.services.notification_scheduler import notification_scheduler
+    from src.services.job_scheduler import job_scheduler
+    from src.services.job_digest_scheduler import job_digest_scheduler
+    from src.services.cleanup_service import get_cleanup_service
+    from src.services.cv.job_queue import prune_jobs
+    from src.services import candidate_scoring, skill_demand
+
+    coordinator.register_all(notification_scheduler.scheduled_tasks())
+    coordinator.register_all(job_scheduler.scheduled_tasks())
+    coordinator.register_all(job_digest_scheduler.scheduled_tasks())
+    coordinator.register_all(get_cleanup_service().scheduled_tasks())
+    coordinator.register_all(candidate_scoring.scheduled_tasks())
+    coordinator.register_all(skill_demand.scheduled_tasks())
+    coordinator.register(ScheduledTask('scheduler.prune_history', prune_history, cron('30 3 * * *'), jitter=600))
+    coordinator.register(ScheduledTask('cv_jobs.prune', prune_jobs, cron('45 3 * * *'), jitter=600))
+    return coordinator
+
+
+scheduler_coordinator = SchedulerCoordinator()
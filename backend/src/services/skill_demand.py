@@ -0,0 +1,311 @@
+"""
+Skill Demand Service
+Rebuilds the skill_demand_stats aggregates from active jobs in one grouped pass
+and answers market-demand lookups for skill-gap and career-insight endpoints
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional
+
+from src.models.user import db
+from src.models.job import Job
+from src.models.skill_demand import SkillDemandStat
+from src.services.candidate_scoring import normalize_skills
+from src.utils.cache import cache
+
+
+logger = logging.getLogger(__name__)
+
+WINDOWS = (7, 30, 90)
+DEFAULT_WINDOW = 30
+
+# Stats older than this schedule a background rebuild on the next read
+MAX_STATS_AGE = timedelta(hours=24)
+
+# At most one on-demand rebuild per REBUILD_LOCK_SECONDS across workers (Redis) or per process
+REBUILD_LOCK_KEY = 'ts:skill_demand:rebuild'
+REBUILD_LOCK_SECONDS = 600
+
+# Demand share of jobs in a slice that counts as high/medium demand
+HIGH_DEMAND_SHARE = 0.15
+MEDIUM_DEMAND_SHARE = 0.05
+
+# Multipliers to normalise posted salaries to a yearly figure
+YEARLY_MULTIPLIERS = {'hourly': 2080, 'daily': 260, 'weekly': 52, 'monthly': 12, 'yearly': 1}
+
+
+def _yearly_salary(salary_min, salary_max, period) -> Optional[int]:
+    values = [v for v in (salary_min, salary_max) if v]
+    if not values:
+        return None
+    return int(sum(values) / len(values) * YEARLY_MULTIPLIERS.get((period or 'yearly').lower(), 1))
+
+
+def _percentile(sorted_values: List[int], fraction: float) -> int:
+    """Linear-interpolated percentile of an already sorted list"""
+    position = (len(sorted_values) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return int(round(sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)))
+
+
+def _slope(bucket_counts: List[int]) -> float:
+    """Least-squares slope of counts over equally spaced buckets (oldest first)"""
+    n = len(bucket_counts)
+    if n < 2:
+        return 0.0
+    mean_x = (n - 1) / 2
+    mean_y = sum(bucket_counts) / n
+    numerator = sum((x - mean_x) * (y - mean_y) for x, y in enumerate(bucket_counts))
+    denominator = sum((x - mean_x) ** 2 for x in range(n))
+    return numerator / denominator
+
+
+def _bucket_days(window: int) -> int:
+    return 1 if window <= 7 else 7
+
+
+def _trend_slope(buckets: List[int], window: int) -> float:
+    """Slope over the complete buckets of a window.
+
+    Buckets are aligned to the rebuild time, so the oldest one only covers the
+    days of the window left over after the full buckets (2 of 7 for 30 days);
+    its low count would read as growth, so it is left out.
+    """
+    partial = window % _bucket_days(window)
+    return _slope(buckets[1:] if partial else buckets)
+
+
+class _SliceStats:
+    """Accumulator for one skill in one slice"""
+    __slots__ = ('job_count', 'required', 'preferred', 'salaries', 'buckets')
+
+    def __init__(self, bucket_total: int):
+        self.job_count = 0
+        self.required = 0
+        self.preferred = 0
+        self.salaries = defaultdict(list)
+        self.buckets = [0] * bucket_total
+
+
+def refresh_skill_demand(now: datetime = None) -> int:
+    """Rebuild all skill demand statistics from active, published jobs.
+
+    One query loads the jobs posted within the widest window; every
+    (window, category, region) slice is accumulated in a single pass over them
+    and the table is replaced in one transaction. Returns the number of rows
+    written; a failed rebuild is rolled back and re-raised.
+    """
+    now = now or datetime.utcnow()
+    horizon = now - timedelta(days=max(WINDOWS))
+    posted_at = db.func.coalesce(Job.published_at, Job.created_at)
+
+    try:
+        jobs = db.session.query(
+            Job.category_id, Job.country, posted_at.label('posted_at'),
+            Job.required_skills, Job.preferred_skills,
+            Job.salary_min, Job.salary_max, Job.salary_period, Job.salary_currency
+        ).filter(
+            Job.status == 'published',
+            Job.is_active == True,
+            posted_at >= horizon
+        ).all()
+
+        stats: Dict[tuple, _SliceStats] = {}
+        for job in jobs:
+            age_days = max((now - job.posted_at).days, 0)
+            required = normalize_skills(job.required_skills)
+            preferred = normalize_skills(job.preferred_skills) - required
+            salary = _yearly_salary(job.salary_min, job.salary_max, job.salary_period)
+            currency = (job.salary_currency or 'USD').upper()
+            region = (job.country or '').strip().lower()[:100]
+            slices = {(None, ''), (job.category_id, '')}
+            if region:
+                slices.update({(None, region), (job.category_id, region)})
+
+            for window in WINDOWS:
+                if age_days >= window:
+                    continue
+                bucket_days = _bucket_days(window)
+                bucket_total = -(-window // bucket_days)
+                bucket = bucket_total - 1 - age_days // bucket_days
+                for category_id, slice_region in slices:
+                    for skill, is_required in [(SkillDemandStat.TOTAL_SKILL, None)] + \
+                            [(s, True) for s in required] + [(s, False) for s in preferred]:
+                        key = (window, category_id, slice_region, skill[:100])
+                        entry = stats.get(key)
+                        if entry is None:
+                            entry = stats[key] = _SliceStats(bucket_total)
+                        entry.job_count += 1
+                        if is_required is True:
+                            entry.required += 1
+                        elif is_required is False:
+                            entry.preferred += 1
+                        if salary:
+                            entry.salaries[currency].append(salary)
+                        entry.buckets[bucket] += 1
+
+        # The all-jobs totals exist even without jobs: they mark when the stats were built
+        for window in WINDOWS:
+            key = (window, None, '', SkillDemandStat.TOTAL_SKILL)
+            if key not in stats:
+                stats[key] = _SliceStats(-(-window // _bucket_days(window)))
+
+        # Rank skills within each slice by job count
+        by_slice = defaultdict(list)
+        for (window, category_id, region, skill), entry in stats.items():
+            if skill != SkillDemandStat.TOTAL_SKILL:
+                by_slice[(window, category_id, region)].append((entry.job_count, skill))
+        ranks = {}
+        for slice_key, skills in by_slice.items():
+            for rank, (_, skill) in enumerate(sorted(skills, key=lambda s: (-s[0], s[1])), start=1):
+                ranks[slice_key + (skill,)] = rank
+
+        rows = []
+        for key, entry in stats.items():
+            window, category_id, region, skill = key
+            row = {
+                'skill': skill,
+                'window_days': window,
+                'category_id': category_id,
+                'region': region,
+                'job_count': entry.job_count,
+                'required_count': entry.required,
+                'preferred_count': entry.preferred,
+                'demand_rank': ranks.get(key, 0),
+                'salary_samples': 0,
+                'trend_slope': _trend_slope(entry.buckets, window),
+                'computed_at': now,
+            }
+            if entry.salaries:
+                currency, values = max(entry.salaries.items(), key=lambda item: len(item[1]))
+                values.sort()
+                row.update({
+                    'salary_currency': currency,
+                    'salary_p25': _percentile(values, 0.25),
+                    'salary_p50': _percentile(values, 0.5),
+                    'salary_p75': _percentile(values, 0.75),
+                    'salary_samples': len(values),
+                })
+            rows.append(row)
+
+        SkillDemandStat.query.delete(synchronize_session=False)
+        if rows:
+            db.session.bulk_insert_mappings(SkillDemandStat, rows)
+        db.session.commit()
+        logger.info(f"Skill demand statistics rebuilt: {len(rows)} rows from {len(jobs)} jobs")
+        return len(rows)
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Failed to rebuild skill demand statistics: {str(e)}")
+        raise
+
+
+def demand_level(job_count: int, total_jobs: int) -> str:
+    """High/Medium/Low label from a skill's share of jobs in its slice"""
+    share = job_count / total_jobs if total_jobs else 0
+    if share >= HIGH_DEMAND_SHARE:
+        return 'High'
+    if share >= MEDIUM_DEMAND_SHARE:
+        return 'Medium'
+    return 'Low'
+
+
+def trend_label(slope: float) -> str:
+    if slope > 0.05:
+        return 'rising'
+    if slope < -0.05:
+        return 'falling'
+    return 'stable'
+
+
+def slice_query(window: int = DEFAULT_WINDOW, category_id: int = None, region: str = None):
+    """Base query over one (window, category, region) slice"""
+    query = SkillDemandStat.query.filter(
+        SkillDemandStat.window_days == window,
+        SkillDemandStat.region == (region or '').strip().lower()
+    )
+    if category_id:
+        return query.filter(SkillDemandStat.category_id == category_id)
+    return query.filter(SkillDemandStat.category_id.is_(None))
+
+
+_rebuild_lock = threading.Lock()
+_rebuild_claimed_until = 0.0
+
+
+def _claim_rebuild() -> bool:
+    if cache.enabled:
+        try:
+            return bool(cache.redis_client.set(REBUILD_LOCK_KEY, '1', nx=True, ex=REBUILD_LOCK_SECONDS))
+        except Exception:
+            pass
+    global _rebuild_claimed_until
+    with _rebuild_lock:
+        if _rebuild_claimed_until > time.time():
+            return False
+        _rebuild_claimed_until = time.time() + REBUILD_LOCK_SECONDS
+        return True
+
+
+def request_rebuild(app) -> bool:
+    """Rebuild the statistics in a background thread unless a rebuild was already
+    started within REBUILD_LOCK_SECONDS; returns whether one was started"""
+    if not _claim_rebuild():
+        return False
+
+    def run():
+        with app.app_context():
+            try:
+                refresh_skill_demand()
+            except Exception:
+                pass  # logged by refresh_skill_demand; the next read or scheduled run retries
+            finally:
+                db.session.remove()
+
+    threading.Thread(target=run, daemon=True, name='skill-demand-rebuild').start()
+    return True
+
+
+def built_at(window: int = DEFAULT_WINDOW) -> Optional[datetime]:
+    """When the statistics were last rebuilt (None if never)"""
+    return db.session.query(SkillDemandStat.computed_at).filter(
+        SkillDemandStat.window_days == window,
+        SkillDemandStat.category_id.is_(None),
+        SkillDemandStat.region == '',
+        SkillDemandStat.skill == SkillDemandStat.TOTAL_SKILL
+    ).scalar()
+
+
+def fetch_slice(criteria: Iterable = (), window: int = DEFAULT_WINDOW, category_id: int = None,
+                region: str = None, limit: int = None) -> List[SkillDemandStat]:
+    """Rows of one slice matching ``criteria``, ordered by demand rank (total row first).
+
+    Always answers from the stored statistics. Staleness is judged from the
+    fetched rows (or, when none match, the build marker), and missing or stale
+    statistics schedule a single background rebuild instead of rebuilding in
+    the request.
+    """
+    query = slice_query(window, category_id, region).filter(*criteria).order_by(
+        SkillDemandStat.demand_rank
+    )
+    rows = (query.limit(limit) if limit else query).all()
+    computed_at = rows[0].computed_at if rows else built_at(window)
+    if computed_at is None or datetime.utcnow() - computed_at > MAX_STATS_AGE:
+        from flask import current_app
+        request_rebuild(current_app._get_current_object())
+    return rows
+
+
+def scheduled_tasks():
+    """Tasks run by the scheduler coordinator"""
+    from src.services.scheduler_coordinator import ScheduledTask, every
+    hours = int(os.getenv('SKILL_DEMAND_REFRESH_HOURS', '6'))
+    return [
+        ScheduledTask('skill_demand.refresh', refresh_skill_demand, every(hours=hours), jitter=600)
+    ]
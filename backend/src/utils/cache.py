@@ -7,6 +7,7 @@ Implements Redis-based caching for frequently accessed data to reduce database l
 import os
 import json
 import hashlib
+import time
 from datetime import datetime, timedelta
 from functools import wraps
 from typing import Any, Optional, Dict, List
@@ -115,6 +116,57 @@ class CacheManager:
 # Global cache instance
 cache = CacheManager()
 
+
+class RedisLRU:
+    """Size-bounded Redis key space with TTL and least-recently-used eviction.
+
+    Values live at ``<prefix>:<member>``; the sorted set ``<prefix>:index``
+    records each member's last use, so writes beyond ``max_entries`` evict the
+    least recently used. Redis errors propagate, so callers choose their fallback.
+    """
+
+    def __init__(self, prefix: str, ttl: int, max_entries: int):
+        self.prefix = prefix
+        self.ttl = ttl
+        self.max_entries = max_entries
+
+    @property
+    def index_key(self) -> str:
+        return f'{self.prefix}:index'
+
+    def key(self, member: str) -> str:
+        return f'{self.prefix}:{member}'
+
+    def get(self, member: str) -> Optional[str]:
+        value = cache.redis_client.get(self.key(member))
+        if value is not None:
+            cache.redis_client.zadd(self.index_key, {member: time.time()})
+        return value
+
+    def put(self, member: str, value: str) -> int:
+        """Store ``value``; returns how many entries were evicted to make room"""
+        now = time.time()
+        pipe = cache.redis_client.pipeline()
+        pipe.set(self.key(member), value, ex=self.ttl)
+        pipe.zadd(self.index_key, {member: now})
+        # Index members whose entry already expired
+        pipe.zremrangebyscore(self.index_key, '-inf', now - self.ttl)
+        pipe.zcard(self.index_key)
+        size = pipe.execute()[-1]
+        if size <= self.max_entries:
+            return 0
+        evicted = [member for member, _ in cache.redis_client.zpopmin(self.index_key, size - self.max_entries)]
+        if evicted:
+            cache.redis_client.delete(*[self.key(member) for member in evicted])
+        return len(evicted)
+
+    def discard(self, member: str) -> None:
+        cache.redis_client.delete(self.key(member))
+        cache.redis_client.zrem(self.index_key, member)
+
+    def size(self) -> int:
+        return cache.redis_client.zcard(self.index_key)
+
 def cached(prefix: str, ttl: int = 300, invalidate_on: Optional[List[str]] = None):
     """
     Decorator for caching function results
@@ -1,6 +1,7 @@
 import React, { createContext, useContext, useEffect, useState, useCallback, useRef } from 'react';
 import { toast } from 'sonner';
 import api from '../../services/api';
+import { API_CONFIG } from '../../config/environment';
 
 const NotificationContext = createContext();
 
@@ -20,9 +21,13 @@ export const NotificationProvider = ({ children }) => {
   const [isPolling, setIsPolling] = useState(false);
   const lastFetchRef = useRef(null);
   const pollingIntervalRef = useRef(null);
+  const eventSourceRef = useRef(null);
+  const streamErrorsRef = useRef(0);
 
-  // Real-time polling interval (30 seconds)
+  // Polling interval (30 seconds), used only when the notification stream is unavailable
   const POLL_INTERVAL = 30000;
+  // Consecutive stream errors (without a successful reconnect) before falling back to polling
+  const MAX_STREAM_ERRORS = 5;
   
   // Notification sound
   const playNotificationSound = useCallback(() => {
@@ -235,6 +240,80 @@ export const NotificationProvider = ({ children }) => {
     setIsPolling(false);
   }, []);
 
+  // Notification pushed over the stream
+  const handleStreamNotification = useCallback((notification) => {
+    if (!notification) return;
+    setNotifications(prev => (
+      prev.some(n => n.id === notification.id) ? prev : [notification, ...prev]
+    ));
+    if (!notification.is_read) {
+      toast.info(notification.title, {
+        description: notification.message,
+        action: {
+          label: 'View',
+          onClick: () => markAsRead(notification.id)
+        },
+        duration: 5000
+      });
+      playNotificationSound();
+    }
+  }, [markAsRead, playNotificationSound]);
+
+  // Close the notification stream
+  const stopStream = useCallback(() => {
+    if (eventSourceRef.current) {
+      eventSourceRef.current.close();
+      eventSourceRef.current = null;
+    }
+  }, []);
+
+  // Open the notification stream (Server-Sent Events). The server closes it
+  // every 90 seconds and EventSource reconnects on its own; returns false when
+  // the stream cannot be used so the caller polls instead.
+  const startStream = useCallback(() => {
+    if (eventSourceRef.current) return true;
+    const token = localStorage.getItem('token');
+    if (typeof EventSource === 'undefined' || !token) return false;
+
+    const es = new EventSource(
+      `${API_CONFIG.STREAM_BASE_URL}/notifications/stream?token=${encodeURIComponent(token)}`
+    );
+    eventSourceRef.current = es;
+
+    es.onopen = () => {
+      streamErrorsRef.current = 0;
+    };
+
+    es.addEventListener('unread_count', (event) => {
+      try {
+        const data = JSON.parse(event.data);
+        if (typeof data.unread_count === 'number') setUnreadCount(data.unread_count);
+      } catch (error) {
+        console.error('Invalid unread_count event:', error);
+      }
+    });
+
+    es.addEventListener('notification', (event) => {
+      try {
+        const data = JSON.parse(event.data);
+        handleStreamNotification(data.notification);
+        if (typeof data.unread_count === 'number') setUnreadCount(data.unread_count);
+      } catch (error) {
+        console.error('Invalid notification event:', error);
+      }
+    });
+
+    es.onerror = () => {
+      streamErrorsRef.current += 1;
+      if (es.readyState === EventSource.CLOSED || streamErrorsRef.current >= MAX_STREAM_ERRORS) {
+        // Token rejected or service unreachable: fall back to polling
+        stopStream();
+        startPolling();
+      }
+    };
+    return true;
+  }, [handleStreamNotification, stopStream, startPolling]);
+
   // Initialize on mount
   useEffect(() => {
     // Run initial fetch
@@ -249,11 +328,14 @@ export const NotificationProvider = ({ children }) => {
     
     initialize();
     
-    // Start polling
-    startPolling();
+    // Live updates over the notification stream; poll only when it is unavailable
+    if (!startStream()) {
+      startPolling();
+    }
     
     return () => {
       // Cleanup on unmount
+      stopStream();
       if (pollingIntervalRef.current) {
         clearInterval(pollingIntervalRef.current);
         pollingIntervalRef.current = null;
@@ -324,7 +406,7 @@ export const NotificationProvider = ({ children }) => {
     stats,
     loading,
     isPolling,
-    lastFetch,
+    lastFetch: lastFetchRef.current,
     
     // Actions
     fetchNotifications,
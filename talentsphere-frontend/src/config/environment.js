@@ -6,6 +6,8 @@
 // API Configuration
 export const API_CONFIG = {
   BASE_URL: import.meta.env.VITE_API_BASE_URL || '/api',
+  // Server-Sent Event streams are served by the stream service when one is deployed
+  STREAM_BASE_URL: import.meta.env.VITE_STREAM_API_BASE_URL || import.meta.env.VITE_API_BASE_URL || '/api',
   TIMEOUT: parseInt(import.meta.env.VITE_API_TIMEOUT || '30000'),
   API_URL: import.meta.env.VITE_API_URL || 'http://localhost:5001',
 };
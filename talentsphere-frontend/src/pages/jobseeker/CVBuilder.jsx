@@ -323,6 +323,7 @@ const CVBuilder = () => {
   const [showARIAReasoning, setShowARIAReasoning] = useState(false);
   const [ariaTabs, setAriaTabs] = useState('strategy');
   const [ssePhase, setSsePhase] = useState(null);
+  const [draftSections, setDraftSections] = useState(null);
   const genTimerRef = useRef(null);
 
   const {
@@ -440,6 +441,7 @@ const CVBuilder = () => {
   const handleGenerateCV = async () => {
     dispatch({ type: 'START_GENERATION' });
     setSsePhase(null);
+    setDraftSections(null);
     const startTime = Date.now();
     try {
       let jobData = {};
@@ -452,6 +454,7 @@ const CVBuilder = () => {
           onRetryWait: ({ attempt, waitSeconds, error: e }) =>
             dispatch({ type: 'UPDATE_RETRY_INFO', payload: { attempt, waitSeconds, errorCode: e.code, message: e.message } }),
           onPhaseUpdate: ({ phase, message: msg }) => setSsePhase({ phase, message: msg }),
+          onSection: ({ section, content }) => setDraftSections(prev => ({ ...prev, [section]: content })),
         }
       );
 
@@ -492,6 +495,7 @@ const CVBuilder = () => {
           },
         });
         setSsePhase(null);
+        setDraftSections(null);
       } else {
         throw new Error(response.message || 'Generation failed');
       }
@@ -499,13 +503,14 @@ const CVBuilder = () => {
       console.error('CV generation error:', err);
       const errMap = {
         RATE_LIMITED: { message: `Rate limited — wait ${err.retryAfter || 60}s`, suggestion: 'The AI service is busy. Try again shortly.' },
-        TIMEOUT:      { message: 'Generation timed out (120s)', suggestion: 'Try selecting fewer sections.' },
+        TIMEOUT:      { message: 'Generation timed out', suggestion: 'Try selecting fewer sections.' },
         NETWORK_ERROR:{ message: 'Network connection failed', suggestion: 'Check your internet and retry.' },
         SERVER_ERROR: { message: 'Server error — please retry', suggestion: 'The server is temporarily unavailable.' },
       };
       const info = errMap[err.code] || { message: err.message || 'Generation failed', suggestion: 'If this persists, try fewer sections.' };
       dispatch({ type: 'GENERATION_ERROR', payload: { ...info, code: err.code || 'UNKNOWN' } });
       setSsePhase(null);
+      setDraftSections(null);
     }
   };
 
@@ -1060,6 +1065,21 @@ const CVBuilder = () => {
               </div>
             )}
 
+            {/* Draft preview: sections fill in as ARIA writes them */}
+            {isGenerating && draftSections && (
+              <div className="bg-white rounded-2xl border border-gray-200 shadow-sm overflow-hidden">
+                <div className="flex items-center gap-2.5 px-5 py-3.5 bg-gray-50/80 border-b border-gray-100">
+                  <Eye className="w-4 h-4 text-gray-400" />
+                  <h2 className="text-sm font-bold text-gray-800">Draft Preview</h2>
+                  <Loader2 className="w-3.5 h-3.5 text-blue-500 animate-spin" />
+                  <span className="text-xs text-gray-400">{Object.keys(draftSections).length} section{Object.keys(draftSections).length === 1 ? '' : 's'} drafted</span>
+                </div>
+                <div className="p-4 sm:p-6 opacity-90">
+                  <CVRenderer cvData={draftSections} selectedTemplate={selectedStyle} />
+                </div>
+              </div>
+            )}
+
             {/* CV preview */}
             {cvContent && !isGenerating && (
               <div className="bg-white rounded-2xl border border-gray-200 shadow-sm overflow-hidden">
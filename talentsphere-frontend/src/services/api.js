@@ -1069,10 +1069,25 @@ class ApiService {
   }
 
   // CV Auto-Fill
-  async cvExtractText(file) {
+  async cvExtractText(file, { pollIntervalMs = 1000, timeoutMs = 180000 } = {}) {
     const formData = new FormData();
     formData.append('cv_file', file);
-    return this.postForm('/profile/cv-extract', formData);
+    const submitted = await this.postForm('/profile/cv-extract', formData);
+    // Without a shared status store the server extracts during the upload request
+    if (!submitted?.extraction_id || submitted.status !== 'processing') {
+      return submitted;
+    }
+
+    // Extraction (and OCR of scanned pages) runs in the background; poll for the text
+    const deadline = Date.now() + timeoutMs;
+    while (Date.now() < deadline) {
+      await new Promise((resolve) => setTimeout(resolve, pollIntervalMs));
+      const result = await this.get(`/profile/cv-extract/${submitted.extraction_id}`);
+      if (result?.status !== 'processing') {
+        return result;
+      }
+    }
+    throw new Error('Reading your CV is taking too long. Please try again.');
   }
 
   async cvParseWithAI(extractedText) {
@@ -79,6 +79,75 @@ function buildStreamURL(params) {
   return `${API_BASE}/generate-stream?${qs.toString()}`;
 }
 
+// Whole generation, including reconnects; the server closes each stream after
+// 90 seconds and EventSource reopens it, resuming from the last event id
+const GENERATION_TIMEOUT = 600000;
+const MAX_RECONNECT_ERRORS = 5;
+const JOB_POLL_INTERVAL = 2000;
+
+function completeResult(cvData, agentReasoning, metadata) {
+  return {
+    success: true,
+    data: {
+      cv_content: cvData,
+      agent_reasoning: agentReasoning || null,
+      metadata: metadata || {},
+      progress: [],
+      todos: [],
+      job_match_analysis: cvData?.job_match_analysis || null,
+    },
+  };
+}
+
+function forwardProgress(msg, callbacks) {
+  const { phase, message } = msg;
+  if (callbacks.onPhaseUpdate) callbacks.onPhaseUpdate({ phase, message });
+  // Drafted sections arrive while the CV is still being written
+  if (msg.event === 'section' && callbacks.onSection) {
+    callbacks.onSection({ section: msg.section, content: msg.content });
+  }
+}
+
+function generationError(message) {
+  const err = new Error(message || 'SSE generation error');
+  err.code = 'GENERATION_ERROR';
+  return err;
+}
+
+/**
+ * Follow an already queued CV job by polling GET /jobs/<id>, for when its
+ * stream can no longer be reopened. Never starts another generation.
+ */
+async function followJob(jobId, since, callbacks = {}, deadline = Date.now() + GENERATION_TIMEOUT) {
+  const token = localStorage.getItem('token');
+  let next = since;
+  while (Date.now() < deadline) {
+    const response = await fetch(`${API_BASE}/jobs/${jobId}?since=${next}`, {
+      headers: { Authorization: `Bearer ${token}` },
+    });
+    if (!response.ok) {
+      const err = new Error(`Failed to follow CV job (${response.status})`);
+      err.code = response.status >= 500 ? 'SERVER_ERROR' : 'API_ERROR';
+      err.status = response.status;
+      throw err;
+    }
+    const { data } = await response.json();
+    data.events
+      .filter((event) => event.phase !== 'complete' && event.phase !== 'error')
+      .forEach((event) => forwardProgress(event, callbacks));
+    next = data.event_count;
+
+    if (data.status === 'succeeded') {
+      return completeResult(data.result, data.result?.agent_reasoning);
+    }
+    if (data.status === 'failed') throw generationError(data.error || 'CV generation failed');
+    await new Promise((resolve) => setTimeout(resolve, JOB_POLL_INTERVAL));
+  }
+  const err = new Error('CV generation timed out');
+  err.code = 'TIMEOUT';
+  throw err;
+}
+
 /**
  * Connect to the SSE streaming endpoint and resolve with the complete CV data
  * when the "complete" phase event arrives.
@@ -87,22 +156,31 @@ function buildStreamURL(params) {
  * the token as a query parameter instead. The backend must extract it from
  * request.args when the SSE path is used.
  *
- * Falls back to null if EventSource is not supported, letting the caller use
- * the POST path.
+ * Dropped connections are left to EventSource: it reconnects with the
+ * Last-Event-ID header and the backend resumes the same CV job. If the stream
+ * cannot be reopened the job is followed by polling instead. Rejects with
+ * STREAM_UNAVAILABLE when the stream fails before a job was queued, and with
+ * GENERATION_ERROR when the job failed.
  */
 function generateViaSSE(params, callbacks = {}) {
   return new Promise((resolve, reject) => {
     const token = localStorage.getItem('token') || '';
     const url = buildStreamURL(params) + (token ? `&token=${encodeURIComponent(token)}` : '');
+    const deadline = Date.now() + GENERATION_TIMEOUT;
 
     let es;
     try {
       es = new EventSource(url);
     } catch (err) {
+      err.code = 'STREAM_UNAVAILABLE';
       reject(err);
       return;
     }
 
+    let jobId = null;
+    let received = 0;
+    let errors = 0;
+
     const cleanup = () => {
       if (es) {
         es.close();
@@ -110,71 +188,79 @@ function generateViaSSE(params, callbacks = {}) {
       }
     };
 
-    // Safety timeout in case the stream stalls
+    // Safety timeout in case the job never finishes
     const timer = setTimeout(() => {
       cleanup();
-      const e = new Error('SSE stream timed out after 120 seconds');
+      const e = new Error('CV generation timed out');
       e.code = 'TIMEOUT';
       reject(e);
-    }, RETRY_CONFIG.timeout);
+    }, GENERATION_TIMEOUT);
+
+    const finish = (settle, value) => {
+      clearTimeout(timer);
+      cleanup();
+      settle(value);
+    };
+
+    const track = (event) => {
+      errors = 0;
+      const [id, index] = (event.lastEventId || '').split(':');
+      if (id) {
+        jobId = id;
+        received = Math.max(received, Number(index) + 1);
+      }
+    };
+
+    // First frame of every stream: the CV job it follows
+    es.addEventListener('job', track);
 
     es.onmessage = (event) => {
+      track(event);
+      let msg;
       try {
-        const msg = JSON.parse(event.data);
-        const { phase, message } = msg;
-
-        if (phase !== 'complete' && phase !== 'error') {
-          // Forward progress events to the caller
-          if (callbacks.onPhaseUpdate) callbacks.onPhaseUpdate({ phase, message });
-          return;
-        }
-
-        clearTimeout(timer);
-        cleanup();
-
-        if (phase === 'error') {
-          const err = new Error(msg.message || 'SSE generation error');
-          err.code = 'GENERATION_ERROR';
-          reject(err);
-          return;
-        }
-
-        // phase === 'complete'
-        resolve({
-          success: true,
-          data: {
-            cv_content: msg.cv_data,
-            agent_reasoning: msg.agent_reasoning || null,
-            metadata: msg.metadata || {},
-            progress: [],
-            todos: [],
-            job_match_analysis: msg.cv_data?.job_match_analysis || null,
-          },
-        });
-      } catch (parseErr) {
-        // Ignore malformed events
+        msg = JSON.parse(event.data);
+      } catch {
+        return; // Ignore malformed events
+      }
+
+      if (msg.phase === 'error') {
+        finish(reject, generationError(msg.message));
+      } else if (msg.phase === 'complete') {
+        finish(resolve, completeResult(msg.cv_data, msg.agent_reasoning, msg.metadata));
+      } else {
+        forwardProgress(msg, callbacks);
       }
     };
 
     es.onerror = () => {
+      errors += 1;
+      if (es && es.readyState !== EventSource.CLOSED && errors <= MAX_RECONNECT_ERRORS) {
+        return; // EventSource reconnects and resumes from the last event id
+      }
       clearTimeout(timer);
       cleanup();
-      const err = new Error('SSE connection error');
-      err.code = 'NETWORK_ERROR';
-      reject(err);
+      if (!jobId) {
+        const err = new Error('SSE connection error');
+        err.code = 'STREAM_UNAVAILABLE';
+        reject(err);
+        return;
+      }
+      followJob(jobId, received, callbacks, deadline).then(resolve, reject);
     };
   });
 }
 
-// ── POST transport (original) ─────────────────────────────────────────────────
+// ── POST transport ────────────────────────────────────────────────────────────
 
-async function generateViaPOST(params, callbacks = {}) {
+/**
+ * Queue a CV job with POST /generate (async) and resolve with its id.
+ */
+async function queueViaPOST(params) {
   const {
     job_id,
     custom_job,
     style = 'professional',
     sections = ['summary', 'work', 'education', 'skills', 'projects', 'certifications', 'awards', 'references'],
-    use_section_by_section = true,
     humanize,
   } = params;
 
@@ -186,12 +272,12 @@ async function generateViaPOST(params, callbacks = {}) {
   const timeoutId = setTimeout(() => controller.abort(), RETRY_CONFIG.timeout);
 
   try {
-    const requestBody = { style, sections, use_section_by_section };
+    const requestBody = { style, sections, async: true };
     if (job_id) requestBody.job_id = job_id;
     else if (custom_job) requestBody.custom_job = custom_job;
     if (typeof humanize === 'boolean') requestBody.humanize = humanize;
 
-    const response = await fetch(`${API_BASE}/quick-generate`, {
+    const response = await fetch(`${API_BASE}/generate`, {
       method: 'POST',
       headers: {
         'Content-Type': 'application/json',
@@ -235,7 +321,7 @@ async function generateViaPOST(params, callbacks = {}) {
       error.code = 'GENERATION_ERROR';
       throw error;
     }
-    return responseData;
+    return responseData.data.job_id;
   } catch (err) {
     clearTimeout(timeoutId);
     if (err.name === 'AbortError') {
@@ -258,19 +344,22 @@ async function generateViaPOST(params, callbacks = {}) {
  * Generate CV content.
  *
  * Prefers the SSE endpoint (/generate-stream) for real-time phase updates.
- * Automatically falls back to the POST endpoint (/quick-generate) when:
+ * Falls back to queueing a job with POST /generate only when:
  *   - EventSource is not available in the browser
- *   - The SSE connection fails
+ *   - The stream could not be opened, so no CV job was queued
+ *   - The CV job failed
+ * A job that is still running is never generated a second time.
  *
  * @param {Object} params - Generation parameters
  * @param {number}  params.job_id
  * @param {Object}  params.custom_job
  * @param {string}  params.style
  * @param {string[]} params.sections
- * @param {boolean} params.use_section_by_section
+ * @param {boolean} params.humanize
  * @param {Object}  callbacks
  * @param {Function} callbacks.onRetryWait
  * @param {Function} callbacks.onPhaseUpdate  — (only for SSE) called with {phase, message}
+ * @param {Function} callbacks.onSection  — (only for SSE) called with {section, content} for each drafted section
  */
 export const generateCV = async (params = {}, callbacks = {}) => {
   // Try SSE first if the browser supports it
@@ -279,15 +368,17 @@ export const generateCV = async (params = {}, callbacks = {}) => {
       console.log('🌊 Attempting SSE streaming generation…');
       return await generateViaSSE(params, callbacks);
     } catch (sseErr) {
-      console.warn('⚠️ SSE failed, falling back to POST:', sseErr.message);
+      if (sseErr.code !== 'STREAM_UNAVAILABLE' && sseErr.code !== 'GENERATION_ERROR') throw sseErr;
+      console.warn('⚠️ SSE generation failed, falling back to POST:', sseErr.message);
       // fall through to POST
     }
   }
 
-  // POST fallback with retry logic
-  return retryWithBackoff(() => generateViaPOST(params, callbacks), {
+  // POST fallback: only queueing is retried, so a job is never queued twice
+  const jobId = await retryWithBackoff(() => queueViaPOST(params), {
     onRetryWait: callbacks.onRetryWait,
   });
+  return followJob(jobId, 0, callbacks);
 };
 
 /**